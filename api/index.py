@@ -7,12 +7,13 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import uuid
-import structlog
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+
+import structlog
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage, AIMessage
 
 # Inicializar logger
 structlog.configure(
@@ -49,9 +50,16 @@ def get_agent():
     global _agent
     if _agent is None:
         logger.info("Initializing Ruffo agent for Vercel...")
+        from src.agent.checkpoint import get_checkpointer
         from src.agent.graph import create_ruffo_agent
-        _agent = create_ruffo_agent()
+        _agent = create_ruffo_agent(checkpointer=get_checkpointer())
         logger.info("Ruffo agent ready!")
+
+        # Cargar catálogo, calentar cachés y abrir la conexión al LLM en segundo plano
+        from src.agent.llm import start_llm_warmup
+        from src.tools.warmup import start_cache_warmup
+        start_cache_warmup()
+        start_llm_warmup()
     return _agent
 
 
@@ -72,12 +80,11 @@ async def chat(request: ChatRequest):
     """
     Endpoint principal para chatear con Ruffo.
     """
-    try:
-        agent = get_agent()
+    from src.agent.runner import ask_agent
 
+    try:
         # Generar thread_id si no existe
         thread_id = request.thread_id or str(uuid.uuid4())
-        config = {"configurable": {"thread_id": f"vercel-{thread_id}"}}
 
         logger.info(
             "Chat request received",
@@ -85,18 +92,8 @@ async def chat(request: ChatRequest):
             message=request.message[:50]
         )
 
-        # Invocar el agente
-        result = agent.invoke(
-            {"messages": [HumanMessage(content=request.message)]},
-            config=config
-        )
-
-        # Extraer respuesta del agente
-        response = ""
-        for msg in reversed(result.get("messages", [])):
-            if isinstance(msg, AIMessage) and msg.content and not getattr(msg, 'tool_calls', None):
-                response = msg.content
-                break
+        # Invocar el agente sin bloquear el worker (ainvoke + tools en pool acotado)
+        response = await ask_agent(get_agent(), request.message, f"vercel-{thread_id}")
 
         if not response:
             response = "🐕 ¡Guau! Tuve un problemita. ¿Puedes repetirme eso?"
@@ -116,15 +113,64 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Chat con la respuesta en streaming (Server-Sent Events).
+    """
+    from src.channels.web.streaming import SSE_HEADERS, sse_chat_events
+
+    thread_id = request.thread_id or str(uuid.uuid4())
+
+    logger.info(
+        "Chat stream request received",
+        thread_id=thread_id,
+        message=request.message[:50]
+    )
+
+    return StreamingResponse(
+        sse_chat_events(
+            get_agent(),
+            request.message,
+            thread_id,
+            f"vercel-{thread_id}",
+            is_disconnected=http_request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @app.get("/api/health")
-async def health():
-    """Health check endpoint."""
+async def health(require_warm: bool = False):
+    """Health check endpoint (503 con require_warm=true mientras se calientan cachés)."""
     import os
-    return {
+
+    from src.agent.checkpoint import get_checkpointer_stats
+    from src.agent.degraded import get_llm_health
+    from src.agent.fast_path import get_fast_path_stats
+    from src.agent.llm import get_llm_registry
+    from src.agent.llm_cache import get_llm_cache
+    from src.tools.memo import get_tool_memo
+    from src.tools.warmup import get_warmup_status
+
+    warmup = get_warmup_status()
+    body = {
         "status": "ok",
         "agent": "ruffo",
         "platform": "vercel",
         "has_openai_key": bool(os.environ.get("OPENAI_API_KEY")),
         "has_google_creds_json": bool(os.environ.get("GOOGLE_CREDENTIALS_JSON")),
         "has_google_creds_file": os.path.exists(os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json")),
+        "warmup": warmup,
+        "conversations": get_checkpointer_stats(),
+        "llm_clients": get_llm_registry().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "fast_path": get_fast_path_stats(),
+        "llm_health": get_llm_health().stats(),
+        "tool_memo": get_tool_memo().stats(),
     }
+    if require_warm and not warmup["warm"]:
+        body["status"] = "warming"
+        return JSONResponse(status_code=503, content=body)
+    return body
@@ -0,0 +1,71 @@
+"""
+Benchmark: bytes escritos a SQLite por turno de conversación.
+
+Compara el checkpointer guardando el historial completo en cada paso
+contra el log de mensajes con deltas. Usa el agente real con un modelo
+falso (sin llamadas a OpenAI).
+
+    OPENAI_API_KEY=x python -m benchmarks.checkpoint_bytes [turnos]
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.checkpoint import SQLiteCheckpointer
+from src.agent.graph import create_ruffo_agent
+from src.agent.runner import ask_agent
+
+USER_TEXT = "Busco croquetas para perro adulto de raza mediana, ¿qué marcas tienen y en qué tamaños? " * 2
+REPLY_TEXT = "¡Guau! 🐾 Tenemos Royal Canin Medium Adult 15 kg a $1,299 y Pro Plan 13 kg a $1,150. " * 4
+
+
+class FixedReplyModel(BaseChatModel):
+    """Modelo falso con respuesta de tamaño fijo."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fixed-reply"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=REPLY_TEXT))])
+
+
+async def bytes_per_turn(path: str, delta: bool, turns: int) -> list[int]:
+    """Bytes escritos en cada turno de una conversación."""
+    saver = SQLiteCheckpointer(
+        path, flush_interval=3600, delta_channels=("messages",) if delta else ()
+    )
+    agent = create_ruffo_agent(checkpointer=saver, llm=FixedReplyModel())
+
+    written = []
+    for _ in range(turns):
+        before = saver.bytes_written
+        await ask_agent(agent, USER_TEXT, "bench")
+        saver.flush()
+        written.append(saver.bytes_written - before)
+    saver.close()
+    return written
+
+
+async def main(turns: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        full = await bytes_per_turn(str(Path(tmp) / "full.db"), delta=False, turns=turns)
+        delta = await bytes_per_turn(str(Path(tmp) / "delta.db"), delta=True, turns=turns)
+
+    print(f"{'turno':>6} {'completo (B)':>14} {'delta (B)':>11}")
+    for turn in sorted({1, 2, 5, 10, 25, 50, 100, turns} & set(range(1, turns + 1))):
+        print(f"{turn:>6} {full[turn - 1]:>14,} {delta[turn - 1]:>11,}")
+    print(f"{'total':>6} {sum(full):>14,} {sum(delta):>11,}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
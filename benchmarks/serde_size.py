@@ -0,0 +1,79 @@
+"""
+Benchmark: tamaño y CPU del serializador compacto contra el de LangGraph.
+
+Serializa valores típicos del estado de Ruffo (historial con tools, pedido,
+sesión, contexto y una salida grande de tool) y mide bytes y tiempo de
+codificación/decodificación.
+
+    OPENAI_API_KEY=x python -m benchmarks.serde_size [repeticiones]
+"""
+
+import sys
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.agent.checkpoint import RuffoSerializer
+from src.schemas.customer import CustomerSession
+from src.schemas.intents import ConversationContext
+from src.schemas.order import DeliveryType, OrderInProgress, PaymentMethod
+from src.schemas.product import ProductInCart
+
+CATALOG_LINE = "• Royal Canin Medium Adult 15 kg — $1,299 — SKU RC-MED-15 — Disponible en Centro y Norte\n"
+
+
+def sample_values() -> dict:
+    order = OrderInProgress(delivery_type=DeliveryType.DELIVERY, payment_method=PaymentMethod.TRANSFER)
+    for i in range(3):
+        order.add_item(ProductInCart(product_id=f"P{i}", product_name=f"Producto {i}", quantity=i + 1, unit_price=199.0))
+
+    history = []
+    for i in range(10):
+        history.append(HumanMessage(content=f"¿Tienen croquetas para perro adulto? ({i})", id=f"h{i}"))
+        history.append(AIMessage(
+            content="",
+            id=f"a{i}",
+            tool_calls=[{"name": "search_products", "args": {"query": "croquetas perro"}, "id": f"call_{i}"}],
+        ))
+        history.append(ToolMessage(content=CATALOG_LINE * 3, tool_call_id=f"call_{i}", id=f"t{i}"))
+        history.append(AIMessage(content="¡Guau! 🐾 Tenemos Royal Canin 15 kg a $1,299.", id=f"r{i}"))
+
+    return {
+        "mensaje": history[1],
+        "historial (40 msgs)": history,
+        "pedido": order,
+        "sesión": CustomerSession(telegram_id="123456", name="Ana"),
+        "contexto": ConversationContext(pet_type="perro", recent_messages=["hola", "croquetas"]),
+        "tool grande (9 KB)": ToolMessage(content=CATALOG_LINE * 100, tool_call_id="call_x"),
+    }
+
+
+def measure(serde, value, repeat: int) -> tuple[int, float, float]:
+    """(bytes, µs por dumps, µs por loads)"""
+    typed = serde.dumps_typed(value)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serde.dumps_typed(value)
+    dumps = (time.perf_counter() - start) / repeat * 1e6
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serde.loads_typed(typed)
+    loads = (time.perf_counter() - start) / repeat * 1e6
+    return len(typed[1]), dumps, loads
+
+
+def main(repeat: int) -> None:
+    default, compact = JsonPlusSerializer(), RuffoSerializer()
+    print(f"{'valor':<20} {'default (B)':>12} {'compacto (B)':>13} {'dumps µs':>17} {'loads µs':>17}")
+    for name, value in sample_values().items():
+        d_size, d_dumps, d_loads = measure(default, value, repeat)
+        c_size, c_dumps, c_loads = measure(compact, value, repeat)
+        print(
+            f"{name:<20} {d_size:>12,} {c_size:>13,} "
+            f"{d_dumps:>8.1f} → {c_dumps:<6.1f} {d_loads:>8.1f} → {c_loads:<6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,89 @@
+"""
+Benchmark: tokens por turno que el modelo recibe por salidas de tools.
+
+Simula una sesión de compra donde cada turno hace una búsqueda de 5
+productos y compara la entrada del modelo en tres modos: JSON completo
+(como lo serializa el ToolNode), tabla compacta, y tabla compacta con las
+salidas de turnos anteriores omitidas.
+
+    OPENAI_API_KEY=x python -m benchmarks.tool_tokens [turnos]
+"""
+
+import json
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from src.agent.history import HistoryBudget
+from src.tools.render import render_products
+
+BRANDS = ["Pro Plan", "Royal Canin", "Dog Chow", "Hills", "Diamond"]
+
+
+def sample_products(turn: int) -> list[dict]:
+    """5 productos con la forma de `with_stock(catalog.product(slot))`."""
+    products = []
+    for i, brand in enumerate(BRANDS):
+        size = [2, 4, 7.5, 15, 20][i]
+        price = 180.0 * size + turn
+        products.append({
+            "id": f"{brand[:2].upper()}-{turn}-{i}",
+            "name": f"{brand.upper()} ADULTO RAZA MEDIANA {size:g} KG",
+            "category": "Alimento",
+            "brand": brand,
+            "price": price,
+            "stock": 7,
+            "description": f"Perro - {brand}",
+            "unit": "PZ",
+            "barcode": f"75010{turn:03d}{i:04d}",
+            "size_kg": size,
+            "price_per_kg": round(price / size, 2),
+            "stock_by_branch": {"ojo-agua": 3, "tecamac": 4, "ecatepec": 0},
+        })
+    return products
+
+
+def session(turns: int, compact: bool) -> list:
+    messages = []
+    for turn in range(turns):
+        products = sample_products(turn)
+        call = {"name": "search_products", "args": {"query": "adulto"}, "id": f"call_{turn}", "type": "tool_call"}
+        if compact:
+            content, refs = render_products(products)
+            tool_message = ToolMessage(content=content, tool_call_id=call["id"],
+                                       name="search_products", artifact={"refs": refs})
+        else:
+            tool_message = ToolMessage(content=json.dumps(products, ensure_ascii=False),
+                                       tool_call_id=call["id"], name="search_products")
+        messages += [
+            HumanMessage(content=f"¿Qué croquetas para perro adulto tienen? ({turn})"),
+            AIMessage(content="", tool_calls=[call]),
+            tool_message,
+            AIMessage(content="¡Guau! Tengo Pro Plan 15 kg y Royal Canin 7.5 kg 🐾"),
+        ]
+    return messages
+
+
+def model_input_tokens(messages: list, elide: bool) -> int:
+    """Tokens de la entrada del modelo en la última llamada del turno."""
+    hook = HistoryBudget(max_tokens=0, elide_tool_outputs=elide)
+    return count_tokens_approximately(hook({"messages": messages[:-1]}, {})["llm_input_messages"])
+
+
+def main(turns: int) -> None:
+    full = session(turns, compact=False)
+    compact = session(turns, compact=True)
+
+    print(f"{'turno':>6} {'JSON completo':>14} {'compacta':>9} {'+ omitidas':>11}")
+    for turn in sorted({1, 2, 5, 10, 20, turns} & set(range(1, turns + 1))):
+        end = turn * 4
+        print(
+            f"{turn:>6} {model_input_tokens(full[:end], elide=False):>14,} "
+            f"{model_input_tokens(compact[:end], elide=False):>9,} "
+            f"{model_input_tokens(compact[:end], elide=True):>11,}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -1,10 +1,11 @@
 """Agente Ruffo con LangGraph."""
 
-from .graph import create_ruffo_agent, build_ruffo_graph
+from .graph import build_ruffo_graph, create_hybrid_graph, create_ruffo_agent
 from .state import RuffoState
 
 __all__ = [
     "create_ruffo_agent",
+    "create_hybrid_graph",
     "build_ruffo_graph",
     "RuffoState",
 ]
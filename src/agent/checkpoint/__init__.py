@@ -0,0 +1,64 @@
+"""Persistencia de conversaciones (checkpointer de LangGraph)."""
+
+import atexit
+import sqlite3
+from typing import Optional, Union
+
+from langgraph.checkpoint.memory import MemorySaver
+import structlog
+
+from src.config.settings import settings
+
+from .serde import RuffoSerializer
+from .sqlite import SQLiteCheckpointer
+
+logger = structlog.get_logger()
+
+__all__ = ["RuffoSerializer", "SQLiteCheckpointer", "get_checkpointer", "get_checkpointer_stats"]
+
+# Checkpointer compartido por los canales del proceso
+_checkpointer: Optional[Union[SQLiteCheckpointer, MemorySaver]] = None
+
+
+def get_checkpointer() -> Union[SQLiteCheckpointer, MemorySaver]:
+    """
+    Obtiene el checkpointer durable (SQLite) configurado.
+
+    Si no se puede abrir la base (p. ej. un sistema de archivos de solo
+    lectura), las conversaciones se guardan en memoria del proceso.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        serde = None
+        if settings.checkpoint_serializer == "compact":
+            serde = RuffoSerializer(compress_over=settings.checkpoint_compress_over_bytes)
+        try:
+            _checkpointer = _open_sqlite(serde)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Checkpoint database unavailable, using in-memory checkpointer",
+                           path=settings.checkpoint_db_path, error=str(e))
+            _checkpointer = MemorySaver(serde=serde)
+    return _checkpointer
+
+
+def _open_sqlite(serde: Optional[RuffoSerializer]) -> SQLiteCheckpointer:
+    checkpointer = SQLiteCheckpointer(
+        settings.checkpoint_db_path,
+        serde=serde,
+        hot_threads=settings.checkpoint_hot_threads,
+        flush_interval=settings.checkpoint_flush_ms / 1000,
+        idle_ttl=settings.checkpoint_idle_ttl_seconds or None,
+        max_live_threads=settings.checkpoint_max_live_threads,
+        sweep_interval=settings.checkpoint_sweep_seconds,
+        delta_channels=("messages",) if settings.checkpoint_delta_messages else (),
+        compact_every=settings.checkpoint_compact_every,
+    )
+    atexit.register(checkpointer.close)
+    logger.info("Checkpointer ready", path=settings.checkpoint_db_path,
+                hot_threads=settings.checkpoint_hot_threads)
+    return checkpointer
+
+
+def get_checkpointer_stats() -> Optional[dict]:
+    """Estadísticas del checkpointer SQLite (None si no se ha creado o está en memoria)."""
+    return _checkpointer.stats() if isinstance(_checkpointer, SQLiteCheckpointer) else None
@@ -0,0 +1,104 @@
+"""Historial de mensajes como log append-only con deltas por paso."""
+
+import json
+from typing import Any, Callable, Optional
+
+from langgraph.checkpoint.base import SerializerProtocol
+
+# Tipo de blob para canales guardados como delta del log de mensajes
+DELTA_TYPE = "msgdelta"
+
+
+class MessageLog:
+    """
+    Lista de mensajes de un canal tal como está en el último checkpoint.
+
+    Cada entrada es `[seq, (tipo, bytes), objeto]`: `seq` es la fila del
+    mensaje en el log y el objeto (si se conoce) permite detectar sin
+    serializar que un mensaje no cambió entre pasos.
+    """
+
+    __slots__ = ("entries", "depth")
+
+    def __init__(self, entries: list[list], depth: int = 0):
+        self.entries = entries
+        # Deltas encadenados desde el último snapshot completo
+        self.depth = depth
+
+    def common_prefix(self, messages: list, serde: SerializerProtocol) -> int:
+        """Cuántos mensajes del inicio siguen iguales (normalmente todos los anteriores)."""
+        for i, entry in enumerate(self.entries[:len(messages)]):
+            message = messages[i]
+            if entry[2] is message:
+                continue
+            if serde.dumps_typed(message) != entry[1]:
+                return i
+            entry[2] = message
+        return min(len(self.entries), len(messages))
+
+    def seqs(self) -> list[int]:
+        return [entry[0] for entry in self.entries]
+
+    def nbytes(self) -> int:
+        return sum(len(entry[1][1]) for entry in self.entries)
+
+
+def encode_delta(base: Optional[str], keep: int, append: list[int]) -> tuple[str, bytes]:
+    """
+    Blob de un paso: "la lista de la versión `base` recortada a `keep`
+    mensajes, más `append`". Sin base es un snapshot completo.
+
+    Solo lleva enteros y una versión, así que no depende del serializador.
+    """
+    data = json.dumps({"base": base, "keep": keep, "append": append}, separators=(",", ":"))
+    return DELTA_TYPE, data.encode()
+
+
+def decode_delta(data: bytes) -> dict:
+    return json.loads(data)
+
+
+def resolve_seqs(
+    data: bytes,
+    fetch_blob: Callable[[str], Optional[bytes]],
+) -> tuple[list[int], int]:
+    """
+    Reconstruye la lista de seqs siguiendo la cadena de deltas hasta el snapshot.
+
+    Args:
+        data: Blob del delta de la versión pedida
+        fetch_blob: versión -> blob del delta de esa versión
+
+    Returns:
+        (seqs en orden, número de deltas encadenados)
+    """
+    chain = [decode_delta(data)]
+    while chain[-1]["base"] is not None:
+        base = fetch_blob(chain[-1]["base"])
+        if base is None:
+            raise LookupError(f"Missing base delta {chain[-1]['base']}")
+        chain.append(decode_delta(base))
+
+    seqs: list[int] = []
+    for delta in reversed(chain):
+        seqs = seqs[:delta["keep"]] + list(delta["append"])
+    return seqs, len(chain) - 1
+
+
+def log_record(log: MessageLog) -> dict:
+    """Forma serializable del log (para el archivo de threads)."""
+    return {"entries": [[seq, list(typed)] for seq, typed, _ in log.entries]}
+
+
+def log_from_record(record: dict) -> MessageLog:
+    return MessageLog([[seq, tuple(typed), None] for seq, typed in record["entries"]])
+
+
+def load_messages(log: MessageLog, serde: SerializerProtocol) -> list[Any]:
+    """Deserializa los mensajes y recuerda los objetos entregados."""
+    messages = []
+    for entry in log.entries:
+        message = serde.loads_typed(entry[1])
+        entry[2] = message
+        messages.append(message)
+    return messages
@@ -0,0 +1,201 @@
+"""
+Serializador compacto de checkpoints.
+
+El serializador por defecto de LangGraph guarda cada objeto Pydantic con su
+módulo, nombre de clase y todos sus campos (incluidos los que tienen valor
+por defecto). Aquí los tipos conocidos del estado de Ruffo y los mensajes de
+LangChain se codifican en msgpack con un código de tipo de 1 byte y solo los
+campos que difieren del default. Lo desconocido se delega al serializador de
+LangGraph, y los payloads grandes (salidas de tools) se comprimen.
+"""
+
+import zlib
+from typing import Any, Optional
+
+import ormsgpack
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic_core import PydanticUndefined
+
+from src.schemas.customer import CustomerSession
+from src.schemas.intents import ConversationContext, UserIntent
+from src.schemas.order import DeliveryType, OrderInProgress, OrderStatus, PaymentMethod
+from src.schemas.product import ProductInCart
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional; sin él se usa zlib
+    zstandard = None
+
+COMPACT_TYPE = "ruffo"
+
+# =====================================================
+# TIPOS CONOCIDOS
+# =====================================================
+# Los códigos quedan escritos en la base: no reordenar ni reutilizar,
+# solo agregar al final.
+
+EXT_TUPLE = 1
+EXT_FALLBACK = 2
+
+MODEL_CODES: dict[int, type] = {
+    10: HumanMessage,
+    11: AIMessage,
+    12: ToolMessage,
+    13: SystemMessage,
+    20: OrderInProgress,
+    21: ProductInCart,
+    22: CustomerSession,
+    23: ConversationContext,
+}
+
+ENUM_CODES: dict[int, type] = {
+    40: DeliveryType,
+    41: PaymentMethod,
+    42: OrderStatus,
+    43: UserIntent,
+}
+
+_MODEL_BY_CLASS = {cls: code for code, cls in MODEL_CODES.items()}
+_ENUM_BY_CLASS = {cls: code for code, cls in ENUM_CODES.items()}
+
+_PACK_OPTIONS = (
+    ormsgpack.OPT_NON_STR_KEYS
+    | ormsgpack.OPT_PASSTHROUGH_TUPLE
+    | ormsgpack.OPT_PASSTHROUGH_ENUM
+    | ormsgpack.OPT_PASSTHROUGH_DATETIME
+    | ormsgpack.OPT_PASSTHROUGH_UUID
+    | ormsgpack.OPT_PASSTHROUGH_DATACLASS
+    | ormsgpack.OPT_PASSTHROUGH_SUBCLASS
+    | ormsgpack.OPT_REPLACE_SURROGATES
+)
+
+
+def _field_defaults(cls: type) -> dict[str, Any]:
+    """Valores por defecto de los campos del modelo (los requeridos no aparecen)."""
+    defaults = {}
+    for name, field in cls.model_fields.items():
+        if field.default is not PydanticUndefined:
+            defaults[name] = field.default
+        elif field.default_factory is not None:
+            defaults[name] = field.default_factory()
+    return defaults
+
+
+_DEFAULTS = {cls: _field_defaults(cls) for cls in MODEL_CODES.values()}
+
+
+class RuffoSerializer(SerializerProtocol):
+    """
+    Serializador de checkpoints con codificación por esquema y compresión.
+
+    Args:
+        compress_over: Tamaño en bytes a partir del cual se comprime (0 = nunca)
+        compression: "zstd", "zlib" o None; por defecto zstd si está instalado
+    """
+
+    def __init__(self, compress_over: int = 1024, compression: Optional[str] = "auto"):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "zlib"
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package (install the 'zstd' extra)")
+        self.compress_over = compress_over
+        self.compression = compression
+        self.fallback = JsonPlusSerializer()
+        if compression == "zstd":
+            self._zstd_c = zstandard.ZstdCompressor(level=3)
+        self._zstd_d = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    # =====================================================
+    # CODIFICACIÓN
+    # =====================================================
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return self.fallback.dumps_typed(obj)
+
+        data = self._pack(obj)
+        if self.compression and self.compress_over and len(data) > self.compress_over:
+            if self.compression == "zstd":
+                return f"{COMPACT_TYPE}+zstd", self._zstd_c.compress(data)
+            return f"{COMPACT_TYPE}+zlib", zlib.compress(data, 6)
+        return COMPACT_TYPE, data
+
+    def _pack(self, obj: Any) -> bytes:
+        return ormsgpack.packb(obj, default=self._default, option=_PACK_OPTIONS)
+
+    def _default(self, obj: Any) -> ormsgpack.Ext:
+        cls = type(obj)
+        code = _MODEL_BY_CLASS.get(cls)
+        if code is not None:
+            return ormsgpack.Ext(code, self._pack(self._model_fields(obj, cls)))
+
+        code = _ENUM_BY_CLASS.get(cls)
+        if code is not None:
+            return ormsgpack.Ext(code, obj.value.encode())
+
+        if cls is tuple:
+            return ormsgpack.Ext(EXT_TUPLE, self._pack(list(obj)))
+
+        # Tipo desconocido: lo codifica el serializador de LangGraph
+        type_, data = self.fallback.dumps_typed(obj)
+        return ormsgpack.Ext(EXT_FALLBACK, self._pack([type_, data]))
+
+    @staticmethod
+    def _model_fields(obj: Any, cls: type) -> dict[str, Any]:
+        """Solo los campos que difieren del default, más los extra."""
+        defaults = _DEFAULTS[cls]
+        fields = {}
+        for name in cls.model_fields:
+            value = getattr(obj, name)
+            if name in defaults and value == defaults[name]:
+                continue
+            fields[name] = value
+        if obj.__pydantic_extra__:
+            fields.update(obj.__pydantic_extra__)
+        return fields
+
+    # =====================================================
+    # DECODIFICACIÓN
+    # =====================================================
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == COMPACT_TYPE:
+            return self._unpack(payload)
+        if type_ == f"{COMPACT_TYPE}+zlib":
+            return self._unpack(zlib.decompress(payload))
+        if type_ == f"{COMPACT_TYPE}+zstd":
+            if self._zstd_d is None:
+                raise ImportError("zstd compressed checkpoint requires the 'zstandard' package")
+            return self._unpack(self._zstd_d.decompress(payload))
+        # Filas escritas con el serializador por defecto siguen siendo legibles
+        return self.fallback.loads_typed(data)
+
+    def _unpack(self, data: bytes) -> Any:
+        return ormsgpack.unpackb(data, ext_hook=self._ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        cls = MODEL_CODES.get(code)
+        if cls is not None:
+            fields = self._unpack(data)
+            # Se valida aunque model_construct sería más rápido (se salta la
+            # validación): así corren los validadores de los mensajes y se
+            # revisan los tipos de filas escritas con otra versión del esquema.
+            # Si una fila vieja ya no valida, se construye sin validar
+            try:
+                return cls(**fields)
+            except Exception:
+                return cls.model_construct(**fields)
+
+        cls = ENUM_CODES.get(code)
+        if cls is not None:
+            return cls(data.decode())
+
+        if code == EXT_TUPLE:
+            return tuple(self._unpack(data))
+        if code == EXT_FALLBACK:
+            type_, payload = self._unpack(data)
+            return self.fallback.loads_typed((type_, payload))
+        raise ValueError(f"Unknown checkpoint ext code: {code}")
@@ -0,0 +1,991 @@
+"""Checkpointer durable en SQLite (WAL) con escrituras por lotes y LRU de threads activos."""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+import structlog
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from src.agent.metrics import increment
+
+from .delta import (
+    DELTA_TYPE,
+    MessageLog,
+    encode_delta,
+    load_messages,
+    log_from_record,
+    log_record,
+    resolve_seqs,
+)
+
+logger = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS message_log (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, seq)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_last_seen ON threads (last_seen);
+CREATE TABLE IF NOT EXISTS archive (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    archived_at REAL NOT NULL,
+    type TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns)
+);
+"""
+
+INSERT_CHECKPOINT = "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_BLOB = "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_WRITE = "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPSERT_WRITE = "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+TOUCH_THREAD = "INSERT OR REPLACE INTO threads VALUES (?, ?)"
+INSERT_MESSAGE = "INSERT OR REPLACE INTO message_log VALUES (?, ?, ?, ?, ?)"
+
+# Tablas del nivel vivo (lo que se archiva al desalojar un thread)
+LIVE_TABLES = ("checkpoints", "blobs", "writes", "message_log", "threads")
+
+
+class HotThread:
+    """Último checkpoint de un thread ya serializado (lo que se lee en cada turno)."""
+
+    __slots__ = ("checkpoint_id", "parent_id", "checkpoint", "metadata", "blobs", "writes", "logs")
+
+    def __init__(self, checkpoint_id, parent_id, checkpoint, metadata, blobs, writes, logs=None):
+        self.checkpoint_id: str = checkpoint_id
+        self.parent_id: Optional[str] = parent_id
+        self.checkpoint: tuple[str, bytes] = checkpoint
+        self.metadata: tuple[str, bytes] = metadata
+        # canal -> (versión, (tipo, bytes))
+        self.blobs: dict[str, tuple[str, tuple[str, bytes]]] = blobs
+        # (task_id, idx) -> (task_id, canal, (tipo, bytes), task_path)
+        self.writes: dict[tuple[str, int], tuple[str, str, tuple[str, bytes], str]] = writes
+        # canal -> log de mensajes (canales guardados como delta)
+        self.logs: dict[str, MessageLog] = logs or {}
+
+    def to_record(self) -> dict:
+        """Forma serializable para el archivo (solo tipos básicos y bytes)."""
+        return {
+            "checkpoint_id": self.checkpoint_id,
+            "checkpoint": list(self.checkpoint),
+            "metadata": list(self.metadata),
+            "blobs": {channel: [version, list(blob)] for channel, (version, blob) in self.blobs.items()},
+            "writes": [[task_id, idx, channel, list(value), task_path]
+                       for (task_id, idx), (_, channel, value, task_path) in self.writes.items()],
+            "logs": {channel: log_record(log) for channel, log in self.logs.items()},
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "HotThread":
+        # Al archivar se descarta el historial: el checkpoint queda sin padre
+        return cls(
+            record["checkpoint_id"],
+            None,
+            tuple(record["checkpoint"]),
+            tuple(record["metadata"]),
+            {channel: (version, tuple(blob)) for channel, (version, blob) in record["blobs"].items()},
+            {(task_id, idx): (task_id, channel, tuple(value), task_path)
+             for task_id, idx, channel, value, task_path in record["writes"]},
+            {channel: log_from_record(log) for channel, log in record.get("logs", {}).items()},
+        )
+
+    def nbytes(self) -> int:
+        """Bytes serializados que ocupa el thread en memoria."""
+        size = len(self.checkpoint[1]) + len(self.metadata[1])
+        size += sum(len(blob[1]) for _, blob in self.blobs.values())
+        size += sum(len(value[1]) for _, _, value, _ in self.writes.values())
+        size += sum(log.nbytes() for log in self.logs.values())
+        return size
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Checkpointer de LangGraph sobre SQLite.
+
+    - Modo WAL: lecturas y escrituras no se bloquean entre sí
+    - Las escrituras (`put`/`put_writes`) se encolan y un hilo las confirma
+      en lote cada `flush_interval` segundos (o al juntar `batch_size`); el
+      turno del agente no espera al disco
+    - Un LRU de `hot_threads` conversaciones guarda su último checkpoint
+      serializado, así que la memoria no crece con el número de thread_id
+      vistos: el resto vive solo en disco
+
+    - Los canales de `delta_channels` (el historial de mensajes) no se
+      reescriben completos en cada paso: cada mensaje se guarda una vez en
+      un log append-only y el blob del paso solo dice qué se agregó (o
+      recortó) respecto a la versión anterior. Cada `compact_every` pasos
+      se escribe un snapshot de la lista de seqs para acotar la cadena
+    - Los threads inactivos más de `idle_ttl` segundos, o los más viejos
+      cuando hay más de `max_live_threads`, se archivan: su último
+      checkpoint se guarda comprimido (zlib) y se borra su historial del
+      nivel vivo. Si el usuario vuelve, se rehidrata sin que el agente lo note
+
+    Las lecturas de checkpoints viejos (por checkpoint_id o `list`) vacían
+    la cola antes de consultar SQLite.
+
+    Hay dos locks: `_lock` protege lo que está en memoria (cola, LRU,
+    contadores) y es lo único que toman `put`/`put_writes` y la lectura
+    del LRU en el event loop; `_db_lock` serializa el uso de la conexión
+    (lotes, lecturas de disco, archivado). Siempre se toma `_db_lock`
+    antes que `_lock`, nunca al revés. Un lote que falla se reintenta
+    hasta `max_flush_retries` veces; después se escribe fila por fila y
+    se descartan (con log) las que sigan fallando.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        hot_threads: int = 256,
+        flush_interval: float = 0.05,
+        batch_size: int = 200,
+        idle_ttl: Optional[float] = None,
+        max_live_threads: Optional[int] = None,
+        sweep_interval: float = 300,
+        min_idle: float = 60,
+        delta_channels: Sequence[str] = ("messages",),
+        compact_every: int = 20,
+        max_flush_retries: int = 5,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.hot_threads = hot_threads
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.idle_ttl = idle_ttl
+        self.max_live_threads = max_live_threads
+        self.sweep_interval = sweep_interval
+        self.min_idle = min_idle
+        self.delta_channels = frozenset(delta_channels)
+        self.compact_every = compact_every
+        self.max_flush_retries = max_flush_retries
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        self._lock = threading.RLock()
+        self._db_lock = threading.RLock()
+        self._pending: list[tuple[str, tuple]] = []
+        self._hot: OrderedDict[tuple[str, str], HotThread] = OrderedDict()
+        # thread_id -> última lectura/escritura en este proceso (time.time())
+        self._active: dict[str, float] = {}
+        self.flushes = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.flush_failures = 0
+        self.dropped_rows = 0
+        self._seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM message_log").fetchone()[0]
+        self.archived = 0
+        self.rehydrated = 0
+        # Se mide una vez al abrir; después se lleva como totales corridos
+        self._storage_stats = self._measure_storage()
+        self._next_sweep_at = time.monotonic() + sweep_interval
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="ruffo-checkpoint", daemon=True)
+        self._flusher.start()
+
+    # ===========================================
+    # Escrituras por lotes
+    # ===========================================
+
+    def _enqueue(self, rows: list[tuple[str, tuple]]) -> None:
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() >= self._next_sweep_at:
+                    self._next_sweep_at = time.monotonic() + self.sweep_interval
+                    self.evict()
+            except Exception as e:
+                logger.error("Error flushing checkpoints", error=str(e))
+
+    def flush(self) -> int:
+        """
+        Confirma en SQLite las escrituras pendientes (una transacción).
+
+        La cola se toma bajo `_lock` y se escribe fuera de él: mientras
+        tanto `put` sigue encolando sin esperar al disco.
+        """
+        with self._db_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, []
+
+            new_threads: set[str] = set()
+            try:
+                new_threads = self._new_threads(pending)
+                self._write_batch(pending)
+            except Exception as e:
+                self.flush_failures += 1
+                if self.flush_failures < self.max_flush_retries:
+                    with self._lock:
+                        self._pending = pending + self._pending
+                    raise
+                pending = self._write_rows(pending, e)
+                new_threads &= {params[0] for sql, params in pending if sql == TOUCH_THREAD}
+            self.flush_failures = 0
+
+            written_bytes = sum(
+                len(value) for _, params in pending for value in params if isinstance(value, bytes)
+            )
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += len(pending)
+                self.bytes_written += written_bytes
+                # Estimado: una fila reemplazada (INSERT OR REPLACE) cuenta dos veces
+                self._storage_stats["live_bytes"] += written_bytes
+                self._storage_stats["live_threads"] += len(new_threads)
+            return len(pending)
+
+    def _write_batch(self, rows: list[tuple[str, tuple]]) -> None:
+        self.conn.execute("BEGIN")
+        try:
+            for sql, params in rows:
+                self.conn.execute(sql, params)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _write_rows(self, rows: list[tuple[str, tuple]], error: Exception) -> list[tuple[str, tuple]]:
+        """
+        Último intento de un lote que sigue fallando: fila por fila.
+
+        Las filas que fallan se descartan (quedan en el log) para que una
+        fila mala no detenga la cola para siempre.
+
+        Returns:
+            Filas escritas
+        """
+        written, dropped = [], []
+        for sql, params in rows:
+            try:
+                self.conn.execute(sql, params)
+            except Exception:
+                dropped.append(params[0])
+            else:
+                written.append((sql, params))
+
+        self.dropped_rows += len(dropped)
+        increment("checkpoint.dropped_rows", len(dropped))
+        logger.error(
+            "Dropped checkpoint rows after repeated flush failures",
+            attempts=self.max_flush_retries,
+            rows=len(rows),
+            dropped=len(dropped),
+            thread_ids=sorted(set(dropped))[:10],
+            error=str(error),
+        )
+        return written
+
+    def _new_threads(self, rows: list[tuple[str, tuple]]) -> set[str]:
+        """thread_id del lote que todavía no están en el nivel vivo."""
+        thread_ids = list({params[0] for sql, params in rows if sql == TOUCH_THREAD})
+        known = set()
+        for start in range(0, len(thread_ids), 500):
+            chunk = thread_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            known.update(row[0] for row in self.conn.execute(
+                f"SELECT thread_id FROM threads WHERE thread_id IN ({marks})", chunk
+            ))
+        return set(thread_ids) - known
+
+    def close(self) -> None:
+        """Vacía la cola y cierra la conexión."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join(timeout=1)
+        with self._db_lock:
+            self.flush()
+            self.conn.close()
+
+    # ===========================================
+    # LRU de threads activos
+    # ===========================================
+
+    def _hot_get(self, key: tuple[str, str]) -> Optional[HotThread]:
+        with self._lock:
+            self._active[key[0]] = time.time()
+            hot = self._hot.get(key)
+            if hot is not None:
+                self._hot.move_to_end(key)
+            return hot
+
+    def _hot_set(self, key: tuple[str, str], hot: HotThread) -> None:
+        with self._lock:
+            self._hot[key] = hot
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_threads:
+                self._hot.popitem(last=False)
+
+    def _hot_drop(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._hot if k[0] == thread_id]:
+                del self._hot[key]
+
+    def stats(self) -> dict:
+        """Threads vivos/archivados, bytes que ocupan y escrituras a disco."""
+        with self._lock:
+            return {
+                "hot_threads": len(self._hot),
+                "hot_bytes": sum(hot.nbytes() for hot in self._hot.values()),
+                **self._storage_stats,
+                "archived": self.archived,
+                "rehydrated": self.rehydrated,
+                "pending_rows": len(self._pending),
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "bytes_written": self.bytes_written,
+                "flush_failures": self.flush_failures,
+                "dropped_rows": self.dropped_rows,
+            }
+
+    def _measure_storage(self, thread_id: Optional[str] = None) -> dict:
+        """
+        Cuenta threads y bytes en el nivel vivo y en el archivo.
+
+        Sin thread_id recorre las tablas completas (solo al abrir); con
+        thread_id se limita a ese thread por la llave primaria.
+        """
+        where, params = ("WHERE thread_id = ?", (thread_id,)) if thread_id is not None else ("", ())
+
+        def total(select: str, table: str) -> int:
+            return self.conn.execute(f"SELECT {select} FROM {table} {where}", params).fetchone()[0]
+
+        with self._db_lock:
+            live_bytes = (
+                total("COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0)", "checkpoints")
+                + total("COALESCE(SUM(LENGTH(blob)), 0)", "blobs")
+                + total("COALESCE(SUM(LENGTH(value)), 0)", "writes")
+                + total("COALESCE(SUM(LENGTH(data)), 0)", "message_log")
+            )
+            return {
+                "live_threads": total("COUNT(*)", "threads"),
+                "live_bytes": live_bytes,
+                "archived_threads": total("COUNT(DISTINCT thread_id)", "archive"),
+                "archived_bytes": total("COALESCE(SUM(LENGTH(data)), 0)", "archive"),
+            }
+
+    def _adjust_storage(self, before: dict, after: dict) -> None:
+        """Suma a los totales lo que cambió un thread (archivado, rehidratado, borrado)."""
+        with self._lock:
+            for name, value in after.items():
+                self._storage_stats[name] += value - before[name]
+
+    # ===========================================
+    # Archivo de threads inactivos
+    # ===========================================
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        Archiva los threads inactivos (TTL) y los más viejos si se pasa del tope.
+
+        Los threads con actividad en los últimos `min_idle` segundos nunca se
+        archivan (podrían estar a media ejecución), ni los que tienen filas
+        en la cola: esas filas llegarían después de borrar el nivel vivo y
+        dejarían un checkpoint sin sus blobs o un delta sin base.
+
+        Returns:
+            Número de threads archivados
+        """
+        now = time.time() if now is None else now
+        with self._db_lock:
+            self.flush()
+            candidates: list[str] = []
+            if self.idle_ttl:
+                candidates += [row[0] for row in self.conn.execute(
+                    "SELECT thread_id FROM threads WHERE last_seen < ?",
+                    (now - max(self.idle_ttl, self.min_idle),),
+                )]
+            if self.max_live_threads is not None:
+                live = self.conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0] - len(candidates)
+                overflow = live - self.max_live_threads
+                if overflow > 0:
+                    candidates += [row[0] for row in self.conn.execute(
+                        "SELECT thread_id FROM threads WHERE last_seen >= ? AND last_seen < ? "
+                        "ORDER BY last_seen LIMIT ?",
+                        (now - (self.idle_ttl or float("inf")), now - self.min_idle, overflow),
+                    )]
+
+            archived, changes = [], []
+            if candidates:
+                self.conn.execute("BEGIN")
+                try:
+                    for thread_id in candidates:
+                        if not self._claim_for_archive(thread_id, now):
+                            continue
+                        before = self._measure_storage(thread_id)
+                        self._archive_thread(thread_id, now)
+                        changes.append((before, self._measure_storage(thread_id)))
+                        archived.append(thread_id)
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                for before, after in changes:
+                    self._adjust_storage(before, after)
+
+            with self._lock:
+                self.archived += len(archived)
+                storage = dict(self._storage_stats)
+                for thread_id in [t for t, seen in self._active.items() if now - seen >= self.min_idle]:
+                    del self._active[thread_id]
+
+        if archived:
+            increment("checkpoint.archived", len(archived))
+            logger.info("Archived idle threads", count=len(archived),
+                        skipped=len(candidates) - len(archived), **storage)
+        return len(archived)
+
+    def _claim_for_archive(self, thread_id: str, now: float) -> bool:
+        """
+        Si el thread se puede archivar ya; en ese caso sale del LRU.
+
+        Se revisa bajo `_lock` (el mismo que toman `get_tuple` y `put`): sin
+        actividad reciente ni filas en la cola. Al sacarlo del LRU, el
+        siguiente acceso va a disco y espera a que termine el archivado.
+        También se vuelve a leer `last_seen` dentro de la transacción.
+        """
+        with self._lock:
+            seen = self._active.get(thread_id)
+            if seen is not None and now - seen < self.min_idle:
+                return False
+            if any(params[0] == thread_id for _, params in self._pending):
+                return False
+            self._hot_drop(thread_id)
+
+        row = self.conn.execute("SELECT last_seen FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return row is not None and row[0] < now - self.min_idle
+
+    def _archive_thread(self, thread_id: str, now: float) -> None:
+        """Comprime el último checkpoint de cada namespace y borra el nivel vivo."""
+        namespaces = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+        )]
+        for checkpoint_ns in namespaces:
+            hot = self._load_hot(thread_id, checkpoint_ns, None, flush=False)
+            if hot is None:
+                continue
+            data_type, data = self.serde.dumps_typed(hot.to_record())
+            self.conn.execute(
+                "INSERT OR REPLACE INTO archive VALUES (?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, now, data_type, zlib.compress(data)),
+            )
+        for table in LIVE_TABLES:
+            self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        self._hot_drop(thread_id)
+
+    def _rehydrate(self, thread_id: str, checkpoint_ns: str) -> Optional[HotThread]:
+        """Devuelve un thread archivado al nivel vivo."""
+        with self._db_lock:
+            row = self.conn.execute(
+                "SELECT type, data FROM archive WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None:
+                return None
+
+            hot = HotThread.from_record(self.serde.loads_typed((row[0], zlib.decompress(row[1]))))
+            rows = []
+            # Los mensajes vuelven al log con seqs nuevos y un snapshot como base
+            for channel, log in hot.logs.items():
+                for entry in log.entries:
+                    entry[0] = self._next_seq()
+                    rows.append((INSERT_MESSAGE, (thread_id, checkpoint_ns, entry[0], *entry[1])))
+                version = hot.blobs[channel][0]
+                hot.blobs[channel] = (version, encode_delta(None, 0, log.seqs()))
+            rows += [(INSERT_CHECKPOINT, (thread_id, checkpoint_ns, hot.checkpoint_id, None,
+                                         *hot.checkpoint, *hot.metadata))]
+            rows += [(INSERT_BLOB, (thread_id, checkpoint_ns, channel, version, *blob))
+                     for channel, (version, blob) in hot.blobs.items()]
+            rows += [(INSERT_WRITE, (thread_id, checkpoint_ns, hot.checkpoint_id, task_id, idx,
+                                     channel, *value, task_path))
+                     for (task_id, idx), (_, channel, value, task_path) in hot.writes.items()]
+            rows.append((TOUCH_THREAD, (thread_id, time.time())))
+
+            before = self._measure_storage(thread_id)
+            self.conn.execute("BEGIN")
+            try:
+                for sql, params in rows:
+                    self.conn.execute(sql, params)
+                self.conn.execute(
+                    "DELETE FROM archive WHERE thread_id = ? AND checkpoint_ns = ?",
+                    (thread_id, checkpoint_ns),
+                )
+                after = self._measure_storage(thread_id)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self._adjust_storage(before, after)
+
+            with self._lock:
+                self.rehydrated += 1
+        increment("checkpoint.rehydrated")
+        logger.info("Rehydrated archived thread", thread_id=thread_id)
+        return hot
+
+    # ===========================================
+    # Lectura
+    # ===========================================
+
+    def _tuple_from_hot(self, thread_id: str, checkpoint_ns: str, hot: HotThread) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed(hot.checkpoint)
+        checkpoint["channel_values"] = {
+            channel: (
+                load_messages(hot.logs[channel], self.serde)
+                if blob[0] == DELTA_TYPE
+                else self.serde.loads_typed(blob)
+            )
+            for channel, (_, blob) in hot.blobs.items()
+            if blob[0] != "empty"
+        }
+        with self._lock:
+            writes = sorted(hot.writes.values(), key=lambda w: writes_sort_key(w[3], w[0]))
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, hot.checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(hot.metadata),
+            parent_config=_config(thread_id, checkpoint_ns, hot.parent_id) if hot.parent_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for task_id, channel, value, _ in writes
+            ],
+        )
+
+    def _load_hot(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str], flush: bool = True
+    ) -> Optional[HotThread]:
+        """Lee un checkpoint de SQLite en su forma serializada (flush=False dentro de una transacción)."""
+        with self._db_lock:
+            if flush:
+                self.flush()
+            if checkpoint_id:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+
+            cp_id, parent_id, cp_type, cp_blob, md_type, md_blob = row
+            versions = self.serde.loads_typed((cp_type, cp_blob))["channel_versions"]
+
+            blobs, logs = {}, {}
+            for channel, version in versions.items():
+                blob = self._fetch_blob(thread_id, checkpoint_ns, channel, str(version))
+                if blob is None:
+                    continue
+                blobs[channel] = (str(version), blob)
+                if blob[0] == DELTA_TYPE:
+                    logs[channel] = self._load_log(thread_id, checkpoint_ns, channel, blob[1])
+
+            writes = {}
+            for task_id, idx, channel, w_type, value, task_path in self.conn.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, cp_id),
+            ):
+                writes[(task_id, idx)] = (task_id, channel, (w_type, value), task_path)
+
+        return HotThread(cp_id, parent_id, (cp_type, cp_blob), (md_type, md_blob), blobs, writes, logs)
+
+    def _fetch_blob(self, thread_id: str, checkpoint_ns: str, channel: str, version: str) -> Optional[tuple[str, bytes]]:
+        row = self.conn.execute(
+            "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?",
+            (thread_id, checkpoint_ns, channel, version),
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def _load_log(self, thread_id: str, checkpoint_ns: str, channel: str, data: bytes) -> MessageLog:
+        """Reconstruye el log de un canal siguiendo sus deltas hasta el último snapshot."""
+
+        def fetch(version: str) -> Optional[bytes]:
+            blob = self._fetch_blob(thread_id, checkpoint_ns, channel, version)
+            return blob[1] if blob is not None else None
+
+        seqs, depth = resolve_seqs(data, fetch)
+        stored = {}
+        for start in range(0, len(seqs), 500):
+            chunk = seqs[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            for seq, m_type, m_data in self.conn.execute(
+                f"SELECT seq, type, data FROM message_log WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND seq IN ({marks})",
+                (thread_id, checkpoint_ns, *chunk),
+            ):
+                stored[seq] = (m_type, m_data)
+        return MessageLog([[seq, stored[seq], None] for seq in seqs], depth)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Último checkpoint del thread (o el indicado por checkpoint_id)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+
+        hot = self._hot_get(key)
+        if hot is not None and (not checkpoint_id or hot.checkpoint_id == checkpoint_id):
+            return self._tuple_from_hot(thread_id, checkpoint_ns, hot)
+
+        loaded = self._load_hot(thread_id, checkpoint_ns, checkpoint_id)
+        if loaded is None and not checkpoint_id:
+            loaded = self._rehydrate(thread_id, checkpoint_ns)
+        if loaded is None:
+            return None
+        if not checkpoint_id:
+            self._hot_set(key, loaded)
+        return self._tuple_from_hot(thread_id, checkpoint_ns, loaded)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Lista checkpoints del más nuevo al más viejo."""
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, metadata_type, metadata FROM checkpoints"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._db_lock:
+            self.flush()
+            rows = self.conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, checkpoint_id, md_type, md_blob in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((md_type, md_blob))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            hot = self._load_hot(thread_id, checkpoint_ns, checkpoint_id)
+            if hot is None:
+                continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple_from_hot(thread_id, checkpoint_ns, hot)
+
+    # ===========================================
+    # Escritura
+    # ===========================================
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Guarda un checkpoint (solo se serializan los canales con versión nueva)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        key = (thread_id, checkpoint_ns)
+
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")
+        cp_typed = self.serde.dumps_typed(c)
+        md_typed = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        previous = self._hot_get(key)
+        if previous is not None and previous.checkpoint_id != parent_id:
+            previous = None
+
+        rows = [(INSERT_CHECKPOINT, (
+            thread_id, checkpoint_ns, checkpoint["id"], parent_id, *cp_typed, *md_typed,
+        ))]
+        new_blobs, new_logs = {}, {}
+        for channel, version in new_versions.items():
+            if channel not in values:
+                typed = ("empty", b"")
+            elif channel in self.delta_channels and isinstance(values[channel], list):
+                typed, new_logs[channel] = self._append_messages(
+                    thread_id, checkpoint_ns, channel, values[channel], previous, rows
+                )
+            else:
+                typed = self.serde.dumps_typed(values[channel])
+            new_blobs[channel] = (str(version), typed)
+
+        rows.extend(
+            (INSERT_BLOB, (thread_id, checkpoint_ns, channel, version, *typed))
+            for channel, (version, typed) in new_blobs.items()
+        )
+        rows.append((TOUCH_THREAD, (thread_id, time.time())))
+        self._enqueue(rows)
+
+        # Actualizar el thread en memoria si el padre es el que tenemos
+        if previous is not None:
+            blobs, logs = {}, {}
+            for channel, version in checkpoint["channel_versions"].items():
+                version = str(version)
+                if channel in new_blobs:
+                    blobs[channel] = new_blobs[channel]
+                    if channel in new_logs:
+                        logs[channel] = new_logs[channel]
+                elif channel in previous.blobs and previous.blobs[channel][0] == version:
+                    blobs[channel] = previous.blobs[channel]
+                    if channel in previous.logs:
+                        logs[channel] = previous.logs[channel]
+            self._hot_set(key, HotThread(checkpoint["id"], parent_id, cp_typed, md_typed, blobs, {}, logs))
+        elif parent_id is None:
+            # Primer checkpoint del thread: todos los canales son nuevos
+            self._hot_set(key, HotThread(checkpoint["id"], None, cp_typed, md_typed, new_blobs, {}, new_logs))
+        else:
+            # No sabemos armarlo en memoria: la siguiente lectura va a SQLite
+            with self._lock:
+                self._hot.pop(key, None)
+
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def _next_seq(self) -> int:
+        with self._lock:
+            self._seq += 1
+            return self._seq
+
+    def _append_messages(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        messages: list,
+        previous: Optional[HotThread],
+        rows: list,
+    ) -> tuple[tuple[str, bytes], MessageLog]:
+        """
+        Guarda solo los mensajes nuevos del canal y devuelve el delta del paso.
+
+        Sin el log anterior en memoria (thread frío a media ejecución) se
+        escribe un snapshot con todos los mensajes.
+        """
+        base = previous.logs.get(channel) if previous is not None else None
+        keep = base.common_prefix(messages, self.serde) if base is not None else 0
+
+        entries = base.entries[:keep] if base is not None else []
+        appended = []
+        for message in messages[keep:]:
+            seq = self._next_seq()
+            typed = self.serde.dumps_typed(message)
+            entries.append([seq, typed, message])
+            appended.append(seq)
+            rows.append((INSERT_MESSAGE, (thread_id, checkpoint_ns, seq, *typed)))
+
+        log = MessageLog(entries)
+        if base is None or base.depth + 1 >= self.compact_every:
+            # Compactación: snapshot de la lista completa de seqs
+            return encode_delta(None, 0, log.seqs()), log
+
+        log.depth = base.depth + 1
+        return encode_delta(previous.blobs[channel][0], keep, appended), log
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Guarda las escrituras pendientes de una tarea."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        hot = self._hot_get((thread_id, checkpoint_ns))
+        if hot is not None and hot.checkpoint_id != checkpoint_id:
+            hot = None
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            typed = self.serde.dumps_typed(value)
+            # Las escrituras especiales (idx < 0) se sobreescriben, las normales no
+            rows.append((UPSERT_WRITE if idx < 0 else INSERT_WRITE, (
+                thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, *typed, task_path,
+            )))
+            if hot is not None and (idx < 0 or (task_id, idx) not in hot.writes):
+                with self._lock:
+                    hot.writes[(task_id, idx)] = (task_id, channel, typed, task_path)
+        self._enqueue(rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Borra todos los checkpoints y escrituras de un thread."""
+        with self._db_lock:
+            self.flush()
+            before = self._measure_storage(thread_id)
+            for table in (*LIVE_TABLES, "archive"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._adjust_storage(before, self._measure_storage(thread_id))
+            self._hot_drop(thread_id)
+            with self._lock:
+                self._active.pop(thread_id, None)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ===========================================
+    # Versiones async (los accesos a disco van en un hilo)
+    # ===========================================
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        hot = self._hot_get((thread_id, checkpoint_ns))
+        if hot is not None and (not checkpoint_id or hot.checkpoint_id == checkpoint_id):
+            return self._tuple_from_hot(thread_id, checkpoint_ns, hot)
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # Solo serializa y encola: no toca el disco
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
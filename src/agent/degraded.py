@@ -0,0 +1,196 @@
+"""
+Modo degradado: grafo híbrido cuando el LLM está saturado o fallando.
+
+El agente ReAct depende del LLM para todo. Aquí se vigilan las llamadas
+al modelo (en curso y tasa de errores en una ventana) con un callback en
+los clientes del registro. Si pasan el umbral, los turnos se atienden
+con el grafo híbrido (nodos deterministas sobre RuffoState) y los nodos
+dejan de pedir redacción al LLM: usan sus textos fijos. Pasado el
+enfriamiento se vuelve a probar el agente.
+
+Con AGENT_MODE=hybrid el grafo híbrido atiende siempre (y el LLM solo se
+usa para redactar mientras esté sano).
+"""
+
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Optional
+from uuid import UUID
+
+import structlog
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.agent.metrics import increment
+from src.config.settings import settings
+
+logger = structlog.get_logger()
+
+
+class _HealthCallback(BaseCallbackHandler):
+    """Reporta inicio, fin y error de cada llamada al modelo."""
+
+    run_inline = True
+
+    def __init__(self, health: "LLMHealth"):
+        self.health = health
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        self.health.started(run_id)
+
+    def on_llm_start(self, serialized: dict, prompts: list, *, run_id: UUID, **kwargs: Any) -> None:
+        self.health.started(run_id)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.health.finished(run_id, error=False)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.health.finished(run_id, error=True)
+
+
+class LLMHealth:
+    """
+    Llamadas al LLM en curso y errores recientes.
+
+    Args:
+        max_inflight: Llamadas simultáneas a partir de las cuales se degrada
+        error_rate: Tasa de errores en la ventana a partir de la cual se degrada
+        window_seconds: Ventana para la tasa de errores
+        min_calls: Llamadas mínimas en la ventana para juzgar la tasa
+        cooldown_seconds: Tiempo mínimo en modo degradado
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = 16,
+        error_rate: float = 0.5,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        cooldown_seconds: float = 30.0,
+    ):
+        self.max_inflight = max_inflight
+        self.error_rate_threshold = error_rate
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self.callback = _HealthCallback(self)
+        self._inflight: set[UUID] = set()
+        self._results: deque[tuple[float, bool]] = deque()
+        self._degraded_until = 0.0
+        self._lock = threading.Lock()
+        self.activations = 0
+
+    def started(self, run_id: UUID) -> None:
+        with self._lock:
+            self._inflight.add(run_id)
+
+    def finished(self, run_id: UUID, error: bool) -> None:
+        with self._lock:
+            if run_id not in self._inflight:
+                return
+            self._inflight.discard(run_id)
+            self._results.append((time.monotonic(), error))
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def error_rate(self) -> tuple[float, int]:
+        """(tasa de errores, llamadas) en la ventana."""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._results and self._results[0][0] < cutoff:
+                self._results.popleft()
+            calls = len(self._results)
+            errors = sum(1 for _, error in self._results if error)
+        return (errors / calls if calls else 0.0), calls
+
+    def is_degraded(self) -> bool:
+        """Evalúa los umbrales; una vez degradado se mantiene durante el enfriamiento."""
+        now = time.monotonic()
+        rate, calls = self.error_rate()
+        reason = None
+        if self.inflight >= self.max_inflight:
+            reason = "overload"
+        elif calls >= self.min_calls and rate >= self.error_rate_threshold:
+            reason = "errors"
+
+        if reason:
+            if now >= self._degraded_until:
+                self.activations += 1
+                increment("llm.degraded_activations")
+                logger.warning(
+                    "LLM degraded mode on", reason=reason, inflight=self.inflight, error_rate=round(rate, 2)
+                )
+            self._degraded_until = now + self.cooldown_seconds
+        return now < self._degraded_until
+
+    def reset(self) -> None:
+        with self._lock:
+            self._inflight.clear()
+            self._results.clear()
+            self._degraded_until = 0.0
+
+    def stats(self) -> dict:
+        rate, calls = self.error_rate()
+        return {
+            "degraded": time.monotonic() < self._degraded_until,
+            "inflight": self.inflight,
+            "error_rate": round(rate, 3),
+            "calls": calls,
+            "activations": self.activations,
+        }
+
+
+# =====================================================
+# ESTADO DEL PROCESO
+# =====================================================
+
+_health: Optional[LLMHealth] = None
+_health_lock = threading.Lock()
+_hybrid_graphs: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_health() -> LLMHealth:
+    """Obtiene el monitor de salud del LLM del proceso."""
+    global _health
+    if _health is None:
+        with _health_lock:
+            if _health is None:
+                _health = LLMHealth(
+                    max_inflight=settings.degraded_max_inflight_llm,
+                    error_rate=settings.degraded_error_rate,
+                    window_seconds=settings.degraded_window_seconds,
+                    min_calls=settings.degraded_min_calls,
+                    cooldown_seconds=settings.degraded_cooldown_seconds,
+                )
+    return _health
+
+
+def llm_available() -> bool:
+    """False en modo degradado: los nodos usan sus textos fijos sin llamar al LLM."""
+    return not (settings.degraded_mode_auto and get_llm_health().is_degraded())
+
+
+def select_graph(agent: Any) -> Any:
+    """
+    Grafo que atiende el turno: el agente ReAct o el híbrido.
+
+    El híbrido usa el mismo checkpointer y thread, así la conversación
+    sigue con su historial al cambiar de modo.
+    """
+    if settings.agent_mode != "hybrid" and llm_available():
+        return agent
+
+    checkpointer = getattr(agent, "checkpointer", None)
+    if checkpointer is None:
+        return agent
+
+    graph = _hybrid_graphs.get(checkpointer)
+    if graph is None:
+        from src.agent.graph import create_hybrid_graph
+
+        graph = _hybrid_graphs[checkpointer] = create_hybrid_graph(checkpointer=checkpointer)
+    increment("agent.hybrid_turns")
+    return graph
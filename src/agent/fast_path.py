@@ -0,0 +1,178 @@
+"""
+Respuestas rápidas antes del agente ReAct.
+
+Un "hola", un "gracias" o "¿dónde están sus sucursales?" no necesitan
+pasar por el loop del LLM. Aquí se reconocen los mensajes que son
+únicamente un saludo, una despedida, una consulta de sucursales o del
+carrito (la intención la da classify_by_keywords, la del router, y cada
+palabra del mensaje pertenece al vocabulario de esa intención) y se
+responden con plantillas y los nodos sin LLM. Todo lo
+que tenga algo más ("hola, quiero croquetas") sigue al agente.
+
+La respuesta se guarda en el thread como si la hubiera dado el agente,
+así el siguiente turno ve el historial completo.
+"""
+
+import random
+import re
+import time
+from typing import Any, Optional
+
+import structlog
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.metrics import get_metrics, increment, record_latency
+from src.agent.nodes.branch_info import branch_info_node
+from src.agent.nodes.farewell import farewell_node
+from src.agent.nodes.greeting import GREETINGS, GREETINGS_RETURNING
+from src.agent.nodes.intent_router import classify_by_keywords, normalize_text
+from src.config.settings import settings
+from src.schemas.intents import UserIntent
+from src.tools.executor import run_in_tool_executor
+
+logger = structlog.get_logger()
+
+# Mensajes más largos no se consideran triviales
+MAX_WORDS = 8
+
+# Palabras que no cambian la intención
+FILLER_WORDS = {
+    "ruffo", "amigo", "oye", "y", "de", "la", "el", "los", "las", "sus", "su", "son",
+    "me", "por", "favor", "porfa", "muy", "pues", "tu", "ustedes",
+}
+
+# Intención trivial -> palabras que puede tener el mensaje. La intención
+# la decide classify_by_keywords (la misma que usa el router); aquí solo
+# se comprueba que el mensaje no traiga nada más
+TRIVIAL_VOCABULARY = {
+    UserIntent.GREETING: {
+        "hola", "holi", "ola", "buenas", "buenos", "buen", "hey", "hi", "hello", "saludos", "tal", "onda",
+        "dia", "dias", "tardes", "noches", "que", "como", "estas",
+    },
+    UserIntent.FAREWELL: {
+        "gracias", "adios", "bye", "chao", "chau", "vemos", "luego",
+        "muchas", "mil", "hasta", "pronto", "manana", "nos", "eso", "es", "seria", "todo",
+    },
+    UserIntent.BRANCH_INFO: {
+        "sucursal", "sucursales", "tienda", "tiendas", "horario", "horarios",
+        "direccion", "direcciones", "ubicacion", "ubicaciones", "donde",
+        "cuales", "cual", "que", "a", "hora", "estan", "ubicados", "tienen", "abren", "cierran",
+        "abierto", "abiertos", "abierta", "abiertas",
+    },
+    UserIntent.CART_STATUS: {
+        "carrito", "carro", "mi", "ver", "que", "llevo", "tengo", "en", "como", "va", "el",
+    },
+}
+
+EMPTY_CART_TEXT = "🛒 Tu carrito está vacío, humano-amigo.\n¿Qué le buscamos a tu peludo? 🐾"
+
+
+def _words(text: str) -> list[str]:
+    """Minúsculas, sin acentos ni signos ("¿Dónde están?" -> ["donde", "estan"])."""
+    return re.findall(r"[a-zñ]+", normalize_text(text))
+
+
+def classify_trivial(text: str) -> Optional[UserIntent]:
+    """
+    Intención del mensaje si es únicamente un saludo, despedida, consulta
+    de sucursales o del carrito; None si tiene cualquier otra cosa.
+    """
+    intent = classify_by_keywords(text)
+    vocabulary = TRIVIAL_VOCABULARY.get(intent)
+    if vocabulary is None:
+        return None
+
+    words = [w for w in _words(text) if w not in FILLER_WORDS]
+    if not words or len(words) > MAX_WORDS:
+        return None
+    return intent if all(w in vocabulary for w in words) else None
+
+
+def fast_reply(intent: UserIntent, text: str, state: dict) -> Optional[str]:
+    """Respuesta sin LLM para una intención trivial (None = que responda el agente)."""
+    messages = state.get("messages", [])
+
+    if intent == UserIntent.GREETING:
+        return random.choice(GREETINGS_RETURNING if messages else GREETINGS)
+
+    if intent == UserIntent.FAREWELL:
+        return farewell_node(state)["last_ruffo_message"]
+
+    if intent == UserIntent.BRANCH_INFO:
+        return branch_info_node({**state, "messages": [HumanMessage(content=text)]})["last_ruffo_message"]
+
+    if intent == UserIntent.CART_STATUS:
+        order = state.get("order")
+        if order is not None and order.items:
+            return order.to_summary() + "\n\n¿Agregamos algo más o procedemos? 🐾"
+        if not messages:
+            return EMPTY_CART_TEXT
+        # El carrito lo lleva el agente en la conversación
+        return None
+
+    return None
+
+
+async def try_fast_path(agent: Any, text: str, thread_id: str) -> Optional[str]:
+    """
+    Responde el turno sin LLM si el mensaje es trivial.
+
+    Guarda el mensaje y la respuesta en el thread del agente. Devuelve
+    None si el turno debe ir al agente.
+    """
+    if not settings.fast_path_enabled:
+        return None
+
+    started = time.perf_counter()
+    intent = classify_trivial(text)
+    if intent is None:
+        increment("fast_path.misses")
+        return None
+
+    config = {"configurable": {"thread_id": thread_id}}
+    try:
+        snapshot = await agent.aget_state(config)
+        if intent == UserIntent.BRANCH_INFO:
+            # El directorio de sucursales puede leerse de Sheets: fuera del event loop
+            reply = await run_in_tool_executor(fast_reply, intent, text, snapshot.values)
+        else:
+            reply = fast_reply(intent, text, snapshot.values)
+        if reply is None:
+            increment("fast_path.misses")
+            return None
+        await agent.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=text), AIMessage(content=reply)]},
+            as_node="agent",
+        )
+    except Exception as e:
+        logger.warning("Fast path failed, falling back to agent", intent=intent.value, error=str(e))
+        increment("fast_path.errors")
+        increment("fast_path.misses")
+        return None
+
+    increment("fast_path.hits")
+    increment(f"fast_path.{intent.value}")
+    record_latency("fast_path.ms", (time.perf_counter() - started) * 1000)
+    logger.info("Fast path reply", intent=intent.value, thread_id=thread_id)
+    return reply
+
+
+def get_fast_path_stats() -> dict:
+    """Tasa de aciertos y latencias del camino rápido frente al agente."""
+    metrics = get_metrics()
+    counters = metrics["counters"]
+    hits = counters.get("fast_path.hits", 0)
+    total = hits + counters.get("fast_path.misses", 0)
+    return {
+        "hits": hits,
+        "misses": total - hits,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "by_intent": {
+            name.removeprefix("fast_path."): count
+            for name, count in counters.items()
+            if name.startswith("fast_path.") and name not in ("fast_path.hits", "fast_path.misses", "fast_path.errors")
+        },
+        "latency": metrics["latency"].get("fast_path.ms"),
+        "agent_latency": metrics["latency"].get("agent.turn_ms"),
+    }
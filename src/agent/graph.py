@@ -5,22 +5,41 @@ Este es un agente REAL donde:
 - El LLM controla TODAS las decisiones
 - El LLM decide cuándo usar tools
 - NO hay lógica hardcodeada de routing
+
+También está el grafo híbrido (`create_hybrid_graph`): los nodos
+deterministas sobre RuffoState, con el LLM solo para clasificar lo que
+las keywords no resuelven y para redactar. Se usa con AGENT_MODE=hybrid
+y como modo degradado (src.agent.degraded).
 """
 
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage
 import structlog
+from langchain_core.messages import SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.prebuilt import create_react_agent
 
-from src.config.settings import settings
+from src.agent.history import HistoryBudget, RuffoAgentState
+from src.agent.llm import get_llm
+from src.agent.nodes import (
+    branch_info_node,
+    escalation_node,
+    farewell_node,
+    greeting_node,
+    intent_router_node,
+    order_handler_node,
+    product_info_node,
+)
+from src.agent.state import RuffoState, checkout_in_progress
 from src.config.prompts import RUFFO_SYSTEM_PROMPT
+from src.config.settings import settings
+from src.schemas.intents import UserIntent
 from src.tools.agent_tools import RUFFO_TOOLS
 
 logger = structlog.get_logger()
 
 
-def create_ruffo_agent(checkpointer=None):
+def create_ruffo_agent(checkpointer=None, llm=None):
     """
     Crea el agente Ruffo usando LangGraph's create_react_agent.
 
@@ -31,17 +50,17 @@ def create_ruffo_agent(checkpointer=None):
 
     Args:
         checkpointer: Checkpointer para persistencia de estado.
-                      Si es None, usa MemorySaver (en memoria).
+                      Si es None, usa MemorySaver (en memoria). Los canales
+                      pasan el durable de src.agent.checkpoint.
+        llm: Modelo de chat a usar. Si es None, usa el ChatOpenAI compartido
+             (src.agent.llm).
 
     Returns:
         Grafo compilado listo para ejecutar
     """
     # Inicializar LLM
-    llm = ChatOpenAI(
-        model=settings.llm_model,
-        api_key=settings.openai_api_key,
-        max_completion_tokens=settings.llm_max_completion_tokens,
-    )
+    if llm is None:
+        llm = get_llm()
 
     # System prompt que define la personalidad de Ruffo
     system_message = SystemMessage(content=RUFFO_SYSTEM_PROMPT)
@@ -50,12 +69,25 @@ def create_ruffo_agent(checkpointer=None):
     if checkpointer is None:
         checkpointer = MemorySaver()
 
+    # Historial recortado a un presupuesto de tokens (con resumen de lo anterior)
+    history = None
+    if settings.history_max_tokens > 0 or settings.history_elide_tool_outputs:
+        history = HistoryBudget(
+            llm if settings.history_summaries else None,
+            max_tokens=settings.history_max_tokens,
+            keep_exchanges=settings.history_keep_exchanges,
+            elide_tool_outputs=settings.history_elide_tool_outputs,
+            prompt_tokens=count_tokens_approximately([system_message]),
+        )
+
     # Crear el agente ReAct
     agent = create_react_agent(
         model=llm,
         tools=RUFFO_TOOLS,
         prompt=system_message,  # Inyecta la personalidad
         checkpointer=checkpointer,
+        state_schema=RuffoAgentState,
+        pre_model_hook=history,
     )
 
     logger.info(
@@ -67,15 +99,64 @@ def create_ruffo_agent(checkpointer=None):
     return agent
 
 
-def get_llm():
+# =====================================================
+# GRAFO HÍBRIDO (nodos deterministas)
+# =====================================================
+
+# Intención -> nodo que la atiende
+INTENT_ROUTES = {
+    UserIntent.GREETING: "greeting",
+    UserIntent.UNKNOWN: "greeting",
+    UserIntent.BUY_ORDER: "order_handler",
+    UserIntent.PAYMENT_PROOF: "order_handler",
+    UserIntent.CART_STATUS: "order_handler",
+    UserIntent.PRODUCT_INQUIRY: "product_info",
+    UserIntent.BRANCH_INFO: "branch_info",
+    UserIntent.PROBLEM_ESCALATION: "escalation",
+    UserIntent.WHOLESALER: "escalation",
+    UserIntent.ORDER_STATUS: "escalation",
+    UserIntent.FAREWELL: "farewell",
+}
+
+
+def route_by_intent(state: RuffoState) -> str:
+    """Nodo según la intención clasificada (un pedido en curso sigue en el order handler)."""
+    intent = state.get("intent") or UserIntent.UNKNOWN
+    if checkout_in_progress(state) and intent not in (UserIntent.FAREWELL, UserIntent.PROBLEM_ESCALATION):
+        return "order_handler"
+    return INTENT_ROUTES.get(intent, "greeting")
+
+
+def create_hybrid_graph(checkpointer=None):
     """
-    Obtiene la instancia del LLM configurado.
+    Crea el grafo híbrido: intent_router y un nodo por intención.
+
+    Cada turno hace a lo más una clasificación y una redacción con el LLM
+    (ninguna en modo degradado); las búsquedas, el carrito y el checkout
+    son deterministas.
+
+    Args:
+        checkpointer: Checkpointer (el mismo del agente ReAct para compartir threads)
+
+    Returns:
+        Grafo compilado listo para ejecutar
     """
-    return ChatOpenAI(
-        model=settings.llm_model,
-        api_key=settings.openai_api_key,
-        max_completion_tokens=settings.llm_max_completion_tokens,
-    )
+    graph = StateGraph(RuffoState)
+    graph.add_node("intent_router", intent_router_node)
+    graph.add_node("greeting", greeting_node)
+    graph.add_node("order_handler", order_handler_node)
+    graph.add_node("product_info", product_info_node)
+    graph.add_node("branch_info", branch_info_node)
+    graph.add_node("escalation", escalation_node)
+    graph.add_node("farewell", farewell_node)
+
+    graph.add_edge(START, "intent_router")
+    graph.add_conditional_edges("intent_router", route_by_intent, sorted(set(INTENT_ROUTES.values())))
+    for node in set(INTENT_ROUTES.values()):
+        graph.add_edge(node, END)
+
+    logger.info("Ruffo hybrid graph created")
+    return graph.compile(checkpointer=checkpointer if checkpointer is not None else MemorySaver())
 
 
 # Alias para compatibilidad con código existente
@@ -0,0 +1,312 @@
+"""
+Historial con presupuesto de tokens y resumen acumulado.
+
+El agente ReAct le manda al modelo todo el thread en cada turno. Este
+pre-model hook arma la entrada del modelo dentro de un presupuesto:
+el system prompt (lo agrega create_react_agent), los últimos K
+intercambios tal cual, los datos del carrito y la mascota, y un resumen
+de lo anterior. El resumen se genera en segundo plano al terminar el
+turno, así nunca está en el camino de la respuesta. Las salidas de
+tools de turnos anteriores (ya usadas) se sustituyen por una nota con
+sus refs.
+
+El historial completo sigue en el estado: el hook solo cambia lo que ve
+el modelo (`llm_input_messages`, que no se guarda en el checkpoint).
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Annotated, Any, Callable, Optional
+
+import structlog
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import RunnableConfig
+from langgraph.channels import UntrackedValue
+from langgraph.prebuilt.chat_agent_executor import AgentState
+
+from src.agent.metrics import increment, record_latency
+from src.schemas.intents import ConversationContext
+from src.schemas.order import OrderInProgress
+from src.tools.cart import merge_order
+
+logger = structlog.get_logger()
+
+SUMMARY_PROMPT = """Resume la conversación entre un cliente y Ruffo (asistente de una tienda de mascotas).
+Conserva: productos consultados con precio y presentación, lo que el cliente decidió o descartó,
+datos del cliente (nombre, dirección, sucursal, forma de pago) y su mascota. Máximo 120 palabras,
+en español, sin saludos.
+
+Resumen anterior:
+{previous}
+
+Mensajes nuevos:
+{messages}"""
+
+
+class RuffoAgentState(AgentState):
+    """
+    Estado del agente ReAct; la entrada recortada del modelo no se persiste.
+
+    `order` es el carrito de las tools de src.tools.cart: recibe operaciones
+    y las aplica sobre el pedido actual (ver merge_order).
+    """
+
+    llm_input_messages: Annotated[list[AnyMessage], UntrackedValue]
+    order: Annotated[OrderInProgress, merge_order]
+
+
+class Summary:
+    """Resumen acumulado de un thread: cubre los primeros `covered` mensajes."""
+
+    __slots__ = ("text", "covered")
+
+    def __init__(self, text: str, covered: int):
+        self.text = text
+        self.covered = covered
+
+
+# =====================================================
+# RESÚMENES PENDIENTES (se lanzan al terminar el turno)
+# =====================================================
+
+_pending: dict[str, Callable[[], Any]] = {}
+_running: set[asyncio.Task] = set()
+
+
+def schedule_summary(thread_id: str) -> Optional[asyncio.Task]:
+    """Lanza en segundo plano el resumen pendiente del thread (si hay)."""
+    job = _pending.pop(thread_id, None)
+    if job is None:
+        return None
+    task = asyncio.get_running_loop().create_task(job())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return task
+
+
+async def wait_summaries() -> None:
+    """Espera los resúmenes en curso (tests y apagado ordenado)."""
+    while _running:
+        await asyncio.gather(*list(_running), return_exceptions=True)
+
+
+# =====================================================
+# PRE-MODEL HOOK
+# =====================================================
+
+class HistoryBudget:
+    """
+    Recorta el historial que ve el modelo a un presupuesto de tokens.
+
+    Args:
+        llm: Modelo para los resúmenes (None = solo recortar)
+        max_tokens: Presupuesto de la entrada del modelo (incluye el system prompt)
+        keep_exchanges: Intercambios recientes que siempre van completos
+        elide_tool_outputs: Omitir las salidas de tools de turnos anteriores
+        prompt_tokens: Tokens del system prompt
+        max_threads: Threads con resumen en memoria (LRU)
+    """
+
+    def __init__(
+        self,
+        llm: Any = None,
+        *,
+        max_tokens: int = 6000,
+        keep_exchanges: int = 4,
+        elide_tool_outputs: bool = True,
+        prompt_tokens: int = 0,
+        max_threads: int = 1024,
+    ):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.keep_exchanges = keep_exchanges
+        self.elide_tool_outputs = elide_tool_outputs
+        self.prompt_tokens = prompt_tokens
+        self.max_threads = max_threads
+        self._summaries: OrderedDict[str, Summary] = OrderedDict()
+        self._summarizing: set[str] = set()
+
+    def __call__(self, state: dict, config: RunnableConfig) -> dict:
+        messages = state["messages"]
+        view = self._elide_consumed(messages) if self.elide_tool_outputs else messages
+        budget = self.max_tokens - self.prompt_tokens
+        if not self.max_tokens or count_tokens_approximately(view) <= budget:
+            return {"llm_input_messages": view}
+
+        thread_id = config.get("configurable", {}).get("thread_id", "")
+        start = self._recent_start(view, budget)
+        older, recent = view[:start], view[start:]
+
+        summary = self._get_summary(thread_id, len(messages))
+        covered = min(summary.covered, start) if summary else 0
+
+        head_text = self._context_text(state, messages[:start], summary)
+        head = [SystemMessage(content=head_text)] if head_text else []
+        left = budget - count_tokens_approximately(head + recent)
+
+        # Lo anterior que el resumen aún no cubre entra solo si cabe
+        uncovered = older[covered:]
+        kept = self._fit_tail(uncovered, left)
+        if uncovered:
+            # El resumen se hace sobre los mensajes originales (con las salidas de tools)
+            self._queue_summary(thread_id, messages[:start], summary)
+
+        trimmed = head + kept + recent
+        increment("history.trimmed")
+        increment("history.tokens_saved", count_tokens_approximately(view) - count_tokens_approximately(trimmed))
+        return {"llm_input_messages": trimmed}
+
+    # =====================================================
+    # SALIDAS DE TOOLS YA USADAS
+    # =====================================================
+
+    @staticmethod
+    def _elide_consumed(messages: list) -> list:
+        """
+        Sustituye las salidas de tools de turnos anteriores por una nota corta.
+
+        El modelo ya respondió con ellas; si necesita el detalle de un
+        producto lo vuelve a pedir por su ref.
+        """
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        view, saved = [], 0
+        for i, message in enumerate(messages):
+            if i < last_human and isinstance(message, ToolMessage):
+                stub = message.model_copy(update={"content": _elided_text(message)})
+                saved += count_tokens_approximately([message]) - count_tokens_approximately([stub])
+                message = stub
+            view.append(message)
+        if saved > 0:
+            increment("history.tokens_elided", saved)
+        return view
+
+    # =====================================================
+    # RECORTE
+    # =====================================================
+
+    def _recent_start(self, messages: list, budget: int) -> int:
+        """Índice donde empiezan los últimos K intercambios (menos si no caben)."""
+        starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if not starts:
+            return 0
+        keep = min(self.keep_exchanges, len(starts))
+        while keep > 1 and count_tokens_approximately(messages[starts[-keep]:]) > budget:
+            keep -= 1
+        return starts[-keep]
+
+    @staticmethod
+    def _fit_tail(messages: list, tokens: int) -> list:
+        """Los intercambios más recientes de `messages` que caben en `tokens`."""
+        if tokens <= 0:
+            return []
+        for i, message in enumerate(messages):
+            if isinstance(message, HumanMessage) and count_tokens_approximately(messages[i:]) <= tokens:
+                return messages[i:]
+        return []
+
+    def _context_text(self, state: dict, older: list, summary: Optional[Summary]) -> str:
+        """Resumen más carrito y mascota, que no se pierden al recortar."""
+        parts = []
+        if summary:
+            parts.append(f"Resumen de la conversación anterior:\n{summary.text}")
+
+        cart = _cart_facts(state, older)
+        if cart:
+            parts.append(f"Carrito actual:\n{cart}")
+
+        pet = _pet_facts(state, older)
+        if pet:
+            parts.append(f"Mascota del cliente: {pet}")
+
+        return "\n\n".join(parts)
+
+    # =====================================================
+    # RESUMEN ACUMULADO
+    # =====================================================
+
+    def _get_summary(self, thread_id: str, total: int) -> Optional[Summary]:
+        summary = self._summaries.get(thread_id)
+        if summary is None:
+            return None
+        if summary.covered > total:
+            # El thread se borró y volvió a empezar
+            del self._summaries[thread_id]
+            return None
+        self._summaries.move_to_end(thread_id)
+        return summary
+
+    def _queue_summary(self, thread_id: str, messages: list, previous: Optional[Summary]) -> None:
+        """Deja pendiente el resumen hasta `len(messages)`; lo lanza el runner al terminar el turno."""
+        if self.llm is None or thread_id in self._summarizing:
+            return
+        covered = previous.covered if previous else 0
+        new = messages[covered:]
+
+        async def job():
+            await self._summarize(thread_id, previous.text if previous else "", new, len(messages))
+
+        _pending[thread_id] = job
+
+    async def _summarize(self, thread_id: str, previous: str, messages: list, covered: int) -> None:
+        self._summarizing.add(thread_id)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            prompt = SUMMARY_PROMPT.format(
+                previous=previous or "(ninguno)",
+                messages="\n".join(_message_line(m) for m in messages),
+            )
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            self._summaries[thread_id] = Summary(str(response.content).strip(), covered)
+            self._summaries.move_to_end(thread_id)
+            while len(self._summaries) > self.max_threads:
+                self._summaries.popitem(last=False)
+            record_latency("history.summary_ms", (loop.time() - start) * 1000)
+        except Exception as e:
+            logger.warning("History summary failed", thread_id=thread_id, error=str(e))
+            increment("history.summary_errors")
+        finally:
+            self._summarizing.discard(thread_id)
+
+
+# =====================================================
+# DATOS QUE SE CONSERVAN TAL CUAL
+# =====================================================
+
+def _cart_facts(state: dict, older: list) -> str:
+    """Carrito del estado o, en threads anteriores a las tools del carrito, la última consulta ya recortada."""
+    order = state.get("order")
+    if order is not None and order.items:
+        return order.to_summary()
+    for message in reversed(older):
+        if isinstance(message, ToolMessage) and message.name in ("get_cart_status", "view_cart"):
+            return str(message.content)
+    return ""
+
+
+def _pet_facts(state: dict, older: list) -> str:
+    context = state.get("conversation_context")
+    if context is None:
+        context = ConversationContext()
+        for message in older:
+            if isinstance(message, HumanMessage) and isinstance(message.content, str):
+                context.extract_pet_info(message.content)
+    facts = [f for f in (context.pet_type, context.pet_name) if f]
+    if context.product_type_needed:
+        facts.append(f"busca {context.product_type_needed}")
+    return ", ".join(facts)
+
+
+def _elided_text(message: ToolMessage) -> str:
+    refs = (message.artifact or {}).get("refs") if isinstance(message.artifact, dict) else None
+    note = f"[salida de {message.name or 'tool'} ya usada"
+    return f"{note}; refs: {', '.join(refs)}]" if refs else f"{note}]"
+
+
+def _message_line(message: AnyMessage) -> str:
+    role = {"human": "Cliente", "ai": "Ruffo", "tool": "Tool"}.get(message.type, message.type)
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if message.type == "ai" and getattr(message, "tool_calls", None) and not content:
+        content = ", ".join(f"{c['name']}({c['args']})" for c in message.tool_calls)
+    return f"{role}: {content[:500]}"
@@ -0,0 +1,213 @@
+"""
+Registro de clientes LLM compartidos por el proceso.
+
+Crear un `ChatOpenAI` por llamada valida la configuración y arma clientes
+nuevos cada vez. Aquí hay una instancia por (modelo, max_tokens) y todas
+comparten un pool HTTP con keep-alive: uno síncrono (nodos que usan
+`invoke`, seguro entre hilos) y uno asíncrono (agente con `ainvoke`).
+Al arrancar se abre una conexión para que el primer mensaje no pague el
+handshake TCP/TLS. Cada instancia reporta sus llamadas al monitor del
+modo degradado.
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from typing import Optional
+
+import httpx
+import structlog
+from langchain_openai import ChatOpenAI
+
+from src.agent.degraded import get_llm_health
+from src.config.settings import settings
+
+logger = structlog.get_logger()
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+class LLMRegistry:
+    """
+    Instancias de ChatOpenAI por (modelo, max_tokens) sobre pools HTTP compartidos.
+
+    El pool asíncrono queda ligado al event loop donde se usa por primera vez;
+    si el proceso pasa a otro loop (ej. `asyncio.run` sucesivos) se crean
+    pool e instancias nuevos para ese loop.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self._lock = threading.Lock()
+        self._models: dict[tuple[str, int], ChatOpenAI] = {}
+        self._http: Optional[httpx.Client] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.created = 0
+        self.reused = 0
+
+    # =====================================================
+    # POOLS HTTP
+    # =====================================================
+
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return self._http
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_http is None:
+                self._async_http = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            return self._async_http
+
+    def _bind_loop(self) -> None:
+        """Liga el pool asíncrono al loop actual (y lo rehace si el loop cambió)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is loop:
+            return
+        with self._lock:
+            if self._loop is not None and self._loop is not loop:
+                # Las conexiones del loop anterior no sirven en este
+                logger.info("LLM async pool rebound to new event loop")
+                self._models.clear()
+                self._async_http = None
+            self._loop = loop
+
+    # =====================================================
+    # INSTANCIAS
+    # =====================================================
+
+    def get(self, model: str, max_tokens: int) -> ChatOpenAI:
+        """Instancia compartida para (modelo, max_tokens)."""
+        self._bind_loop()
+        key = (model, max_tokens)
+        llm = self._models.get(key)
+        if llm is not None:
+            self.reused += 1
+            return llm
+
+        http_client, async_http_client = self.http_client(), self.async_http_client()
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is None:
+                llm = ChatOpenAI(
+                    model=model,
+                    api_key=settings.openai_api_key,
+                    max_completion_tokens=max_tokens,
+                    http_client=http_client,
+                    http_async_client=async_http_client,
+                    callbacks=[get_llm_health().callback],
+                )
+                self._models[key] = llm
+                self.created += 1
+                logger.info("LLM client created", model=model, max_tokens=max_tokens)
+            else:
+                self.reused += 1
+        return llm
+
+    def stats(self) -> dict:
+        return {"clients": len(self._models), "created": self.created, "reused": self.reused}
+
+    def close(self) -> None:
+        """Cierra el pool síncrono (el asíncrono lo cierra su loop al terminar)."""
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    # =====================================================
+    # WARM-UP
+    # =====================================================
+
+    def _warmup_request(self) -> tuple[str, dict]:
+        base_url = os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+        return f"{base_url}/models", {"Authorization": f"Bearer {settings.openai_api_key}"}
+
+    def warm_up(self) -> None:
+        """Abre una conexión del pool síncrono (TCP + TLS) con una petición ligera."""
+        url, headers = self._warmup_request()
+        try:
+            response = self.http_client().get(url, headers=headers)
+            logger.info("LLM sync pool warmed up", status=response.status_code)
+        except httpx.HTTPError as e:
+            logger.warning("LLM warm-up failed", error=str(e))
+
+    async def awarm_up(self) -> None:
+        """Igual que `warm_up` para el pool asíncrono (en el loop que atiende)."""
+        self._bind_loop()
+        url, headers = self._warmup_request()
+        try:
+            response = await self.async_http_client().get(url, headers=headers)
+            logger.info("LLM async pool warmed up", status=response.status_code)
+        except httpx.HTTPError as e:
+            logger.warning("LLM async warm-up failed", error=str(e))
+
+
+# Registro compartido por todo el proceso
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Obtiene el registro de clientes LLM del proceso."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMRegistry(
+                    max_connections=settings.llm_pool_max_connections,
+                    keepalive_expiry=settings.llm_pool_keepalive_seconds,
+                    timeout=settings.llm_timeout_seconds,
+                )
+                atexit.register(_registry.close)
+    return _registry
+
+
+def get_llm(max_tokens: Optional[int] = None, model: Optional[str] = None) -> ChatOpenAI:
+    """
+    Obtiene el ChatOpenAI compartido.
+
+    Args:
+        max_tokens: Máximo de tokens de la respuesta (default: settings.llm_max_completion_tokens)
+        model: Modelo (default: settings.llm_model)
+    """
+    return get_llm_registry().get(
+        model or settings.llm_model,
+        max_tokens or settings.llm_max_completion_tokens,
+    )
+
+
+def start_llm_warmup() -> None:
+    """
+    Calienta los pools HTTP sin bloquear el arranque.
+
+    El síncrono en un hilo daemon; si hay un event loop corriendo, el
+    asíncrono como tarea en ese loop.
+    """
+    global _warmup_task
+    if not settings.llm_warmup:
+        return
+    registry = get_llm_registry()
+    threading.Thread(target=registry.warm_up, name="llm-warmup", daemon=True).start()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _warmup_task = loop.create_task(registry.awarm_up())
@@ -0,0 +1,189 @@
+"""
+Caché de respuestas del LLM por coincidencia exacta del prompt.
+
+Varios nodos arman prompts deterministas con plantillas: la clasificación
+de intención para el mismo mensaje y contexto, el saludo a un "hola"
+nuevo y los mensajes de error del flujo de pedido. Para esos, la misma
+entrada puede servir la misma respuesta. La llave es el hash de
+(modelo, parámetros, prompt ya renderizado).
+
+Es opt-in por punto de llamada (`cached_invoke`); los prompts de
+personalidad que deben variar siguen llamando al modelo directo.
+Hay un nivel en memoria (LRU con TTL) y, opcionalmente, uno persistente
+en SQLite que sobrevive reinicios y se comparte entre procesos.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import structlog
+from langchain_core.messages import AIMessage
+
+from src.agent.metrics import increment
+from src.config.settings import settings
+from src.tools.cache import LRUCache
+
+logger = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+# Parámetros del modelo que cambian la respuesta (además del prompt)
+KEY_PARAMS = ("model_name", "max_tokens", "temperature", "reasoning_effort")
+
+
+def cache_key(llm: Any, prompt: Any) -> str:
+    """Hash de (modelo, parámetros, prompt renderizado)."""
+    params = {name: getattr(llm, name, None) for name in KEY_PARAMS}
+    if isinstance(prompt, str):
+        rendered = prompt
+    else:
+        rendered = [[m.type, m.content] for m in prompt]
+    payload = json.dumps([params, rendered], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Respuestas (texto) del LLM por llave exacta.
+
+    Args:
+        maxsize: Entradas en memoria (LRU)
+        ttl_seconds: Vida de una respuesta en ambos niveles (None = sin límite)
+        db_path: Archivo SQLite del nivel persistente (None = solo memoria)
+    """
+
+    def __init__(self, maxsize: int = 512, ttl_seconds: Optional[float] = 3600, db_path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.db_path = db_path
+        self.db_hits = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            if db_path != ":memory:":
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        """Respuesta guardada (None si no hay o expiró)."""
+        value = self.memory.get(key)
+        if value is not None or self._conn is None:
+            return value
+
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        self.db_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Borra del nivel SQLite las respuestas expiradas."""
+        if self._conn is None or self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.db_hits = 0
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        # Un acierto en SQLite cuenta como fallo del nivel en memoria
+        stats["db_hits"] = self.db_hits
+        stats["persistent"] = self._conn is not None
+        return stats
+
+
+# =====================================================
+# CACHÉ DEL PROCESO
+# =====================================================
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Obtiene la caché de respuestas del LLM del proceso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    maxsize=settings.llm_cache_size,
+                    ttl_seconds=settings.llm_cache_ttl_seconds or None,
+                    db_path=settings.llm_cache_db_path or None,
+                )
+                purged = _cache.purge_expired()
+                if purged:
+                    logger.info("LLM cache purged expired entries", count=purged)
+    return _cache
+
+
+def cached_invoke(llm: Any, prompt: Any, accept: Optional[Callable[[str], bool]] = None) -> AIMessage:
+    """
+    `llm.invoke(prompt)` servido desde la caché si el mismo prompt ya se respondió.
+
+    Args:
+        llm: Modelo (ChatOpenAI del registro)
+        prompt: Prompt renderizado (texto o lista de mensajes)
+        accept: Filtro de qué respuestas se guardan (ej. solo intenciones válidas)
+    """
+    if not settings.llm_cache_enabled:
+        return llm.invoke(prompt)
+
+    cache = get_llm_cache()
+    key = cache_key(llm, prompt)
+    content = cache.get(key)
+    if content is not None:
+        increment("llm_cache.hits")
+        return AIMessage(content=content)
+
+    increment("llm_cache.misses")
+    response = llm.invoke(prompt)
+    content = response.content if isinstance(response.content, str) else ""
+    if content.strip() and (accept is None or accept(content)):
+        cache.set(key, content)
+    return response
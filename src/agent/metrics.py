@@ -0,0 +1,69 @@
+"""Métricas simples en proceso (latencias y contadores) para logs y health checks."""
+
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyStats:
+    """Ventana acotada de latencias en ms con percentiles."""
+
+    def __init__(self, window: int = 500):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms: float) -> None:
+        with self._lock:
+            self.samples.append(value_ms)
+            self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return round(ordered[index], 1)
+
+    def summary(self) -> dict:
+        return {"count": self.count, "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95)}
+
+
+# Registro global: nombre de métrica -> estadísticas / contador
+_latencies: dict[str, LatencyStats] = {}
+_counters: dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def record_latency(name: str, value_ms: float) -> None:
+    """Registra una latencia (ms) bajo un nombre."""
+    with _lock:
+        stats = _latencies.get(name)
+        if stats is None:
+            stats = _latencies[name] = LatencyStats()
+    stats.record(value_ms)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Incrementa un contador."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def get_metrics() -> dict:
+    """Resumen de todas las métricas registradas."""
+    with _lock:
+        latencies = dict(_latencies)
+        counters = dict(_counters)
+    return {
+        "latency": {name: stats.summary() for name, stats in latencies.items()},
+        "counters": counters,
+    }
+
+
+def reset_metrics() -> None:
+    """Limpia las métricas (útil en pruebas)."""
+    with _lock:
+        _latencies.clear()
+        _counters.clear()
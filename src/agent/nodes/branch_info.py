@@ -1,13 +1,38 @@
 """Nodo de información de sucursales."""
 
-from langchain_core.messages import AIMessage
 import structlog
+from langchain_core.messages import AIMessage
 
 from src.agent.state import RuffoState
-from src.tools.sheets.branches import get_all_branches, format_all_branches, find_nearest_branch
+from src.tools.sheets.branches import format_all_branches, get_branch_directory, rank_branches
+from src.tools.sheets.hours import store_now
 
 logger = structlog.get_logger()
 
+# Preguntas de horario en este momento ("¿está abierto?", "¿a qué hora cierra?")
+OPEN_NOW_KEYWORDS = ["abierto", "abierta", "abren", "abre ", "cierra", "cierran", "ahorita"]
+
+
+def format_open_status(message: str) -> str:
+    """Estado de apertura (de la sucursal mencionada o de todas) sin LLM."""
+    directory = get_branch_directory()
+    now = store_now()
+    mentioned = directory.find_in_text(message)
+    branches = [mentioned] if mentioned else directory.branches
+
+    lines = []
+    for branch in branches:
+        status = directory.status(branch["id"], now)
+        if status["open_now"] is None:
+            lines.append(f"🕐 **{branch['name']}**: {branch['hours']}")
+        elif status["open_now"]:
+            lines.append(f"🟢 **{branch['name']}** está abierta, cierra a las {status['closes_at']}")
+        elif status["next_opening"]:
+            lines.append(f"🔴 **{branch['name']}** está cerrada, abre {status['next_opening']}")
+        else:
+            lines.append(f"🔴 **{branch['name']}** está cerrada")
+    return "\n".join(lines)
+
 
 def branch_info_node(state: RuffoState) -> dict:
     """
@@ -26,24 +51,40 @@ def branch_info_node(state: RuffoState) -> dict:
 
     logger.info("Branch info requested", message=last_message[:50] if last_message else "none")
 
+    # ¿Está abierto? / ¿A qué hora cierra? (cálculo directo sobre el horario)
+    if any(kw in last_message.lower() for kw in OPEN_NOW_KEYWORDS):
+        response = format_open_status(last_message) + "\n\n¿Te ayudo con algo más, humano-amigo? 🐾"
+        return {
+            "messages": [AIMessage(content=response)],
+            "current_node": "branch_info",
+            "last_ruffo_message": response,
+        }
+
     # Verificar si pregunta por una ubicación específica
     location_keywords = ["cerca", "cercana", "más cerca", "en", "por"]
     is_location_query = any(kw in last_message.lower() for kw in location_keywords)
 
     if is_location_query and last_message:
-        # Intentar encontrar sucursal cercana
+        # Ordenar sucursales por distancia (gazetteer local + índice espacial)
         try:
-            branch = find_nearest_branch.invoke({"location": last_message})
-            response = (
-                f"🏪 La sucursal más cercana es:\n\n"
-                f"**{branch['name']}**\n"
-                f"📍 {branch['address']}\n"
-                f"📞 {branch['phone']}\n"
-                f"🕐 {branch['hours']}\n"
-                f"🔧 Servicios: {', '.join(branch['services'])}\n\n"
-                f"📍 [Ver en Maps]({branch['maps_url']})\n\n"
-                "¿Necesitas algo más, humano-amigo? 🐾"
-            )
+            resolved, ranked = rank_branches(last_message)
+            if ranked:
+                branch = ranked[0]
+                response = (
+                    f"🏪 La sucursal más cercana a {resolved['label']} es:\n\n"
+                    f"**{branch['name']}** (~{branch['distance_km']} km)\n"
+                    f"📍 {branch['address']}\n"
+                    f"📞 {branch['phone']}\n"
+                    f"🕐 {branch['hours']}\n"
+                    f"🔧 Servicios: {', '.join(branch['services'])}\n\n"
+                    f"📍 [Ver en Maps]({branch['maps_url']})\n"
+                )
+                if len(ranked) > 1:
+                    others = ", ".join(f"{b['name']} (~{b['distance_km']} km)" for b in ranked[1:])
+                    response += f"\nTambién te quedan: {others}\n"
+                response += "\n¿Necesitas algo más, humano-amigo? 🐾"
+            else:
+                response = format_all_branches() + "\n¿Alguna te queda bien? 🐾"
         except Exception as e:
             logger.error("Error finding nearest branch", error=str(e))
             response = format_all_branches() + "\n¿Alguna te queda bien? 🐾"
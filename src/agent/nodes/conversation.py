@@ -1,12 +1,10 @@
 """Nodo conversacional principal que usa LLM para responder."""
 
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 import structlog
+from langchain_core.messages import AIMessage, HumanMessage
 
+from src.agent.llm import get_llm
 from src.agent.state import RuffoState
-from src.config.settings import settings
-from src.config.prompts import RUFFO_SYSTEM_PROMPT
 from src.tools.sheets.products import search_products
 
 logger = structlog.get_logger()
@@ -163,11 +161,7 @@ def conversation_node(state: RuffoState) -> dict:
 
     # Generar respuesta con LLM
     try:
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            max_completion_tokens=500,
-        )
+        llm = get_llm(max_tokens=500)
 
         prompt = RUFFO_CONVERSATION_PROMPT.format(
             context=context_info or "Sin información adicional",
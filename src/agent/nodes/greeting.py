@@ -1,11 +1,14 @@
 """Nodo de saludo de Ruffo con LLM conversacional."""
 
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+import random
+
 import structlog
+from langchain_core.messages import AIMessage, HumanMessage
 
+from src.agent.degraded import llm_available
+from src.agent.llm import get_llm
+from src.agent.llm_cache import cached_invoke
 from src.agent.state import RuffoState
-from src.config.settings import settings
 from src.schemas.intents import UserIntent
 
 logger = structlog.get_logger()
@@ -35,6 +38,19 @@ RUFFO_GREETING_PROMPT = """Eres Ruffo, un Pastor Inglés gigante virtual que tra
 
 Responde como Ruffo (CORTO, máximo 3 líneas):"""
 
+# Saludos sin LLM (respuesta rápida a un "hola" suelto y modo degradado)
+GREETINGS = [
+    "¡Guau, guau! 🐾 Soy Ruffo, el perro más rockero de Animalicha 🤘\n¿En qué puedo ayudarte hoy? ¿Qué mascota tienes?",
+    "¡Qué onda, humano-amigo! 🎸 Soy Ruffo de Animalicha 🐕\nCuéntame, ¿qué peludo tienes en casa y qué le buscamos?",
+    "¡Hola, hola! 🐾 Aquí Ruffo, el Pastor Inglés más rockero de Animalicha 🤘\n¿Buscas algo para tu perro, tu gato u otra mascota?",
+]
+
+GREETINGS_RETURNING = [
+    "¡Qué onda de nuevo, humano-amigo! 🤘🐾\n¿En qué te ayudo ahora?",
+    "¡Guau! Aquí sigo 🐕🎸\n¿Qué más necesitas para tu peludo?",
+    "¡Hola otra vez! 🐾\n¿Buscamos algo más o seguimos con tu pedido?",
+]
+
 
 def greeting_node(state: RuffoState) -> dict:
     """
@@ -63,6 +79,7 @@ def greeting_node(state: RuffoState) -> dict:
 
     # Determinar contexto y tarea según la situación
     intent_value = intent.value if hasattr(intent, "value") else str(intent) if intent else None
+    cache = False
 
     if intent_value == "unknown" or intent == UserIntent.UNKNOWN:
         # Intent desconocido - pedir clarificación amigable
@@ -75,6 +92,8 @@ def greeting_node(state: RuffoState) -> dict:
         # Primera interacción
         context_str = "Es la primera vez que este cliente me habla."
         task = "Salúdalo calurosamente, preséntate como Ruffo de Animalicha y pregunta cómo puedes ayudarle o qué mascota tiene."
+        # El primer "hola" siempre arma el mismo prompt
+        cache = True
 
     else:
         # Cliente que regresa
@@ -87,7 +106,8 @@ def greeting_node(state: RuffoState) -> dict:
     response = _generate_greeting_response(
         context_str=context_str,
         user_message=last_message or "hola",
-        task=task
+        task=task,
+        cache=cache,
     )
 
     logger.info("Greeting generated", length=len(response))
@@ -101,14 +121,12 @@ def greeting_node(state: RuffoState) -> dict:
     }
 
 
-def _generate_greeting_response(context_str: str, user_message: str, task: str) -> str:
-    """Genera una respuesta de saludo usando el LLM."""
+def _generate_greeting_response(context_str: str, user_message: str, task: str, cache: bool = False) -> str:
+    """Genera una respuesta de saludo usando el LLM (cache=True: servirla de la caché si se repite)."""
+    if not llm_available():
+        return random.choice(GREETINGS)
     try:
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            max_completion_tokens=500,
-        )
+        llm = get_llm(max_tokens=500)
 
         prompt = RUFFO_GREETING_PROMPT.format(
             context=context_str,
@@ -116,7 +134,7 @@ def _generate_greeting_response(context_str: str, user_message: str, task: str)
             task=task,
         )
 
-        response = llm.invoke(prompt)
+        response = cached_invoke(llm, prompt) if cache else llm.invoke(prompt)
         return response.content.strip()
 
     except Exception as e:
@@ -1,12 +1,15 @@
 """Nodo de clasificación de intención."""
 
+import unicodedata
 from typing import Optional
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+
 import structlog
+from langchain_core.messages import HumanMessage
 
-from src.agent.state import RuffoState, update_conversation_context
-from src.config.settings import settings
+from src.agent.degraded import llm_available
+from src.agent.llm import get_llm
+from src.agent.llm_cache import cached_invoke
+from src.agent.state import RuffoState, checkout_in_progress, update_conversation_context
 from src.config.prompts import INTENT_CLASSIFICATION_PROMPT
 from src.schemas.intents import UserIntent
 
@@ -26,10 +29,13 @@ INTENT_MAPPING = {
     "unknown": UserIntent.UNKNOWN,
 }
 
-# Palabras clave para clasificación rápida (sin LLM)
+# Palabras clave para clasificación rápida (sin LLM); se comparan sin acentos
 KEYWORD_INTENTS = {
-    UserIntent.GREETING: ["hola", "buenos días", "buenas tardes", "buenas noches", "hey", "qué tal", "hi"],
-    UserIntent.FAREWELL: ["adiós", "bye", "gracias", "hasta luego", "chao", "nos vemos"],
+    UserIntent.GREETING: [
+        "hola", "holi", "buenos días", "buen día", "buenas", "hey", "qué tal", "qué onda", "hi", "hello", "saludos",
+    ],
+    UserIntent.FAREWELL: ["adiós", "bye", "gracias", "hasta luego", "chao", "chau", "nos vemos"],
+    UserIntent.CART_STATUS: ["ver carrito", "ver el carrito", "mi carrito", "qué llevo"],
     UserIntent.BUY_ORDER: ["comprar", "ordenar", "pedir", "quiero", "necesito", "agregar", "carrito"],
     UserIntent.PRODUCT_INQUIRY: ["precio", "cuánto cuesta", "tienen", "hay", "busco", "información"],
     UserIntent.BRANCH_INFO: ["sucursal", "tienda", "horario", "dirección", "ubicación", "dónde"],
@@ -38,11 +44,23 @@ KEYWORD_INTENTS = {
 }
 
 
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin acentos ("¿Dónde?" -> "¿donde?")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+_NORMALIZED_KEYWORDS = {
+    intent: [normalize_text(keyword) for keyword in keywords]
+    for intent, keywords in KEYWORD_INTENTS.items()
+}
+
+
 def classify_by_keywords(message: str) -> Optional[UserIntent]:
     """Clasificación rápida por palabras clave."""
-    message_lower = message.lower()
+    message_lower = normalize_text(message)
 
-    for intent, keywords in KEYWORD_INTENTS.items():
+    for intent, keywords in _NORMALIZED_KEYWORDS.items():
         for keyword in keywords:
             if keyword in message_lower:
                 return intent
@@ -99,20 +117,25 @@ def intent_router_node(state: RuffoState) -> dict:
         }
 
     # Si está en medio de un pedido, asumir que continúa
-    if state.get("order_stage"):
+    if checkout_in_progress(state):
         logger.info("Continuing order flow", stage=state.get("order_stage"))
         return {
             "intent": UserIntent.BUY_ORDER,
             "current_node": "intent_router",
         }
 
+    # Sin LLM (modo degradado) lo que no resuelven las keywords queda como unknown
+    if not llm_available():
+        return {
+            "intent": UserIntent.UNKNOWN,
+            "previous_intent": state.get("intent"),
+            "current_node": "intent_router",
+            "conversation_context": state.get("conversation_context"),
+        }
+
     # Si no hay match por keywords, usar LLM
     try:
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            max_completion_tokens=300,
-        )
+        llm = get_llm(max_tokens=300)
 
         context = state.get("conversation_context")
         context_str = context.to_string() if context else "Sin contexto previo"
@@ -122,7 +145,8 @@ def intent_router_node(state: RuffoState) -> dict:
             message=last_message,
         )
 
-        response = llm.invoke(prompt)
+        # Mismo mensaje y contexto -> misma clasificación; solo se guardan intenciones válidas
+        response = cached_invoke(llm, prompt, accept=lambda text: text.strip().lower() in INTENT_MAPPING)
         intent_str = response.content.strip().lower()
 
         # Mapear respuesta a intención
@@ -1,17 +1,35 @@
-"""Nodo manejador de pedidos con LLM conversacional."""
+"""
+Nodo manejador de pedidos.
+
+Las respuestas salen de plantillas con la voz de Ruffo (order_templates);
+el LLM solo las reescribe en las situaciones de ORDER_LLM_STAGES.
+"""
+
+from typing import Optional
 
-import random
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
 import structlog
+from langchain_core.messages import AIMessage, HumanMessage
 
+from src.agent.degraded import llm_available
+from src.agent.llm import get_llm
+from src.agent.llm_cache import cached_invoke
+from src.agent.metrics import increment
+from src.agent.nodes.order_templates import render_order_template
 from src.agent.state import RuffoState
 from src.config.settings import settings
-from src.schemas.order import OrderInProgress, DeliveryType, PaymentMethod
+from src.schemas.order import (
+    DEFAULT_FREE_SHIPPING_OVER,
+    DeliveryType,
+    OrderInProgress,
+    PaymentMethod,
+)
 from src.schemas.product import ProductInCart
+from src.tools.delivery import DELIVERY_ZONES, validate_address
+from src.tools.popularity import get_popularity_tracker
+from src.tools.sheets.branches import format_all_branches, get_all_branches
+from src.tools.sheets.inventory import get_inventory
 from src.tools.sheets.products import search_products
-from src.tools.sheets.branches import get_all_branches, format_all_branches
-from src.tools.upselling import get_upsell_suggestions, generate_upsell_message
+from src.tools.upselling import generate_upsell_message, get_upsell_suggestions
 
 logger = structlog.get_logger()
 
@@ -44,14 +62,20 @@ ORDER_HANDLER_PROMPT = """Eres Ruffo, un Pastor Inglés gigante virtual rockero
 Responde como Ruffo (CORTO y AMIGABLE):"""
 
 
-def _generate_order_response(stage: str, order_context: str, user_message: str, task: str) -> str:
-    """Genera una respuesta conversacional usando el LLM."""
+def _generate_order_response(
+    stage: str, order_context: str, user_message: str, task: str, cache: bool = False
+) -> Optional[str]:
+    """
+    Genera una respuesta conversacional usando el LLM.
+
+    cache=True para los prompts fijos de error: la misma entrada se sirve
+    desde la caché en lugar de llamar de nuevo al modelo. En modo degradado
+    devuelve None y cada etapa usa su texto fijo.
+    """
+    if not llm_available():
+        return None
     try:
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            max_completion_tokens=500,
-        )
+        llm = get_llm(max_tokens=500)
 
         prompt = ORDER_HANDLER_PROMPT.format(
             order_context=order_context,
@@ -60,7 +84,7 @@ def _generate_order_response(stage: str, order_context: str, user_message: str,
             task=task,
         )
 
-        response = llm.invoke(prompt)
+        response = cached_invoke(llm, prompt) if cache else llm.invoke(prompt)
         return response.content.strip()
 
     except Exception as e:
@@ -68,16 +92,86 @@ def _generate_order_response(stage: str, order_context: str, user_message: str,
         return None
 
 
+def _polish_allowed(key: str) -> bool:
+    """Si la situación `key` está en la lista de ORDER_LLM_STAGES ("*" = todas)."""
+    stages = {s.strip() for s in settings.order_llm_stages.split(",") if s.strip()}
+    return "*" in stages or key in stages
+
+
+def _order_response(
+    key: str,
+    order: OrderInProgress,
+    *,
+    stage: str,
+    order_context: str,
+    user_message: str,
+    task: str,
+    cache: bool = False,
+    **fields,
+) -> str:
+    """
+    Respuesta de una situación del pedido.
+
+    La plantilla es la respuesta; si la situación está en la lista de
+    ORDER_LLM_STAGES, el LLM la reescribe conservando los datos (si falla,
+    queda la plantilla). Las llamadas al LLM se cuentan en el pedido.
+    """
+    text = render_order_template(key, **fields)
+    if not _polish_allowed(key) or not llm_available():
+        return text
+
+    order.llm_calls += 1
+    increment("order.llm_calls")
+    polished = _generate_order_response(
+        stage=stage,
+        order_context=f"{order_context}\n\nRespuesta base (conserva todos sus datos):\n{text}",
+        user_message=user_message,
+        task=task,
+        cache=cache,
+    )
+    return polished or text
+
+
+def _cart_lines(order: OrderInProgress) -> list[tuple[str, int]]:
+    """(product_id, cantidad) de cada item del carrito."""
+    return [(item.product_id, item.quantity) for item in order.items]
+
+
+def _pickup_branches(order: OrderInProgress) -> tuple[list[dict], bool]:
+    """
+    Sucursales donde se puede recoger todo el carrito.
+
+    Returns:
+        (sucursales, filtradas): sin inventario o si ninguna tiene todo,
+        se devuelven todas con filtradas=False
+    """
+    branches = get_all_branches.invoke({})
+    inventory = get_inventory()
+    if inventory is None:
+        return branches, False
+
+    available = set(inventory.branches_for(_cart_lines(order)))
+    with_stock = [branch for branch in branches if branch["id"] in available]
+    if not with_stock:
+        return branches, False
+    return with_stock, len(with_stock) < len(branches)
+
+
 def order_handler_node(state: RuffoState) -> dict:
     """
     Nodo principal para manejar el flujo de pedidos.
-    Usa LLM para generar respuestas naturales con personalidad de Ruffo.
+    Responde con plantillas con personalidad de Ruffo (LLM opcional por situación).
     """
     messages = state.get("messages", [])
     order = state.get("order") or OrderInProgress()
     order_stage = state.get("order_stage")
     context = state.get("conversation_context")
 
+    new_order = order_stage == "completed"
+    if new_order:
+        # El pedido anterior ya se confirmó: este mensaje empieza uno nuevo
+        order, order_stage = OrderInProgress(), None
+
     # Obtener último mensaje del usuario
     last_message = ""
     for msg in reversed(messages):
@@ -93,7 +187,20 @@ def order_handler_node(state: RuffoState) -> dict:
         pet_type=context.pet_type if context else None,
     )
 
-    # Determinar qué hacer según la etapa actual
+    llm_calls = order.llm_calls
+    result = _handle_stage(state, order, order_stage, last_message, context)
+    # Las llamadas al LLM de este turno (o el pedido nuevo) quedan en el estado
+    if (order.llm_calls != llm_calls or new_order) and "order" not in result:
+        result["order"] = order
+    if new_order:
+        result.setdefault("order_stage", None)
+    return result
+
+
+def _handle_stage(
+    state: RuffoState, order: OrderInProgress, order_stage: Optional[str], last_message: str, context
+) -> dict:
+    """Atiende el mensaje según la etapa actual del pedido."""
     if order_stage is None or order_stage == "collecting_items":
         return handle_collecting_items(state, order, last_message, context)
 
@@ -120,14 +227,15 @@ def order_handler_node(state: RuffoState) -> dict:
 
     else:
         # Estado desconocido, reiniciar
-        response = _generate_order_response(
+        response = _order_response(
+            "unknown_stage",
+            order,
             stage="error",
             order_context="Algo salió mal en el flujo del pedido",
             user_message=last_message,
-            task="Dile amablemente que algo se reinició y pregunta qué quiere pedir"
+            task="Dile amablemente que algo se reinició y pregunta qué quiere pedir",
+            cache=True,
         )
-        if not response:
-            response = "🐕 ¡Guau! Algo se enredó. ¿Qué te gustaría pedir, humano-amigo?"
 
         return {
             "order": OrderInProgress(),
@@ -151,15 +259,17 @@ def handle_collecting_items(state: RuffoState, order: OrderInProgress, message:
     })
 
     if not products:
-        # No encontró productos - usar LLM para respuesta amigable
-        response = _generate_order_response(
+        # No encontró productos - pedir que lo describa diferente
+        response = _order_response(
+            "product_not_found",
+            order,
             stage="collecting_items",
             order_context=f"No encontré productos para '{message}'. Mascota del cliente: {pet_type or 'no especificada'}",
             user_message=message,
-            task="Dile que no encontraste el producto pero pide que lo describa diferente. Da ejemplos como 'croquetas para perro' o 'snacks de pollo'. Sé amigable."
+            task="Dile que no encontraste el producto pero pide que lo describa diferente. Da ejemplos como 'croquetas para perro' o 'snacks de pollo'. Sé amigable.",
+            cache=True,
+            query=message,
         )
-        if not response:
-            response = f"🐕 ¡Guau! No encontré '{message}' en mi catálogo, humano-amigo.\n¿Me lo describes diferente? Por ejemplo: 'croquetas para perro' o 'snacks de pollo' 🔍"
 
         return {
             "messages": [AIMessage(content=response)],
@@ -178,6 +288,9 @@ def handle_collecting_items(state: RuffoState, order: OrderInProgress, message:
         )
         order.add_item(item)
 
+        # Popularidad: el producto mostrado terminó en el carrito
+        get_popularity_tracker().record_added(product["id"])
+
         # Verificar si ofrecer upselling
         if not state.get("upsell_offered") and len(order.items) >= 1:
             try:
@@ -188,19 +301,18 @@ def handle_collecting_items(state: RuffoState, order: OrderInProgress, message:
 
                 if suggestions:
                     upsell_msg = generate_upsell_message(product["name"], suggestions[0])
-                    response = _generate_order_response(
+                    response = _order_response(
+                        "item_added_upsell",
+                        order,
                         stage="collecting_items",
                         order_context=f"Agregué {product['name']} al carrito. Carrito: {order.to_summary()}",
                         user_message=message,
-                        task=f"Confirma que agregaste el producto. Sugiere: {upsell_msg}. Pregunta si quiere algo más."
+                        task=f"Confirma que agregaste el producto. Sugiere: {upsell_msg}. Pregunta si quiere algo más.",
+                        name=product["name"],
+                        price=product["price"],
+                        summary=order.to_summary(),
+                        upsell=upsell_msg,
                     )
-                    if not response:
-                        response = (
-                            f"🛒 ¡Agregado! {product['name']} - ${product['price']:.2f}\n\n"
-                            f"{order.to_summary()}\n\n"
-                            f"{upsell_msg}\n\n"
-                            "¿Algo más o procedemos? 🤘"
-                        )
                     return {
                         "order": order,
                         "messages": [AIMessage(content=response)],
@@ -212,18 +324,17 @@ def handle_collecting_items(state: RuffoState, order: OrderInProgress, message:
             except Exception as e:
                 logger.error("Error getting upsell suggestions", error=str(e))
 
-        response = _generate_order_response(
+        response = _order_response(
+            "item_added",
+            order,
             stage="collecting_items",
             order_context=f"Agregué {product['name']} (${product['price']:.2f}) al carrito. Carrito actual: {order.to_summary()}",
             user_message=message,
-            task="Confirma entusiastamente que agregaste el producto. Muestra el resumen del carrito. Pregunta si quiere algo más o si procedemos."
+            task="Confirma entusiastamente que agregaste el producto. Muestra el resumen del carrito. Pregunta si quiere algo más o si procedemos.",
+            name=product["name"],
+            price=product["price"],
+            summary=order.to_summary(),
         )
-        if not response:
-            response = (
-                f"🛒 ¡A todo dar! Agregué {product['name']} - ${product['price']:.2f}\n\n"
-                f"{order.to_summary()}\n\n"
-                "¿Algo más o procedemos con tu pedido? 🤘"
-            )
 
         return {
             "order": order,
@@ -234,23 +345,22 @@ def handle_collecting_items(state: RuffoState, order: OrderInProgress, message:
 
     else:
         # Múltiples productos encontrados
+        get_popularity_tracker().record_shown([p["id"] for p in products[:5]])
+
         options = "\n".join([
             f"{i+1}. {p['name']} - ${p['price']:.2f}"
             for i, p in enumerate(products[:5])
         ])
 
-        response = _generate_order_response(
+        response = _order_response(
+            "product_options",
+            order,
             stage="collecting_items",
             order_context=f"Encontré {len(products)} productos. Opciones:\n{options}",
             user_message=message,
-            task="Dile que encontraste varios productos y muestra las opciones. Pide que elija por número o nombre."
+            task="Dile que encontraste varios productos y muestra las opciones. Pide que elija por número o nombre.",
+            options=options,
         )
-        if not response:
-            response = (
-                f"🔍 ¡Genial! Encontré varias opciones:\n\n"
-                f"{options}\n\n"
-                "¿Cuál te late? Dime el número o el nombre 🐾"
-            )
 
         return {
             "found_products": products,
@@ -265,19 +375,14 @@ def handle_confirming_items(state: RuffoState, order: OrderInProgress, message:
     message_lower = message.lower()
 
     if any(word in message_lower for word in ["sí", "si", "ok", "listo", "confirmo", "correcto", "eso"]):
-        response = _generate_order_response(
+        response = _order_response(
+            "items_confirmed",
+            order,
             stage="confirming_items",
             order_context=f"Cliente confirmó el carrito: {order.to_summary()}",
             user_message=message,
-            task="Celebra que confirmó. Pregunta cómo quiere recibir: Pickup (recoger en tienda) o Domicilio (se lo llevan)."
+            task="Celebra que confirmó. Pregunta cómo quiere recibir: Pickup (recoger en tienda) o Domicilio (se lo llevan).",
         )
-        if not response:
-            response = (
-                "🤘 ¡A todo dar! Tu carrito está listo.\n\n"
-                "¿Cómo prefieres recibirlo?\n"
-                "🏪 **Pickup** - Recoges en tienda\n"
-                "🚚 **Domicilio** - Te lo llevamos"
-            )
         return {
             "order": order,
             "messages": [AIMessage(content=response)],
@@ -286,18 +391,14 @@ def handle_confirming_items(state: RuffoState, order: OrderInProgress, message:
         }
 
     elif any(word in message_lower for word in ["no", "cambiar", "modificar", "quitar"]):
-        response = _generate_order_response(
+        response = _order_response(
+            "modify_items",
+            order,
             stage="confirming_items",
             order_context=f"Cliente quiere modificar el carrito: {order.to_summary()}",
             user_message=message,
-            task="Dile que está bien modificar. Explica que puede escribir 'quitar [producto]' o agregar algo nuevo."
+            task="Dile que está bien modificar. Explica que puede escribir 'quitar [producto]' o agregar algo nuevo.",
         )
-        if not response:
-            response = (
-                "🐕 ¡Claro! ¿Qué quieres cambiar?\n"
-                "- Escribe 'quitar [producto]' para eliminarlo\n"
-                "- O dime qué producto agregar"
-            )
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "collecting_items",
@@ -315,21 +416,20 @@ def handle_selecting_delivery(state: RuffoState, order: OrderInProgress, message
 
     if any(word in message_lower for word in ["pickup", "recoger", "tienda", "sucursal"]):
         order.delivery_type = DeliveryType.PICKUP
-        branches = get_all_branches.invoke({})
-        branches_text = format_all_branches()
-
-        response = _generate_order_response(
+        branches, filtered = _pickup_branches(order)
+        branches_text = format_all_branches(branches)
+        if filtered:
+            branches_text += "\n(Solo te muestro las sucursales que tienen todo tu pedido en existencia)"
+
+        response = _order_response(
+            "pickup_branches",
+            order,
             stage="selecting_delivery",
-            order_context=f"Cliente eligió pickup. Sucursales disponibles:\n{branches_text}",
+            order_context=f"Cliente eligió pickup. Sucursales con existencia:\n{branches_text}",
             user_message=message,
-            task="Confirma pickup en tienda. Muestra las sucursales y pregunta en cuál le queda mejor."
+            task="Confirma pickup en tienda. Muestra las sucursales y pregunta en cuál le queda mejor.",
+            branches=branches_text,
         )
-        if not response:
-            response = (
-                f"🏪 ¡Genial! Pickup en tienda.\n\n"
-                f"{branches_text}\n"
-                "¿En cuál sucursal te queda mejor?"
-            )
         return {
             "order": order,
             "messages": [AIMessage(content=response)],
@@ -341,20 +441,20 @@ def handle_selecting_delivery(state: RuffoState, order: OrderInProgress, message
         order.delivery_type = DeliveryType.DELIVERY
 
         shipping_note = ""
-        if order.subtotal < 500:
-            shipping_note = f" (¡Tip! Con ${500 - order.subtotal:.2f} más el envío es gratis)"
+        if order.subtotal < DEFAULT_FREE_SHIPPING_OVER:
+            shipping_note = (
+                f" (¡Tip! En zona A, con ${DEFAULT_FREE_SHIPPING_OVER - order.subtotal:.2f} más el envío es gratis)"
+            )
 
-        response = _generate_order_response(
+        response = _order_response(
+            "ask_address",
+            order,
             stage="selecting_delivery",
             order_context=f"Cliente eligió domicilio. Subtotal: ${order.subtotal:.2f}.{shipping_note}",
             user_message=message,
-            task="Confirma envío a domicilio. Pide la dirección completa (calle, número, colonia, ciudad)."
+            task="Confirma envío a domicilio. Pide la dirección completa (calle, número, colonia, municipio y CP).",
+            shipping_note=shipping_note,
         )
-        if not response:
-            response = (
-                f"🚚 ¡Perfecto! Te lo llevamos a domicilio.{shipping_note}\n\n"
-                "¿Cuál es tu dirección completa? (calle, número, colonia, ciudad)"
-            )
         return {
             "order": order,
             "messages": [AIMessage(content=response)],
@@ -364,18 +464,15 @@ def handle_selecting_delivery(state: RuffoState, order: OrderInProgress, message
         }
 
     else:
-        response = _generate_order_response(
+        response = _order_response(
+            "unclear_delivery",
+            order,
             stage="selecting_delivery",
             order_context="No entendí el tipo de entrega que quiere el cliente",
             user_message=message,
-            task="Dile amablemente que no entendiste. Pregunta si prefiere Pickup (recoger en tienda) o Domicilio (se lo llevan)."
+            task="Dile amablemente que no entendiste. Pregunta si prefiere Pickup (recoger en tienda) o Domicilio (se lo llevan).",
+            cache=True,
         )
-        if not response:
-            response = (
-                "🐕 ¡Guau! No capté bien, humano-amigo. ¿Prefieres:\n"
-                "🏪 **Pickup** - Recoges en tienda\n"
-                "🚚 **Domicilio** - Te lo llevamos"
-            )
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "selecting_delivery",
@@ -384,42 +481,61 @@ def handle_selecting_delivery(state: RuffoState, order: OrderInProgress, message
 
 
 def handle_collecting_address(state: RuffoState, order: OrderInProgress, message: str) -> dict:
-    """Recoge la dirección de entrega."""
-    if len(message) < 10:
-        response = _generate_order_response(
-            stage="collecting_address",
-            order_context="La dirección proporcionada es muy corta",
-            user_message=message,
-            task="Dile amablemente que la dirección parece muy corta. Necesitas: calle, número, colonia y ciudad."
+    """Recoge la dirección de entrega (validada contra el índice local de CP)."""
+    message_lower = message.lower()
+
+    # Cambio a pickup (ej. la dirección quedó fuera de zona)
+    if any(word in message_lower for word in ["pickup", "recoger", "sucursal"]):
+        return handle_selecting_delivery(state, order, message)
+
+    address = validate_address(message)
+
+    # Respuestas inmediatas (sin LLM) para direcciones fuera de zona o incompletas
+    if address["out_of_area"]:
+        response = (
+            "🐕 ¡Uy! Esa dirección queda fuera de nuestra zona de envío 😔\n"
+            "Llegamos a Tecámac, Ecatepec, Coacalco, Acolman, Zumpango y alrededores.\n"
+            "¿Prefieres recogerlo en sucursal? 🏪"
+        )
+        return {
+            "messages": [AIMessage(content=response)],
+            "order_stage": "collecting_address",
+            "last_ruffo_message": response,
+        }
+
+    if not address["valid"]:
+        response = (
+            f"🐕 ¡Guau! Me falta: {' y '.join(address['missing'])}.\n"
+            "Pásame la dirección así: calle y número, colonia, municipio y CP para no perderme 📍"
         )
-        if not response:
-            response = (
-                "🐕 ¡Guau! Esa dirección parece muy cortita.\n"
-                "Necesito: calle, número, colonia y ciudad para no perderme 📍"
-            )
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "collecting_address",
             "last_ruffo_message": response,
         }
 
-    order.delivery_address = message
+    order.delivery_address = address["normalized"]
+    order.delivery_zone = address["zone"]
+    order.delivery_fee = address["fee"]
+    order.free_shipping_over = address["free_over"]
+
+    shipping_text = (
+        "🚚 ¡Envío gratis!" if order.shipping_cost == 0
+        else f"🚚 Envío {DELIVERY_ZONES[address['zone']]['name']}: ${order.shipping_cost:.2f} "
+             f"(gratis desde ${address['free_over']:.0f})"
+    )
 
-    response = _generate_order_response(
+    response = _order_response(
+        "address_confirmed",
+        order,
         stage="collecting_address",
-        order_context=f"Dirección registrada: {message}. Carrito: {order.to_summary()}",
+        order_context=f"Dirección registrada: {order.delivery_address}. {shipping_text}. Carrito: {order.to_summary()}",
         user_message=message,
-        task="Confirma la dirección. Muestra resumen del pedido. Pregunta cómo quiere pagar: Efectivo, Transferencia o Tarjeta."
+        task="Confirma la dirección. Muestra resumen del pedido. Pregunta cómo quiere pagar: Efectivo, Transferencia o Tarjeta.",
+        address=order.delivery_address,
+        shipping=shipping_text,
+        summary=order.to_summary(),
     )
-    if not response:
-        response = (
-            f"📍 ¡Anotado!\n{message}\n\n"
-            f"{order.to_summary()}\n\n"
-            "¿Cómo quieres pagar?\n"
-            "💵 **Efectivo** - Pagas al recibir\n"
-            "💳 **Transferencia** - Te paso los datos\n"
-            "💳 **Tarjeta** - Pagas al recibir"
-        )
     return {
         "order": order,
         "messages": [AIMessage(content=response)],
@@ -433,6 +549,10 @@ def handle_selecting_branch(state: RuffoState, order: OrderInProgress, message:
     """Selecciona sucursal para pickup."""
     message_lower = message.lower()
 
+    # Cambio a envío a domicilio (ej. la sucursal no tiene todo)
+    if any(word in message_lower for word in ["domicilio", "envío", "enviar"]):
+        return handle_selecting_delivery(state, order, message)
+
     branches = get_all_branches.invoke({})
 
     # Buscar sucursal mencionada
@@ -451,25 +571,49 @@ def handle_selecting_branch(state: RuffoState, order: OrderInProgress, message:
                     selected_branch = branch
                     break
 
+    # Verificar que la sucursal tenga todo el carrito
+    inventory = get_inventory()
+    missing = inventory.missing_at(selected_branch["id"], _cart_lines(order)) if selected_branch and inventory else []
+    if missing:
+        missing_names = [item.product_name for item in order.items if item.product_id in missing]
+        branches, filtered = _pickup_branches(order)
+        alternatives = [b["name"] for b in branches if b["id"] != selected_branch["id"]] if filtered else []
+        response = _order_response(
+            "branch_missing_stock",
+            order,
+            stage="selecting_branch",
+            order_context=(
+                f"{selected_branch['name']} no tiene en existencia: {', '.join(missing_names)}. "
+                f"Sucursales con todo el pedido: {', '.join(alternatives) or 'ninguna'}"
+            ),
+            user_message=message,
+            task="Avisa que esa sucursal no tiene todo. Sugiere otra sucursal con existencia o envío a domicilio.",
+            branch=selected_branch["name"],
+            missing=", ".join(missing_names),
+            alternatives=f"Puedes recogerlo en: {', '.join(alternatives)}\n" if alternatives else "",
+        )
+        return {
+            "messages": [AIMessage(content=response)],
+            "order_stage": "selecting_branch",
+            "last_ruffo_message": response,
+        }
+
     if selected_branch:
         order.branch_id = selected_branch["id"]
         order.branch_name = selected_branch["name"]
 
-        response = _generate_order_response(
+        response = _order_response(
+            "branch_confirmed",
+            order,
             stage="selecting_branch",
             order_context=f"Sucursal seleccionada: {selected_branch['name']} - {selected_branch['address']}. Horario: {selected_branch['hours']}. Carrito: {order.to_summary()}",
             user_message=message,
-            task="Confirma la sucursal con su dirección y horario. Muestra resumen del pedido. Pregunta cómo quiere pagar."
+            task="Confirma la sucursal con su dirección y horario. Muestra resumen del pedido. Pregunta cómo quiere pagar.",
+            branch=selected_branch["name"],
+            address=selected_branch["address"],
+            hours=selected_branch["hours"],
+            summary=order.to_summary(),
         )
-        if not response:
-            response = (
-                f"🏪 ¡Perfecto! Recoges en **{selected_branch['name']}**\n"
-                f"📍 {selected_branch['address']}\n"
-                f"🕐 {selected_branch['hours']}\n\n"
-                f"{order.to_summary()}\n\n"
-                "¿Cómo quieres pagar?\n"
-                "💵 **Efectivo** | 💳 **Transferencia** | 💳 **Tarjeta**"
-            )
         return {
             "order": order,
             "messages": [AIMessage(content=response)],
@@ -478,18 +622,16 @@ def handle_selecting_branch(state: RuffoState, order: OrderInProgress, message:
         }
     else:
         branches_text = format_all_branches()
-        response = _generate_order_response(
+        response = _order_response(
+            "branch_not_found",
+            order,
             stage="selecting_branch",
             order_context=f"No encontré la sucursal mencionada. Sucursales disponibles:\n{branches_text}",
             user_message=message,
-            task="Dile amablemente que no ubicaste esa sucursal. Muestra las opciones disponibles."
+            task="Dile amablemente que no ubicaste esa sucursal. Muestra las opciones disponibles.",
+            cache=True,
+            branches=branches_text,
         )
-        if not response:
-            response = (
-                f"🐕 ¡Guau! No ubiqué esa sucursal. Aquí están las opciones:\n\n"
-                f"{branches_text}\n"
-                "¿Cuál te queda mejor?"
-            )
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "selecting_branch",
@@ -507,22 +649,15 @@ def handle_selecting_payment(state: RuffoState, order: OrderInProgress, message:
 
     elif any(word in message_lower for word in ["transferencia", "transfer", "spei"]):
         order.payment_method = PaymentMethod.TRANSFER
-        response = _generate_order_response(
+        response = _order_response(
+            "bank_transfer",
+            order,
             stage="selecting_payment",
             order_context=f"Cliente eligió transferencia. Total: ${order.total:.2f}",
             user_message=message,
-            task="Confirma transferencia. Da los datos bancarios: BBVA, Cuenta 0123456789, CLABE 012345678901234567, Animalicha SA de CV. Pide que mande foto del comprobante."
+            task="Confirma transferencia. Da los datos bancarios: BBVA, Cuenta 0123456789, CLABE 012345678901234567, Animalicha SA de CV. Pide que mande foto del comprobante.",
+            total=order.total,
         )
-        if not response:
-            response = (
-                "💳 ¡Perfecto! Aquí están los datos para transferencia:\n\n"
-                "🏦 Banco: BBVA\n"
-                "📝 Cuenta: 0123456789\n"
-                "🔢 CLABE: 012345678901234567\n"
-                "👤 Nombre: Animalicha SA de CV\n\n"
-                f"💰 Total: **${order.total:.2f}**\n\n"
-                "Cuando hagas la transferencia, mándame foto del comprobante 📸"
-            )
         return {
             "order": order,
             "messages": [AIMessage(content=response)],
@@ -536,19 +671,15 @@ def handle_selecting_payment(state: RuffoState, order: OrderInProgress, message:
         return finalize_order(order, "tarjeta")
 
     else:
-        response = _generate_order_response(
+        response = _order_response(
+            "unclear_payment",
+            order,
             stage="selecting_payment",
             order_context="No entendí el método de pago",
             user_message=message,
-            task="Dile amablemente que no entendiste. Pregunta si prefiere Efectivo, Transferencia o Tarjeta."
+            task="Dile amablemente que no entendiste. Pregunta si prefiere Efectivo, Transferencia o Tarjeta.",
+            cache=True,
         )
-        if not response:
-            response = (
-                "🐕 ¡Guau! No capté bien. ¿Cómo prefieres pagar?\n"
-                "💵 **Efectivo**\n"
-                "💳 **Transferencia**\n"
-                "💳 **Tarjeta**"
-            )
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "selecting_payment",
@@ -558,19 +689,6 @@ def handle_selecting_payment(state: RuffoState, order: OrderInProgress, message:
 
 def handle_waiting_payment_proof(state: RuffoState, order: OrderInProgress, message: str) -> dict:
     """Espera el comprobante de pago."""
-    response = _generate_order_response(
-        stage="waiting_payment_proof",
-        order_context=f"Cliente envió algo (posiblemente comprobante). Total esperado: ${order.total:.2f}",
-        user_message=message,
-        task="Confirma que recibiste el comprobante. Dile que lo procesarás y confirmarás pronto. Sé entusiasta."
-    )
-    if not response:
-        response = (
-            "📸 ¡Recibido, humano-amigo! Voy a procesarlo y te confirmaré pronto.\n\n"
-            "Tu pedido queda registrado. ¡Te avisamos cuando verifiquemos! 🐾\n\n"
-            "¡Rock on! 🤘"
-        )
-
     return finalize_order(order, "transferencia (comprobante recibido)")
 
 
@@ -581,14 +699,14 @@ def handle_confirming_order(state: RuffoState, order: OrderInProgress, message:
     if any(word in message_lower for word in ["sí", "si", "confirmo", "ok", "listo"]):
         return finalize_order(order, order.payment_method.value if order.payment_method else "efectivo")
     else:
-        response = _generate_order_response(
+        response = _order_response(
+            "confirm_order",
+            order,
             stage="confirming_order",
             order_context=f"Esperando confirmación final. Carrito: {order.to_summary()}",
             user_message=message,
-            task="Pregunta si confirma el pedido. Si dice que quiere cambiar algo, dile qué puede hacer."
+            task="Pregunta si confirma el pedido. Si dice que quiere cambiar algo, dile qué puede hacer.",
         )
-        if not response:
-            response = "🐕 ¿Confirmamos el pedido? Responde 'sí' para confirmar o dime qué quieres cambiar."
         return {
             "messages": [AIMessage(content=response)],
             "order_stage": "confirming_order",
@@ -601,28 +719,27 @@ def finalize_order(order: OrderInProgress, payment_method: str) -> dict:
     import uuid
     order_number = f"RUF-{uuid.uuid4().hex[:6].upper()}"
 
+    increment("order.checkouts")
+    logger.info("Checkout completed", order_number=order_number, llm_calls=order.llm_calls)
+
     delivery_info = ""
     if order.delivery_type == DeliveryType.PICKUP:
         delivery_info = f"🏪 Recoger en: {order.branch_name}"
     else:
         delivery_info = f"🚚 Envío a: {order.delivery_address}"
 
-    response = _generate_order_response(
+    response = _order_response(
+        "order_confirmed",
+        order,
         stage="completed",
         order_context=f"Pedido #{order_number} confirmado. {delivery_info}. Pago: {payment_method}. {order.to_summary()}",
         user_message="",
-        task="Celebra el pedido confirmado. Muestra el número de pedido, tipo de entrega y forma de pago. Agradece y despídete rockero."
+        task="Celebra el pedido confirmado. Muestra el número de pedido, tipo de entrega y forma de pago. Agradece y despídete rockero.",
+        order_number=order_number,
+        delivery_info=delivery_info,
+        payment=payment_method,
+        summary=order.to_summary(),
     )
-    if not response:
-        response = (
-            f"🎉 **¡PEDIDO CONFIRMADO!** 🎉\n\n"
-            f"📦 Pedido: **{order_number}**\n"
-            f"{delivery_info}\n"
-            f"💳 Pago: {payment_method}\n\n"
-            f"{order.to_summary()}\n\n"
-            "¡Gracias, humano-amigo! Tu peludo va a estar feliz 🐕\n"
-            "¡Rock on! 🤘🐾"
-        )
 
     return {
         "order": order,
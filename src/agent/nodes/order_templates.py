@@ -0,0 +1,148 @@
+"""
+Respuestas del flujo de pedido con la voz de Ruffo.
+
+Cada situación del checkout tiene varias redacciones para no sonar
+repetitivo; se elige una al azar y se llena con los datos del pedido.
+Son la salida principal del order handler: el LLM solo las reescribe en
+las situaciones de ORDER_LLM_STAGES, y nunca cambia los datos.
+"""
+
+import random
+
+ORDER_TEMPLATES: dict[str, list[str]] = {
+    # ===== Errores / no entendí =====
+    "unknown_stage": [
+        "🐕 ¡Guau! Algo se enredó. ¿Qué te gustaría pedir, humano-amigo?",
+        "🐾 ¡Uy! Se me revolvieron las patas. Empecemos de nuevo: ¿qué le llevamos a tu peludo?",
+    ],
+    "product_not_found": [
+        "🐕 ¡Guau! No encontré '{query}' en mi catálogo, humano-amigo.\n"
+        "¿Me lo describes diferente? Por ejemplo: 'croquetas para perro' o 'snacks de pollo' 🔍",
+        "🔍 Olfateé todo el catálogo y no di con '{query}' 🐾\n"
+        "¿Me lo dices de otra forma? Algo como 'croquetas para perro' o 'snacks de pollo'.",
+        "🐶 Mmm, '{query}' no me sale en la tienda.\n"
+        "Prueba con algo como 'croquetas para perro' o 'snacks de pollo' y lo busco de nuevo 🤘",
+    ],
+    "unclear_delivery": [
+        "🐕 ¡Guau! No capté bien, humano-amigo. ¿Prefieres:\n"
+        "🏪 **Pickup** - Recoges en tienda\n"
+        "🚚 **Domicilio** - Te lo llevamos",
+        "🐾 Perdón, no te entendí. ¿Cómo lo quieres recibir?\n"
+        "🏪 **Pickup** - Recoges en tienda\n"
+        "🚚 **Domicilio** - Te lo llevamos",
+    ],
+    "branch_not_found": [
+        "🐕 ¡Guau! No ubiqué esa sucursal. Aquí están las opciones:\n\n{branches}\n¿Cuál te queda mejor?",
+        "🐾 Esa sucursal no me suena, humano-amigo. Estas son las nuestras:\n\n{branches}\n¿En cuál pasas?",
+    ],
+    "unclear_payment": [
+        "🐕 ¡Guau! No capté bien. ¿Cómo prefieres pagar?\n"
+        "💵 **Efectivo**\n"
+        "💳 **Transferencia**\n"
+        "💳 **Tarjeta**",
+        "🐾 Perdón, no te entendí. ¿Con qué pagas?\n"
+        "💵 **Efectivo**\n"
+        "💳 **Transferencia**\n"
+        "💳 **Tarjeta**",
+    ],
+
+    # ===== Carrito =====
+    "item_added_upsell": [
+        "🛒 ¡Agregado! {name} - ${price:.2f}\n\n{summary}\n\n{upsell}\n\n¿Algo más o procedemos? 🤘",
+        "🤘 ¡Listo! Ya va {name} - ${price:.2f}\n\n{summary}\n\n{upsell}\n\n¿Le sumamos algo o seguimos?",
+    ],
+    "item_added": [
+        "🛒 ¡A todo dar! Agregué {name} - ${price:.2f}\n\n{summary}\n\n¿Algo más o procedemos con tu pedido? 🤘",
+        "🎸 ¡Rock on! {name} - ${price:.2f} ya está en tu carrito\n\n{summary}\n\n¿Agregamos algo más o procedemos? 🐾",
+        "🐾 ¡Guau! Anotado: {name} - ${price:.2f}\n\n{summary}\n\n¿Quieres algo más o cerramos el pedido? 🤘",
+    ],
+    "product_options": [
+        "🔍 ¡Genial! Encontré varias opciones:\n\n{options}\n\n¿Cuál te late? Dime el número o el nombre 🐾",
+        "🐕 ¡Mira lo que encontré!\n\n{options}\n\n¿Cuál te llevas? Dime el número o el nombre 🤘",
+    ],
+    "items_confirmed": [
+        "🤘 ¡A todo dar! Tu carrito está listo.\n\n"
+        "¿Cómo prefieres recibirlo?\n"
+        "🏪 **Pickup** - Recoges en tienda\n"
+        "🚚 **Domicilio** - Te lo llevamos",
+        "🎸 ¡Rock on! Carrito confirmado.\n\n"
+        "¿Cómo lo quieres?\n"
+        "🏪 **Pickup** - Recoges en tienda\n"
+        "🚚 **Domicilio** - Te lo llevamos",
+    ],
+    "modify_items": [
+        "🐕 ¡Claro! ¿Qué quieres cambiar?\n"
+        "- Escribe 'quitar [producto]' para eliminarlo\n"
+        "- O dime qué producto agregar",
+        "🐾 ¡Sin problema! Para cambiar tu carrito:\n"
+        "- Escribe 'quitar [producto]' para eliminarlo\n"
+        "- O dime qué producto agregar",
+    ],
+
+    # ===== Entrega =====
+    "pickup_branches": [
+        "🏪 ¡Genial! Pickup en tienda.\n\n{branches}\n¿En cuál sucursal te queda mejor?",
+        "🐾 ¡Va! Lo recoges en tienda.\n\n{branches}\n¿Cuál sucursal te queda más cerca?",
+    ],
+    "ask_address": [
+        "🚚 ¡Perfecto! Te lo llevamos a domicilio.{shipping_note}\n\n"
+        "¿Cuál es tu dirección completa? (calle, número, colonia, municipio y CP)",
+        "🐕 ¡A domicilio entonces!{shipping_note}\n\n"
+        "Pásame tu dirección completa: calle, número, colonia, municipio y CP 📍",
+    ],
+    "address_confirmed": [
+        "📍 ¡Anotado!\n{address}\n{shipping}\n\n{summary}\n\n"
+        "¿Cómo quieres pagar?\n"
+        "💵 **Efectivo** - Pagas al recibir\n"
+        "💳 **Transferencia** - Te paso los datos\n"
+        "💳 **Tarjeta** - Pagas al recibir",
+        "🐾 ¡Listo, ya sé a dónde ir!\n{address}\n{shipping}\n\n{summary}\n\n"
+        "¿Cómo pagas?\n"
+        "💵 **Efectivo** - Pagas al recibir\n"
+        "💳 **Transferencia** - Te paso los datos\n"
+        "💳 **Tarjeta** - Pagas al recibir",
+    ],
+    "branch_missing_stock": [
+        "🐕 ¡Guau! En **{branch}** no hay existencia de: {missing}.\n{alternatives}"
+        "¿Quieres elegir otra sucursal o que te lo llevemos a domicilio? 🚚",
+        "🐾 Uy, a **{branch}** le falta: {missing}.\n{alternatives}"
+        "¿Elegimos otra sucursal o te lo mandamos a domicilio? 🚚",
+    ],
+    "branch_confirmed": [
+        "🏪 ¡Perfecto! Recoges en **{branch}**\n📍 {address}\n🕐 {hours}\n\n{summary}\n\n"
+        "¿Cómo quieres pagar?\n"
+        "💵 **Efectivo** | 💳 **Transferencia** | 💳 **Tarjeta**",
+        "🤘 ¡Va! Te esperamos en **{branch}**\n📍 {address}\n🕐 {hours}\n\n{summary}\n\n"
+        "¿Cómo pagas?\n"
+        "💵 **Efectivo** | 💳 **Transferencia** | 💳 **Tarjeta**",
+    ],
+
+    # ===== Pago y cierre =====
+    "bank_transfer": [
+        "💳 ¡Perfecto! Aquí están los datos para transferencia:\n\n"
+        "🏦 Banco: BBVA\n"
+        "📝 Cuenta: 0123456789\n"
+        "🔢 CLABE: 012345678901234567\n"
+        "👤 Nombre: Animalicha SA de CV\n\n"
+        "💰 Total: **${total:.2f}**\n\n"
+        "Cuando hagas la transferencia, mándame foto del comprobante 📸",
+    ],
+    "confirm_order": [
+        "🐕 ¿Confirmamos el pedido? Responde 'sí' para confirmar o dime qué quieres cambiar.",
+        "🐾 ¿Lo cerramos así? Dime 'sí' para confirmar o qué quieres cambiar.",
+    ],
+    "order_confirmed": [
+        "🎉 **¡PEDIDO CONFIRMADO!** 🎉\n\n"
+        "📦 Pedido: **{order_number}**\n{delivery_info}\n💳 Pago: {payment}\n\n{summary}\n\n"
+        "¡Gracias, humano-amigo! Tu peludo va a estar feliz 🐕\n"
+        "¡Rock on! 🤘🐾",
+        "🤘 **¡PEDIDO CONFIRMADO!** 🎸\n\n"
+        "📦 Pedido: **{order_number}**\n{delivery_info}\n💳 Pago: {payment}\n\n{summary}\n\n"
+        "¡Gracias por elegir Animalicha! Nos vemos pronto 🐾",
+    ],
+}
+
+
+def render_order_template(key: str, **fields) -> str:
+    """Una de las redacciones de `key`, con los datos del pedido."""
+    return random.choice(ORDER_TEMPLATES[key]).format(**fields)
@@ -1,11 +1,11 @@
 """Nodo de información de productos con LLM conversacional."""
 
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
 import structlog
+from langchain_core.messages import AIMessage, HumanMessage
 
+from src.agent.degraded import llm_available
+from src.agent.llm import get_llm
 from src.agent.state import RuffoState
-from src.config.settings import settings
 from src.tools.sheets.products import search_products
 
 logger = structlog.get_logger()
@@ -83,7 +83,8 @@ def product_info_node(state: RuffoState) -> dict:
             context_str="El usuario pregunta por productos pero NO sabemos qué mascota tiene.",
             products_str="No hemos buscado aún.",
             user_message=last_message,
-            task="Pregúntale de forma amigable QUÉ MASCOTA tiene (¿perro o gato?). NO sugieras productos aún."
+            task="Pregúntale de forma amigable QUÉ MASCOTA tiene (¿perro o gato?). NO sugieras productos aún.",
+            fallback="🐾 ¡Guau! Para recomendarte bien, ¿tu peludo es perro o gato?",
         )
         return {
             "messages": [AIMessage(content=response)],
@@ -98,7 +99,8 @@ def product_info_node(state: RuffoState) -> dict:
             context_str=f"El usuario tiene un {context.pet_type}. NO sabemos qué tipo de producto busca.",
             products_str="No hemos buscado aún.",
             user_message=last_message,
-            task=f"Pregúntale qué tipo de producto busca para su {context.pet_type} (comida, snacks, juguetes, etc). NO sugieras productos específicos aún."
+            task=f"Pregúntale qué tipo de producto busca para su {context.pet_type} (comida, snacks, juguetes, etc). NO sugieras productos específicos aún.",
+            fallback=f"🐾 ¿Qué le buscamos a tu {context.pet_type}: comida, snacks, juguetes, arena…?",
         )
         return {
             "messages": [AIMessage(content=response)],
@@ -148,7 +150,9 @@ def product_info_node(state: RuffoState) -> dict:
         context_str=f"El usuario tiene un {context.pet_type} y busca {context.product_type_needed}.",
         products_str=products_str,
         user_message=last_message,
-        task="Muestra los productos encontrados de forma amigable. Si hay productos, pregunta cuál le interesa."
+        task="Muestra los productos encontrados de forma amigable. Si hay productos, pregunta cuál le interesa.",
+        fallback="🐕 ¡Guau! Mira lo que tengo" if products else
+        "🐕 ¡Guau! No encontré eso en mi catálogo. ¿Me lo describes diferente?",
     )
 
     # Agregar lista de productos si hay
@@ -172,14 +176,14 @@ def product_info_node(state: RuffoState) -> dict:
     }
 
 
-def _generate_llm_response(context_str: str, products_str: str, user_message: str, task: str) -> str:
-    """Genera una respuesta conversacional usando el LLM."""
+def _generate_llm_response(
+    context_str: str, products_str: str, user_message: str, task: str, fallback: str = ""
+) -> str:
+    """Genera una respuesta conversacional usando el LLM (en modo degradado, `fallback`)."""
+    if fallback and not llm_available():
+        return fallback
     try:
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            max_completion_tokens=500,
-        )
+        llm = get_llm(max_tokens=500)
 
         prompt = RUFFO_PRODUCT_PROMPT.format(
             context=context_str,
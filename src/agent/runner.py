@@ -0,0 +1,145 @@
+"""Ejecución asíncrona del agente Ruffo desde los canales."""
+
+import time
+from typing import Any, AsyncIterator
+
+import structlog
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.degraded import select_graph
+from src.agent.fast_path import try_fast_path
+from src.agent.history import schedule_summary
+from src.agent.metrics import record_latency
+
+logger = structlog.get_logger()
+
+# Texto de progreso por tool (se muestra mientras el agente trabaja)
+TOOL_PROGRESS = {
+    "search_products": "🔍 Buscando {query}…",
+    "get_product_by_id": "🔍 Revisando el producto…",
+    "get_products_by_category": "🔍 Buscando en {category}…",
+    "get_all_branches": "🏪 Consultando sucursales…",
+    "get_branch_by_id": "🏪 Consultando la sucursal…",
+    "get_branch_hours": "🕘 Revisando horarios…",
+    "find_nearest_branch": "📍 Buscando la sucursal más cercana…",
+    "add_to_cart": "🛒 Agregando al carrito…",
+    "remove_from_cart": "🛒 Actualizando tu carrito…",
+    "set_quantity": "🛒 Actualizando tu carrito…",
+    "view_cart": "🛒 Revisando tu carrito…",
+}
+DEFAULT_TOOL_PROGRESS = "🐕 Olfateando…"
+
+
+def last_ai_text(result: dict) -> str:
+    """Último mensaje del agente con texto (ignora los que solo llaman tools)."""
+    for msg in reversed(result.get("messages", [])):
+        if isinstance(msg, AIMessage) and msg.content and not getattr(msg, "tool_calls", None):
+            return msg.content
+    return ""
+
+
+def tool_progress_text(name: str, tool_input: Any = None) -> str:
+    """Texto de progreso para una tool ("🔍 Buscando croquetas…")."""
+    template = TOOL_PROGRESS.get(name, DEFAULT_TOOL_PROGRESS)
+    try:
+        return template.format(**tool_input) if isinstance(tool_input, dict) else template.format()
+    except (KeyError, IndexError):
+        return DEFAULT_TOOL_PROGRESS if name not in TOOL_PROGRESS else template.split(" {")[0] + "…"
+
+
+async def ask_agent(agent: Any, text: str, thread_id: str) -> str:
+    """
+    Envía un mensaje al agente con ainvoke y devuelve su respuesta.
+
+    El LLM se llama de forma asíncrona y las tools síncronas corren en el
+    pool acotado, así un turno lento no bloquea el event loop del canal.
+    Los mensajes triviales (saludo, despedida, sucursales, carrito) se
+    responden antes, sin LLM (src.agent.fast_path). Con el LLM saturado o
+    fallando el turno lo atiende el grafo híbrido (src.agent.degraded).
+
+    Args:
+        agent: Grafo compilado (create_ruffo_agent)
+        text: Mensaje del usuario
+        thread_id: ID de la conversación (con prefijo del canal)
+
+    Returns:
+        Texto de la respuesta ("" si el agente no respondió texto)
+    """
+    reply = await try_fast_path(agent, text, thread_id)
+    if reply is not None:
+        return reply
+
+    started = time.perf_counter()
+    result = await select_graph(agent).ainvoke(
+        {"messages": [HumanMessage(content=text)]},
+        config={"configurable": {"thread_id": thread_id}},
+    )
+    record_latency("agent.turn_ms", (time.perf_counter() - started) * 1000)
+    schedule_summary(thread_id)
+    return last_ai_text(result)
+
+
+async def stream_agent(agent: Any, text: str, thread_id: str) -> AsyncIterator[dict]:
+    """
+    Ejecuta el agente y va entregando eventos para mostrar progreso.
+
+    Eventos:
+    - {"type": "token", "text": ...}: fragmento de la respuesta del LLM
+    - {"type": "reset"}: empezó otro turno del LLM (descartar lo mostrado)
+    - {"type": "tool", "name": ..., "status": "start" | "end", "text": ...}:
+      progreso de tools (texto listo para mostrar)
+    - {"type": "done", "text": ...}: respuesta final completa
+
+    Si el consumidor deja de iterar (ej. el cliente se desconecta), al
+    cerrar el generador se cancela la ejecución del agente. Una respuesta
+    del camino rápido llega como un solo token y "done".
+    """
+    reply = await try_fast_path(agent, text, thread_id)
+    if reply is not None:
+        yield {"type": "token", "text": reply}
+        yield {"type": "done", "text": reply}
+        return
+
+    started = time.perf_counter()
+    config = {"configurable": {"thread_id": thread_id}}
+    streamed = ""
+    final = ""
+
+    events = select_graph(agent).astream_events(
+        {"messages": [HumanMessage(content=text)]}, config=config, version="v2"
+    )
+    try:
+        async for event in events:
+            kind = event["event"]
+
+            if kind == "on_chat_model_start":
+                if streamed:
+                    streamed = ""
+                    yield {"type": "reset"}
+
+            elif kind == "on_chat_model_stream":
+                chunk = event["data"].get("chunk")
+                content = getattr(chunk, "content", "")
+                if content and isinstance(content, str) and not getattr(chunk, "tool_call_chunks", None):
+                    streamed += content
+                    yield {"type": "token", "text": content}
+
+            elif kind in ("on_tool_start", "on_tool_end"):
+                yield {
+                    "type": "tool",
+                    "name": event["name"],
+                    "status": kind.removeprefix("on_tool_"),
+                    "text": tool_progress_text(event["name"], event["data"].get("input")),
+                }
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output")
+                if isinstance(output, dict):
+                    final = last_ai_text(output)
+    finally:
+        await events.aclose()
+
+    record_latency("agent.turn_ms", (time.perf_counter() - started) * 1000)
+    # El resumen del historial corre después de responder
+    schedule_summary(thread_id)
+    yield {"type": "done", "text": final or streamed}
@@ -1,13 +1,12 @@
 """Estado del agente Ruffo."""
 
-from typing import Annotated, Optional, Literal
-from typing_extensions import TypedDict
+from typing import Literal, Optional
+
 from langgraph.graph import MessagesState
-from pydantic import BaseModel, Field
 
 from src.schemas.customer import CustomerSession
-from src.schemas.order import OrderInProgress, DeliveryType, PaymentMethod
-from src.schemas.intents import UserIntent, ConversationContext
+from src.schemas.intents import ConversationContext, UserIntent
+from src.schemas.order import OrderInProgress
 
 
 class RuffoState(MessagesState):
@@ -113,6 +112,12 @@ def update_conversation_context(state: RuffoState, user_message: str) -> RuffoSt
     return state
 
 
+def checkout_in_progress(state: RuffoState) -> bool:
+    """Si hay un checkout abierto (un pedido ya confirmado no cuenta)."""
+    stage = state.get("order_stage")
+    return stage is not None and stage != "completed"
+
+
 class OrderStageTransitions:
     """Transiciones válidas entre etapas del pedido."""
 
@@ -1,12 +1,16 @@
 """Bot de Telegram principal."""
 
 import asyncio
+
+import structlog
 from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-import structlog
+from aiogram.enums import ParseMode
 
+from src.agent.llm import start_llm_warmup
 from src.config.settings import settings
+from src.tools.warmup import start_cache_warmup
+
 from .handlers import setup_handlers
 
 logger = structlog.get_logger()
@@ -44,6 +48,10 @@ async def run_telegram_bot():
     """
     bot, dp = create_telegram_bot()
 
+    # Cargar catálogo, calentar cachés y abrir la conexión al LLM mientras arranca el polling
+    start_cache_warmup()
+    start_llm_warmup()
+
     logger.info("Starting Telegram bot polling...")
 
     try:
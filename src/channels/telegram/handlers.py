@@ -1,13 +1,15 @@
 """Handlers de mensajes para el bot de Telegram con Agente ReAct."""
 
-from aiogram import Dispatcher, types, F
-from aiogram.filters import Command, CommandStart
-from aiogram.types import Message, CallbackQuery
-from langchain_core.messages import HumanMessage, AIMessage
 import structlog
+from aiogram import Dispatcher, F
+from aiogram.filters import Command, CommandStart
+from aiogram.types import CallbackQuery, Message
 
+from src.agent.checkpoint import get_checkpointer
 from src.agent.graph import create_ruffo_agent
-from .keyboards import get_main_menu_keyboard
+from src.agent.runner import stream_agent
+
+from .streaming import TelegramStreamer
 
 logger = structlog.get_logger()
 
@@ -19,10 +21,33 @@ def get_agent():
     """Obtiene o crea la instancia del agente."""
     global ruffo_agent
     if ruffo_agent is None:
-        ruffo_agent = create_ruffo_agent()
+        ruffo_agent = create_ruffo_agent(checkpointer=get_checkpointer())
     return ruffo_agent
 
 
+async def reply_streaming(
+    message: Message,
+    user_id: str,
+    text: str,
+    empty_text: str,
+    error_text: str,
+) -> str:
+    """
+    Responde en el chat del mensaje mostrando la respuesta del agente en streaming.
+
+    Si el agente falla se deja `error_text` en el placeholder.
+    """
+    streamer = TelegramStreamer(message.bot, message.chat.id)
+    try:
+        return await streamer.stream(
+            stream_agent(get_agent(), text, f"telegram-{user_id}"), empty_text=empty_text
+        )
+    except Exception as e:
+        logger.error("Error streaming agent response", error=str(e), user_id=user_id)
+        await streamer.finish(error_text)
+        return error_text
+
+
 def setup_handlers(dp: Dispatcher):
     """Configura todos los handlers del bot."""
 
@@ -34,34 +59,17 @@ def setup_handlers(dp: Dispatcher):
 
         logger.info("Start command received", user_id=user_id, user_name=user_name)
 
-        try:
-            agent = get_agent()
-            config = {"configurable": {"thread_id": f"telegram-{user_id}"}}
-
-            # Invocar el agente con mensaje de inicio
-            result = agent.invoke(
-                {"messages": [HumanMessage(content="Hola")]},
-                config=config
-            )
-
-            # Obtener última respuesta del agente
-            response = ""
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, AIMessage):
-                    response = msg.content
-                    break
-
-            if not response:
-                response = "¡Guau, guau! 🐾 Soy Ruffo de Animalicha 🤘 ¿En qué puedo ayudarte?"
-
-            await message.answer(response)
-
-        except Exception as e:
-            logger.error("Error in start handler", error=str(e))
-            await message.answer(
+        # Invocar el agente con mensaje de inicio (sin bloquear el polling)
+        await reply_streaming(
+            message,
+            user_id,
+            "Hola",
+            empty_text="¡Guau, guau! 🐾 Soy Ruffo de Animalicha 🤘 ¿En qué puedo ayudarte?",
+            error_text=(
                 "¡Guau, guau! 🐾 Soy Ruffo de Animalicha 🤘\n"
                 "¿En qué puedo ayudarte hoy, humano-amigo?"
-            )
+            ),
+        )
 
     @dp.message(Command("help"))
     async def handle_help(message: Message):
@@ -95,33 +103,17 @@ def setup_handlers(dp: Dispatcher):
 
         logger.info("Photo received", user_id=user_id)
 
-        try:
-            agent = get_agent()
-            config = {"configurable": {"thread_id": f"telegram-{user_id}"}}
-
-            # Enviar como mensaje de comprobante
-            result = agent.invoke(
-                {"messages": [HumanMessage(content="Te envío mi comprobante de pago")]},
-                config=config
-            )
-
-            response = ""
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, AIMessage):
-                    response = msg.content
-                    break
-
-            if not response:
-                response = "📸 ¡Recibido! Voy a procesarlo y te confirmaré pronto, humano-amigo 🤘"
-
-            await message.answer(response)
-
-        except Exception as e:
-            logger.error("Error processing photo", error=str(e))
-            await message.answer(
+        # Enviar como mensaje de comprobante
+        await reply_streaming(
+            message,
+            user_id,
+            "Te envío mi comprobante de pago",
+            empty_text="📸 ¡Recibido! Voy a procesarlo y te confirmaré pronto, humano-amigo 🤘",
+            error_text=(
                 "📸 ¡Recibido! Voy a procesarlo y te confirmaré pronto, humano-amigo.\n\n"
                 "¡Gracias! 🐾🤘"
-            )
+            ),
+        )
 
     @dp.message()
     async def handle_message(message: Message):
@@ -143,39 +135,21 @@ def setup_handlers(dp: Dispatcher):
             message=user_message[:50],
         )
 
-        try:
-            agent = get_agent()
-
-            # El thread_id mantiene la memoria de la conversación
-            config = {"configurable": {"thread_id": f"telegram-{user_id}"}}
-
-            # Invocar el agente - EL LLM DECIDE TODO
-            result = agent.invoke(
-                {"messages": [HumanMessage(content=user_message)]},
-                config=config
-            )
-
-            # Obtener la respuesta del agente
-            response = ""
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, AIMessage):
-                    response = msg.content
-                    break
-
-            if not response:
-                response = "🐕 ¡Guau! ¿Puedes repetirme eso, humano-amigo?"
-
-            logger.info("Response generated", user_id=user_id, response_length=len(response))
-
-            # Enviar respuesta (sin botones - conversación pura)
-            await message.answer(response)
-
-        except Exception as e:
-            logger.error("Error processing message", error=str(e), user_id=user_id)
-            await message.answer(
+        # Invocar el agente - EL LLM DECIDE TODO
+        # (el thread_id mantiene la memoria de la conversación; la respuesta
+        # se va mostrando mientras se genera, sin botones - conversación pura)
+        response = await reply_streaming(
+            message,
+            user_id,
+            user_message,
+            empty_text="🐕 ¡Guau! ¿Puedes repetirme eso, humano-amigo?",
+            error_text=(
                 "🐕 ¡Guau! Tuve un pequeño problema técnico.\n"
                 "¿Puedes intentar de nuevo?"
-            )
+            ),
+        )
+
+        logger.info("Response generated", user_id=user_id, response_length=len(response))
 
     @dp.callback_query()
     async def handle_callback(callback: CallbackQuery):
@@ -199,26 +173,13 @@ def setup_handlers(dp: Dispatcher):
 
         user_message = callback_messages.get(data, data)
 
-        try:
-            agent = get_agent()
-            config = {"configurable": {"thread_id": f"telegram-{user_id}"}}
-
-            result = agent.invoke(
-                {"messages": [HumanMessage(content=user_message)]},
-                config=config
-            )
-
-            response = ""
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, AIMessage):
-                    response = msg.content
-                    break
-
-            await callback.answer()
-            await callback.message.answer(response or "🐕 ¿Qué más necesitas?")
-
-        except Exception as e:
-            logger.error("Error in callback handler", error=str(e))
-            await callback.answer("Error procesando solicitud")
+        await callback.answer()
+        await reply_streaming(
+            callback.message,
+            user_id,
+            user_message,
+            empty_text="🐕 ¿Qué más necesitas?",
+            error_text="🐕 ¡Guau! Error procesando solicitud, ¿intentamos de nuevo?",
+        )
 
     logger.info("Telegram handlers configured (ReAct Agent)")
@@ -0,0 +1,207 @@
+"""Respuestas en streaming para Telegram: placeholder que se edita mientras el agente responde."""
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Optional
+
+import structlog
+from aiogram import Bot
+from aiogram.enums import ChatAction
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from src.agent.metrics import increment, record_latency
+from src.config.settings import settings
+
+logger = structlog.get_logger()
+
+# Límite de caracteres de un mensaje de Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+PLACEHOLDER_TEXT = "🐕 …"
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Parte un texto largo en mensajes de hasta `limit` caracteres (prefiere saltos de línea)."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+class TelegramStreamer:
+    """
+    Muestra la respuesta del agente conforme se genera.
+
+    - Envía la acción "escribiendo…" de inmediato
+    - Publica un placeholder y lo edita con los tokens (o el progreso de
+      las tools mientras aún no hay texto)
+    - Las ediciones intermedias van en texto plano y como máximo una por
+      `edit_interval` segundos (Telegram limita las ediciones por chat)
+    - La edición final va en Markdown, con fallback a texto plano
+
+    Registra el tiempo hasta el primer contenido visible (ttfc) como métrica.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        edit_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.edit_interval = (
+            settings.telegram_edit_interval_seconds if edit_interval is None else edit_interval
+        )
+        self.clock = clock
+
+        self.message_id: Optional[int] = None
+        self.shown = ""
+        self.edits = 0
+        self.started = clock()
+        self.first_content_ms: Optional[float] = None
+        self._next_edit_at = 0.0
+
+    async def start(self) -> None:
+        """Envía "escribiendo…" y el placeholder."""
+        try:
+            await self.bot.send_chat_action(chat_id=self.chat_id, action=ChatAction.TYPING)
+        except Exception as e:
+            logger.warning("Could not send typing action", error=str(e))
+
+        placeholder = await self.bot.send_message(
+            chat_id=self.chat_id, text=PLACEHOLDER_TEXT, parse_mode=None
+        )
+        self.message_id = placeholder.message_id
+        self.shown = PLACEHOLDER_TEXT
+        self._next_edit_at = self.clock() + self.edit_interval
+
+    async def stream(self, events: AsyncIterator[dict], empty_text: str) -> str:
+        """
+        Consume los eventos de `stream_agent` y deja la respuesta final en el chat.
+
+        Returns:
+            Texto final mostrado (`empty_text` si el agente no respondió texto)
+        """
+        if self.message_id is None:
+            await self.start()
+
+        text = ""
+        status = ""
+        final = ""
+
+        async for event in events:
+            kind = event["type"]
+            if kind == "token":
+                text += event["text"]
+            elif kind == "reset":
+                text = ""
+            elif kind == "tool" and event["status"] == "start":
+                status = event["text"]
+            elif kind == "done":
+                final = event["text"]
+                continue
+
+            await self._maybe_edit(text or status)
+
+        response = final or text or empty_text
+        await self.finish(response)
+        return response
+
+    async def finish(self, text: str) -> None:
+        """Edición final (Markdown); lo que no cabe va en mensajes adicionales."""
+        parts = split_message(text)
+
+        if self.message_id is None:
+            for part in parts:
+                await self._send(part)
+        else:
+            await self._edit(parts[0], final=True)
+            for part in parts[1:]:
+                await self._send(part)
+
+        self._mark_first_content()
+        total_ms = (self.clock() - self.started) * 1000
+        record_latency("telegram.response_ms", total_ms)
+        increment("telegram.edits", self.edits)
+
+        logger.info(
+            "Streamed response",
+            chat_id=self.chat_id,
+            ttfc_ms=round(self.first_content_ms, 1),
+            total_ms=round(total_ms, 1),
+            edits=self.edits,
+            length=len(text),
+        )
+
+    # ===========================================
+    # Ediciones
+    # ===========================================
+
+    def _mark_first_content(self) -> None:
+        if self.first_content_ms is None:
+            self.first_content_ms = (self.clock() - self.started) * 1000
+            record_latency("telegram.first_content_ms", self.first_content_ms)
+
+    async def _maybe_edit(self, display: str) -> None:
+        """Edita el placeholder si hay texto nuevo y ya pasó el intervalo."""
+        display = display[:MAX_MESSAGE_LENGTH]
+        if not display.strip() or display == self.shown:
+            return
+        if self.clock() < self._next_edit_at:
+            return
+        if await self._edit(display):
+            self._mark_first_content()
+
+    async def _edit(self, text: str, final: bool = False) -> bool:
+        """Edita el mensaje; en la edición final intenta Markdown y luego texto plano."""
+        if text == self.shown and not final:
+            return False
+
+        modes = [self.bot.default.parse_mode, None] if final else [None]
+        retried = False
+        while modes:
+            parse_mode = modes[0]
+            try:
+                await self.bot.edit_message_text(
+                    text=text,
+                    chat_id=self.chat_id,
+                    message_id=self.message_id,
+                    parse_mode=parse_mode,
+                )
+            except TelegramRetryAfter as e:
+                # Nos pasamos del límite: la final espera, las intermedias se saltan
+                self._next_edit_at = self.clock() + e.retry_after
+                if not final or retried:
+                    return False
+                retried = True
+                await asyncio.sleep(e.retry_after)
+                continue
+            except TelegramBadRequest as e:
+                if "not modified" in e.message:
+                    return False
+                if parse_mode is None:
+                    logger.warning("Could not edit streamed message", error=e.message)
+                    return False
+                modes.pop(0)  # Markdown inválido: reintentar en texto plano
+                continue
+
+            self.shown = text
+            self.edits += 1
+            self._next_edit_at = self.clock() + self.edit_interval
+            return True
+
+        return False
+
+    async def _send(self, text: str) -> None:
+        try:
+            await self.bot.send_message(chat_id=self.chat_id, text=text)
+        except TelegramBadRequest:
+            await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode=None)
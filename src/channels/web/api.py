@@ -1,17 +1,26 @@
 """API FastAPI para el chat de Ruffo."""
 
 import uuid
-import structlog
 from pathlib import Path
 from typing import Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+
+import structlog
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage, AIMessage
 
+from src.agent.checkpoint import get_checkpointer, get_checkpointer_stats
+from src.agent.degraded import get_llm_health
+from src.agent.fast_path import get_fast_path_stats
 from src.agent.graph import create_ruffo_agent
+from src.agent.llm import get_llm_registry, start_llm_warmup
+from src.agent.llm_cache import get_llm_cache
+from src.agent.runner import ask_agent
+from src.channels.web.streaming import SSE_HEADERS, sse_chat_events
+from src.tools.memo import get_tool_memo
+from src.tools.warmup import get_warmup_status, start_cache_warmup
 
 logger = structlog.get_logger()
 
@@ -31,11 +40,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Crear agente una sola vez
+# Crear agente una sola vez (conversaciones persistidas en SQLite)
 logger.info("Initializing Ruffo agent for web...")
-agent = create_ruffo_agent()
+agent = create_ruffo_agent(checkpointer=get_checkpointer())
 logger.info("Ruffo agent ready!")
 
+# Cargar catálogo y calentar cachés en segundo plano
+start_cache_warmup()
+
+
+@app.on_event("startup")
+async def warm_llm_pool():
+    """Abre la conexión al LLM en el loop que atiende las peticiones."""
+    start_llm_warmup()
+
 
 class ChatRequest(BaseModel):
     """Request para enviar un mensaje."""
@@ -60,7 +78,6 @@ async def chat(request: ChatRequest):
     try:
         # Generar thread_id si no existe
         thread_id = request.thread_id or str(uuid.uuid4())
-        config = {"configurable": {"thread_id": f"web-{thread_id}"}}
 
         logger.info(
             "Chat request received",
@@ -68,18 +85,8 @@ async def chat(request: ChatRequest):
             message=request.message[:50]
         )
 
-        # Invocar el agente
-        result = agent.invoke(
-            {"messages": [HumanMessage(content=request.message)]},
-            config=config
-        )
-
-        # Extraer respuesta del agente
-        response = ""
-        for msg in reversed(result.get("messages", [])):
-            if isinstance(msg, AIMessage) and msg.content and not getattr(msg, 'tool_calls', None):
-                response = msg.content
-                break
+        # Invocar el agente sin bloquear el worker (ainvoke + tools en pool acotado)
+        response = await ask_agent(agent, request.message, f"web-{thread_id}")
 
         if not response:
             response = "🐕 ¡Guau! Tuve un problemita. ¿Puedes repetirme eso?"
@@ -97,10 +104,59 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Chat con la respuesta en streaming (Server-Sent Events).
+
+    Emite eventos start, token, tool (progreso de búsquedas), reset, done
+    y error. Si el cliente se desconecta se cancela el turno del agente.
+    """
+    thread_id = request.thread_id or str(uuid.uuid4())
+
+    logger.info(
+        "Chat stream request received",
+        thread_id=thread_id,
+        message=request.message[:50]
+    )
+
+    return StreamingResponse(
+        sse_chat_events(
+            agent,
+            request.message,
+            thread_id,
+            f"web-{thread_id}",
+            is_disconnected=http_request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @app.get("/api/health")
-async def health():
-    """Health check endpoint."""
-    return {"status": "ok", "agent": "ruffo"}
+async def health(require_warm: bool = False):
+    """
+    Health check endpoint.
+
+    Con require_warm=true responde 503 mientras las cachés se calientan
+    (para readiness probes del balanceador).
+    """
+    warmup = get_warmup_status()
+    body = {
+        "status": "ok",
+        "agent": "ruffo",
+        "warmup": warmup,
+        "conversations": get_checkpointer_stats(),
+        "llm_clients": get_llm_registry().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "fast_path": get_fast_path_stats(),
+        "llm_health": get_llm_health().stats(),
+        "tool_memo": get_tool_memo().stats(),
+    }
+    if require_warm and not warmup["warm"]:
+        body["status"] = "warming"
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 
 # Rutas para archivos estáticos
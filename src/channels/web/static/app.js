@@ -58,16 +58,17 @@ async function handleSubmit(e) {
 }
 
 /**
- * Send message to API
+ * Send message to API (streaming response)
  */
 async function sendMessage(message) {
     setLoading(true);
 
     // Show typing indicator
     const typingEl = showTypingIndicator();
+    let bubble = null;
 
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -78,35 +79,92 @@ async function sendMessage(message) {
             })
         });
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-
-        // Save thread ID for conversation continuity
-        threadId = data.thread_id;
-
-        // Remove typing indicator
-        removeTypingIndicator(typingEl);
+        let text = '';
+        let finished = false;
+
+        await readEvents(response, (event, data) => {
+            if (event === 'start') {
+                threadId = data.thread_id;
+            } else if (event === 'tool' && data.status === 'start' && !text) {
+                setTypingStatus(typingEl, data.text);
+            } else if (event === 'reset') {
+                text = '';
+                if (bubble) setBubbleText(bubble, '');
+            } else if (event === 'token') {
+                text += data.text;
+                if (!bubble) {
+                    removeTypingIndicator(typingEl);
+                    bubble = addMessage('', 'ruffo');
+                }
+                setBubbleText(bubble, text);
+            } else if (event === 'done') {
+                finished = true;
+                threadId = data.thread_id;
+                removeTypingIndicator(typingEl);
+                if (!bubble) bubble = addMessage('', 'ruffo');
+                setBubbleText(bubble, data.response);
+            } else if (event === 'error') {
+                throw new Error(data.detail);
+            }
+        });
 
-        // Add Ruffo's response
-        addMessage(data.response, 'ruffo');
+        if (!finished) {
+            throw new Error('Stream ended before the response was complete');
+        }
 
     } catch (error) {
-        console.error('Error sending message:', error);
+        console.error('Error streaming message:', error);
 
         // Remove typing indicator
         removeTypingIndicator(typingEl);
 
         // Show error message
-        addMessage('🐕 ¡Guau! Tuve un problema técnico. ¿Puedes intentar de nuevo?', 'ruffo');
+        const errorText = '🐕 ¡Guau! Tuve un problema técnico. ¿Puedes intentar de nuevo?';
+        if (bubble) {
+            setBubbleText(bubble, errorText);
+        } else {
+            addMessage(errorText, 'ruffo');
+        }
     } finally {
         setLoading(false);
         messageInput.focus();
     }
 }
 
+/**
+ * Read Server-Sent Events from a fetch response
+ */
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of raw.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 /**
  * Add a message to the chat
  */
@@ -126,6 +184,26 @@ function addMessage(text, sender) {
 
     messagesContainer.appendChild(messageEl);
     scrollToBottom();
+    return messageEl.querySelector('.message-bubble');
+}
+
+/**
+ * Replace the text of a message bubble (used while streaming)
+ */
+function setBubbleText(bubble, text) {
+    bubble.innerHTML = escapeHtml(text).replace(/\n/g, '<br>');
+    scrollToBottom();
+}
+
+/**
+ * Show tool progress ("🔍 Buscando croquetas…") in the typing indicator
+ */
+function setTypingStatus(typingEl, text) {
+    const bubble = typingEl.querySelector('.message-bubble');
+    if (bubble) {
+        bubble.textContent = text;
+        scrollToBottom();
+    }
 }
 
 /**
@@ -0,0 +1,95 @@
+"""Streaming de respuestas del agente como Server-Sent Events (SSE)."""
+
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import structlog
+
+from src.agent.metrics import increment, record_latency
+from src.agent.runner import stream_agent
+
+logger = structlog.get_logger()
+
+EMPTY_RESPONSE = "🐕 ¡Guau! Tuve un problemita. ¿Puedes repetirme eso?"
+
+# Cabeceras para que proxies (nginx, Vercel) no acumulen el stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Formatea un evento SSE."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_chat_events(
+    agent: Any,
+    message: str,
+    thread_id: str,
+    agent_thread_id: str,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Eventos SSE de un turno del agente.
+
+    - start: {"thread_id"}
+    - token: {"text"} fragmento de la respuesta
+    - reset: el agente empezó otra respuesta (descartar lo mostrado)
+    - tool: {"name", "status", "text"} progreso ("🔍 Buscando croquetas…")
+    - done: {"response", "thread_id"}
+    - error: {"detail"}
+
+    Si el cliente se desconecta se deja de iterar el agente; al cerrar el
+    stream se cancela la ejecución y no se gastan más tokens del LLM.
+
+    Args:
+        agent: Grafo compilado
+        message: Mensaje del usuario
+        thread_id: ID de conversación que ve el cliente
+        agent_thread_id: ID de conversación en el checkpointer (con prefijo del canal)
+        is_disconnected: Corutina que indica si el cliente se fue (Request.is_disconnected)
+    """
+    started = time.perf_counter()
+    first_token = True
+    finished = False
+
+    yield sse_event("start", {"thread_id": thread_id})
+
+    events = stream_agent(agent, message, agent_thread_id)
+    try:
+        async for event in events:
+            if is_disconnected is not None and await is_disconnected():
+                break
+
+            kind = event["type"]
+            if kind == "token":
+                if first_token:
+                    first_token = False
+                    record_latency("web.first_token_ms", (time.perf_counter() - started) * 1000)
+                yield sse_event("token", {"text": event["text"]})
+            elif kind == "reset":
+                yield sse_event("reset", {})
+            elif kind == "tool":
+                yield sse_event("tool", {k: event[k] for k in ("name", "status", "text")})
+            elif kind == "done":
+                finished = True
+                response = event["text"] or EMPTY_RESPONSE
+                record_latency("web.response_ms", (time.perf_counter() - started) * 1000)
+                logger.info("Chat stream finished", thread_id=thread_id, response_length=len(response))
+                yield sse_event("done", {"response": response, "thread_id": thread_id})
+
+    except Exception as e:
+        logger.error("Error in chat stream", thread_id=thread_id, error=str(e))
+        yield sse_event("error", {"detail": str(e)})
+        finished = True
+
+    finally:
+        # Cierra el stream del agente (cancela el turno si el cliente se fue)
+        await events.aclose()
+        if not finished:
+            increment("web.streams_cancelled")
+            logger.info("Chat stream cancelled by client", thread_id=thread_id,
+                        elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
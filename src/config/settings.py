@@ -1,8 +1,9 @@
 """Configuración centralizada usando Pydantic Settings."""
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal, Optional
+
 from pydantic import Field
-from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,10 @@ class Settings(BaseSettings):
         default=None,
         description="Token del bot de Telegram",
     )
+    telegram_edit_interval_seconds: float = Field(
+        default=1.0,
+        description="Intervalo mínimo entre ediciones del mensaje al hacer streaming en Telegram",
+    )
 
     # Google Sheets
     google_credentials_path: str = Field(
@@ -41,6 +46,131 @@ class Settings(BaseSettings):
         description="Nombre de la hoja a usar",
     )
 
+    catalog_refresh_seconds: int = Field(
+        default=300,
+        description="Segundos que se reutiliza el snapshot del catálogo antes de recargar la hoja",
+    )
+
+    # Popularidad de productos (ranking de búsqueda)
+    popularity_store_path: str = Field(
+        default="data/popularity.json",
+        description="Archivo local donde se guardan los contadores de popularidad",
+    )
+    popularity_half_life_days: float = Field(
+        default=14.0,
+        description="Vida media (días) del decaimiento de popularidad",
+    )
+    popularity_max_bonus: float = Field(
+        default=15.0,
+        description="Puntos máximos que la popularidad suma al score de búsqueda",
+    )
+    popularity_flush_every: int = Field(
+        default=20,
+        description="Eventos acumulados antes de volcar los contadores a disco",
+    )
+    popularity_flush_seconds: float = Field(
+        default=60.0,
+        description="Segundos máximos entre volcados de contadores",
+    )
+
+    # Caché de búsquedas y warm-up
+    search_cache_size: int = Field(
+        default=1024,
+        description="Resultados de búsqueda que se guardan en caché por versión de catálogo",
+    )
+    tool_memo_enabled: bool = Field(
+        default=True,
+        description="Repetir una tool con los mismos argumentos en un thread devuelve el resultado anterior",
+    )
+    tool_memo_size: int = Field(
+        default=2048,
+        description="Resultados de tools memorizados (todos los threads)",
+    )
+    tool_memo_ttl_seconds: float = Field(
+        default=900.0,
+        description="Segundos que se reutiliza el resultado de una tool en un thread",
+    )
+    query_log_path: str = Field(
+        default="data/query_log.json",
+        description="Archivo local con el conteo de búsquedas normalizadas",
+    )
+    query_log_max_keys: int = Field(
+        default=1000,
+        description="Búsquedas distintas que conserva el log (las más frecuentes)",
+    )
+    warmup_top_queries: int = Field(
+        default=50,
+        description="Búsquedas más frecuentes que se repiten al cargar el catálogo",
+    )
+
+    # Directorio de sucursales (pestaña de la hoja; sin ella se usan las default)
+    branches_sheet_name: Optional[str] = Field(
+        default=None,
+        description="Pestaña con las sucursales (ID, Nombre, Direccion, Telefono, Horario, Servicios, Lat, Lng)"
+    )
+
+    # Inventario por sucursal (pestaña de la hoja o archivo CSV local)
+    inventory_sheet_name: Optional[str] = Field(
+        default=None,
+        description="Pestaña con existencias por sucursal (Clave + una columna por sucursal)"
+    )
+    inventory_file_path: Optional[str] = Field(
+        default=None,
+        description="CSV local de existencias (tiene prioridad sobre la pestaña)"
+    )
+
+    # Memoria de conversaciones (checkpointer SQLite)
+    checkpoint_db_path: str = Field(
+        default="data/checkpoints.db",
+        description="Archivo SQLite donde se guardan las conversaciones (en Vercel usar /tmp/...)",
+    )
+    checkpoint_hot_threads: int = Field(
+        default=256,
+        description="Conversaciones recientes que se mantienen en memoria",
+    )
+    checkpoint_flush_ms: int = Field(
+        default=50,
+        description="Cada cuántos ms se escriben en lote los checkpoints pendientes",
+    )
+    checkpoint_delta_messages: bool = Field(
+        default=True,
+        description="Guardar el historial como log append-only con deltas por paso",
+    )
+    checkpoint_compact_every: int = Field(
+        default=20,
+        description="Cada cuántos pasos se escribe un snapshot completo del historial",
+    )
+    checkpoint_idle_ttl_seconds: int = Field(
+        default=24 * 3600,
+        description="Inactividad tras la cual una conversación se archiva comprimida (0 = nunca)",
+    )
+    checkpoint_max_live_threads: int = Field(
+        default=10000,
+        description="Máximo de conversaciones vivas; las menos recientes se archivan",
+    )
+    checkpoint_sweep_seconds: int = Field(
+        default=300,
+        description="Cada cuántos segundos se revisan conversaciones para archivar",
+    )
+    checkpoint_serializer: Literal["compact", "default"] = Field(
+        default="compact",
+        description="Serializador de checkpoints: compacto por esquema o el de LangGraph",
+    )
+    checkpoint_compress_over_bytes: int = Field(
+        default=1024,
+        description="Tamaño a partir del cual se comprime un valor serializado (0 = nunca)",
+    )
+
+    # Ejecución de tools síncronas (pool de hilos acotado)
+    tool_thread_pool_size: int = Field(
+        default=8,
+        description="Máximo de tools síncronas ejecutándose a la vez fuera del event loop"
+    )
+    tool_concurrency_limits: str = Field(
+        default="search_products=4,get_products_by_category=4",
+        description="Máximo de llamadas simultáneas por tool síncrona: 'tool=n' separadas por coma (las demás solo las limita el pool)",
+    )
+
     # Slack (opcional)
     slack_bot_token: Optional[str] = Field(
         default=None,
@@ -73,6 +203,102 @@ class Settings(BaseSettings):
         default=1024,
         description="Máximo de tokens en respuesta (incluye razonamiento para GPT-5 mini)",
     )
+    llm_pool_max_connections: int = Field(
+        default=20,
+        description="Conexiones HTTP a OpenAI compartidas por todos los clientes del proceso",
+    )
+    llm_pool_keepalive_seconds: float = Field(
+        default=60.0,
+        description="Cuánto se conserva abierta una conexión inactiva al API",
+    )
+    llm_timeout_seconds: float = Field(
+        default=60.0,
+        description="Timeout de las peticiones al LLM",
+    )
+    llm_warmup: bool = Field(
+        default=True,
+        description="Abrir la conexión al API de OpenAI al arrancar",
+    )
+    llm_cache_enabled: bool = Field(
+        default=True,
+        description="Servir desde caché los prompts deterministas (clasificación, saludo inicial, errores de pedido)",
+    )
+    llm_cache_size: int = Field(
+        default=512,
+        description="Respuestas del LLM en la caché en memoria",
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default=3600,
+        description="Vida de una respuesta en caché (0 = sin límite)",
+    )
+    llm_cache_db_path: str = Field(
+        default="",
+        description="Archivo SQLite para persistir la caché del LLM (vacío = solo memoria)",
+    )
+
+    # Grafo que atiende: agente ReAct o grafo híbrido de nodos deterministas
+    agent_mode: Literal["react", "hybrid"] = Field(
+        default="react",
+        description="Agente ReAct (el LLM decide todo) o grafo híbrido (LLM solo para redactar)",
+    )
+    degraded_mode_auto: bool = Field(
+        default=True,
+        description="Pasar al grafo híbrido sin LLM cuando el LLM está saturado o fallando",
+    )
+    degraded_max_inflight_llm: int = Field(
+        default=16,
+        description="Llamadas simultáneas al LLM a partir de las cuales se degrada",
+    )
+    degraded_error_rate: float = Field(
+        default=0.5,
+        description="Tasa de errores del LLM (en la ventana) a partir de la cual se degrada",
+    )
+    degraded_window_seconds: float = Field(
+        default=60.0,
+        description="Ventana para medir la tasa de errores del LLM",
+    )
+    degraded_min_calls: int = Field(
+        default=5,
+        description="Llamadas mínimas en la ventana para juzgar la tasa de errores",
+    )
+    degraded_cooldown_seconds: float = Field(
+        default=30.0,
+        description="Tiempo en modo degradado antes de volver a probar el agente",
+    )
+
+    # Redacción del flujo de pedido: plantillas; el LLM solo reescribe estas situaciones
+    order_llm_stages: str = Field(
+        default="",
+        description="Situaciones del pedido que reescribe el LLM, separadas por coma ('*' = todas, vacío = ninguna)",
+    )
+
+    # Respuestas sin LLM para mensajes triviales (saludo, despedida, sucursales, carrito)
+    fast_path_enabled: bool = Field(
+        default=True,
+        description="Responder con plantillas los mensajes triviales antes del agente",
+    )
+
+    # Historial que ve el modelo (recorte por presupuesto + resumen)
+    history_max_tokens: int = Field(
+        default=6000,
+        description="Presupuesto de tokens de la entrada del modelo (0 = mandar todo el historial)",
+    )
+    history_keep_exchanges: int = Field(
+        default=4,
+        description="Últimos intercambios que siempre se mandan completos",
+    )
+    history_summaries: bool = Field(
+        default=True,
+        description="Resumir en segundo plano los turnos que quedan fuera del presupuesto",
+    )
+    history_elide_tool_outputs: bool = Field(
+        default=True,
+        description="Omitir ante el modelo las salidas de tools de turnos anteriores (quedan sus refs)",
+    )
+    tool_tokens_sample_every: int = Field(
+        default=20,
+        description="Cada cuántas llamadas se mide también el JSON completo de una tool compacta (0 = nunca)",
+    )
 
 
 # Instancia global de configuración
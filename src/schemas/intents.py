@@ -1,8 +1,9 @@
 """Esquemas de intenciones del usuario."""
 
-from pydantic import BaseModel, Field
-from typing import Optional
 from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 
 class UserIntent(str, Enum):
@@ -15,6 +16,7 @@ class UserIntent(str, Enum):
     PROBLEM_ESCALATION = "problem_escalation"
     WHOLESALER = "wholesaler"
     ORDER_STATUS = "order_status"
+    CART_STATUS = "cart_status"
     PAYMENT_PROOF = "payment_proof"
     FAREWELL = "farewell"
     UNKNOWN = "unknown"
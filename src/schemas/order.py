@@ -1,12 +1,17 @@
 """Esquemas de pedido."""
 
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
 from datetime import datetime
 from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 from .product import ProductInCart
 
+# Envío cuando todavía no se conoce la zona de la dirección
+DEFAULT_SHIPPING_FEE = 50.0
+DEFAULT_FREE_SHIPPING_OVER = 500.0
+
 
 class DeliveryType(str, Enum):
     """Tipos de entrega."""
@@ -90,11 +95,25 @@ class OrderInProgress(BaseModel):
     items: list[ProductInCart] = Field(default_factory=list)
     delivery_type: Optional[DeliveryType] = None
     delivery_address: Optional[str] = None
+    delivery_zone: Optional[str] = None
+    delivery_fee: Optional[float] = None
+    free_shipping_over: Optional[float] = None
     branch_id: Optional[str] = None
     branch_name: Optional[str] = None
     payment_method: Optional[PaymentMethod] = None
     payment_proof_url: Optional[str] = None
     notes: Optional[str] = None
+    llm_calls: int = Field(default=0, description="Llamadas al LLM para redactar este checkout")
+
+    # product_id -> item; se reconstruye si `items` se reemplazó (o al deserializar)
+    _index: Optional[dict[str, ProductInCart]] = PrivateAttr(default=None)
+    _indexed_items: Optional[list[ProductInCart]] = PrivateAttr(default=None)
+
+    def __eq__(self, other: object) -> bool:
+        """Compara solo los campos (el índice es una caché)."""
+        if not isinstance(other, OrderInProgress):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
 
     @property
     def subtotal(self) -> float:
@@ -103,10 +122,11 @@ class OrderInProgress(BaseModel):
 
     @property
     def shipping_cost(self) -> float:
-        """Calcula el costo de envío."""
+        """Calcula el costo de envío según la zona de la dirección."""
         if self.delivery_type == DeliveryType.DELIVERY:
-            # Envío gratis arriba de $500
-            return 0.0 if self.subtotal >= 500 else 50.0
+            fee = DEFAULT_SHIPPING_FEE if self.delivery_fee is None else self.delivery_fee
+            free_over = DEFAULT_FREE_SHIPPING_OVER if self.free_shipping_over is None else self.free_shipping_over
+            return 0.0 if self.subtotal >= free_over else fee
         return 0.0
 
     @property
@@ -119,28 +139,56 @@ class OrderInProgress(BaseModel):
         """Cuenta total de items."""
         return sum(item.quantity for item in self.items)
 
+    def _item_index(self) -> dict[str, ProductInCart]:
+        """Índice por product_id de los items actuales."""
+        if (
+            self._index is None
+            or self._indexed_items is not self.items
+            or len(self._index) != len(self.items)
+        ):
+            self._index = {item.product_id: item for item in self.items}
+            self._indexed_items = self.items
+        return self._index
+
+    def get_item(self, product_id: str) -> Optional[ProductInCart]:
+        """Item del carrito con ese product_id (None si no está)."""
+        return self._item_index().get(product_id)
+
     def add_item(self, item: ProductInCart) -> None:
-        """Agrega un item al pedido."""
-        # Verificar si ya existe el producto
-        for existing in self.items:
-            if existing.product_id == item.product_id:
-                existing.quantity += item.quantity
-                return
+        """Agrega un item al pedido (si ya existe el producto suma la cantidad)."""
+        existing = self.get_item(item.product_id)
+        if existing is not None:
+            existing.quantity += item.quantity
+            return
         self.items.append(item)
+        self._item_index()[item.product_id] = item
 
     def remove_item(self, product_id: str) -> bool:
         """Elimina un item del pedido."""
-        for i, item in enumerate(self.items):
-            if item.product_id == product_id:
-                self.items.pop(i)
-                return True
-        return False
+        item = self._item_index().pop(product_id, None)
+        if item is None:
+            return False
+        self.items.remove(item)
+        return True
+
+    def set_quantity(self, product_id: str, quantity: int) -> bool:
+        """Cambia la cantidad de un item (0 o menos lo elimina). False si no está."""
+        if quantity <= 0:
+            return self.remove_item(product_id)
+        item = self.get_item(product_id)
+        if item is None:
+            return False
+        item.quantity = quantity
+        return True
 
     def clear(self) -> None:
         """Limpia el pedido."""
         self.items = []
         self.delivery_type = None
         self.delivery_address = None
+        self.delivery_zone = None
+        self.delivery_fee = None
+        self.free_shipping_over = None
         self.branch_id = None
         self.payment_method = None
 
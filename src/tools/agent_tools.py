@@ -5,14 +5,21 @@ Este módulo exporta todas las herramientas que el agente puede usar.
 El LLM decide cuándo y cómo usar cada tool.
 """
 
-from typing import Optional, Annotated
-from langchain_core.tools import tool
-from pydantic import BaseModel, Field
 import structlog
 
+from src.tools.cart import CART_TOOLS
+from src.tools.executor import offload_sync_tool
+from src.tools.memo import memo_tool
+from src.tools.render import compact_tool
+from src.tools.sheets.branches import (
+    find_nearest_branch,
+    get_all_branches,
+    get_branch_by_id,
+    get_branch_hours,
+)
+
 # Importar tools existentes
-from src.tools.sheets.products import search_products, get_product_by_id, get_products_by_category
-from src.tools.sheets.branches import get_all_branches, get_branch_by_id, find_nearest_branch
+from src.tools.sheets.products import get_product_by_id, get_products_by_category, search_products
 
 logger = structlog.get_logger()
 
@@ -21,46 +28,29 @@ logger = structlog.get_logger()
 # TOOLS PARA EL AGENTE RUFFO
 # ============================================
 
-# Las tools de productos y sucursales ya están definidas en sus módulos
-# Aquí las reexportamos y agregamos tools adicionales para el carrito
-
-
-@tool
-def get_cart_status(cart_items: list = None) -> str:
-    """
-    Muestra el estado actual del carrito de compras.
-    Úsala cuando el cliente pregunte qué tiene en su carrito.
-
-    Returns:
-        Resumen del carrito con productos y total
-    """
-    if not cart_items:
-        return "El carrito está vacío. ¿Qué te gustaría agregar?"
-
-    total = sum(item.get("price", 0) * item.get("quantity", 1) for item in cart_items)
-    items_text = "\n".join([
-        f"- {item['name']} x{item.get('quantity', 1)} = ${item.get('price', 0) * item.get('quantity', 1):.2f}"
-        for item in cart_items
-    ])
-
-    return f"Carrito actual:\n{items_text}\n\nTotal: ${total:.2f}"
+# Las tools de productos y sucursales ya están definidas en sus módulos;
+# las del carrito (src.tools.cart) trabajan sobre el pedido del estado del grafo
 
 
 # Lista de todas las tools disponibles para el agente
-RUFFO_TOOLS = [
+# (las síncronas corren en el pool acotado cuando el agente se usa con ainvoke;
+# las de productos responden al modelo con la tabla compacta de render.py;
+# las de catálogo y sucursales repiten su resultado dentro del thread, memo.py)
+RUFFO_TOOLS = [memo_tool(offload_sync_tool(t)) for t in [
     # Búsqueda de productos
-    search_products,
-    get_product_by_id,
-    get_products_by_category,
+    compact_tool(search_products),
+    compact_tool(get_product_by_id),
+    compact_tool(get_products_by_category),
 
     # Información de sucursales
     get_all_branches,
     get_branch_by_id,
     find_nearest_branch,
+    get_branch_hours,
 
-    # Carrito (básico)
-    get_cart_status,
-]
+    # Carrito (en el estado del thread)
+    *CART_TOOLS,
+]]
 
 
 def get_tools_description() -> str:
@@ -0,0 +1,243 @@
+"""
+Tools del carrito sobre el estado del agente.
+
+El carrito vive en el estado del grafo (`order`, un OrderInProgress que
+se guarda en el checkpoint del thread). Las tools lo leen con
+InjectedState, así el modelo no tiene que cargar el carrito en su
+contexto ni repetirlo como argumento. No escriben el pedido completo:
+devuelven operaciones (`add`, `remove`, `set`) que el reducer
+`merge_order` aplica sobre el carrito actual, de modo que varias
+llamadas en el mismo paso se componen.
+
+Al modelo le responden solo el cambio y los totales, con la ref del
+producto ("+2 PRO PLAN ADULTO 20 KG (ref 3k9x0a) | carrito: 3 pzas, $3800.00").
+"""
+
+from typing import Annotated, Any, Optional, Union
+
+import structlog
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.prebuilt import InjectedState
+from langgraph.types import Command
+
+from src.schemas.order import OrderInProgress
+from src.schemas.product import ProductInCart
+from src.tools.popularity import get_popularity_tracker
+from src.tools.render import product_handle, resolve_handle
+from src.tools.sheets.products import get_catalog, get_product_by_id
+
+logger = structlog.get_logger()
+
+# Operación sobre el carrito: {"op": "add" | "remove" | "set", "product_id": ..., ...}
+CartOp = dict[str, Any]
+
+# Tools cuya tabla de productos es "lo que se le mostró al cliente"
+SEARCH_TOOLS = ("search_products", "get_products_by_category")
+
+
+# =====================================================
+# REDUCER DEL ESTADO
+# =====================================================
+
+def apply_cart_ops(order: OrderInProgress, ops: list[CartOp]) -> None:
+    """Aplica las operaciones sobre el pedido (lo modifica)."""
+    for op in ops:
+        kind, product_id = op["op"], op["product_id"]
+        if kind == "add":
+            order.add_item(ProductInCart(
+                product_id=product_id,
+                product_name=op["product_name"],
+                quantity=op["quantity"],
+                unit_price=op["unit_price"],
+            ))
+        elif kind == "remove":
+            order.remove_item(product_id)
+        elif kind == "set":
+            if not order.set_quantity(product_id, op["quantity"]) and op["quantity"] > 0 and "unit_price" in op:
+                # Se quitó en otra llamada del mismo paso: se vuelve a agregar
+                apply_cart_ops(order, [{**op, "op": "add"}])
+
+
+def merge_order(
+    current: Optional[OrderInProgress],
+    update: Union[OrderInProgress, list[CartOp], None],
+) -> Optional[OrderInProgress]:
+    """
+    Reducer de `order`: un pedido completo lo reemplaza; una lista de
+    operaciones se aplica sobre una copia del actual.
+    """
+    if not isinstance(update, list):
+        return update
+    order = current.model_copy(deep=True) if current is not None else OrderInProgress()
+    apply_cart_ops(order, update)
+    return order
+
+
+# =====================================================
+# SALIDA COMPACTA
+# =====================================================
+
+def _cart_line(order: OrderInProgress) -> str:
+    if not order.items:
+        return "carrito vacío"
+    return f"carrito: {order.item_count} pzas, ${order.subtotal:.2f}"
+
+
+def _item_label(item: ProductInCart) -> str:
+    return f"{item.product_name} (ref {product_handle(item.product_id)})"
+
+
+def _reply(
+    tool_call_id: str,
+    text: str,
+    ops: Optional[list[CartOp]] = None,
+    name: str = "",
+) -> Command:
+    """Command con la salida para el modelo y, si hay, las operaciones para el estado."""
+    update: dict[str, Any] = {"messages": [ToolMessage(content=text, tool_call_id=tool_call_id, name=name)]}
+    if ops:
+        update["order"] = ops
+    return Command(update=update)
+
+
+def _current_order(state: dict) -> OrderInProgress:
+    order = state.get("order")
+    return order.model_copy(deep=True) if order is not None else OrderInProgress()
+
+
+def _last_shown_ids(state: dict) -> list[str]:
+    """Claves de la última tabla de búsqueda del thread (por sus refs)."""
+    for message in reversed(state.get("messages", [])):
+        if isinstance(message, ToolMessage) and message.name in SEARCH_TOOLS:
+            refs = message.artifact.get("refs", []) if isinstance(message.artifact, dict) else []
+            catalog = get_catalog()
+            slots = [resolve_handle(catalog, ref) for ref in refs]
+            return [str(catalog.products[slot]["id"]) for slot in slots if slot is not None]
+    return []
+
+
+def _find_in_cart(order: OrderInProgress, product_id: str) -> Optional[ProductInCart]:
+    """Item por Clave o, si no, resolviendo la ref/SKU en el catálogo."""
+    item = order.get_item(product_id)
+    if item is None:
+        product = get_product_by_id.invoke({"product_id": product_id})
+        if product:
+            item = order.get_item(str(product["id"]))
+    return item
+
+
+# =====================================================
+# TOOLS
+# =====================================================
+
+@tool
+def add_to_cart(
+    product_id: str,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    quantity: int = 1,
+) -> Command:
+    """
+    Agrega un producto al carrito del cliente.
+    Úsala cuando el cliente decida llevar un producto.
+
+    Args:
+        product_id: ref (de la tabla de productos), Clave o SKU del producto
+        quantity: Piezas a agregar
+    """
+    if quantity <= 0:
+        return _reply(tool_call_id, "La cantidad debe ser mayor a 0.", name="add_to_cart")
+
+    product = get_product_by_id.invoke({"product_id": product_id})
+    if not product or not product.get("price"):
+        return _reply(tool_call_id, f"Producto no encontrado: {product_id}", name="add_to_cart")
+
+    op = {
+        "op": "add",
+        "product_id": str(product["id"]),
+        "product_name": product["name"],
+        "unit_price": float(product["price"]),
+        "quantity": quantity,
+    }
+    order = _current_order(state)
+    apply_cart_ops(order, [op])
+    item = order.get_item(op["product_id"])
+    text = f"+{quantity} {_item_label(item)} = {item.quantity} en carrito | {_cart_line(order)}"
+
+    # Popularidad: el producto terminó en el carrito (y lo demás de la tabla se mostró)
+    get_popularity_tracker().record_added(op["product_id"], _last_shown_ids(state))
+    logger.info("Cart item added", product_id=op["product_id"], quantity=quantity)
+    return _reply(tool_call_id, text, [op], name="add_to_cart")
+
+
+@tool
+def remove_from_cart(
+    product_id: str,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    """
+    Quita un producto del carrito del cliente.
+
+    Args:
+        product_id: ref, Clave o SKU del producto
+    """
+    order = _current_order(state)
+    item = _find_in_cart(order, product_id)
+    if item is None:
+        return _reply(tool_call_id, f"No está en el carrito: {product_id} | {_cart_line(order)}", name="remove_from_cart")
+
+    op = {"op": "remove", "product_id": item.product_id}
+    apply_cart_ops(order, [op])
+    logger.info("Cart item removed", product_id=item.product_id)
+    return _reply(tool_call_id, f"-{_item_label(item)} | {_cart_line(order)}", [op], name="remove_from_cart")
+
+
+@tool
+def set_quantity(
+    product_id: str,
+    quantity: int,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    """
+    Cambia cuántas piezas lleva el cliente de un producto del carrito (0 lo quita).
+
+    Args:
+        product_id: ref, Clave o SKU del producto
+        quantity: Nueva cantidad total
+    """
+    order = _current_order(state)
+    item = _find_in_cart(order, product_id)
+    if item is None:
+        return _reply(tool_call_id, f"No está en el carrito: {product_id} | {_cart_line(order)}", name="set_quantity")
+
+    op = {
+        "op": "set",
+        "product_id": item.product_id,
+        "product_name": item.product_name,
+        "unit_price": item.unit_price,
+        "quantity": quantity,
+    }
+    label = _item_label(item)
+    apply_cart_ops(order, [op])
+    text = f"{label} x{quantity}" if quantity > 0 else f"-{label}"
+    return _reply(tool_call_id, f"{text} | {_cart_line(order)}", [op], name="set_quantity")
+
+
+@tool
+def view_cart(state: Annotated[dict, InjectedState]) -> str:
+    """
+    Muestra el carrito actual del cliente con cantidades y total.
+    Úsala cuando el cliente pregunte qué lleva o antes de cerrar el pedido.
+    """
+    order = state.get("order")
+    if order is None or not order.items:
+        return "carrito vacío"
+    lines = [f"{item.quantity}x {_item_label(item)} ${item.subtotal:.2f}" for item in order.items]
+    lines.append(f"subtotal ${order.subtotal:.2f}")
+    return "\n".join(lines)
+
+
+CART_TOOLS = [add_to_cart, remove_from_cart, set_quantity, view_cart]
@@ -0,0 +1,174 @@
+"""Validación de direcciones y zonas de envío (índice local de códigos postales)."""
+
+import re
+from typing import Optional
+
+import structlog
+
+from src.tools.geo import COLONIAS, GridIndex, get_gazetteer
+
+logger = structlog.get_logger()
+
+# Zonas de envío: costo y monto a partir del cual el envío es gratis
+DELIVERY_ZONES = {
+    "A": {"name": "Zona A", "fee": 50.0, "free_over": 500.0},
+    "B": {"name": "Zona B", "fee": 70.0, "free_over": 700.0},
+    "C": {"name": "Zona C", "fee": 100.0, "free_over": 1000.0},
+}
+
+# Zona por municipio (todas las colonias del municipio comparten zona)
+MUNICIPIO_ZONES = {
+    "Tecámac": "A",
+    "Ecatepec": "B",
+    "Tonanitla": "B",
+    "Coacalco": "C",
+    "Acolman": "C",
+    "Zumpango": "C",
+    "Nextlalpan": "C",
+}
+
+# Radio máximo (km) alrededor de una colonia conocida para coordenadas sueltas
+MAX_COORDS_DISTANCE_KM = 3.0
+
+# Calle y número: "Av. Juárez 123", "Calle 5 #12-B", "Mz 4 Lt 12", "s/n"
+STREET_NUMBER_PATTERN = re.compile(
+    r"(?:#\s*\d+|\bn[uú]m(?:ero)?\.?\s*\d+|\b(?:mz|manzana)\.?\s*\d+|\b(?:lt|lote)\.?\s*\d+"
+    r"|\bs/?n\b|\bsin n[uú]mero\b|[a-záéíóúñ]{3,}\.?\s+\d{1,5}(?:\s*-?\s*[a-z])?\b)",
+    re.IGNORECASE,
+)
+
+CP_LABEL_PATTERN = re.compile(r"\b(?:c\.?\s?p\.?\s*)?\d{5}\b", re.IGNORECASE)
+
+
+class PostalIndex:
+    """
+    Índice compacto CP → (zona, colonias) construido desde el gazetteer.
+
+    Todo es local: validar una dirección no llama al LLM ni a servicios
+    externos de geocodificación.
+    """
+
+    def __init__(self, colonias=COLONIAS):
+        self.zone_of_cp: dict[str, str] = {}
+        self.colonias_of_cp: dict[str, tuple[str, ...]] = {}
+        points = []
+        for cp, colonia, municipio, lat, lng in colonias:
+            zone = MUNICIPIO_ZONES.get(municipio)
+            if zone is None:
+                continue
+            self.zone_of_cp[cp] = zone
+            self.colonias_of_cp[cp] = self.colonias_of_cp.get(cp, ()) + (colonia,)
+            points.append((lat, lng, (cp, colonia, municipio)))
+        self.colonias = GridIndex(points)
+
+    def zone_for(self, cp: Optional[str], municipio: Optional[str]) -> Optional[str]:
+        """Zona por CP o, si no hay CP, por municipio."""
+        if cp:
+            return self.zone_of_cp.get(cp)
+        return MUNICIPIO_ZONES.get(municipio) if municipio else None
+
+    def nearest_colonia(self, lat: float, lng: float) -> Optional[tuple[str, str, str]]:
+        """Colonia de la zona más cercana a unas coordenadas (si está en el radio)."""
+        nearest = self.colonias.nearest(lat, lng, k=1)
+        if nearest and nearest[0][0] <= MAX_COORDS_DISTANCE_KM:
+            return nearest[0][1]
+        return None
+
+
+def _street_part(text: str) -> Optional[str]:
+    """Primer segmento de la dirección con calle y número (sin el CP)."""
+    for segment in text.split(","):
+        segment = CP_LABEL_PATTERN.sub("", segment).strip(" .")
+        if STREET_NUMBER_PATTERN.search(segment):
+            return " ".join(segment.split())
+    return None
+
+
+def validate_address(text: str) -> dict:
+    """
+    Valida y normaliza una dirección de entrega.
+
+    Args:
+        text: Dirección tal como la escribió el cliente
+
+    Returns:
+        Diccionario con:
+        - valid: la dirección está completa y dentro de la zona
+        - out_of_area: el CP/ubicación está fuera de la zona de servicio
+        - missing: lo que falta ("calle y número", "colonia o CP")
+        - cp, colonia, municipio, zone, fee, free_over
+        - normalized: dirección normalizada (si es válida)
+    """
+    result = {
+        "valid": False,
+        "out_of_area": False,
+        "missing": [],
+        "cp": None,
+        "colonia": None,
+        "municipio": None,
+        "zone": None,
+        "fee": None,
+        "free_over": None,
+        "normalized": None,
+    }
+    text = " ".join(str(text or "").split())
+    index = get_postal_index()
+    location = get_gazetteer().resolve(text)
+
+    if location is not None and location["match"] == "coords":
+        nearest = index.nearest_colonia(location["lat"], location["lng"])
+        if nearest is None:
+            result["out_of_area"] = True
+            return result
+        cp, colonia, municipio = nearest
+        result.update(cp=cp, colonia=colonia, municipio=municipio)
+    elif location is not None:
+        result.update(cp=location["cp"], municipio=location["municipio"])
+        if location["match"] in ("colonia", "cp"):
+            result["colonia"] = location["label"]
+    else:
+        # Un CP que no está en el índice es de fuera de la zona
+        cp_match = re.search(r"\b(\d{5})\b", text)
+        if cp_match:
+            result.update(cp=cp_match.group(1), out_of_area=True)
+            return result
+
+    zone = index.zone_for(result["cp"], result["municipio"])
+    if result["municipio"] and zone is None:
+        result["out_of_area"] = True
+        return result
+
+    street = _street_part(text) if location is None or location["match"] != "coords" else text
+    if not street:
+        result["missing"].append("calle y número")
+    if not result["colonia"]:
+        result["missing"].append("colonia o CP")
+    if result["missing"]:
+        return result
+
+    if result["cp"] is None:
+        cps = [cp for cp, names in index.colonias_of_cp.items() if result["colonia"] in names]
+        result["cp"] = cps[0] if cps else None
+
+    zone_info = DELIVERY_ZONES[zone]
+    result.update(
+        valid=True,
+        zone=zone,
+        fee=zone_info["fee"],
+        free_over=zone_info["free_over"],
+        normalized=f"{street}, Col. {result['colonia']}, {result['municipio']}, C.P. {result['cp']}",
+    )
+    logger.info("Address validated", cp=result["cp"], zone=zone)
+    return result
+
+
+# Instancia global del índice postal
+_postal_index: Optional[PostalIndex] = None
+
+
+def get_postal_index() -> PostalIndex:
+    """Obtiene el índice de códigos postales de la zona de servicio."""
+    global _postal_index
+    if _postal_index is None:
+        _postal_index = PostalIndex()
+    return _postal_index
@@ -0,0 +1,101 @@
+"""
+Ejecución de tools síncronas fuera del event loop (pool de hilos acotado).
+
+Cuando el modelo pide varias tools en un mismo paso, el ToolNode del
+agente las lanza a la vez (con ainvoke) y devuelve los resultados en el
+orden de las llamadas: las async corren en el event loop y las síncronas
+en este pool, así el paso tarda lo que la llamada más lenta. Las tools
+pesadas además tienen un máximo de llamadas simultáneas propio
+(TOOL_CONCURRENCY_LIMITS) para que no acaparen el pool.
+"""
+
+import asyncio
+import contextvars
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import structlog
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.config.settings import settings
+
+logger = structlog.get_logger()
+
+# Pool compartido por todas las tools síncronas
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Semáforos por event loop: (tool, límite) -> semáforo
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, int], asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Obtiene el pool de hilos para tools síncronas."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.tool_thread_pool_size,
+            thread_name_prefix="ruffo-tool",
+        )
+    return _executor
+
+
+async def run_in_tool_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Ejecuta una función bloqueante en el pool (conserva el contexto del caller)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_tool_executor(), call)
+
+
+def tool_concurrency_limits() -> dict[str, int]:
+    """Límites de TOOL_CONCURRENCY_LIMITS ("search_products=4,find_nearest_branch=2")."""
+    limits = {}
+    for entry in settings.tool_concurrency_limits.split(","):
+        name, _, value = entry.partition("=")
+        try:
+            limit = int(value)
+        except ValueError:
+            continue
+        if name.strip() and limit > 0:
+            limits[name.strip()] = limit
+    return limits
+
+
+def _tool_semaphore(name: str) -> Optional[asyncio.Semaphore]:
+    """Semáforo de la tool en el loop actual (None si no tiene límite propio)."""
+    limit = tool_concurrency_limits().get(name)
+    if limit is None:
+        return None
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get((name, limit))
+    if semaphore is None:
+        semaphore = semaphores[(name, limit)] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def offload_sync_tool(tool: BaseTool) -> BaseTool:
+    """
+    Versión de la tool con coroutine que corre la función en el pool acotado.
+
+    Las tools que ya son async (o que no son StructuredTool) se devuelven
+    igual. La versión síncrona sigue disponible para `invoke`. Si la tool
+    tiene límite en TOOL_CONCURRENCY_LIMITS, las llamadas de más esperan
+    en el event loop sin ocupar hilos del pool.
+    """
+    if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+        return tool
+
+    func, name = tool.func, tool.name
+
+    async def coroutine(*args: Any, **kwargs: Any) -> Any:
+        semaphore = _tool_semaphore(name)
+        if semaphore is None:
+            return await run_in_tool_executor(func, *args, **kwargs)
+        async with semaphore:
+            return await run_in_tool_executor(func, *args, **kwargs)
+
+    return tool.model_copy(update={"coroutine": coroutine})
@@ -0,0 +1,232 @@
+"""Geografía local: gazetteer de colonias/CP, distancia haversine e índice espacial."""
+
+import math
+import re
+import unicodedata
+from typing import Any, Iterable, Optional
+
+# Radio medio de la Tierra en km
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilómetros por grado de latitud
+KM_PER_DEGREE = 111.195
+
+# Colonias de la zona de servicio: (CP, colonia, municipio, lat, lng)
+# Los centroides son aproximados; bastan para ordenar sucursales por cercanía.
+COLONIAS = [
+    ("55740", "Tecámac Centro", "Tecámac", 19.7131, -98.9683),
+    ("55743", "Villas del Real", "Tecámac", 19.7192, -99.0031),
+    ("55749", "Sierra Hermosa", "Tecámac", 19.7048, -99.0102),
+    ("55750", "San Francisco Cuautliquixca", "Tecámac", 19.7207, -98.9752),
+    ("55755", "San Pablo Tecalco", "Tecámac", 19.6991, -98.9802),
+    ("55763", "Héroes Tecámac", "Tecámac", 19.6725, -98.9905),
+    ("55764", "Galaxias el Llano", "Tecámac", 19.6871, -99.0004),
+    ("55765", "Real del Sol", "Tecámac", 19.6931, -99.0241),
+    ("55767", "Santa María Ozumbilla", "Tecámac", 19.6592, -99.0203),
+    ("55768", "San Pedro Atzompa", "Tecámac", 19.6703, -99.0402),
+    ("55770", "Ojo de Agua", "Tecámac", 19.6797, -99.0170),
+    ("55770", "Villa del Real", "Tecámac", 19.6829, -99.0121),
+    ("55773", "Lomas de Tecámac", "Tecámac", 19.7263, -98.9907),
+    ("55000", "Ecatepec Centro", "Ecatepec", 19.6010, -99.0500),
+    ("55010", "San Cristóbal", "Ecatepec", 19.6058, -99.0452),
+    ("55020", "Jardines de Morelos", "Ecatepec", 19.6052, -99.0203),
+    ("55040", "Las Américas", "Ecatepec", 19.5992, -99.0384),
+    ("55050", "Ciudad Cuauhtémoc", "Ecatepec", 19.6402, -99.0071),
+    ("55055", "Santa Clara Coatitla", "Ecatepec", 19.5498, -99.0520),
+    ("55070", "Ciudad Azteca", "Ecatepec", 19.5361, -99.0281),
+    ("55080", "Guadalupe Victoria", "Ecatepec", 19.5700, -99.0421),
+    ("55118", "Valle de Santiago", "Ecatepec", 19.6185, -99.0298),
+    ("55120", "Granjas Valle de Guadalupe", "Ecatepec", 19.5805, -99.0181),
+    ("55125", "Jardines de Santa Clara", "Ecatepec", 19.5588, -99.0429),
+    ("55130", "Xalostoc", "Ecatepec", 19.5250, -99.0601),
+    ("55140", "Ciudad Azteca Tercera Sección", "Ecatepec", 19.5290, -99.0209),
+    ("55712", "Coacalco Centro", "Coacalco", 19.6318, -99.0967),
+    ("55719", "Villa de las Flores", "Coacalco", 19.6211, -99.0822),
+    ("55870", "Acolman Centro", "Acolman", 19.6383, -98.9112),
+    ("55883", "Tepexpan", "Acolman", 19.6125, -98.9353),
+    ("55600", "Zumpango Centro", "Zumpango", 19.7969, -99.0991),
+    ("55640", "Tonanitla", "Tonanitla", 19.6896, -99.0513),
+    ("55730", "Nextlalpan", "Nextlalpan", 19.7364, -99.0745),
+]
+
+# Códigos postales de 5 dígitos (los de la zona empiezan con 5)
+CP_PATTERN = re.compile(r"\b(?:c\.?\s?p\.?\s*)?(\d{5})\b", re.IGNORECASE)
+
+# Coordenadas "19.68, -99.01" (ej. ubicación compartida desde Telegram)
+COORDS_PATTERN = re.compile(r"(-?\d{1,2}\.\d+)\s*,\s*(-?\d{1,3}\.\d+)")
+
+
+def normalize_place(text: str) -> str:
+    """Minúsculas, sin acentos ni puntuación, con espacios simples."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia en km sobre la esfera entre dos puntos."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class GridIndex:
+    """
+    Índice espacial de rejilla (celdas de `cell_deg` grados).
+
+    Para los k más cercanos se recorren anillos de celdas alrededor del
+    punto y se detiene en cuanto ningún anillo más lejano puede mejorar el
+    k-ésimo resultado. Con pocas decenas de puntos responde en microsegundos.
+    """
+
+    def __init__(self, points: Iterable[tuple[float, float, Any]], cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self.cells: dict[tuple[int, int], list[tuple[float, float, Any]]] = {}
+        for lat, lng, item in points:
+            self.cells.setdefault(self._cell(lat, lng), []).append((lat, lng, item))
+        self.size = sum(len(bucket) for bucket in self.cells.values())
+
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _ring(self, center: tuple[int, int], radius: int) -> Iterable[tuple[int, int]]:
+        """Celdas a distancia Chebyshev exacta `radius` del centro."""
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for dc in range(-radius, radius + 1):
+            yield (row - radius, col + dc)
+            yield (row + radius, col + dc)
+        for dr in range(-radius + 1, radius):
+            yield (row + dr, col - radius)
+            yield (row + dr, col + radius)
+
+    def nearest(self, lat: float, lng: float, k: int = 1) -> list[tuple[float, Any]]:
+        """
+        Los k puntos más cercanos como (distancia_km, item), del más cercano al más lejano.
+        """
+        if not self.cells or k <= 0:
+            return []
+
+        center = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._bounds
+        max_radius = max(
+            abs(center[0] - min_row), abs(center[0] - max_row),
+            abs(center[1] - min_col), abs(center[1] - max_col),
+        )
+        # Lado mínimo de una celda en km (la longitud se encoge con la latitud)
+        cell_km = self.cell_deg * KM_PER_DEGREE * max(math.cos(math.radians(abs(lat) + self.cell_deg)), 0.01)
+
+        found: list[tuple[float, Any]] = []
+        for radius in range(max_radius + 1):
+            for cell in self._ring(center, radius):
+                for p_lat, p_lng, item in self.cells.get(cell, ()):
+                    found.append((haversine_km(lat, lng, p_lat, p_lng), item))
+            if len(found) >= k:
+                found.sort(key=lambda pair: pair[0])
+                # Todo lo que está en anillos siguientes queda al menos a radius celdas
+                if found[k - 1][0] <= radius * cell_km:
+                    break
+
+        found.sort(key=lambda pair: pair[0])
+        return found[:k]
+
+
+class Gazetteer:
+    """
+    Resolución de ubicaciones de texto a coordenadas.
+
+    Orden de prioridad: coordenadas explícitas, código postal, nombre de
+    colonia (la frase más larga que aparezca) y por último municipio
+    (centroide de sus colonias).
+    """
+
+    def __init__(self, colonias: Iterable[tuple[str, str, str, float, float]] = COLONIAS):
+        self.entries = [
+            {"cp": cp, "colonia": colonia, "municipio": municipio, "lat": lat, "lng": lng}
+            for cp, colonia, municipio, lat, lng in colonias
+        ]
+        self.by_cp: dict[str, list[dict]] = {}
+        by_municipio: dict[str, list[dict]] = {}
+        for entry in self.entries:
+            self.by_cp.setdefault(entry["cp"], []).append(entry)
+            by_municipio.setdefault(normalize_place(entry["municipio"]), []).append(entry)
+
+        # Frases de colonia ordenadas de la más larga a la más corta
+        self.by_name = sorted(
+            ((normalize_place(entry["colonia"]), entry) for entry in self.entries),
+            key=lambda pair: len(pair[0]),
+            reverse=True,
+        )
+        self.municipios = {
+            name: _centroid(entries, label=entries[0]["municipio"])
+            for name, entries in by_municipio.items()
+        }
+
+    def resolve(self, text: str) -> Optional[dict]:
+        """
+        Resuelve un texto libre a {"lat", "lng", "label", "cp", "municipio", "match"}.
+
+        Returns:
+            Ubicación resuelta o None si no se reconoce nada
+        """
+        coords = COORDS_PATTERN.search(text or "")
+        if coords:
+            lat, lng = float(coords.group(1)), float(coords.group(2))
+            if -90 <= lat <= 90 and -180 <= lng <= 180:
+                return {"lat": lat, "lng": lng, "label": f"{lat:.4f}, {lng:.4f}",
+                        "cp": None, "municipio": None, "match": "coords"}
+
+        for match in CP_PATTERN.finditer(text or ""):
+            entries = self.by_cp.get(match.group(1))
+            if entries:
+                location = _centroid(entries, label=entries[0]["colonia"])
+                location.update(cp=match.group(1), match="cp")
+                return location
+
+        normalized = f" {normalize_place(text)} "
+        for name, entry in self.by_name:
+            if f" {name} " in normalized:
+                return {"lat": entry["lat"], "lng": entry["lng"], "label": entry["colonia"],
+                        "cp": entry["cp"], "municipio": entry["municipio"], "match": "colonia"}
+
+        for name, location in self.municipios.items():
+            if f" {name} " in normalized:
+                return dict(location)
+
+        return None
+
+
+def _centroid(entries: list[dict], label: str) -> dict:
+    """Centroide simple de varias colonias."""
+    return {
+        "lat": round(sum(e["lat"] for e in entries) / len(entries), 6),
+        "lng": round(sum(e["lng"] for e in entries) / len(entries), 6),
+        "label": label,
+        "cp": None,
+        "municipio": entries[0]["municipio"],
+        "match": "municipio",
+    }
+
+
+# Instancia global del gazetteer
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Obtiene la instancia del gazetteer de la zona de servicio."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,197 @@
+"""
+Memoización de tools por conversación.
+
+En un mismo thread el agente repite llamadas idénticas: la misma
+búsqueda dos veces, o get_all_branches en turnos seguidos. Aquí se
+guarda el resultado de cada tool por (thread, tool, argumentos, versión
+de los datos) y la repetición se responde sin volver a correr la tool
+(ni pasar por el pool de hilos).
+
+La versión es la del snapshot que lee la tool: catálogo e inventario
+para las de productos, directorio para las de sucursales. Al publicarse
+uno nuevo las entradas anteriores dejan de coincidir. No se memorizan
+las tools que dependen de la hora (get_branch_hours) ni las del carrito.
+
+Cada repetición se registra con la tasa de llamadas duplicadas, para
+ajustar el prompt.
+"""
+
+import json
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+import structlog
+from langchain_core.runnables import ensure_config
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.config.settings import settings
+from src.tools.cache import LRUCache
+from src.tools.sheets.branches import branches_version
+from src.tools.sheets.inventory import inventory_version
+from src.tools.sheets.products import catalog_version
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+
+
+def _product_data_version() -> tuple[int, int]:
+    return catalog_version(), inventory_version()
+
+
+def _branch_data_version() -> tuple[int]:
+    return (branches_version(),)
+
+
+# Tool -> versión de los datos de los que depende su resultado
+MEMO_VERSIONS: dict[str, Callable[[], Hashable]] = {
+    "search_products": _product_data_version,
+    "get_product_by_id": _product_data_version,
+    "get_products_by_category": _product_data_version,
+    "get_all_branches": _branch_data_version,
+    "get_branch_by_id": _branch_data_version,
+    "find_nearest_branch": _branch_data_version,
+}
+
+
+class ToolMemo:
+    """
+    Resultados de tools por (thread, tool, versión, argumentos).
+
+    Args:
+        maxsize: Resultados guardados entre todos los threads (LRU)
+        ttl_seconds: Tiempo de vida de un resultado (None = sin límite)
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl_seconds: Optional[float] = 900.0):
+        self.results = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.calls = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, version: Hashable, args: tuple, kwargs: dict) -> Optional[tuple]:
+        """Clave de la llamada; None fuera de un thread del agente (no se memoriza)."""
+        thread_id = ensure_config().get("configurable", {}).get("thread_id")
+        if not thread_id:
+            return None
+        arguments = json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+        return str(thread_id), name, version, arguments
+
+    def get(self, key: tuple) -> Any:
+        """Resultado guardado de la llamada (_MISSING si no se ha hecho)."""
+        result = self.results.get(key, _MISSING)
+        with self._lock:
+            self.calls += 1
+            if result is not _MISSING:
+                self.duplicates += 1
+            rate = self.duplicates / self.calls
+
+        # Import diferido: src.agent importa las tools al crear el agente
+        from src.agent.metrics import increment
+
+        thread_id, name = key[0], key[1]
+        increment("tools.memo_calls")
+        if result is not _MISSING:
+            increment("tools.memo_duplicates")
+            increment(f"tools.memo_duplicates.{name}")
+            logger.info("Duplicate tool call served from memo", tool=name, thread_id=thread_id,
+                        duplicate_rate=round(rate, 3))
+        return result
+
+    def set(self, key: tuple, version: Hashable, result: Any) -> None:
+        """
+        Guarda el resultado si los datos no cambiaron mientras corría la tool
+        (o si la tool hizo la primera carga: queda con la versión cargada).
+        """
+        if key[2] == version:
+            self.results.set(key, result)
+        elif not any(key[2]):
+            self.results.set((key[0], key[1], version, key[3]), result)
+
+    def clear(self) -> None:
+        self.results.clear()
+        with self._lock:
+            self.calls = 0
+            self.duplicates = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.results),
+            "calls": self.calls,
+            "duplicates": self.duplicates,
+            "duplicate_rate": round(self.duplicates / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+# =====================================================
+# MEMO DEL PROCESO
+# =====================================================
+
+_memo: Optional[ToolMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_tool_memo() -> ToolMemo:
+    """Obtiene la memoización de tools del proceso."""
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = ToolMemo(
+                    maxsize=settings.tool_memo_size,
+                    ttl_seconds=settings.tool_memo_ttl_seconds or None,
+                )
+    return _memo
+
+
+def _lookup(name: str, version_of: Callable[[], Hashable], args: tuple, kwargs: dict) -> tuple[Optional[tuple], Any]:
+    """(clave, resultado guardado o _MISSING); clave None si no aplica."""
+    if not settings.tool_memo_enabled:
+        return None, _MISSING
+    key = ToolMemo.key(name, version_of(), args, kwargs)
+    if key is None:
+        return None, _MISSING
+    return key, get_tool_memo().get(key)
+
+
+def memo_tool(tool: BaseTool) -> BaseTool:
+    """
+    Versión de la tool que reutiliza resultados dentro del thread.
+
+    Envuelve `func` y `coroutine` (la de offload_sync_tool): en la versión
+    async la repetición se responde en el event loop, sin ir al pool.
+    Las tools fuera de MEMO_VERSIONS se devuelven igual.
+    """
+    version_of = MEMO_VERSIONS.get(tool.name)
+    if version_of is None or not isinstance(tool, StructuredTool):
+        return tool
+
+    name, func, coroutine = tool.name, tool.func, tool.coroutine
+    update: dict[str, Any] = {}
+
+    if func is not None:
+        def memo_func(*args: Any, **kwargs: Any) -> Any:
+            key, result = _lookup(name, version_of, args, kwargs)
+            if result is not _MISSING:
+                return result
+            result = func(*args, **kwargs)
+            if key is not None:
+                get_tool_memo().set(key, version_of(), result)
+            return result
+
+        update["func"] = memo_func
+
+    if coroutine is not None:
+        async def memo_coroutine(*args: Any, **kwargs: Any) -> Any:
+            key, result = _lookup(name, version_of, args, kwargs)
+            if result is not _MISSING:
+                return result
+            result = await coroutine(*args, **kwargs)
+            if key is not None:
+                get_tool_memo().set(key, version_of(), result)
+            return result
+
+        update["coroutine"] = memo_coroutine
+
+    return tool.model_copy(update=update)
@@ -0,0 +1,349 @@
+"""Popularidad de productos y log de búsquedas (contadores locales en lotes)."""
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Callable, Optional
+
+import structlog
+
+from src.config.settings import settings
+from src.tools.sheets.catalog import CatalogSnapshot
+
+logger = structlog.get_logger()
+
+# Peso de un agregado al carrito en el score (las impresiones solo miden conversión)
+ADD_WEIGHT = 1.0
+
+
+class BackgroundFlush:
+    """Corre el volcado de un contador en un hilo aparte (uno a la vez)."""
+
+    def __init__(self, flush: Callable[[], None], name: str):
+        self._flush = flush
+        self._name = name
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def schedule(self) -> None:
+        """Lanza el volcado si no hay uno en curso (el que llama no espera)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self._flush()
+        except Exception as e:
+            logger.error("Background flush failed", store=self._name, error=str(e))
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Espera el volcado en curso (tests y apagado ordenado)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+class PopularityTracker:
+    """
+    Contadores de popularidad con decaimiento exponencial.
+
+    Los eventos se acumulan en memoria y se vuelcan al archivo local en
+    lotes (cada N eventos o cada T segundos) desde un hilo aparte, así
+    quien registra el evento nunca espera el disco. La búsqueda no hace I/O:
+    usa un arreglo de bonos por slot que se recalcula solo cuando cambia
+    la versión del catálogo o después de un volcado.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        half_life_days: float = 14.0,
+        flush_every: int = 20,
+        flush_seconds: float = 60.0,
+    ):
+        self.path = path
+        self.half_life_seconds = half_life_days * 86400
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+
+        # product_id -> [score de agregados, score de impresiones, timestamp]
+        self.scores: dict[str, list[float]] = {}
+        # product_id -> [agregados, impresiones] pendientes de volcar
+        self.pending: dict[str, list[int]] = {}
+        self.pending_events = 0
+        self.generation = 0
+        self.last_flush = time.time()
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._bonus_cache: Optional[tuple[tuple[int, int, int], array]] = None
+        self.background = BackgroundFlush(self.flush, "popularity-flush")
+
+    # ============================================
+    # REGISTRO DE EVENTOS
+    # ============================================
+
+    def record_shown(self, product_ids: list[str]) -> None:
+        """Registra productos mostrados al cliente."""
+        self._record(product_ids, adds=0, shows=1)
+
+    def record_added(self, product_id: str, shown_ids: Optional[list[str]] = None) -> None:
+        """Registra un producto agregado al carrito (y lo que se mostró junto a él)."""
+        if shown_ids:
+            self._record([pid for pid in shown_ids if pid != product_id], adds=0, shows=1)
+        self._record([product_id], adds=1, shows=1)
+
+    def _record(self, product_ids: list[str], adds: int, shows: int) -> None:
+        product_ids = [str(pid) for pid in product_ids if pid]
+        if not product_ids:
+            return
+
+        with self._lock:
+            for pid in product_ids:
+                counts = self.pending.setdefault(pid, [0, 0])
+                counts[0] += adds
+                counts[1] += shows
+            self.pending_events += len(product_ids)
+            should_flush = (
+                self.pending_events >= self.flush_every
+                or time.time() - self.last_flush >= self.flush_seconds
+            )
+
+        if should_flush:
+            self.background.schedule()
+
+    # ============================================
+    # PERSISTENCIA
+    # ============================================
+
+    def _decayed(self, value: float, since: float, now: float) -> float:
+        """Aplica el decaimiento exponencial desde `since` hasta `now`."""
+        if self.half_life_seconds <= 0:
+            return value
+        return value * math.pow(0.5, max(now - since, 0) / self.half_life_seconds)
+
+    def load(self) -> None:
+        """Carga los contadores persistidos (una sola vez)."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self.scores = {pid: [float(v) for v in values] for pid, values in data.items()}
+                self.generation += 1
+                logger.info("Popularity counters loaded", products=len(self.scores))
+            except (OSError, ValueError) as e:
+                logger.error("Error loading popularity counters", path=self.path, error=str(e))
+
+    def flush(self) -> None:
+        """Vuelca los eventos pendientes al score decaído y al archivo local."""
+        self.load()
+
+        with self._lock:
+            if not self.pending:
+                self.last_flush = time.time()
+                return
+
+            now = time.time()
+            for pid, (adds, shows) in self.pending.items():
+                add_score, show_score, updated = self.scores.get(pid, [0.0, 0.0, now])
+                self.scores[pid] = [
+                    self._decayed(add_score, updated, now) + adds * ADD_WEIGHT,
+                    self._decayed(show_score, updated, now) + shows,
+                    now,
+                ]
+            flushed = self.pending_events
+            self.pending = {}
+            self.pending_events = 0
+            self.last_flush = now
+            self.generation += 1
+            snapshot = dict(self.scores)
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+            logger.info("Popularity counters flushed", events=flushed, products=len(snapshot))
+        except OSError as e:
+            # En entornos de solo lectura los contadores siguen en memoria
+            logger.warning("Could not persist popularity counters", path=self.path, error=str(e))
+
+    # ============================================
+    # RANKING
+    # ============================================
+
+    def popularity(self, product_id: str, now: Optional[float] = None) -> float:
+        """Score decaído de agregados al carrito de un producto."""
+        if not self._loaded:
+            self.load()
+        entry = self.scores.get(str(product_id))
+        if not entry:
+            return 0.0
+        now = now or time.time()
+        return self._decayed(entry[0], entry[2], now)
+
+    def bonus_array(self, catalog: CatalogSnapshot, max_bonus: float) -> array:
+        """
+        Arreglo de bonos de popularidad por slot del catálogo.
+
+        Se recalcula solo cuando cambia la versión del catálogo o los
+        contadores (después de un volcado); entre tanto se reutiliza.
+        """
+        self.load()
+
+        cache_key = (id(catalog), catalog.version, self.generation)
+        cached = self._bonus_cache
+        if cached is not None and cached[0] == cache_key and len(cached[1]) == len(catalog.products):
+            return cached[1]
+
+        now = time.time()
+        raw = array("d", bytes(8 * len(catalog.products)))
+        for slot in catalog.live_slots():
+            raw[slot] = self.popularity(catalog.products[slot]["id"], now)
+
+        top = max(raw, default=0.0)
+        if top > 0:
+            scale = max_bonus / math.log1p(top)
+            for slot, value in enumerate(raw):
+                raw[slot] = round(math.log1p(value) * scale, 2) if value > 0 else 0.0
+
+        self._bonus_cache = (cache_key, raw)
+        return raw
+
+
+# Instancia global del tracker
+_tracker: Optional[PopularityTracker] = None
+
+
+def get_popularity_tracker() -> PopularityTracker:
+    """Obtiene la instancia del tracker de popularidad."""
+    global _tracker
+    if _tracker is None:
+        _tracker = PopularityTracker(
+            path=settings.popularity_store_path,
+            half_life_days=settings.popularity_half_life_days,
+            flush_every=settings.popularity_flush_every,
+            flush_seconds=settings.popularity_flush_seconds,
+        )
+    return _tracker
+
+
+class QueryLog:
+    """
+    Registro local de búsquedas normalizadas (para calentar cachés).
+
+    Igual que los contadores de popularidad: se cuenta en memoria y se
+    vuelca a disco en lotes desde un hilo aparte, nunca en el camino de la
+    búsqueda. Al volcar solo se conservan las `max_keys` más buscadas.
+    """
+
+    def __init__(self, path: str, flush_every: int = 50, flush_seconds: float = 60.0, max_keys: int = 1000):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.max_keys = max_keys
+
+        # JSON de los argumentos normalizados -> veces buscada
+        self.counts: dict[str, int] = {}
+        self.pending: dict[str, int] = {}
+        self.pending_events = 0
+        self.last_flush = time.time()
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.background = BackgroundFlush(self.flush, "query-log-flush")
+
+    def record(self, args: dict) -> None:
+        """Registra una búsqueda (argumentos ya normalizados)."""
+        key = json.dumps(args, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            self.pending[key] = self.pending.get(key, 0) + 1
+            self.pending_events += 1
+            should_flush = (
+                self.pending_events >= self.flush_every
+                or time.time() - self.last_flush >= self.flush_seconds
+            )
+        if should_flush:
+            self.background.schedule()
+
+    def load(self) -> None:
+        """Carga el log persistido (una sola vez)."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.counts = {k: int(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.error("Error loading query log", path=self.path, error=str(e))
+
+    def flush(self) -> None:
+        """Suma lo pendiente, recorta a las más buscadas y lo guarda en el archivo local."""
+        self.load()
+
+        with self._lock:
+            self.last_flush = time.time()
+            if not self.pending:
+                return
+            for key, count in self.pending.items():
+                self.counts[key] = self.counts.get(key, 0) + count
+            self.pending = {}
+            self.pending_events = 0
+            if len(self.counts) > self.max_keys:
+                ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+                self.counts = dict(ranked[:self.max_keys])
+            snapshot = dict(self.counts)
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not persist query log", path=self.path, error=str(e))
+
+    def top(self, n: int) -> list[dict]:
+        """Las N búsquedas más frecuentes (incluye lo aún no volcado)."""
+        self.load()
+        with self._lock:
+            merged = dict(self.counts)
+            for key, count in self.pending.items():
+                merged[key] = merged.get(key, 0) + count
+        ranked = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [json.loads(key) for key, _ in ranked]
+
+
+# Instancia global del log de búsquedas
+_query_log: Optional[QueryLog] = None
+
+
+def get_query_log() -> QueryLog:
+    """Obtiene la instancia del log de búsquedas."""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog(
+            path=settings.query_log_path,
+            flush_seconds=settings.popularity_flush_seconds,
+            max_keys=settings.query_log_max_keys,
+        )
+    return _query_log
@@ -0,0 +1,184 @@
+"""
+Salida compacta de tools para el modelo.
+
+Las tools de productos devuelven diccionarios completos (id, categoría,
+descripción, código de barras, existencias por sucursal…). Para el modelo
+se renderizan como una tabla corta con solo lo que necesita para responder
+y una referencia corta (`ref`) por producto. La ref es estable (se deriva
+de la Clave) y el servidor la resuelve al registro completo, así el modelo
+puede pedir el detalle o agregar al carrito sin arrastrar el registro.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+from typing import Any, Callable, Iterable, Optional
+
+import structlog
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.config.settings import settings
+from src.tools.sheets.catalog import CatalogDiff, CatalogSnapshot, register_derived
+
+logger = structlog.get_logger()
+
+HANDLE_LENGTH = 6
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Columnas de la tabla de productos
+PRODUCT_HEADER = "ref | producto | precio | kg | $/kg | existencias"
+
+
+# =====================================================
+# REFERENCIAS CORTAS
+# =====================================================
+
+def product_handle(product_id: Any) -> str:
+    """Referencia corta y estable de un producto (6 caracteres base36 de su Clave)."""
+    digest = int.from_bytes(hashlib.blake2b(str(product_id).encode(), digest_size=8).digest(), "big")
+    chars = []
+    for _ in range(HANDLE_LENGTH):
+        digest, index = divmod(digest, 36)
+        chars.append(_BASE36[index])
+    return "".join(chars)
+
+
+def build_handles(catalog: CatalogSnapshot) -> dict[str, str]:
+    """ref -> Clave de todos los productos del snapshot."""
+    handles: dict[str, str] = {}
+    for slot in catalog.live_slots():
+        _add_handle(handles, catalog.products[slot]["id"])
+    return handles
+
+
+def update_handles(catalog: CatalogSnapshot, handles: dict[str, str], diff: CatalogDiff) -> dict[str, str]:
+    """Las refs no dependen del slot: solo se agregan o quitan las Claves tocadas."""
+    updated = dict(handles)
+    for row in diff.removed.values():
+        product_id = str(row.get("Clave", ""))
+        if catalog.find(product_id) is None:
+            updated.pop(product_handle(product_id), None)
+    for row in diff.added.values():
+        _add_handle(updated, row.get("Clave", ""))
+    return updated
+
+
+def _add_handle(handles: dict[str, str], product_id: Any) -> None:
+    if not product_id:
+        return
+    handle = product_handle(product_id)
+    existing = handles.setdefault(handle, str(product_id))
+    if existing != str(product_id):
+        logger.warning("Product handle collision", handle=handle, kept=existing, skipped=product_id)
+
+
+register_derived("handles", build_handles, update_handles)
+
+
+def resolve_handle(catalog: CatalogSnapshot, ref: str) -> Optional[int]:
+    """Slot del producto con esa ref (None si no existe)."""
+    product_id = catalog.get_derived("handles").get(ref.strip().lower())
+    return catalog.find(product_id) if product_id else None
+
+
+# =====================================================
+# RENDER
+# =====================================================
+
+def _money(value: Optional[float]) -> str:
+    return f"${value:,.2f}" if value else "-"
+
+
+def _number(value: Optional[float]) -> str:
+    return f"{value:g}" if value else "-"
+
+
+def _stock(product: dict) -> str:
+    stock = product.get("stock")
+    if stock is None:
+        return "?"
+    if stock <= 0:
+        return "agotado"
+    per_branch = product.get("stock_by_branch") or {}
+    detail = ", ".join(f"{branch} {qty}" for branch, qty in per_branch.items() if qty > 0)
+    return f"{stock} ({detail})" if detail else str(stock)
+
+
+def product_row(product: dict) -> str:
+    """Una fila de la tabla: ref | nombre | precio | kg | $/kg | existencias."""
+    name = product.get("name", "")
+    brand = product.get("brand", "")
+    if brand and brand.lower() not in name.lower():
+        name = f"{name} · {brand}"
+    return " | ".join([
+        product_handle(product.get("id", "")),
+        name,
+        _money(product.get("price")),
+        _number(product.get("size_kg")),
+        _money(product.get("price_per_kg")),
+        _stock(product),
+    ])
+
+
+def render_products(products: Optional[Iterable[dict] | dict]) -> tuple[str, list[str]]:
+    """
+    Tabla compacta de productos para el modelo.
+
+    Returns:
+        (texto, refs en orden)
+    """
+    if products is None:
+        return "Producto no encontrado.", []
+    if isinstance(products, dict):
+        products = [products]
+    products = list(products)
+    if not products:
+        return "Sin resultados.", []
+    lines = [PRODUCT_HEADER] + [product_row(p) for p in products]
+    return "\n".join(lines), [product_handle(p.get("id", "")) for p in products]
+
+
+# =====================================================
+# TOOLS CON SALIDA COMPACTA
+# =====================================================
+
+# Llamadas a tools compactas (para muestrear la medición del JSON completo)
+_calls = itertools.count()
+
+
+def approx_tokens(text: str) -> int:
+    """Tokens aproximados (misma regla de 4 caracteres que el recorte del historial)."""
+    return math.ceil(len(text) / 4)
+
+
+def compact_tool(tool: BaseTool, render: Callable[[Any], tuple[str, list[str]]] = render_products) -> BaseTool:
+    """
+    Versión de la tool cuyo ToolMessage lleva la tabla compacta.
+
+    El resultado completo sigue disponible para `invoke` de la tool original;
+    la copia responde `content_and_artifact`: el contenido es la tabla y el
+    artifact solo las refs (lo que se conserva al omitir salidas ya usadas).
+    """
+    if not isinstance(tool, StructuredTool) or tool.func is None:
+        return tool
+
+    func = tool.func
+
+    def compact(*args: Any, **kwargs: Any) -> tuple[str, dict]:
+        # Import diferido: src.agent importa las tools al crear el agente
+        from src.agent.metrics import increment
+
+        result = func(*args, **kwargs)
+        text, refs = render(result)
+        compact_tokens = approx_tokens(text)
+        increment("tools.tokens_compact", compact_tokens)
+        # Serializar el resultado completo cuesta: solo en una muestra de llamadas
+        every = settings.tool_tokens_sample_every
+        if every > 0 and next(_calls) % every == 0:
+            full = json.dumps(result, ensure_ascii=False, default=str)
+            increment("tools.tokens_sampled_full", approx_tokens(full))
+            increment("tools.tokens_sampled_compact", compact_tokens)
+        return text, {"refs": refs}
+
+    return tool.model_copy(update={"func": compact, "response_format": "content_and_artifact"})
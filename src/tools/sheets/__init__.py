@@ -1,14 +1,19 @@
 """Tools de Google Sheets."""
 
-from .client import get_sheets_service, SheetsClient
-from .products import search_products, get_product_by_id
-from .branches import get_all_branches, get_branch_by_id
+from .branches import get_all_branches, get_branch_by_id, get_branch_directory, get_branch_hours
+from .catalog import CatalogSnapshot
+from .client import SheetsClient, get_sheets_service
+from .products import get_catalog, get_product_by_id, search_products
 
 __all__ = [
     "get_sheets_service",
     "SheetsClient",
     "search_products",
     "get_product_by_id",
+    "get_catalog",
+    "CatalogSnapshot",
     "get_all_branches",
     "get_branch_by_id",
+    "get_branch_hours",
+    "get_branch_directory",
 ]
@@ -1,12 +1,22 @@
 """Tools para sucursales."""
 
+import time
+from datetime import datetime
 from typing import Optional
-from langchain_core.tools import tool
+
 import structlog
+from langchain_core.tools import tool
+
+from src.config.settings import settings
+from src.tools.geo import GridIndex, get_gazetteer, normalize_place
+
+from .client import get_client
+from .hours import WeeklySchedule, store_now
+from .snapshot import SnapshotLoader
 
 logger = structlog.get_logger()
 
-# Datos de sucursales (hardcoded por ahora, luego se puede mover a Sheets)
+# Sucursales por default (si no hay pestaña de sucursales configurada)
 BRANCHES = [
     {
         "id": "ojo-agua",
@@ -17,6 +27,8 @@ BRANCHES = [
         "services": ["pickup", "grooming", "veterinario"],
         "pickup_available": True,
         "maps_url": "https://maps.google.com/?q=Animalicha+Ojo+de+Agua",
+        "lat": 19.6797,
+        "lng": -99.0170,
     },
     {
         "id": "tecamac",
@@ -27,6 +39,8 @@ BRANCHES = [
         "services": ["pickup", "grooming"],
         "pickup_available": True,
         "maps_url": "https://maps.google.com/?q=Animalicha+Tecamac",
+        "lat": 19.7131,
+        "lng": -98.9683,
     },
     {
         "id": "ecatepec",
@@ -37,10 +51,212 @@ BRANCHES = [
         "services": ["pickup"],
         "pickup_available": True,
         "maps_url": "https://maps.google.com/?q=Animalicha+Ecatepec",
+        "lat": 19.6010,
+        "lng": -99.0500,
     },
 ]
 
 
+# Encabezados aceptados en la pestaña de sucursales
+BRANCH_COLUMNS = {
+    "id": ("id", "ID", "Id", "Clave"),
+    "name": ("name", "Nombre", "Sucursal"),
+    "address": ("address", "Direccion", "Dirección"),
+    "phone": ("phone", "Telefono", "Teléfono"),
+    "hours": ("hours", "Horario", "Horarios"),
+    "services": ("services", "Servicios"),
+    "pickup_available": ("pickup_available", "Pickup"),
+    "maps_url": ("maps_url", "Maps", "Mapa"),
+    "lat": ("lat", "Lat", "Latitud"),
+    "lng": ("lng", "Lng", "Longitud"),
+}
+
+
+def _column(row: dict, field: str, default=""):
+    for header in BRANCH_COLUMNS[field]:
+        if header in row and row[header] not in (None, ""):
+            return row[header]
+    return default
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+def branch_from_row(row: dict) -> Optional[dict]:
+    """Normaliza una fila de la pestaña (o una sucursal default) al dict de sucursal."""
+    name = str(_column(row, "name")).strip()
+    if not name:
+        return None
+
+    services = _column(row, "services", [])
+    if isinstance(services, str):
+        services = [s.strip() for s in services.split(",") if s.strip()]
+
+    pickup = _column(row, "pickup_available", True)
+    if isinstance(pickup, str):
+        pickup = normalize_place(pickup) in ("si", "true", "1", "x")
+
+    branch = {
+        "id": str(_column(row, "id")).strip() or normalize_place(name).replace(" ", "-"),
+        "name": name,
+        "address": str(_column(row, "address")).strip(),
+        "phone": str(_column(row, "phone")).strip(),
+        "hours": str(_column(row, "hours")).strip(),
+        "services": list(services),
+        "pickup_available": bool(pickup),
+        "maps_url": str(_column(row, "maps_url")).strip(),
+    }
+    lat, lng = _to_float(_column(row, "lat", None)), _to_float(_column(row, "lng", None))
+    if lat is not None and lng is not None:
+        branch["lat"], branch["lng"] = lat, lng
+    return branch
+
+
+def render_branch_info(branch: dict) -> str:
+    """Texto de una sucursal para mostrar al usuario."""
+    return f"""
+🏪 **{branch['name']}**
+📍 {branch['address']}
+📞 {branch['phone']}
+🕐 {branch['hours']}
+🔧 Servicios: {', '.join(branch['services'])}
+📍 {branch['maps_url']}
+"""
+
+
+def render_all_branches(branches: list[dict]) -> str:
+    """Texto de una lista de sucursales para mostrar al usuario."""
+    lines = ["🏪 **Sucursales de Animalicha:**\n"]
+    for branch in branches:
+        lines.append(f"**{branch['name']}**")
+        lines.append(f"  📍 {branch['address']}")
+        lines.append(f"  📞 {branch['phone']}")
+        lines.append(f"  🕐 {branch['hours']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class BranchDirectory:
+    """
+    Directorio de sucursales con horarios estructurados.
+
+    Por versión se precalculan: el horario semanal de cada sucursal
+    (consultas de abierto/cierre en tiempo constante), el índice espacial
+    y los textos de format_branch_info / format_all_branches.
+    """
+
+    def __init__(self, branches: list[dict], version: int = 1):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.branches = branches
+        self.by_id = {branch["id"]: branch for branch in branches}
+        self.schedules = {branch["id"]: WeeklySchedule.parse(branch["hours"]) for branch in branches}
+        self.index = GridIndex(
+            (branch["lat"], branch["lng"], branch) for branch in branches if "lat" in branch
+        )
+        self.info_text = {branch["id"]: render_branch_info(branch) for branch in branches}
+        self.all_text = render_all_branches(branches)
+        # Textos de subconjuntos (ej. sucursales con existencia), por tupla de ids
+        self.rendered: dict[tuple[str, ...], str] = {}
+
+    def __len__(self) -> int:
+        return len(self.branches)
+
+    def is_expired(self, max_age_seconds: float) -> bool:
+        """Indica si el snapshot ya superó su tiempo de vida."""
+        return time.monotonic() - self.loaded_at > max_age_seconds
+
+    def same_as(self, other: "BranchDirectory") -> bool:
+        """Compara contenido (para no publicar versiones sin cambios)."""
+        return self.branches == other.branches
+
+    def find_in_text(self, text: str) -> Optional[dict]:
+        """Sucursal mencionada en un texto (por id o por nombre sin "Animalicha")."""
+        normalized = f" {normalize_place(text)} "
+        for branch in self.branches:
+            names = {
+                normalize_place(branch["id"]),
+                normalize_place(branch["name"].replace("Animalicha", "")),
+            }
+            if any(name and f" {name} " in normalized for name in names):
+                return branch
+        # Coincidencia parcial con la primera palabra distintiva del nombre
+        for branch in self.branches:
+            words = normalize_place(branch["name"].replace("Animalicha", "")).split()
+            if words and len(words[0]) > 3 and f" {words[0]} " in normalized:
+                return branch
+        return None
+
+    def status(self, branch_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+        """Estado de apertura de una sucursal en este momento."""
+        branch = self.by_id.get(branch_id)
+        if branch is None:
+            return None
+        now = now or store_now()
+        schedule = self.schedules[branch_id]
+        if not schedule:
+            return {"id": branch_id, "name": branch["name"], "open_now": None, "hours": branch["hours"]}
+        return {
+            "id": branch_id,
+            "name": branch["name"],
+            "open_now": schedule.is_open(now),
+            "closes_at": schedule.closes_at_time(now),
+            "next_opening": schedule.next_opening(now),
+            "today": schedule.day_text(now.weekday()),
+            "hours": branch["hours"],
+        }
+
+
+def load_branch_rows() -> list[dict]:
+    """Filas de la pestaña de sucursales (o las sucursales por default)."""
+    if settings.branches_sheet_name:
+        rows = get_client().get_all_as_dicts(sheet_name=settings.branches_sheet_name)
+        if rows or _loader.current is not None:
+            return rows
+        logger.warning("Branches tab is empty, using default branches", tab=settings.branches_sheet_name)
+    return [dict(branch) for branch in BRANCHES]
+
+
+def build_branch_directory(rows: list[dict], previous: Optional[BranchDirectory]) -> BranchDirectory:
+    """Construye el directorio a partir de las filas."""
+    branches = [branch for branch in map(branch_from_row, rows) if branch is not None]
+    return BranchDirectory(branches, version=previous.version + 1 if previous is not None else 1)
+
+
+_loader: SnapshotLoader[BranchDirectory] = SnapshotLoader(
+    "branches", load_branch_rows, build_branch_directory
+)
+
+
+def refresh_branches() -> Optional[BranchDirectory]:
+    """Recarga la pestaña de sucursales (publica versión nueva solo si cambió)."""
+    return _loader.refresh()
+
+
+def get_branch_directory(force_refresh: bool = False) -> BranchDirectory:
+    """Obtiene el directorio de sucursales vigente."""
+    directory = _loader.get(force_refresh)
+    if directory is None:
+        # Sin filas ni snapshot previo: usar las sucursales por default
+        directory = build_branch_directory([dict(branch) for branch in BRANCHES], None)
+    return directory
+
+
+def branches_version() -> int:
+    """Versión del directorio vigente sin cargar nada (0 = aún no cargado)."""
+    directory = _loader.current
+    return directory.version if directory is not None else 0
+
+
+def get_branches() -> list[dict]:
+    """Lista de sucursales vigente."""
+    return get_branch_directory().branches
+
+
 @tool
 def get_all_branches() -> list[dict]:
     """
@@ -50,8 +266,9 @@ def get_all_branches() -> list[dict]:
     Returns:
         Lista de sucursales con toda su información
     """
-    logger.info("Getting all branches", count=len(BRANCHES))
-    return BRANCHES
+    branches = get_branches()
+    logger.info("Getting all branches", count=len(branches))
+    return branches
 
 
 @tool
@@ -65,10 +282,47 @@ def get_branch_by_id(branch_id: str) -> Optional[dict]:
     Returns:
         Información de la sucursal o None si no existe
     """
-    for branch in BRANCHES:
-        if branch["id"] == branch_id:
-            return branch
-    return None
+    return get_branch_directory().by_id.get(branch_id)
+
+
+@tool
+def get_branch_hours(branch: Optional[str] = None) -> list[dict]:
+    """
+    Indica si las sucursales están abiertas ahorita y a qué hora cierran o abren.
+    Úsala para "¿está abierto?", "¿a qué hora cierra Ecatepec?", "¿abren el domingo?".
+
+    Args:
+        branch: Nombre o ID de la sucursal (vacío = todas)
+
+    Returns:
+        Lista con open_now, closes_at, next_opening y el horario de hoy por sucursal
+    """
+    directory = get_branch_directory()
+    now = store_now()
+    selected = directory.find_in_text(branch) if branch else None
+    branches = [selected] if selected else directory.branches
+    return [directory.status(b["id"], now) for b in branches]
+
+
+def rank_branches(location: str, k: Optional[int] = None) -> tuple[Optional[dict], list[dict]]:
+    """
+    Ordena las sucursales por distancia a la ubicación del cliente.
+
+    Args:
+        location: Texto libre (colonia, CP, municipio o "lat, lng")
+        k: Máximo de sucursales (todas por default)
+
+    Returns:
+        (ubicación resuelta, sucursales con distance_km) o (None, []) si no
+        se reconoce la ubicación
+    """
+    resolved = get_gazetteer().resolve(location)
+    if resolved is None:
+        return None, []
+
+    index = get_branch_directory().index
+    ranked = index.nearest(resolved["lat"], resolved["lng"], k=k or len(index))
+    return resolved, [{**branch, "distance_km": round(distance, 1)} for distance, branch in ranked]
 
 
 @tool
@@ -77,44 +331,43 @@ def find_nearest_branch(location: str) -> dict:
     Encuentra la sucursal más cercana basada en la ubicación del cliente.
 
     Args:
-        location: Ciudad o zona del cliente
+        location: Colonia, código postal, municipio o coordenadas del cliente
 
     Returns:
-        Sucursal recomendada
+        Sucursal recomendada (con distance_km y la ubicación reconocida)
     """
-    location_lower = location.lower()
+    resolved, ranked = rank_branches(location, k=1)
+    if ranked:
+        logger.info("Nearest branch resolved", location=resolved["label"], match=resolved["match"],
+                    branch=ranked[0]["id"], distance_km=ranked[0]["distance_km"])
+        return {**ranked[0], "resolved_location": resolved["label"]}
 
-    # Lógica simple de matching por ubicación
-    if "ojo" in location_lower or "agua" in location_lower:
-        return BRANCHES[0]  # Ojo de Agua
-    elif "tecamac" in location_lower or "centro" in location_lower:
-        return BRANCHES[1]  # Tecámac Centro
-    elif "ecatepec" in location_lower:
-        return BRANCHES[2]  # Ecatepec
+    # Ubicación no reconocida: buscar el nombre de la sucursal en el texto
+    directory = get_branch_directory()
+    mentioned = directory.find_in_text(location)
+    if mentioned:
+        return mentioned
 
     # Default: primera sucursal
-    return BRANCHES[0]
+    return directory.branches[0]
 
 
 def format_branch_info(branch: dict) -> str:
     """Formatea la información de una sucursal para mostrar al usuario."""
-    return f"""
-🏪 **{branch['name']}**
-📍 {branch['address']}
-📞 {branch['phone']}
-🕐 {branch['hours']}
-🔧 Servicios: {', '.join(branch['services'])}
-📍 {branch['maps_url']}
-"""
+    cached = get_branch_directory().info_text.get(branch.get("id"))
+    return cached if cached is not None else render_branch_info(branch)
 
 
-def format_all_branches() -> str:
-    """Formatea todas las sucursales para mostrar al usuario."""
-    lines = ["🏪 **Sucursales de Animalicha:**\n"]
-    for branch in BRANCHES:
-        lines.append(f"**{branch['name']}**")
-        lines.append(f"  📍 {branch['address']}")
-        lines.append(f"  📞 {branch['phone']}")
-        lines.append(f"  🕐 {branch['hours']}")
-        lines.append("")
-    return "\n".join(lines)
+def format_all_branches(branches: Optional[list[dict]] = None) -> str:
+    """Formatea las sucursales (todas por default) para mostrar al usuario."""
+    directory = get_branch_directory()
+    if branches is None:
+        return directory.all_text
+
+    key = tuple(branch["id"] for branch in branches)
+    text = directory.rendered.get(key)
+    if text is None:
+        text = render_all_branches(branches)
+        if len(directory.rendered) < 64:
+            directory.rendered[key] = text
+    return text
@@ -0,0 +1,591 @@
+"""Snapshot del catálogo con índices de búsqueda y mantenimiento incremental."""
+
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Iterable, Optional
+
+# Tamaños de empaque en el nombre del producto: "20 KG", "1.5kg", "85 g", "3 x 85g"
+SIZE_PATTERN = re.compile(
+    r"(?:(\d+)\s*[x×]\s*)?(\d+(?:[.,]\d+)?)\s*"
+    r"(kilogramos?|kilos?|kgs?|gramos?|grs?|g|libras?|lbs?|lb|oz)\b",
+    re.IGNORECASE,
+)
+
+# Factor de conversión a kilogramos por unidad
+UNIT_TO_KG = {
+    "kg": 1.0, "kgs": 1.0, "kilo": 1.0, "kilos": 1.0, "kilogramo": 1.0, "kilogramos": 1.0,
+    "g": 0.001, "gr": 0.001, "grs": 0.001, "gramo": 0.001, "gramos": 0.001,
+    "lb": 0.453592, "lbs": 0.453592, "libra": 0.453592, "libras": 0.453592,
+    "oz": 0.0283495,
+}
+
+# Ordenamientos soportados por las tools de búsqueda
+SORT_OPTIONS = {
+    "relevance": None,
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "size_asc": ("size_kg", False),
+    "size_desc": ("size_kg", True),
+    "price_per_kg_asc": ("price_per_kg", False),
+}
+
+# Si el diff toca más de esta fracción del catálogo, se reconstruye completo
+FULL_REBUILD_RATIO = 0.5
+
+NAN = float("nan")
+
+# Clasificador de facetas: (texto de búsqueda, marca) -> {faceta: valores}
+FacetClassifier = Callable[[str, str], dict[str, Iterable[str]]]
+
+
+def parse_size_kg(text: str) -> Optional[float]:
+    """
+    Extrae el tamaño del empaque en kilogramos a partir del texto.
+
+    Args:
+        text: Nombre o descripción del producto
+
+    Returns:
+        Tamaño en kg o None si no se encontró
+    """
+    match = SIZE_PATTERN.search(str(text or ""))
+    if not match:
+        return None
+
+    count, amount, unit = match.groups()
+    try:
+        value = float(amount.replace(",", "."))
+    except ValueError:
+        return None
+
+    factor = UNIT_TO_KG.get(unit.lower())
+    if factor is None or value <= 0:
+        return None
+
+    total = value * factor * (int(count) if count else 1)
+    return round(total, 4)
+
+
+def parse_price(value) -> float:
+    """Parsea un precio a float."""
+    try:
+        clean = str(value).replace("$", "").replace(",", "").strip()
+        return float(clean) if clean else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def row_to_product(row: dict) -> dict:
+    """Convierte una fila de la hoja en el diccionario de producto normalizado."""
+    price = parse_price(row.get("Precio Publico", "0"))
+    size_kg = parse_size_kg(row.get("Descripcion", ""))
+    price_per_kg = round(price / size_kg, 2) if size_kg and price > 0 else None
+
+    return {
+        "id": row.get("Clave", ""),
+        "name": row.get("Descripcion", ""),
+        "category": row.get("Familia", ""),
+        "brand": row.get("Marca", ""),
+        "price": price,
+        "stock": None,  # lo completa el inventario por sucursal
+        "description": f"{row.get('linea', '')} - {row.get('Marca', '')}",
+        "unit": row.get("Unidad", "PZ"),
+        "barcode": row.get("Codigo de barras", ""),
+        "size_kg": size_kg,
+        "price_per_kg": price_per_kg,
+    }
+
+
+def key_rows(rows: list[dict]) -> dict[str, dict]:
+    """
+    Indexa las filas por Clave.
+
+    Filas sin Clave usan el código de barras o la descripción; las claves
+    repetidas reciben un sufijo (#2, #3...) en orden de aparición.
+    """
+    keyed: dict[str, dict] = {}
+    for row in rows:
+        base = str(
+            row.get("Clave") or row.get("Codigo de barras") or row.get("Descripcion") or "sin-clave"
+        ).strip()
+        key = base
+        n = 1
+        while key in keyed:
+            n += 1
+            key = f"{base}#{n}"
+        keyed[key] = row
+    return keyed
+
+
+class CatalogDiff:
+    """Diferencias por fila (keyed por Clave) entre dos cargas del catálogo."""
+
+    def __init__(
+        self,
+        added: dict[str, dict],
+        removed: dict[str, dict],
+        changed: dict[str, tuple[dict, dict]],
+    ):
+        self.added = added
+        self.removed = removed
+        self.changed = changed  # key -> (fila anterior, fila nueva)
+
+    @classmethod
+    def compute(cls, previous: dict[str, dict], current: dict[str, dict]) -> "CatalogDiff":
+        """Compara dos catálogos indexados por clave."""
+        added = {k: row for k, row in current.items() if k not in previous}
+        removed = {k: row for k, row in previous.items() if k not in current}
+        changed = {
+            k: (previous[k], row)
+            for k, row in current.items()
+            if k in previous and previous[k] != row
+        }
+        return cls(added, removed, changed)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def touched_texts(self) -> list[str]:
+        """Textos de búsqueda (anteriores y nuevos) de todas las filas tocadas."""
+        rows = list(self.added.values()) + list(self.removed.values())
+        for old, new in self.changed.values():
+            rows.extend((old, new))
+        return [_search_text(row) for row in rows]
+
+    def summary(self) -> dict:
+        """Conteos para logging."""
+        return {"added": len(self.added), "removed": len(self.removed), "changed": len(self.changed)}
+
+
+def _search_text(row: dict) -> str:
+    """Texto de búsqueda en minúsculas de una fila."""
+    return " ".join(
+        str(row.get(col, "")).lower()
+        for col in ("Descripcion", "Marca", "Familia", "linea", "Clave")
+    )
+
+
+class SortedIndex:
+    """Índice ordenado de pares (valor, slot) para rangos y ordenamientos."""
+
+    def __init__(self, pairs: Iterable[tuple[float, int]] = ()):
+        ordered = sorted(p for p in pairs if not math.isnan(p[0]))
+        self.keys = [key for key, _ in ordered]
+        self.slots = [slot for _, slot in ordered]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def copy(self) -> "SortedIndex":
+        """Copia independiente (para copy-on-write)."""
+        clone = SortedIndex()
+        clone.keys = list(self.keys)
+        clone.slots = list(self.slots)
+        return clone
+
+    def insert(self, key: float, slot: int) -> None:
+        """Inserta un par manteniendo el orden."""
+        if math.isnan(key):
+            return
+        pos = bisect_right(self.keys, key)
+        # Desempate por slot para que el orden sea estable entre cargas
+        while pos > 0 and self.keys[pos - 1] == key and self.slots[pos - 1] > slot:
+            pos -= 1
+        self.keys.insert(pos, key)
+        self.slots.insert(pos, slot)
+
+    def remove(self, key: float, slot: int) -> None:
+        """Elimina un par si existe."""
+        if math.isnan(key):
+            return
+        pos = bisect_left(self.keys, key)
+        while pos < len(self.keys) and self.keys[pos] == key:
+            if self.slots[pos] == slot:
+                del self.keys[pos]
+                del self.slots[pos]
+                return
+            pos += 1
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> list[int]:
+        """Slots cuyo valor está en [low, high] (límites inclusivos)."""
+        start = bisect_left(self.keys, low) if low is not None else 0
+        end = bisect_right(self.keys, high) if high is not None else len(self.keys)
+        return self.slots[start:end]
+
+    def ordered(self, descending: bool = False) -> list[int]:
+        """Slots ordenados por valor."""
+        return self.slots[::-1] if descending else list(self.slots)
+
+
+# Estructuras derivadas del snapshot (ej. pools de upselling):
+# nombre -> (build(snapshot), update(snapshot, valor_anterior, diff))
+_DERIVED: dict[str, tuple[Callable[["CatalogSnapshot"], Any],
+                          Callable[["CatalogSnapshot", Any, CatalogDiff], Any]]] = {}
+
+
+def register_derived(
+    name: str,
+    build: Callable[["CatalogSnapshot"], Any],
+    update: Callable[["CatalogSnapshot", Any, CatalogDiff], Any],
+) -> None:
+    """
+    Registra una estructura derivada que vive junto al snapshot.
+
+    Se construye perezosamente con `build` y, en cada refresco incremental,
+    se actualiza con `update` antes de publicar la nueva versión.
+    """
+    _DERIVED[name] = (build, update)
+
+
+class CatalogSnapshot:
+    """
+    Foto del catálogo de productos con sus índices de búsqueda.
+
+    Cada producto ocupa un slot estable. Por slot se guardan el producto
+    normalizado, los textos de búsqueda y columnas numéricas (precio, tamaño
+    en kg y precio por kg). Encima hay un índice invertido de tokens,
+    facetas (marca, familia y las que aporte el clasificador), mapas por
+    Clave/código de barras e índices ordenados para filtros por rango.
+
+    Un snapshot publicado no se modifica: `apply_diff` devuelve una versión
+    nueva que comparte lo que no cambió (copy-on-write), así los lectores
+    siguen usando la anterior hasta que se reemplaza la referencia.
+    """
+
+    def __init__(
+        self,
+        rows: list[dict],
+        version: int = 1,
+        classifier: Optional[FacetClassifier] = None,
+    ):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.classifier = classifier
+
+        self.rows: dict[str, dict] = {}
+        self.keys: list[Optional[str]] = []
+        self.free_slots: list[int] = []
+
+        self.products: list[Optional[dict]] = []
+        self.search_texts: list[str] = []
+        self.descriptions: list[str] = []
+        self.brands: list[str] = []
+        self.categories: list[str] = []
+        self.lines: list[str] = []
+
+        self.price = array("d")
+        self.size_kg = array("d")
+        self.price_per_kg = array("d")
+
+        self.by_key: dict[str, int] = {}
+        self.by_id: dict[str, tuple[int, ...]] = {}
+        self.by_barcode: dict[str, tuple[int, ...]] = {}
+        self.indexes: Optional[dict[str, SortedIndex]] = None
+        self.inverted: dict[str, set[int]] = {}
+        self.facets: dict[str, dict[str, set[int]]] = {"brand": {}, "category": {}}
+        self.derived: dict[str, Any] = {}
+        # ids de los sets creados por esta versión (se pueden mutar en sitio)
+        self._owned: set[int] = set()
+
+        for key, row in key_rows(rows).items():
+            self._insert(key, row)
+        self._owned = set()
+
+        self.indexes = {
+            "price": SortedIndex((v, i) for i, v in enumerate(self.price) if v > 0),
+            "size_kg": SortedIndex((v, i) for i, v in enumerate(self.size_kg)),
+            "price_per_kg": SortedIndex((v, i) for i, v in enumerate(self.price_per_kg)),
+        }
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    # ============================================
+    # LECTURA
+    # ============================================
+
+    def is_expired(self, max_age_seconds: float) -> bool:
+        """Indica si el snapshot ya superó su tiempo de vida."""
+        return time.monotonic() - self.loaded_at > max_age_seconds
+
+    def live_slots(self) -> list[int]:
+        """Slots ocupados, en orden."""
+        return sorted(self.by_key.values())
+
+    def product(self, slot: int) -> dict:
+        """Copia del producto en el slot (para que los callers puedan mutarlo)."""
+        return dict(self.products[slot])
+
+    def find(self, product_id: str) -> Optional[int]:
+        """Busca el slot de un producto por Clave o código de barras."""
+        slots = self.by_id.get(product_id) or self.by_barcode.get(product_id)
+        return slots[0] if slots else None
+
+    def facet(self, name: str, value: str) -> set[int]:
+        """Slots con un valor de faceta (conjunto vacío si no existe)."""
+        return self.facets.get(name, {}).get(value, set())
+
+    def candidates(self, words: Iterable[str]) -> set[int]:
+        """
+        Slots cuyo texto contiene alguna de las palabras (como substring).
+
+        Equivale a `word in search_text`: se recorre el vocabulario del
+        índice invertido (mucho menor que el catálogo) y se unen postings.
+        """
+        words = [w for w in words if w]
+        slots: set[int] = set()
+        if not words:
+            return slots
+        for token, postings in self.inverted.items():
+            if any(word in token for word in words):
+                slots |= postings
+        return slots
+
+    def get_derived(self, name: str) -> Any:
+        """Obtiene (construyendo si hace falta) una estructura derivada registrada."""
+        if name not in self.derived:
+            build, _ = _DERIVED[name]
+            self.derived[name] = build(self)
+        return self.derived[name]
+
+    def filter_slots(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_size_kg: Optional[float] = None,
+        max_size_kg: Optional[float] = None,
+    ) -> Optional[set[int]]:
+        """
+        Aplica filtros numéricos usando los índices ordenados.
+
+        Returns:
+            Conjunto de slots que cumplen los filtros, o None si no hay filtros
+        """
+        allowed: Optional[set[int]] = None
+
+        if min_price is not None or max_price is not None:
+            allowed = set(self.indexes["price"].range(min_price, max_price))
+
+        if min_size_kg is not None or max_size_kg is not None:
+            sized = set(self.indexes["size_kg"].range(min_size_kg, max_size_kg))
+            allowed = sized if allowed is None else allowed & sized
+
+        return allowed
+
+    def sort_slots(self, slots: list[int], sort_by: Optional[str]) -> list[int]:
+        """
+        Reordena slots según un atributo numérico.
+
+        El orden previo (relevancia) se conserva como desempate y los
+        productos sin el atributo (NaN, o precio 0 de las filas sin precio,
+        igual que en el índice de precios) quedan al final.
+        """
+        option = SORT_OPTIONS.get(sort_by or "relevance")
+        if option is None:
+            return slots
+
+        column_name, descending = option
+        column = getattr(self, column_name)
+
+        # `not v > 0` también es verdadero para NaN
+        known = [s for s in slots if column[s] > 0]
+        unknown = [s for s in slots if not column[s] > 0]
+        known.sort(key=lambda s: column[s], reverse=descending)
+        return known + unknown
+
+    # ============================================
+    # REFRESCO INCREMENTAL
+    # ============================================
+
+    def diff(self, rows: list[dict]) -> CatalogDiff:
+        """Calcula el diff por Clave contra una nueva carga de la hoja."""
+        return CatalogDiff.compute(self.rows, key_rows(rows))
+
+    def refreshed(self, rows: list[dict]) -> tuple["CatalogSnapshot", CatalogDiff]:
+        """
+        Construye la siguiente versión del snapshot a partir de una nueva carga.
+
+        Aplica el diff de forma incremental; si toca demasiadas filas
+        reconstruye todo (es más barato que parchear).
+        """
+        diff = self.diff(rows)
+        if not diff:
+            return self, diff
+        if len(diff) > max(len(self), 1) * FULL_REBUILD_RATIO:
+            return CatalogSnapshot(rows, self.version + 1, self.classifier), diff
+        return self.apply_diff(diff), diff
+
+    def apply_diff(self, diff: CatalogDiff) -> "CatalogSnapshot":
+        """Devuelve una nueva versión con el diff aplicado (este snapshot no cambia)."""
+        new = self._clone()
+
+        for key in diff.removed:
+            new._remove(key)
+        for key, (_, row) in diff.changed.items():
+            new._remove(key)
+            new._insert(key, row)
+        for key, row in diff.added.items():
+            new._insert(key, row)
+
+        new._owned = set()
+
+        for name, value in list(self.derived.items()):
+            _, update = _DERIVED[name]
+            new.derived[name] = update(new, value, diff)
+
+        return new
+
+    def _clone(self) -> "CatalogSnapshot":
+        """Copia superficial; los sets se reemplazan (no se mutan) al escribir."""
+        new = CatalogSnapshot.__new__(CatalogSnapshot)
+        new.version = self.version + 1
+        new.loaded_at = time.monotonic()
+        new.classifier = self.classifier
+
+        new.rows = dict(self.rows)
+        new.keys = list(self.keys)
+        new.free_slots = list(self.free_slots)
+
+        new.products = list(self.products)
+        new.search_texts = list(self.search_texts)
+        new.descriptions = list(self.descriptions)
+        new.brands = list(self.brands)
+        new.categories = list(self.categories)
+        new.lines = list(self.lines)
+
+        new.price = array("d", self.price)
+        new.size_kg = array("d", self.size_kg)
+        new.price_per_kg = array("d", self.price_per_kg)
+
+        new.by_key = dict(self.by_key)
+        new.by_id = dict(self.by_id)
+        new.by_barcode = dict(self.by_barcode)
+        new.inverted = dict(self.inverted)
+        new.facets = {name: dict(values) for name, values in self.facets.items()}
+        new.derived = {}
+        new._owned = set()
+        new.indexes = {name: index.copy() for name, index in self.indexes.items()}
+        return new
+
+    def _allocate_slot(self) -> int:
+        """Reutiliza un slot libre o agrega uno nuevo al final."""
+        if self.free_slots:
+            return self.free_slots.pop()
+        self.keys.append(None)
+        self.products.append(None)
+        for column in (self.search_texts, self.descriptions, self.brands, self.categories, self.lines):
+            column.append("")
+        for column in (self.price, self.size_kg, self.price_per_kg):
+            column.append(NAN)
+        return len(self.products) - 1
+
+    def _facet_values(self, slot: int) -> dict[str, Iterable[str]]:
+        """Valores de faceta de un slot."""
+        values: dict[str, Iterable[str]] = {
+            "brand": [self.brands[slot]] if self.brands[slot] else [],
+            "category": [self.categories[slot]] if self.categories[slot] else [],
+        }
+        if self.classifier is not None:
+            values.update(self.classifier(self.search_texts[slot], self.brands[slot]))
+        return values
+
+    def _insert(self, key: str, row: dict) -> None:
+        """Agrega una fila en un slot y la registra en todos los índices."""
+        slot = self._allocate_slot()
+        product = row_to_product(row)
+
+        self.rows[key] = row
+        self.keys[slot] = key
+        self.products[slot] = product
+        self.search_texts[slot] = _search_text(row)
+        self.descriptions[slot] = str(row.get("Descripcion", "")).lower()
+        self.brands[slot] = str(row.get("Marca", "")).lower()
+        self.categories[slot] = str(row.get("Familia", "")).lower()
+        self.lines[slot] = str(row.get("linea", "")).lower()
+
+        self.price[slot] = product["price"]
+        self.size_kg[slot] = product["size_kg"] if product["size_kg"] is not None else NAN
+        self.price_per_kg[slot] = (
+            product["price_per_kg"] if product["price_per_kg"] is not None else NAN
+        )
+
+        self.by_key[key] = slot
+        for mapping, value in ((self.by_id, product["id"]), (self.by_barcode, product["barcode"])):
+            if value:
+                mapping[str(value)] = mapping.get(str(value), ()) + (slot,)
+
+        for token in set(self.search_texts[slot].split()):
+            self._add_posting(self.inverted, token, slot)
+
+        for name, values in self._facet_values(slot).items():
+            facet = self.facets.setdefault(name, {})
+            for value in set(values):
+                self._add_posting(facet, value, slot)
+
+        # Durante la construcción inicial los índices ordenados se crean al final
+        if self.indexes is not None:
+            if self.price[slot] > 0:
+                self.indexes["price"].insert(self.price[slot], slot)
+            self.indexes["size_kg"].insert(self.size_kg[slot], slot)
+            self.indexes["price_per_kg"].insert(self.price_per_kg[slot], slot)
+
+    def _remove(self, key: str) -> None:
+        """Saca una fila de todos los índices y libera su slot."""
+        slot = self.by_key.pop(key, None)
+        if slot is None:
+            return
+        product = self.products[slot]
+
+        for mapping, value in ((self.by_id, product["id"]), (self.by_barcode, product["barcode"])):
+            remaining = tuple(s for s in mapping.get(str(value), ()) if s != slot)
+            if remaining:
+                mapping[str(value)] = remaining
+            else:
+                mapping.pop(str(value), None)
+
+        for token in set(self.search_texts[slot].split()):
+            self._discard_posting(self.inverted, token, slot)
+
+        for name, values in self._facet_values(slot).items():
+            facet = self.facets.get(name, {})
+            for value in set(values):
+                self._discard_posting(facet, value, slot)
+
+        if self.price[slot] > 0:
+            self.indexes["price"].remove(self.price[slot], slot)
+        self.indexes["size_kg"].remove(self.size_kg[slot], slot)
+        self.indexes["price_per_kg"].remove(self.price_per_kg[slot], slot)
+
+        del self.rows[key]
+        self.keys[slot] = None
+        self.products[slot] = None
+        for column in (self.search_texts, self.descriptions, self.brands, self.categories, self.lines):
+            column[slot] = ""
+        for column in (self.price, self.size_kg, self.price_per_kg):
+            column[slot] = NAN
+        self.free_slots.append(slot)
+
+    def _writable(self, mapping: dict[str, set[int]], key: str) -> set[int]:
+        """Set de postings que esta versión puede mutar (copia el compartido)."""
+        postings = mapping.get(key)
+        if postings is None or id(postings) not in self._owned:
+            postings = set(postings or ())
+            mapping[key] = postings
+            self._owned.add(id(postings))
+        return postings
+
+    def _add_posting(self, mapping: dict[str, set[int]], key: str, slot: int) -> None:
+        """Agrega un slot a un posting list."""
+        self._writable(mapping, key).add(slot)
+
+    def _discard_posting(self, mapping: dict[str, set[int]], key: str, slot: int) -> None:
+        """Quita un slot de un posting list (y la entrada si queda vacía)."""
+        if key not in mapping:
+            return
+        postings = self._writable(mapping, key)
+        postings.discard(slot)
+        if not postings:
+            del mapping[key]
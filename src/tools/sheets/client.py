@@ -1,13 +1,14 @@
 """Cliente de Google Sheets."""
 
 import os
-from typing import Optional, Any
+from typing import Any, Optional
+
+import structlog
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google.oauth2.service_account import Credentials as ServiceAccountCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-import structlog
 
 from src.config.settings import settings
 
@@ -104,13 +105,13 @@ class SheetsClient:
             logger.error("Error reading range", range=range_notation, error=str(e))
             return []
 
-    def read_all(self) -> list[list[Any]]:
-        """Lee toda la hoja."""
+    def read_all(self, sheet_name: Optional[str] = None) -> list[list[Any]]:
+        """Lee toda la hoja (o la pestaña indicada)."""
         try:
             result = (
                 self.service.spreadsheets()
                 .values()
-                .get(spreadsheetId=self.spreadsheet_id, range=self.sheet_name)
+                .get(spreadsheetId=self.spreadsheet_id, range=sheet_name or self.sheet_name)
                 .execute()
             )
             return result.get("values", [])
@@ -123,9 +124,9 @@ class SheetsClient:
         data = self.read_range("1:1")
         return data[0] if data else []
 
-    def get_all_as_dicts(self) -> list[dict]:
-        """Lee toda la hoja como lista de diccionarios."""
-        data = self.read_all()
+    def get_all_as_dicts(self, sheet_name: Optional[str] = None) -> list[dict]:
+        """Lee toda la hoja (o la pestaña indicada) como lista de diccionarios."""
+        data = self.read_all(sheet_name)
         if not data or len(data) < 2:
             return []
 
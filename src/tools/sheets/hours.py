@@ -0,0 +1,191 @@
+"""Horarios de sucursal: parseo de texto libre a intervalos por día de la semana."""
+
+import re
+import unicodedata
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Zona horaria de las tiendas (CDMX, sin horario de verano desde 2022)
+STORE_TZ = timezone(timedelta(hours=-6), name="America/Mexico_City")
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+# Nombres y abreviaturas de días (sin acentos) → weekday de Python
+DAYS = {
+    "lunes": 0, "lun": 0,
+    "martes": 1, "mar": 1,
+    "miercoles": 2, "mie": 2, "mier": 2,
+    "jueves": 3, "jue": 3,
+    "viernes": 4, "vie": 4,
+    "sabado": 5, "sabados": 5, "sab": 5,
+    "domingo": 6, "domingos": 6, "dom": 6,
+}
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<day>\b(?:" + "|".join(sorted(DAYS, key=len, reverse=True)) + r")\b\.?)"
+    r"|(?P<range>(?P<start>\d{1,2}(?::\d{2})?\s*(?:am|pm|hrs|h)?)\s*(?:-|–|a)\s*"
+    r"(?P<end>\d{1,2}(?::\d{2})?\s*(?:am|pm|hrs|h)?))"
+    r"|(?P<closed>\bcerrad[oa]\b)"
+)
+
+# Lo que puede haber entre dos días para formar un rango ("Lunes a Sábado", "Lun-Vie")
+DAY_RANGE_JOINER = re.compile(r"^\s*(?:a|al|-|–)\s*$")
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def _parse_time(text: str) -> Optional[int]:
+    """'9', '9:30', '8pm', '21 hrs' → minutos desde medianoche."""
+    match = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text.strip())
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def parse_hours(text: str) -> dict[int, list[tuple[int, int]]]:
+    """
+    Parsea un horario en texto libre.
+
+    "Lunes a Sábado 9:00 - 20:00, Domingo 10:00 - 18:00"
+    → {0: [(540, 1200)], ..., 5: [(540, 1200)], 6: [(600, 1080)]}
+
+    Soporta rangos de días ("Lunes a Viernes", "Lun-Vie"), listas
+    ("Sábado y Domingo"), varios turnos por día y días "cerrado".
+    """
+    text = _strip_accents(text)
+    schedule: dict[int, list[tuple[int, int]]] = {}
+
+    days: list[int] = []
+    last_day: Optional[int] = None
+    last_end = 0
+    after_time = False
+
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.group("day"):
+            day = DAYS[match.group("day").rstrip(".")]
+            if after_time:
+                # Empieza un grupo nuevo de días
+                days, last_day, after_time = [], None, False
+            if last_day is not None and DAY_RANGE_JOINER.match(text[last_end:match.start()]):
+                span = (day - last_day) % 7
+                days.extend((last_day + i) % 7 for i in range(1, span + 1))
+            else:
+                days.append(day)
+            last_day = day
+
+        elif match.group("range"):
+            start, end = _parse_time(match.group("start")), _parse_time(match.group("end"))
+            if start is not None and end is not None and days:
+                if end <= start:
+                    end += MINUTES_PER_DAY  # cierra después de medianoche
+                for day in days:
+                    schedule.setdefault(day, []).append((start, end))
+            after_time = True
+
+        elif match.group("closed"):
+            for day in days:
+                schedule.pop(day, None)
+            after_time = True
+
+        last_end = match.end()
+
+    return {day: sorted(spans) for day, spans in schedule.items()}
+
+
+class WeeklySchedule:
+    """
+    Horario semanal precalculado por minuto de la semana.
+
+    `closes_at[m]` es el minuto de la semana en que cierra el turno que
+    incluye a m (-1 si está cerrado) y `opens_at[m]` el siguiente minuto de
+    apertura. Así "¿está abierto?", "¿a qué hora cierra?" y "¿cuándo abre?"
+    son una lectura de arreglo.
+    """
+
+    def __init__(self, intervals: dict[int, list[tuple[int, int]]], text: str = ""):
+        self.text = text
+        self.intervals = intervals
+        self.closes_at = array("h", [-1]) * MINUTES_PER_WEEK
+        self.opens_at = array("h", [-1]) * MINUTES_PER_WEEK
+
+        openings = []
+        for day, spans in intervals.items():
+            for start, end in spans:
+                week_start = day * MINUTES_PER_DAY + start
+                week_end = (day * MINUTES_PER_DAY + end) % MINUTES_PER_WEEK
+                openings.append(week_start)
+                for minute in range(week_start, day * MINUTES_PER_DAY + end):
+                    self.closes_at[minute % MINUTES_PER_WEEK] = week_end
+
+        # Siguiente apertura: barrido hacia atrás sobre dos semanas
+        if openings:
+            is_opening = bytearray(MINUTES_PER_WEEK)
+            for minute in openings:
+                is_opening[minute] = 1
+            next_open = -1
+            for minute in range(2 * MINUTES_PER_WEEK - 1, -1, -1):
+                m = minute % MINUTES_PER_WEEK
+                if is_opening[m]:
+                    next_open = m
+                if minute < MINUTES_PER_WEEK:
+                    self.opens_at[m] = next_open
+
+    @classmethod
+    def parse(cls, text: str) -> "WeeklySchedule":
+        return cls(parse_hours(text), text=text)
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    @staticmethod
+    def minute_of_week(now: datetime) -> int:
+        now = now.astimezone(STORE_TZ) if now.tzinfo else now
+        return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+    def is_open(self, now: datetime) -> bool:
+        """Indica si la sucursal está abierta en ese momento."""
+        return self.closes_at[self.minute_of_week(now)] >= 0
+
+    def closes_at_time(self, now: datetime) -> Optional[str]:
+        """Hora de cierre del turno actual ("20:00") o None si está cerrada."""
+        minute = self.closes_at[self.minute_of_week(now)]
+        return format_minute(minute) if minute >= 0 else None
+
+    def next_opening(self, now: datetime) -> Optional[str]:
+        """Siguiente apertura ("Lunes 9:00") o None si no tiene horario."""
+        minute = self.opens_at[self.minute_of_week(now)]
+        if minute < 0:
+            return None
+        return f"{DAY_NAMES[minute // MINUTES_PER_DAY]} {format_minute(minute)}"
+
+    def day_text(self, weekday: int) -> str:
+        """Horario de un día ("9:00 - 20:00" o "Cerrado")."""
+        spans = self.intervals.get(weekday)
+        if not spans:
+            return "Cerrado"
+        return ", ".join(f"{format_minute(s)} - {format_minute(e)}" for s, e in spans)
+
+
+def format_minute(minute: int) -> str:
+    """Minuto del día/semana → "H:MM"."""
+    minute %= MINUTES_PER_DAY
+    return f"{minute // 60}:{minute % 60:02d}"
+
+
+def store_now() -> datetime:
+    """Hora actual en la zona horaria de las tiendas."""
+    return datetime.now(STORE_TZ)
@@ -0,0 +1,293 @@
+"""Inventario por sucursal: matriz compacta producto × sucursal."""
+
+import csv
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Iterable, Optional
+
+import structlog
+
+from src.config.settings import settings
+
+from .branches import get_branches
+from .catalog import CatalogSnapshot
+from .client import get_client
+from .snapshot import SnapshotLoader
+
+logger = structlog.get_logger()
+
+# Columnas reconocidas en el formato largo (una fila por producto y sucursal)
+BRANCH_COLUMNS = ("Sucursal", "sucursal", "Branch")
+QUANTITY_COLUMNS = ("Existencia", "existencia", "Stock", "stock", "Cantidad", "cantidad")
+
+
+def slugify(text: str) -> str:
+    """Normaliza un texto a minúsculas sin acentos separado por guiones."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def match_branch(label: str, branches: list[dict]) -> Optional[str]:
+    """
+    Identifica la sucursal de un encabezado o celda ("Ojo de Agua" → ojo-agua).
+
+    Acepta el id exacto o un fragmento del nombre de la sucursal.
+    """
+    slug = slugify(label)
+    if len(slug) < 4:
+        return None
+    for branch in branches:
+        if slug == branch["id"]:
+            return branch["id"]
+    for branch in branches:
+        if slug in slugify(branch["name"]):
+            return branch["id"]
+    return None
+
+
+def parse_quantity(value) -> int:
+    """Parsea una existencia (vacío, negativo o inválido → 0)."""
+    try:
+        clean = str(value).replace(",", "").strip()
+        return max(int(float(clean)), 0) if clean else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def parse_inventory_rows(rows: list[dict], branches: list[dict]) -> dict[str, dict[str, int]]:
+    """
+    Convierte las filas de inventario en {Clave: {sucursal: existencia}}.
+
+    Soporta dos formatos:
+    - Ancho: Clave + una columna por sucursal
+    - Largo: Clave, Sucursal, Existencia (una fila por combinación)
+
+    Las claves repetidas se suman.
+    """
+    stock: dict[str, dict[str, int]] = {}
+    if not rows:
+        return stock
+
+    headers = list(rows[0].keys())
+    branch_col = next((h for h in BRANCH_COLUMNS if h in headers), None)
+
+    if branch_col:
+        qty_col = next((h for h in QUANTITY_COLUMNS if h in headers), None)
+        for row in rows:
+            key = str(row.get("Clave", "")).strip()
+            branch_id = match_branch(row.get(branch_col, ""), branches)
+            if not key or branch_id is None:
+                continue
+            per_branch = stock.setdefault(key, {})
+            per_branch[branch_id] = per_branch.get(branch_id, 0) + parse_quantity(row.get(qty_col, 0))
+        return stock
+
+    columns = {h: match_branch(h, branches) for h in headers if h != "Clave"}
+    columns = {h: branch_id for h, branch_id in columns.items() if branch_id}
+    for row in rows:
+        key = str(row.get("Clave", "")).strip()
+        if not key:
+            continue
+        per_branch = stock.setdefault(key, {})
+        for header, branch_id in columns.items():
+            per_branch[branch_id] = per_branch.get(branch_id, 0) + parse_quantity(row.get(header, 0))
+    return stock
+
+
+class InventorySnapshot:
+    """
+    Foto de existencias por sucursal.
+
+    Las existencias viven en un solo arreglo de enteros (fila = producto,
+    columna = sucursal). Las consultas por sucursal recorren una columna
+    con slicing y se alinean con los slots del catálogo mediante un arreglo
+    slot → fila que se calcula una vez por versión de catálogo.
+
+    Igual que el catálogo, un snapshot publicado no se modifica: una
+    recarga con cambios produce la versión siguiente. Los productos que no
+    aparecen en el inventario se consideran sin existencia.
+    """
+
+    def __init__(self, stock: dict[str, dict[str, int]], branch_ids: Iterable[str], version: int = 1):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.branch_ids: tuple[str, ...] = tuple(branch_ids)
+        self.branch_index = {branch_id: i for i, branch_id in enumerate(self.branch_ids)}
+
+        width = len(self.branch_ids)
+        self.row_of: dict[str, int] = {}
+        self.stock = array("l", bytes(array("l").itemsize * width * len(stock)))
+        for row, (key, per_branch) in enumerate(stock.items()):
+            self.row_of[key] = row
+            for branch_id, qty in per_branch.items():
+                col = self.branch_index.get(branch_id)
+                if col is not None:
+                    self.stock[row * width + col] = qty
+
+        # (id del catálogo, versión) -> arreglo slot → fila (-1 si no hay inventario)
+        self._slot_rows: Optional[tuple[tuple[int, int], array]] = None
+        self._available: dict[tuple, set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def is_expired(self, max_age_seconds: float) -> bool:
+        """Indica si el snapshot ya superó su tiempo de vida."""
+        return time.monotonic() - self.loaded_at > max_age_seconds
+
+    def same_as(self, other: "InventorySnapshot") -> bool:
+        """Compara contenido (para no publicar versiones sin cambios)."""
+        return (
+            self.branch_ids == other.branch_ids
+            and self.row_of == other.row_of
+            and self.stock == other.stock
+        )
+
+    # ============================================
+    # CONSULTAS POR PRODUCTO
+    # ============================================
+
+    def stock_of(self, product_id: str) -> dict[str, int]:
+        """Existencias por sucursal de un producto."""
+        row = self.row_of.get(str(product_id))
+        width = len(self.branch_ids)
+        if row is None:
+            return {branch_id: 0 for branch_id in self.branch_ids}
+        values = self.stock[row * width:(row + 1) * width]
+        return dict(zip(self.branch_ids, values))
+
+    def total(self, product_id: str) -> int:
+        """Existencia total de un producto en todas las sucursales."""
+        return sum(self.stock_of(product_id).values())
+
+    def missing_at(self, branch_id: str, items: Iterable[tuple[str, int]]) -> list[str]:
+        """Productos (id) de la lista que no alcanzan en la sucursal."""
+        col = self.branch_index.get(branch_id)
+        width = len(self.branch_ids)
+        missing = []
+        for product_id, quantity in items:
+            row = self.row_of.get(str(product_id))
+            if col is None or row is None or self.stock[row * width + col] < quantity:
+                missing.append(product_id)
+        return missing
+
+    def branches_for(self, items: Iterable[tuple[str, int]]) -> list[str]:
+        """Sucursales que tienen todo el pedido (en orden de sucursal)."""
+        items = list(items)
+        return [branch_id for branch_id in self.branch_ids if not self.missing_at(branch_id, items)]
+
+    # ============================================
+    # CONSULTAS ALINEADAS AL CATÁLOGO
+    # ============================================
+
+    def slot_rows(self, catalog: CatalogSnapshot) -> array:
+        """Fila de inventario por slot del catálogo (se cachea por versión)."""
+        cache_key = (id(catalog), catalog.version)
+        cached = self._slot_rows
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+        rows = array("l", [-1]) * len(catalog.products)
+        for slot in catalog.live_slots():
+            rows[slot] = self.row_of.get(catalog.products[slot]["id"], -1)
+        self._slot_rows = (cache_key, rows)
+        return rows
+
+    def available_slots(self, catalog: CatalogSnapshot, branch_id: str, min_qty: int = 1) -> set[int]:
+        """
+        Slots del catálogo con al menos `min_qty` unidades en la sucursal.
+
+        Sucursal desconocida → conjunto vacío.
+        """
+        col = self.branch_index.get(branch_id)
+        if col is None:
+            return set()
+
+        cache_key = (id(catalog), catalog.version, col, min_qty)
+        with self._lock:
+            cached = self._available.get(cache_key)
+        if cached is not None:
+            return cached
+
+        column = self.stock[col::len(self.branch_ids)]
+        rows = self.slot_rows(catalog)
+        available = {slot for slot, row in enumerate(rows) if row >= 0 and column[row] >= min_qty}
+
+        with self._lock:
+            if len(self._available) > 64:
+                self._available.clear()
+            self._available[cache_key] = available
+        return available
+
+    def annotate(self, product: dict) -> dict:
+        """Agrega existencias total y por sucursal a un producto (en sitio)."""
+        per_branch = self.stock_of(product["id"])
+        product["stock"] = sum(per_branch.values())
+        product["stock_by_branch"] = per_branch
+        return product
+
+
+# ============================================
+# CARGA Y REFRESCO
+# ============================================
+
+
+def inventory_configured() -> bool:
+    """Indica si hay una fuente de inventario configurada."""
+    return bool(settings.inventory_file_path or settings.inventory_sheet_name)
+
+
+def load_inventory_rows() -> list[dict]:
+    """Lee las filas de inventario del CSV local o de la pestaña de la hoja."""
+    if settings.inventory_file_path:
+        try:
+            with open(settings.inventory_file_path, encoding="utf-8-sig", newline="") as f:
+                return list(csv.DictReader(f))
+        except OSError as e:
+            logger.error("Error reading inventory file", path=settings.inventory_file_path, error=str(e))
+            return []
+    return get_client().get_all_as_dicts(sheet_name=settings.inventory_sheet_name)
+
+
+def build_inventory(rows: list[dict], previous: Optional[InventorySnapshot]) -> InventorySnapshot:
+    """Construye la matriz con las sucursales del directorio vigente."""
+    branches = get_branches()
+    version = previous.version + 1 if previous is not None else 1
+    return InventorySnapshot(
+        parse_inventory_rows(rows, branches), [branch["id"] for branch in branches], version=version
+    )
+
+
+_loader: SnapshotLoader[InventorySnapshot] = SnapshotLoader("inventory", load_inventory_rows, build_inventory)
+
+
+def refresh_inventory() -> Optional[InventorySnapshot]:
+    """
+    Recarga el inventario y publica la siguiente versión si cambió.
+
+    Si la recarga no trae filas se conserva el snapshot anterior.
+    """
+    return _loader.refresh()
+
+
+def inventory_version() -> int:
+    """Versión del inventario vigente sin cargar nada (0 = aún no cargado)."""
+    snapshot = _loader.current
+    return snapshot.version if snapshot is not None else 0
+
+
+def get_inventory(force_refresh: bool = False) -> Optional[InventorySnapshot]:
+    """
+    Obtiene el snapshot de inventario (None si no hay fuente configurada).
+
+    Misma política que el catálogo: primera carga síncrona y refresco en
+    segundo plano cuando expira.
+    """
+    if not inventory_configured():
+        return None
+    return _loader.get(force_refresh)
@@ -1,12 +1,21 @@
 """Tools para productos con búsqueda inteligente."""
 
-from typing import Optional
+import threading
+import time
+from typing import Callable, Literal, Optional, Sequence
+
+import structlog
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
-import structlog
 
+from src.config.settings import settings
+from src.tools.cache import LRUCache
+from src.tools.popularity import get_popularity_tracker, get_query_log
+from src.tools.render import resolve_handle
+
+from .catalog import CatalogSnapshot, parse_price
 from .client import get_client
-from src.schemas.product import Product
+from .inventory import InventorySnapshot, get_inventory
 
 logger = structlog.get_logger()
 
@@ -61,167 +70,419 @@ PRODUCT_TYPE_KEYWORDS = {
 }
 
 
+SortOption = Literal["relevance", "price_asc", "price_desc", "size_asc", "size_desc", "price_per_kg_asc"]
+
+
 class ProductSearchInput(BaseModel):
     """Input para buscar productos."""
 
     query: str = Field(description="Término de búsqueda (nombre, categoría, marca)")
     max_results: int = Field(default=5, description="Número máximo de resultados")
     pet_type: Optional[str] = Field(default=None, description="Tipo de mascota (perro, gato, etc.)")
+    min_price: Optional[float] = Field(default=None, description="Precio mínimo en MXN")
+    max_price: Optional[float] = Field(default=None, description="Precio máximo en MXN (ej. 'menos de $500' → 500)")
+    min_size_kg: Optional[float] = Field(default=None, description="Tamaño mínimo del empaque en kg")
+    max_size_kg: Optional[float] = Field(default=None, description="Tamaño máximo del empaque en kg")
+    sort_by: Optional[SortOption] = Field(
+        default=None,
+        description=(
+            "Orden de resultados: relevance (default), price_asc (más barato), price_desc, "
+            "size_desc (bolsa más grande), size_asc, price_per_kg_asc (más barato por kg)"
+        ),
+    )
+    branch_id: Optional[str] = Field(
+        default=None,
+        description="Solo productos con existencia en esta sucursal (ojo-agua, tecamac, ecatepec) para recoger",
+    )
+
+
+# Snapshot vigente del catálogo (se recarga cada settings.catalog_refresh_seconds)
+_catalog: Optional[CatalogSnapshot] = None
+_refresh_lock = threading.Lock()
+
+# Funciones a llamar cada vez que se publica un snapshot nuevo (ej. cache warmer)
+_catalog_listeners: list[Callable[[CatalogSnapshot], None]] = []
+
+# Scores de texto/filtros (score, slot) por versión de catálogo e inventario y
+# argumentos normalizados; la popularidad se suma después de la caché
+_search_cache = LRUCache(maxsize=settings.search_cache_size)
+
+
+def add_catalog_listener(listener: Callable[[CatalogSnapshot], None]) -> None:
+    """Registra una función que se ejecuta tras publicar cada snapshot."""
+    if listener not in _catalog_listeners:
+        _catalog_listeners.append(listener)
+
+
+def _notify_listeners(snapshot: CatalogSnapshot) -> None:
+    """Avisa a los listeners sin que un error en uno afecte la carga."""
+    for listener in list(_catalog_listeners):
+        try:
+            listener(snapshot)
+        except Exception as e:
+            logger.error("Catalog listener failed", listener=getattr(listener, "__name__", "?"), error=str(e))
+
+
+def classify_pets(search_text: str, marca: str) -> dict[str, list[str]]:
+    """
+    Facetas de mascota de un producto (se calculan una vez por fila).
 
+    - pet: mascotas cuyas palabras clave aparecen en el texto
+    - pet_brand: mascotas para las que la marca es conocida
+    """
+    return {
+        "pet": [pet for pet, words in PET_KEYWORDS.items() if any(w in search_text for w in words)],
+        "pet_brand": [pet for pet, brands in PET_BRANDS.items() if any(b in marca for b in brands)],
+    }
 
-@tool(args_schema=ProductSearchInput)
-def search_products(query: str, max_results: int = 5, pet_type: Optional[str] = None) -> list[dict]:
+
+def refresh_catalog() -> CatalogSnapshot:
     """
-    Busca productos en el catálogo de Animalicha con filtrado inteligente.
+    Recarga la hoja y publica la siguiente versión del snapshot.
+
+    Aplica el diff por Clave de forma incremental sobre una copia; los
+    lectores siguen usando la versión anterior hasta que se reemplaza la
+    referencia global. Si la recarga no trae filas (error de red, hoja
+    vacía) se conserva el snapshot anterior.
+    """
+    global _catalog
+
+    with _refresh_lock:
+        previous = _catalog
+        rows = get_client().get_all_as_dicts()
+
+        if previous is None:
+            _catalog = CatalogSnapshot(rows, version=1, classifier=classify_pets)
+            logger.info(
+                "Catalog snapshot loaded",
+                version=1,
+                products=len(_catalog),
+                with_size=len(_catalog.indexes["size_kg"]),
+            )
+            _notify_listeners(_catalog)
+            return _catalog
+
+        if not rows:
+            logger.warning("Catalog reload returned no rows, keeping previous snapshot",
+                           version=previous.version)
+            previous.loaded_at = time.monotonic()
+            return previous
+
+        started = time.perf_counter()
+        snapshot, diff = previous.refreshed(rows)
+        snapshot.loaded_at = time.monotonic()
+        if snapshot is previous:
+            return previous
+        _catalog = snapshot
+
+        logger.info(
+            "Catalog snapshot refreshed",
+            version=snapshot.version,
+            products=len(snapshot),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            **diff.summary(),
+        )
+        _notify_listeners(snapshot)
+        return snapshot
+
+
+def _refresh_in_background() -> None:
+    """Refresca el catálogo sin bloquear al lector que detectó la expiración."""
+    try:
+        refresh_catalog()
+    except Exception as e:
+        logger.error("Error refreshing catalog", error=str(e))
+
+
+def get_catalog(force_refresh: bool = False) -> CatalogSnapshot:
+    """
+    Obtiene el snapshot del catálogo.
+
+    La primera carga es síncrona. Cuando el snapshot expira se devuelve el
+    actual y el refresco corre en un hilo aparte (stale-while-revalidate).
+    """
+    snapshot = _catalog
+
+    if snapshot is None or force_refresh:
+        return refresh_catalog()
+
+    if snapshot.is_expired(settings.catalog_refresh_seconds) and not _refresh_lock.locked():
+        # Evita que varios lectores disparen el mismo refresco
+        snapshot.loaded_at = time.monotonic()
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+
+    return snapshot
+
+
+def catalog_version() -> int:
+    """Versión del snapshot vigente sin cargar nada (0 = aún no cargado)."""
+    snapshot = _catalog
+    return snapshot.version if snapshot is not None else 0
+
+
+def normalize_search_args(
+    query: str,
+    max_results: int = 5,
+    pet_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_size_kg: Optional[float] = None,
+    max_size_kg: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    branch_id: Optional[str] = None,
+) -> dict:
+    """
+    Normaliza los argumentos de búsqueda.
+
+    Misma búsqueda → mismo diccionario: sirve como llave de caché y como
+    entrada del log de búsquedas que usa el cache warmer.
+    """
+    args = {
+        "query": " ".join(query.lower().split()),
+        "max_results": max_results,
+        "pet_type": normalize_pet_type(pet_type),
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_size_kg": min_size_kg,
+        "max_size_kg": max_size_kg,
+        "sort_by": None if sort_by == "relevance" else sort_by,
+        "branch_id": branch_id,
+    }
+    return {key: value for key, value in args.items() if value is not None}
+
+
+def normalize_pet_type(pet_type: Optional[str]) -> Optional[str]:
+    """Normaliza el tipo de mascota (por si el usuario dice "roedor" en vez de "hamster")."""
+    normalized = pet_type.lower() if pet_type else None
+    if normalized and normalized in PET_ALIASES:
+        normalized = PET_ALIASES[normalized]
+    return normalized
+
+
+def expand_query(query: str) -> list[str]:
+    """Palabras de la query expandidas con sinónimos de tipo de producto."""
+    expanded_query_words = set()
+    for word in query.lower().strip().split():
+        if len(word) > 2:
+            expanded_query_words.add(word)
+            # Agregar sinónimos
+            for product_type, synonyms in PRODUCT_TYPE_KEYWORDS.items():
+                if word in synonyms or word == product_type:
+                    expanded_query_words.update(synonyms)
+    return list(expanded_query_words)
+
+
+def rank_products(
+    catalog: CatalogSnapshot,
+    query: str,
+    pet_type: Optional[str] = None,
+    allowed: Optional[set[int]] = None,
+    popularity: Optional[Sequence[float]] = None,
+) -> list[tuple[float, int]]:
+    """
+    Calcula el score de relevancia de los productos que coinciden con la query.
 
     Args:
-        query: Término de búsqueda (nombre del producto, marca, categoría)
-        max_results: Máximo de resultados a devolver
-        pet_type: Filtrar por tipo de mascota (perro, gato, etc.)
+        catalog: Snapshot sobre el que se busca
+        query: Texto de búsqueda
+        pet_type: Tipo de mascota para filtrar/priorizar
+        allowed: Restringe la búsqueda a estos slots (filtros numéricos)
+        popularity: Bono de popularidad precalculado por slot
 
     Returns:
-        Lista de productos encontrados con: nombre, precio, stock, descripción
+        Lista de (score, slot) ordenada por score descendente
     """
-    try:
-        client = get_client()
-        all_products = client.get_all_as_dicts()
+    query_lower = query.lower().strip()
+    query_words = expand_query(query)
+
+    normalized_pet_type = normalize_pet_type(pet_type)
+
+    # Candidatos: solo productos con al menos una palabra (índice invertido)
+    candidates = catalog.candidates(query_words)
+    if allowed is not None:
+        candidates &= allowed
+
+    # Facetas de mascota precalculadas en el snapshot
+    if normalized_pet_type:
+        for_pet = catalog.facet("pet", normalized_pet_type) | catalog.facet("pet_brand", normalized_pet_type)
+        pet_brand = catalog.facet("pet_brand", normalized_pet_type)
+        other_pets = set()
+        for other_pet in PET_KEYWORDS:
+            if other_pet != normalized_pet_type:
+                other_pets |= catalog.facet("pet", other_pet) | catalog.facet("pet_brand", other_pet)
+
+    scored_results = []
+
+    for slot in sorted(candidates):
+        search_text = catalog.search_texts[slot]
+        descripcion = catalog.descriptions[slot]
+
+        # ============================================
+        # FILTRO POR MASCOTA (flexible)
+        # ============================================
+        is_for_pet = False
+        is_for_other_pet = False
+
+        if normalized_pet_type:
+            is_for_pet = slot in for_pet
+            is_for_other_pet = slot in other_pets
+
+            # Si es claramente de otra mascota, SALTAR (filtro estricto)
+            if is_for_other_pet and not is_for_pet:
+                continue
 
-        if not all_products:
-            logger.warning("No products found in sheet")
-            return []
+        # ============================================
+        # BÚSQUEDA CON SCORING
+        # ============================================
+        score = 0
 
-        # Preparar búsqueda - expandir sinónimos
-        query_lower = query.lower().strip()
-
-        # Expandir la query con sinónimos de tipo de producto
-        expanded_query_words = set()
-        for word in query_lower.split():
-            if len(word) > 2:
-                expanded_query_words.add(word)
-                # Agregar sinónimos
-                for product_type, synonyms in PRODUCT_TYPE_KEYWORDS.items():
-                    if word in synonyms or word == product_type:
-                        expanded_query_words.update(synonyms)
-
-        query_words = list(expanded_query_words)
-
-        # Normalizar tipo de mascota (por si el usuario dice "roedor" en vez de "hamster")
-        normalized_pet_type = pet_type.lower() if pet_type else None
-        if normalized_pet_type and normalized_pet_type in PET_ALIASES:
-            normalized_pet_type = PET_ALIASES[normalized_pet_type]
-
-        # Obtener palabras clave de la mascota
-        pet_filter_words = PET_KEYWORDS.get(normalized_pet_type, []) if normalized_pet_type else []
-        pet_brands = PET_BRANDS.get(normalized_pet_type, []) if normalized_pet_type else []
-
-        scored_results = []
-
-        for row in all_products:
-            # Construir texto de búsqueda
-            descripcion = str(row.get("Descripcion", "")).lower()
-            marca = str(row.get("Marca", "")).lower()
-            familia = str(row.get("Familia", "")).lower()
-            linea = str(row.get("linea", "")).lower()
-            clave = str(row.get("Clave", "")).lower()
-
-            search_text = f"{descripcion} {marca} {familia} {linea} {clave}"
-
-            # ============================================
-            # FILTRO POR MASCOTA (flexible)
-            # ============================================
-            is_for_pet = False
-            is_for_other_pet = False
-
-            if normalized_pet_type:
-                # Verificar si tiene palabras de la mascota correcta
-                is_for_pet = any(pw in search_text for pw in pet_filter_words)
-
-                # Verificar si es de una marca conocida para esa mascota
-                if not is_for_pet and pet_brands:
-                    is_for_pet = any(pb in marca for pb in pet_brands)
-
-                # Verificar si es de OTRA mascota (más estricto)
-                for other_pet, other_words in PET_KEYWORDS.items():
-                    if other_pet != normalized_pet_type:
-                        if any(ow in search_text for ow in other_words):
-                            is_for_other_pet = True
-                            break
-
-                # También verificar marcas de otras mascotas
-                if not is_for_other_pet:
-                    for other_pet, other_brands in PET_BRANDS.items():
-                        if other_pet != normalized_pet_type:
-                            if any(ob in marca for ob in other_brands):
-                                is_for_other_pet = True
-                                break
-
-                # Si es claramente de otra mascota, SALTAR (filtro estricto)
-                if is_for_other_pet and not is_for_pet:
-                    continue
+        # Coincidencia exacta de la query original
+        if query_lower in search_text:
+            score += 100
 
-            # ============================================
-            # BÚSQUEDA CON SCORING
-            # ============================================
-            score = 0
+        # Contar coincidencias de palabras expandidas
+        matching_words = sum(1 for word in query_words if word in search_text)
 
-            # Coincidencia exacta de la query original
-            if query_lower in search_text:
-                score += 100
+        # Score basado en coincidencias
+        score += matching_words * 20
 
-            # Contar coincidencias de palabras expandidas
-            matching_words = sum(1 for word in query_words if word in search_text)
+        # Bonus por coincidencia en descripción
+        if any(word in descripcion for word in query_words):
+            score += 30
 
-            # Si no hay coincidencias, saltar
-            if matching_words == 0:
-                continue
+        # Bonus si es de la mascota correcta
+        if normalized_pet_type and is_for_pet:
+            score += 50
 
-            # Score basado en coincidencias
-            score += matching_words * 20
+        # Bonus si es marca conocida para esa mascota
+        if normalized_pet_type and slot in pet_brand:
+            score += 40
 
-            # Bonus por coincidencia en descripción
-            if any(word in descripcion for word in query_words):
-                score += 30
+        # Penalización FUERTE si es de otra mascota pero pasó el filtro inicial
+        if is_for_other_pet:
+            score -= 100
 
-            # Bonus si es de la mascota correcta
-            if normalized_pet_type and is_for_pet:
-                score += 50
+        # Bonus por popularidad (agregados al carrito, con decaimiento)
+        if popularity is not None:
+            score += popularity[slot]
 
-            # Bonus si es marca conocida para esa mascota
-            if pet_brands and any(pb in marca for pb in pet_brands):
-                score += 40
+        scored_results.append((score, slot))
 
-            # Penalización FUERTE si es de otra mascota pero pasó el filtro inicial
-            if is_for_other_pet:
-                score -= 100
+    # Ordenar por score descendente
+    scored_results.sort(key=lambda x: x[0], reverse=True)
+    return scored_results
 
-            # Crear producto normalizado
-            product = {
-                "id": row.get("Clave", ""),
-                "name": row.get("Descripcion", ""),
-                "category": row.get("Familia", ""),
-                "brand": row.get("Marca", ""),
-                "price": _parse_price(row.get("Precio Publico", "0")),
-                "stock": 999,
-                "description": f"{row.get('linea', '')} - {row.get('Marca', '')}",
-                "unit": row.get("Unidad", "PZ"),
-                "barcode": row.get("Codigo de barras", ""),
-            }
 
-            scored_results.append((score, product))
+@tool(args_schema=ProductSearchInput)
+def search_products(
+    query: str,
+    max_results: int = 5,
+    pet_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_size_kg: Optional[float] = None,
+    max_size_kg: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    branch_id: Optional[str] = None,
+) -> list[dict]:
+    """
+    Busca productos en el catálogo de Animalicha con filtrado inteligente.
 
-        # Ordenar por score descendente
-        scored_results.sort(key=lambda x: x[0], reverse=True)
-        results = [product for score, product in scored_results]
+    Args:
+        query: Término de búsqueda (nombre del producto, marca, categoría)
+        max_results: Máximo de resultados a devolver
+        pet_type: Filtrar por tipo de mascota (perro, gato, etc.)
+        min_price: Precio mínimo
+        max_price: Precio máximo
+        min_size_kg: Tamaño mínimo del empaque en kg
+        max_size_kg: Tamaño máximo del empaque en kg
+        sort_by: Ordenamiento (relevance, price_asc, price_desc, size_asc, size_desc, price_per_kg_asc)
+        branch_id: Solo productos con existencia en esa sucursal (pickup)
 
-        logger.info(
-            "Product search completed",
-            query=query,
-            pet_type=pet_type,
-            results_count=len(results),
-            top_scores=[s for s, _ in scored_results[:3]] if scored_results else [],
+    Returns:
+        Lista de productos encontrados con: nombre, precio, stock (total y por sucursal),
+        descripción, tamaño y precio por kg
+    """
+    return run_product_search(
+        query, max_results, pet_type, min_price, max_price, min_size_kg, max_size_kg, sort_by, branch_id
+    )
+
+
+def run_product_search(
+    query: str,
+    max_results: int = 5,
+    pet_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_size_kg: Optional[float] = None,
+    max_size_kg: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    branch_id: Optional[str] = None,
+    record_query: bool = True,
+) -> list[dict]:
+    """
+    Implementación de search_products (con caché por versión de catálogo).
+
+    Args:
+        record_query: Si la búsqueda se cuenta en el log (el warm-up no lo hace)
+    """
+    try:
+        catalog = get_catalog()
+
+        if not len(catalog):
+            logger.warning("No products found in sheet")
+            return []
+
+        args = normalize_search_args(
+            query, max_results, pet_type, min_price, max_price, min_size_kg, max_size_kg, sort_by, branch_id
+        )
+        if record_query:
+            get_query_log().record(args)
+
+        inventory = get_inventory()
+        inventory_version = inventory.version if inventory is not None else 0
+
+        # La popularidad no entra en la llave: cambia en cada volcado de
+        # contadores y dejaría fría la caché (y el warm-up) cada minuto
+        cache_key = (id(catalog), catalog.version, inventory_version, tuple(sorted(args.items())))
+        base_scores = _search_cache.get(cache_key)
+        cached = base_scores is not None
+
+        if base_scores is None:
+            # Filtros numéricos (precio / tamaño) resueltos con los índices ordenados
+            allowed = catalog.filter_slots(min_price, max_price, min_size_kg, max_size_kg)
+
+            # Existencia en la sucursal de pickup (columna de la matriz de inventario)
+            if branch_id and inventory is not None:
+                in_stock = inventory.available_slots(catalog, branch_id)
+                allowed = in_stock if allowed is None else allowed & in_stock
+
+            base_scores = rank_products(catalog, args["query"], args.get("pet_type"), allowed)
+            _search_cache.set(cache_key, base_scores)
+
+        # Bono de popularidad sobre el score de texto (mismo orden que rank_products)
+        popularity = get_popularity_tracker().bonus_array(catalog, settings.popularity_max_bonus)
+        scored_results = sorted(
+            ((score + popularity[slot], slot) for score, slot in base_scores),
+            key=lambda result: (-result[0], result[1]),
         )
 
-        return results[:max_results]
+        # Si se pidió, reordenar por atributo numérico
+        ranked_slots = catalog.sort_slots([slot for _, slot in scored_results], sort_by)[:max_results]
+
+        if not cached:
+            logger.info(
+                "Product search completed",
+                query=query,
+                pet_type=pet_type,
+                sort_by=sort_by,
+                branch_id=branch_id,
+                catalog_version=catalog.version,
+                results_count=len(scored_results),
+                top_scores=[s for s, _ in scored_results[:3]] if scored_results else [],
+            )
+
+        return [with_stock(catalog.product(slot), inventory) for slot in ranked_slots]
 
     except Exception as e:
         logger.error("Error searching products", query=query, error=str(e))
@@ -231,33 +492,20 @@ def search_products(query: str, max_results: int = 5, pet_type: Optional[str] =
 @tool
 def get_product_by_id(product_id: str) -> Optional[dict]:
     """
-    Obtiene un producto específico por su ID o SKU.
+    Obtiene un producto específico por su ID, SKU o ref de la tabla de resultados.
 
     Args:
-        product_id: ID o SKU del producto
+        product_id: ID, SKU o ref (6 caracteres) del producto
 
     Returns:
         Diccionario con los datos del producto o None si no existe
     """
     try:
-        client = get_client()
-        all_products = client.get_all_as_dicts()
-
-        for row in all_products:
-            if row.get("Clave") == product_id or row.get("Codigo de barras") == product_id:
-                return {
-                    "id": row.get("Clave", ""),
-                    "name": row.get("Descripcion", ""),
-                    "category": row.get("Familia", ""),
-                    "brand": row.get("Marca", ""),
-                    "price": _parse_price(row.get("Precio Publico", "0")),
-                    "stock": 999,
-                    "description": f"{row.get('linea', '')} - {row.get('Marca', '')}",
-                    "unit": row.get("Unidad", "PZ"),
-                    "barcode": row.get("Codigo de barras", ""),
-                }
-
-        return None
+        catalog = get_catalog()
+        slot = catalog.find(product_id)
+        if slot is None:
+            slot = resolve_handle(catalog, product_id)
+        return with_stock(catalog.product(slot), get_inventory()) if slot is not None else None
 
     except Exception as e:
         logger.error("Error getting product", product_id=product_id, error=str(e))
@@ -265,7 +513,13 @@ def get_product_by_id(product_id: str) -> Optional[dict]:
 
 
 @tool
-def get_products_by_category(category: str, max_results: int = 10, pet_type: Optional[str] = None) -> list[dict]:
+def get_products_by_category(
+    category: str,
+    max_results: int = 10,
+    pet_type: Optional[str] = None,
+    max_price: Optional[float] = None,
+    sort_by: Optional[SortOption] = None,
+) -> list[dict]:
     """
     Obtiene productos de una categoría específica.
 
@@ -273,23 +527,27 @@ def get_products_by_category(category: str, max_results: int = 10, pet_type: Opt
         category: Categoría a buscar (alimento, snacks, juguetes, etc.)
         max_results: Máximo de resultados
         pet_type: Filtrar por tipo de mascota
+        max_price: Precio máximo en MXN
+        sort_by: Ordenamiento (price_asc, price_desc, size_asc, size_desc, price_per_kg_asc)
 
     Returns:
         Lista de productos de esa categoría
     """
     try:
-        client = get_client()
-        all_products = client.get_all_as_dicts()
+        catalog = get_catalog()
 
         category_lower = category.lower()
         pet_filter_words = PET_KEYWORDS.get(pet_type.lower(), []) if pet_type else []
 
-        results = []
+        allowed = catalog.filter_slots(max_price=max_price)
+        candidates = sorted(allowed) if allowed is not None else catalog.live_slots()
+
+        matched = []
 
-        for row in all_products:
-            product_category = str(row.get("Familia", "")).lower()
-            product_line = str(row.get("linea", "")).lower()
-            search_text = f"{product_category} {product_line} {str(row.get('Descripcion', '')).lower()}"
+        for slot in candidates:
+            product_category = catalog.categories[slot]
+            product_line = catalog.lines[slot]
+            search_text = f"{product_category} {product_line} {catalog.descriptions[slot]}"
 
             # Verificar categoría
             if category_lower not in product_category and category_lower not in product_line:
@@ -300,30 +558,27 @@ def get_products_by_category(category: str, max_results: int = 10, pet_type: Opt
                 if not any(pw in search_text for pw in pet_filter_words):
                     continue
 
-            results.append({
-                "id": row.get("Clave", ""),
-                "name": row.get("Descripcion", ""),
-                "category": row.get("Familia", ""),
-                "brand": row.get("Marca", ""),
-                "price": _parse_price(row.get("Precio Publico", "0")),
-                "stock": 999,
-                "unit": row.get("Unidad", "PZ"),
-            })
+            matched.append(slot)
 
-        return results[:max_results]
+        ranked_slots = catalog.sort_slots(matched, sort_by)
+        inventory = get_inventory()
+        return [with_stock(catalog.product(slot), inventory) for slot in ranked_slots[:max_results]]
 
     except Exception as e:
         logger.error("Error getting products by category", category=category, error=str(e))
         return []
 
 
+def with_stock(product: dict, inventory: Optional[InventorySnapshot]) -> dict:
+    """Completa las existencias del producto (sin inventario quedan como desconocidas)."""
+    if inventory is None:
+        return product
+    return inventory.annotate(product)
+
+
 def _parse_price(value: str) -> float:
     """Parsea un precio a float."""
-    try:
-        clean = str(value).replace("$", "").replace(",", "").strip()
-        return float(clean) if clean else 0.0
-    except (ValueError, TypeError):
-        return 0.0
+    return parse_price(value)
 
 
 def _parse_int(value: str) -> int:
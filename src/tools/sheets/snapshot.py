@@ -0,0 +1,110 @@
+"""Carga de snapshots desde Sheets con refresco en segundo plano."""
+
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+import structlog
+
+from src.config.settings import settings
+
+logger = structlog.get_logger()
+
+S = TypeVar("S")
+
+
+class SnapshotLoader(Generic[S]):
+    """
+    Mantiene el snapshot vigente de una fuente de filas (pestaña o archivo).
+
+    Misma política que el catálogo de productos:
+    - La primera carga es síncrona
+    - Al expirar se devuelve el snapshot actual y se recarga en un hilo
+      aparte (stale-while-revalidate)
+    - Una recarga sin cambios no publica versión nueva
+    - Una recarga vacía conserva el snapshot anterior
+    - Si la primera carga no trae filas (o falla) se recuerda durante
+      `max_age` y se responde None sin volver a leer la fuente
+
+    `build(rows, previous)` recibe el snapshot anterior (o None) para
+    numerar la versión; el snapshot debe exponer `version`, `loaded_at`,
+    `is_expired(max_age)` y `same_as(other)`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load_rows: Callable[[], list[dict]],
+        build: Callable[[list[dict], Optional[S]], S],
+        max_age_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.load_rows = load_rows
+        self.build = build
+        self.max_age_seconds = max_age_seconds
+        self.current: Optional[S] = None
+        # Hasta cuándo se recuerda una primera carga vacía o fallida
+        self._empty_until = 0.0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Descarta el snapshot vigente (la siguiente lectura recarga)."""
+        self.current = None
+        self._empty_until = 0.0
+
+    def _max_age(self) -> float:
+        return self.max_age_seconds or settings.catalog_refresh_seconds
+
+    def refresh(self) -> Optional[S]:
+        """Recarga la fuente y publica la siguiente versión si cambió."""
+        with self._lock:
+            previous = self.current
+            rows = self.load_rows()
+
+            if not rows:
+                if previous is None:
+                    logger.warning("Snapshot source returned no rows", source=self.name)
+                    self._empty_until = time.monotonic() + self._max_age()
+                    return None
+                logger.warning("Snapshot reload returned no rows, keeping previous snapshot",
+                               source=self.name, version=previous.version)
+                previous.loaded_at = time.monotonic()
+                return previous
+
+            snapshot = self.build(rows, previous)
+            if previous is not None and snapshot.same_as(previous):
+                previous.loaded_at = time.monotonic()
+                return previous
+
+            self.current = snapshot
+            logger.info("Snapshot loaded", source=self.name, version=snapshot.version, rows=len(rows))
+            return snapshot
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error("Error refreshing snapshot", source=self.name, error=str(e))
+
+    def get(self, force_refresh: bool = False) -> Optional[S]:
+        """Obtiene el snapshot vigente (None si la fuente no trae filas)."""
+        snapshot = self.current
+        if snapshot is None and not force_refresh:
+            if time.monotonic() < self._empty_until:
+                return None
+            try:
+                return self.refresh()
+            except Exception as e:
+                logger.error("Error loading snapshot", source=self.name, error=str(e))
+                self._empty_until = time.monotonic() + self._max_age()
+                return None
+
+        if snapshot is None or force_refresh:
+            return self.refresh()
+
+        if snapshot.is_expired(self._max_age()) and not self._lock.locked():
+            # Evita que varios lectores disparen el mismo refresco
+            snapshot.loaded_at = time.monotonic()
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+        return snapshot
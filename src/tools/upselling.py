@@ -1,11 +1,12 @@
 """Lógica de upselling para Ruffo."""
 
-from typing import Optional
-from langchain_core.tools import tool
-import structlog
 import random
 
-from .sheets.products import search_products
+import structlog
+from langchain_core.tools import tool
+
+from .sheets.catalog import CatalogDiff, CatalogSnapshot, register_derived
+from .sheets.products import expand_query, get_catalog, rank_products
 
 logger = structlog.get_logger()
 
@@ -20,6 +21,45 @@ UPSELL_RULES = {
     "cama": ["cobija", "juguetes", "accesorios"],
 }
 
+# Productos por pool de upselling (mismo límite que la búsqueda original)
+UPSELL_POOL_SIZE = 3
+
+
+def build_upsell_pools(catalog: CatalogSnapshot) -> dict[str, list[int]]:
+    """Precalcula los mejores productos (slots) de cada categoría sugerida."""
+    pools = {}
+    for suggested_cat in {cat for cats in UPSELL_RULES.values() for cat in cats}:
+        pools[suggested_cat] = _build_pool(catalog, suggested_cat)
+    return pools
+
+
+def update_upsell_pools(
+    catalog: CatalogSnapshot,
+    pools: dict[str, list[int]],
+    diff: CatalogDiff,
+) -> dict[str, list[int]]:
+    """
+    Actualiza los pools tras un refresco incremental del catálogo.
+
+    Solo se recalculan los pools cuyas palabras aparecen en alguna fila
+    tocada (antes o después del cambio); el resto se reutiliza tal cual.
+    """
+    touched_texts = diff.touched_texts()
+    updated = dict(pools)
+    for suggested_cat in pools:
+        words = expand_query(suggested_cat)
+        if any(word in text for text in touched_texts for word in words):
+            updated[suggested_cat] = _build_pool(catalog, suggested_cat)
+    return updated
+
+
+def _build_pool(catalog: CatalogSnapshot, suggested_cat: str) -> list[int]:
+    """Top de productos para una categoría sugerida."""
+    return [slot for _, slot in rank_products(catalog, suggested_cat)[:UPSELL_POOL_SIZE]]
+
+
+register_derived("upsell_pools", build_upsell_pools, update_upsell_pools)
+
 # Frases de upselling de Ruffo
 UPSELL_PHRASES = [
     "¡Oye! Y ya que llevas {current}, ¿qué tal agregarle un {suggestion}? A los peludos les encanta 🐾",
@@ -55,6 +95,9 @@ def get_upsell_suggestions(
         suggestions = []
         seen_categories = set()
 
+        catalog = get_catalog()
+        pools = catalog.get_derived("upsell_pools")
+
         # Obtener categorías de productos actuales
         current_categories = set()
         for item in current_items:
@@ -71,11 +114,8 @@ def get_upsell_suggestions(
                 if suggested_cat in seen_categories:
                     continue
 
-                # Buscar productos de esa categoría
-                products = search_products.invoke({
-                    "query": suggested_cat,
-                    "max_results": 3,
-                })
+                # Productos precalculados de esa categoría
+                products = [catalog.product(slot) for slot in pools.get(suggested_cat, [])]
 
                 if products:
                     # Tomar uno aleatorio
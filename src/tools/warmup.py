@@ -0,0 +1,150 @@
+"""Calentamiento de cachés en segundo plano después de cargar el catálogo."""
+
+import threading
+import time
+from typing import Optional
+
+import structlog
+
+from src.config.settings import settings
+from src.tools.popularity import get_query_log
+from src.tools.sheets import products
+from src.tools.sheets.catalog import CatalogSnapshot
+
+logger = structlog.get_logger()
+
+
+class CacheWarmer:
+    """
+    Repite las búsquedas más frecuentes del log contra cada snapshot nuevo.
+
+    Corre en un hilo daemon para no bloquear el arranque ni la recarga del
+    catálogo. Si llega un snapshot más nuevo a mitad del calentamiento,
+    se abandona el actual y se empieza con el nuevo.
+    """
+
+    def __init__(self, top_n: int = 50):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Optional[CatalogSnapshot] = None
+        self._status = {
+            "state": "idle",
+            "catalog_version": None,
+            "total": 0,
+            "completed": 0,
+            "elapsed_ms": 0.0,
+            "warm": False,
+        }
+
+    def status(self) -> dict:
+        """Copia del progreso actual (para el health check)."""
+        with self._lock:
+            return dict(self._status)
+
+    def schedule(self, catalog: CatalogSnapshot) -> None:
+        """Programa el calentamiento para un snapshot (listener del catálogo)."""
+        with self._lock:
+            self._pending = catalog
+            self._status.update(warm=False)
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Espera a que termine el calentamiento en curso (útil en pruebas)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                catalog, self._pending = self._pending, None
+                if catalog is None:
+                    return
+            self.warm(catalog)
+
+    def warm(self, catalog: CatalogSnapshot) -> None:
+        """Repite las búsquedas top y construye las estructuras derivadas."""
+        queries = get_query_log().top(self.top_n)
+        started = time.perf_counter()
+
+        with self._lock:
+            self._status.update(
+                state="running",
+                catalog_version=catalog.version,
+                total=len(queries) + 1,
+                completed=0,
+                elapsed_ms=0.0,
+                warm=False,
+            )
+
+        try:
+            catalog.get_derived("upsell_pools")
+            self._advance()
+
+            for args in queries:
+                if self._pending is not None:
+                    logger.info("Cache warm-up superseded", catalog_version=catalog.version)
+                    return
+                products.run_product_search(**args, record_query=False)
+                self._advance()
+
+        except Exception as e:
+            with self._lock:
+                self._status.update(state="error")
+            logger.error("Cache warm-up failed", catalog_version=catalog.version, error=str(e))
+            return
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            self._status.update(state="done", elapsed_ms=elapsed_ms, warm=True)
+        logger.info(
+            "Cache warm-up completed",
+            catalog_version=catalog.version,
+            queries=len(queries),
+            elapsed_ms=elapsed_ms,
+        )
+
+    def _advance(self) -> None:
+        with self._lock:
+            self._status["completed"] += 1
+
+
+# Instancia global del warmer
+_warmer: Optional[CacheWarmer] = None
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Obtiene el warmer y lo registra como listener del catálogo."""
+    global _warmer
+    if _warmer is None:
+        _warmer = CacheWarmer(top_n=settings.warmup_top_queries)
+        products.add_catalog_listener(_warmer.schedule)
+    return _warmer
+
+
+def get_warmup_status() -> dict:
+    """Progreso del calentamiento y estadísticas de la caché de búsquedas."""
+    status = get_cache_warmer().status()
+    status["search_cache"] = products._search_cache.stats()
+    return status
+
+
+def start_cache_warmup() -> None:
+    """
+    Carga el catálogo en segundo plano al arrancar.
+
+    Al publicarse el snapshot, el listener dispara el calentamiento.
+    """
+    get_cache_warmer()
+
+    def _load() -> None:
+        try:
+            products.get_catalog()
+        except Exception as e:
+            logger.error("Initial catalog load failed", error=str(e))
+
+    threading.Thread(target=_load, name="catalog-prime", daemon=True).start()
@@ -1,8 +1,47 @@
 """Configuración de pytest para tests de Ruffo."""
 
-import pytest
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog_snapshot(tmp_path):
+    """Descarta el snapshot del catálogo entre tests (cada test mockea su hoja)."""
+    from src.agent import degraded, llm_cache
+    from src.tools import memo, popularity, warmup
+    from src.tools.sheets import branches, inventory, products
+
+    products._catalog = None
+    inventory._loader.reset()
+    branches._loader.reset()
+    products._search_cache.clear()
+    llm_cache._cache = None
+    memo._memo = None
+    degraded.get_llm_health().reset()
+    popularity._tracker = popularity.PopularityTracker(path=str(tmp_path / "popularity.json"))
+    popularity._query_log = popularity.QueryLog(path=str(tmp_path / "query_log.json"))
+    yield
+    products._catalog = None
+    products._search_cache.clear()
+    products._catalog_listeners.clear()
+    popularity._tracker = None
+    popularity._query_log = None
+    warmup._warmer = None
+    llm_cache._cache = None
+    memo._memo = None
+    inventory._loader.reset()
+    branches._loader.reset()
+
+
+@pytest.fixture(autouse=True)
+def agent_turns_without_fast_path():
+    """Los tests del agente mandan "hola" como turno del LLM; el camino rápido se prueba aparte."""
+    from src.config.settings import settings
+
+    with patch.object(settings, "fast_path_enabled", False):
+        yield
+
 
 @pytest.fixture
 def mock_settings():
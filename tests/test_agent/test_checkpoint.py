@@ -0,0 +1,342 @@
+"""Tests del checkpointer durable en SQLite."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent import checkpoint
+from src.agent.checkpoint import SQLiteCheckpointer, get_checkpointer, get_checkpointer_stats
+from src.agent.checkpoint.sqlite import TOUCH_THREAD
+from src.agent.graph import create_ruffo_agent
+from src.agent.runner import ask_agent
+from src.config.settings import settings
+
+
+class EchoModel(BaseChatModel):
+    """Modelo falso que responde cuántos mensajes de usuario lleva la conversación."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        turns = sum(1 for m in messages if m.type == "human")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"turno {turns}"))])
+
+
+def count_rows(path, table: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestSQLiteCheckpointer:
+    """Tests para la persistencia de conversaciones."""
+
+    async def test_conversation_survives_restart(self, tmp_path):
+        """Verifica que la conversación siga después de recrear el checkpointer."""
+        path = str(tmp_path / "checkpoints.db")
+
+        saver = SQLiteCheckpointer(path)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        assert await ask_agent(agent, "hola", "web-1") == "turno 1"
+        assert await ask_agent(agent, "quiero croquetas", "web-1") == "turno 2"
+        saver.close()
+
+        saver = SQLiteCheckpointer(path)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        assert await ask_agent(agent, "¿sigues ahí?", "web-1") == "turno 3"
+        saver.close()
+
+    def test_wal_mode(self, tmp_path):
+        """Verifica que la base use WAL."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"))
+        mode = saver.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        saver.close()
+
+        assert mode == "wal"
+
+    async def test_writes_are_batched(self, tmp_path):
+        """Verifica que las escrituras se encolen y se confirmen en lote."""
+        path = str(tmp_path / "checkpoints.db")
+        saver = SQLiteCheckpointer(path, flush_interval=60)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+
+        await ask_agent(agent, "hola", "web-1")
+
+        assert count_rows(path, "checkpoints") == 0  # aún en la cola
+        assert saver.get_tuple({"configurable": {"thread_id": "web-1"}}) is not None
+
+        written = saver.flush()
+        assert written > 0
+        assert count_rows(path, "checkpoints") > 0
+        assert saver.stats()["flushes"] == 1
+        saver.close()
+
+    async def test_memory_bounded_by_hot_threads(self, tmp_path):
+        """Verifica que solo queden en memoria los threads más recientes."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), hot_threads=3)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+
+        for i in range(10):
+            await ask_agent(agent, "hola", f"web-{i}")
+
+        assert saver.stats()["hot_threads"] == 3
+
+        # Un thread frío se lee de SQLite y continúa donde iba
+        assert await ask_agent(agent, "otra vez", "web-0") == "turno 2"
+        saver.close()
+
+    async def test_read_only_filesystem_falls_back_to_memory(self, tmp_path, monkeypatch):
+        """Verifica que sin poder crear la base (p. ej. en Vercel) se use un checkpointer en memoria."""
+        blocker = tmp_path / "solo-lectura"
+        blocker.write_text("")
+        monkeypatch.setattr(settings, "checkpoint_db_path", str(blocker / "data" / "checkpoints.db"))
+        monkeypatch.setattr(checkpoint, "_checkpointer", None)
+
+        saver = get_checkpointer()
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+
+        assert isinstance(saver, MemorySaver)
+        assert await ask_agent(agent, "hola", "web-1") == "turno 1"
+        assert await ask_agent(agent, "croquetas", "web-1") == "turno 2"
+        assert get_checkpointer_stats() is None
+
+    async def test_list_and_delete_thread(self, tmp_path):
+        """Verifica el historial de checkpoints y el borrado de un thread."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"))
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+
+        config = {"configurable": {"thread_id": "web-1"}}
+        history = list(saver.list(config))
+        assert len(history) > 1
+        assert history[0].checkpoint["id"] > history[-1].checkpoint["id"]
+
+        saver.delete_thread("web-1")
+        assert saver.get_tuple(config) is None
+        saver.close()
+
+
+class TestFlushPath:
+    """Tests para el hilo que confirma los lotes."""
+
+    async def test_turns_do_not_wait_for_disk(self, tmp_path):
+        """Verifica que un turno de un thread activo no espere a un lote en curso."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), flush_interval=60)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+
+        # Otro hilo ocupa la conexión (como un lote o un archivado largos)
+        busy, release = threading.Event(), threading.Event()
+
+        def hold_connection():
+            with saver._db_lock:
+                busy.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_connection)
+        holder.start()
+        busy.wait(5)
+        try:
+            reply = await asyncio.wait_for(ask_agent(agent, "croquetas", "web-1"), timeout=2)
+        finally:
+            release.set()
+            holder.join()
+
+        assert reply == "turno 2"
+        saver.close()
+
+    async def test_storage_stats_are_running_totals(self, tmp_path):
+        """Verifica que los totales sin recorrer las tablas coincidan con lo que hay en disco."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), idle_ttl=3600, flush_interval=60)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        for thread_id in ("web-1", "web-2", "web-3"):
+            await ask_agent(agent, "hola", thread_id)
+        saver.flush()
+        saver.evict(now=time.time() + 7200)
+        await ask_agent(agent, "¿sigues ahí?", "web-1")
+        saver.delete_thread("web-2")
+        saver.flush()
+
+        stats = saver.stats()
+        measured = saver._measure_storage()
+        assert {k: stats[k] for k in measured} == measured
+        assert (stats["live_threads"], stats["archived_threads"]) == (1, 1)
+        saver.close()
+
+    def test_failing_batch_is_dropped_after_retries(self, tmp_path):
+        """Verifica que un lote que sigue fallando no se reencole para siempre."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), flush_interval=60, max_flush_retries=3)
+        saver._enqueue([
+            (TOUCH_THREAD, ("web-1", time.time())),
+            ("INSERT INTO no_existe VALUES (?)", ("web-1",)),
+        ])
+
+        for _ in range(2):
+            with pytest.raises(sqlite3.OperationalError):
+                saver.flush()
+            assert saver.stats()["pending_rows"] == 2
+
+        # Al tercer intento se escribe lo que se puede y se descarta la fila mala
+        assert saver.flush() == 1
+        stats = saver.stats()
+        assert stats["pending_rows"] == 0
+        assert stats["dropped_rows"] == 1
+        assert stats["live_threads"] == 1
+        assert count_rows(saver.path, "threads") == 1
+        saver.close()
+
+
+class TestThreadArchival:
+    """Tests para el archivado de conversaciones inactivas."""
+
+    async def test_idle_threads_are_archived_and_rehydrated(self, tmp_path):
+        """Verifica que un thread inactivo se archive y vuelva al escribir el usuario."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), idle_ttl=3600)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+        await ask_agent(agent, "croquetas", "web-1")
+
+        archived = saver.evict(now=time.time() + 7200)
+
+        stats = saver.stats()
+        assert archived == 1
+        assert stats["live_threads"] == 0
+        assert stats["archived_threads"] == 1
+        assert stats["hot_threads"] == 0
+
+        # El usuario vuelve: la conversación sigue donde iba
+        assert await ask_agent(agent, "¿sigues ahí?", "web-1") == "turno 3"
+        assert saver.stats()["rehydrated"] == 1
+        saver.evict()
+        assert saver.stats()["archived_threads"] == 0
+        saver.close()
+
+    async def test_live_thread_cap_archives_least_recent(self, tmp_path):
+        """Verifica que al pasar el tope se archiven los threads menos recientes."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), max_live_threads=2, min_idle=0)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        for i in range(5):
+            await ask_agent(agent, "hola", f"web-{i}")
+
+        archived = saver.evict(now=time.time() + 1)
+
+        assert archived == 3
+        assert saver.stats()["live_threads"] == 2
+        assert saver.get_tuple({"configurable": {"thread_id": "web-4"}}) is not None
+        assert await ask_agent(agent, "otra vez", "web-0") == "turno 2"
+        saver.close()
+
+    async def test_put_racing_eviction_keeps_thread_live(self, tmp_path):
+        """Verifica que un thread con escrituras encoladas durante el archivado no se archive a medias."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), idle_ttl=3600, flush_interval=60)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+        await ask_agent(agent, "hola", "web-2")
+        await ask_agent(agent, "croquetas", "web-2")
+        saver.flush()
+
+        # Mientras se archiva el primer thread llega una escritura del otro (como desde el event loop)
+        archive_thread = saver._archive_thread
+        raced = []
+
+        def racing_archive(thread_id, now):
+            if not raced:
+                other = "web-2" if thread_id == "web-1" else "web-1"
+                latest = saver.get_tuple({"configurable": {"thread_id": other}})
+                saver.put_writes(latest.config, [("messages", [])], "task-race")
+                raced.append(other)
+            archive_thread(thread_id, now)
+
+        saver._archive_thread = racing_archive
+        archived = saver.evict(now=time.time() + 7200)
+        saver.flush()
+
+        other = raced[0]
+        assert archived == 1
+        assert saver.stats()["live_threads"] == 1
+        saver._hot.clear()
+        state = saver.get_tuple({"configurable": {"thread_id": other}})
+        assert state.pending_writes[0][0] == "task-race"
+        assert len(state.checkpoint["channel_values"]["messages"]) == (2 if other == "web-1" else 4)
+        saver.close()
+
+    async def test_ttl_respects_min_idle(self, tmp_path):
+        """Verifica que el TTL tampoco archive un thread con actividad reciente en el proceso."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), idle_ttl=1, min_idle=60)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+
+        assert saver.evict(now=time.time() + 5) == 0
+        assert saver.evict(now=time.time() + 120) == 1
+        saver.close()
+
+    async def test_recent_threads_are_not_archived(self, tmp_path):
+        """Verifica que no se archive un thread con actividad reciente."""
+        saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"), max_live_threads=0)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+
+        assert saver.evict() == 0
+        saver.close()
+
+
+class TestDeltaCheckpoints:
+    """Tests para el historial guardado como log de mensajes con deltas."""
+
+    async def _bytes_per_turn(self, saver, turns: int) -> list[int]:
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        written = []
+        for i in range(turns):
+            before = saver.bytes_written
+            await ask_agent(agent, f"mensaje {i} " * 20, "web-1")
+            saver.flush()
+            written.append(saver.bytes_written - before)
+        return written
+
+    async def test_bytes_per_turn_stay_flat(self, tmp_path):
+        """Verifica que lo escrito por turno no crezca con la conversación."""
+        saver = SQLiteCheckpointer(str(tmp_path / "delta.db"), flush_interval=60)
+        written = await self._bytes_per_turn(saver, 40)
+        saver.close()
+
+        assert max(written[5:]) < written[1] * 1.5
+
+    async def test_full_mode_grows(self, tmp_path):
+        """Verifica la referencia: sin deltas lo escrito crece con el historial."""
+        saver = SQLiteCheckpointer(str(tmp_path / "full.db"), flush_interval=60, delta_channels=())
+        written = await self._bytes_per_turn(saver, 20)
+        saver.close()
+
+        assert written[-1] > written[1] * 3
+
+    async def test_history_rebuilt_from_log(self, tmp_path):
+        """Verifica que la lista leída de SQLite sea igual a la de memoria."""
+        saver = SQLiteCheckpointer(str(tmp_path / "delta.db"), compact_every=3)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        for i in range(7):
+            await ask_agent(agent, f"mensaje {i}", "web-1")
+
+        config = {"configurable": {"thread_id": "web-1"}}
+        hot = saver.get_tuple(config)
+        saver._hot.clear()
+        cold = saver.get_tuple(config)
+
+        assert cold.checkpoint["channel_values"]["messages"] == hot.checkpoint["channel_values"]["messages"]
+        assert len(cold.checkpoint["channel_values"]["messages"]) == 14
+        assert saver._hot[("web-1", "")].logs["messages"].depth < 3
+
+        # Los checkpoints intermedios también se reconstruyen
+        for item in saver.list(config):
+            assert isinstance(item.checkpoint["channel_values"].get("messages", []), list)
+        saver.close()
@@ -0,0 +1,177 @@
+"""Tests de concurrencia: varios chats simultáneos no se bloquean entre sí."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+from src.agent import graph
+from src.agent.graph import create_ruffo_agent
+from src.agent.runner import ask_agent
+from src.config.settings import settings
+from src.tools.executor import offload_sync_tool, run_in_tool_executor, tool_concurrency_limits
+from tests.test_tools.test_cart import ScriptedModel, call
+
+# Latencia simulada de un turno del LLM
+LLM_DELAY = 0.3
+
+
+class SlowFakeModel(BaseChatModel):
+    """Modelo falso con latencia fija (async con sleep; sync bloquea)."""
+
+    delay: float = LLM_DELAY
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="¡Guau! 🐾"))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.delay)
+        return self._reply()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        return self._reply()
+
+
+class TestConcurrentChats:
+    """Tests para la ejecución no bloqueante del agente."""
+
+    async def test_simultaneous_chats_take_about_one_turn(self):
+        """Verifica que N chats simultáneos tarden ~lo mismo que uno."""
+        agent = create_ruffo_agent(llm=SlowFakeModel())
+        chats = 10
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            ask_agent(agent, "hola", f"test-{i}") for i in range(chats)
+        ))
+        elapsed = time.perf_counter() - started
+
+        assert responses == ["¡Guau! 🐾"] * chats
+        assert elapsed < LLM_DELAY * 3  # secuencial serían ~3 s
+
+    async def test_event_loop_stays_responsive(self):
+        """Verifica que el loop siga atendiendo mientras el agente responde."""
+        agent = create_ruffo_agent(llm=SlowFakeModel())
+
+        task = asyncio.create_task(ask_agent(agent, "hola", "test-loop"))
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - started < LLM_DELAY / 2
+        await task
+
+
+class TestToolExecutor:
+    """Tests para las tools síncronas en el pool acotado."""
+
+    async def test_sync_tool_runs_off_loop(self):
+        """Verifica que una tool síncrona no bloquee otras corutinas."""
+
+        @tool
+        def slow_lookup(query: str) -> str:
+            """Búsqueda lenta de prueba."""
+            time.sleep(0.2)
+            return query.upper()
+
+        offloaded = offload_sync_tool(slow_lookup)
+        assert offloaded.coroutine is not None
+        assert offloaded.invoke({"query": "a"}) == "A"
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(offloaded.ainvoke({"query": q}) for q in "abcd"))
+        assert results == ["A", "B", "C", "D"]
+        assert time.perf_counter() - started < 0.6
+
+    async def test_pool_is_bounded(self):
+        """Verifica que no corran más tareas que hilos del pool."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from src.tools import executor
+
+        previous = executor._executor
+        executor._executor = ThreadPoolExecutor(max_workers=2)
+        running, peak = 0, 0
+
+        def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            time.sleep(0.05)
+            running -= 1
+
+        try:
+            await asyncio.gather(*(run_in_tool_executor(work) for _ in range(6)))
+        finally:
+            executor._executor.shutdown()
+            executor._executor = previous
+
+        assert peak <= 2
+
+
+class TestParallelToolCalls:
+    """Tests para varias tools pedidas en un mismo paso del agente."""
+
+    async def test_step_takes_slowest_call_in_order(self):
+        """Verifica que el paso tarde ~la llamada más lenta y los resultados sigan el orden."""
+
+        @tool
+        def catalog_scan(query: str) -> str:
+            """Búsqueda síncrona lenta de prueba."""
+            time.sleep(0.3 if query == "croquetas" else 0.1)
+            return f"scan {query}"
+
+        @tool
+        async def nearest(place: str) -> str:
+            """Consulta async de prueba."""
+            await asyncio.sleep(0.2)
+            return f"near {place}"
+
+        model = ScriptedModel(script=[[
+            call("catalog_scan", query="croquetas"),
+            call("catalog_scan", query="snacks"),
+            call("nearest", place="Tecámac"),
+        ]])
+        with patch.object(graph, "RUFFO_TOOLS", [offload_sync_tool(catalog_scan), nearest]):
+            agent = create_ruffo_agent(llm=model)
+
+        started = time.perf_counter()
+        await ask_agent(agent, "croquetas, snacks y la sucursal más cercana", "test-tools")
+        elapsed = time.perf_counter() - started
+
+        state = await agent.aget_state({"configurable": {"thread_id": "test-tools"}})
+        outputs = [m.content for m in state.values["messages"] if isinstance(m, ToolMessage)]
+        assert outputs == ["scan croquetas", "scan snacks", "near Tecámac"]
+        assert elapsed < 0.5  # secuencial serían 0.6 s
+
+    async def test_per_tool_limit(self):
+        """Verifica que una tool con límite no pase de N llamadas simultáneas."""
+        running, peak = 0, 0
+
+        @tool
+        def heavy_scan(query: str) -> str:
+            """Tool pesada de prueba."""
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            time.sleep(0.05)
+            running -= 1
+            return query
+
+        offloaded = offload_sync_tool(heavy_scan)
+        with patch.object(settings, "tool_concurrency_limits", "heavy_scan=2, otra=x"):
+            assert tool_concurrency_limits() == {"heavy_scan": 2}
+            results = await asyncio.gather(*(offloaded.ainvoke({"query": q}) for q in "abcdef"))
+
+        assert results == list("abcdef")
+        assert peak == 2
@@ -0,0 +1,128 @@
+"""Tests del grafo híbrido y el modo degradado."""
+
+import asyncio
+import uuid
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage
+
+from src.agent.degraded import LLMHealth, get_llm_health, select_graph
+from src.agent.graph import create_ruffo_agent, route_by_intent
+from src.agent.nodes.escalation import ESCALATION_MESSAGES
+from src.agent.nodes.farewell import FAREWELLS
+from src.agent.nodes.greeting import GREETINGS
+from src.agent.runner import ask_agent
+from src.config.settings import settings
+from src.schemas.intents import UserIntent
+from src.schemas.order import OrderInProgress
+from src.schemas.product import ProductInCart
+from tests.test_agent.test_checkpoint import EchoModel
+from tests.test_agent.test_llm import FakeOpenAI, make_registry
+
+
+def fail_calls(health: LLMHealth, count: int) -> None:
+    for _ in range(count):
+        run_id = uuid.uuid4()
+        health.started(run_id)
+        health.finished(run_id, error=True)
+
+
+class TestLLMHealth:
+    """Tests para los umbrales del modo degradado."""
+
+    def test_error_rate_triggers_and_cools_down(self):
+        """Verifica que la tasa de errores active el modo y que se mantenga el enfriamiento."""
+        health = LLMHealth(error_rate=0.5, min_calls=4, cooldown_seconds=30)
+        fail_calls(health, 3)
+        assert not health.is_degraded()  # pocas llamadas para juzgar
+
+        fail_calls(health, 1)
+        assert health.is_degraded()
+
+        health._results.clear()  # los errores salen de la ventana
+        assert health.is_degraded()
+        with patch("src.agent.degraded.time.monotonic", return_value=10**9):
+            assert not health.is_degraded()
+
+    def test_inflight_overload(self):
+        """Verifica que demasiadas llamadas en curso activen el modo."""
+        health = LLMHealth(max_inflight=2)
+        runs = [uuid.uuid4() for _ in range(2)]
+        health.started(runs[0])
+        assert not health.is_degraded()
+        health.started(runs[1])
+        assert health.is_degraded()
+        assert health.stats()["activations"] == 1
+
+    async def test_registry_clients_report_calls(self):
+        """Verifica que los clientes del registro reporten sus llamadas al monitor."""
+        registry = make_registry(FakeOpenAI())
+        health = get_llm_health()
+
+        await registry.get("gpt-test", 500).ainvoke("hola")
+        await asyncio.to_thread(registry.get("gpt-test", 500).invoke, "hola")
+
+        assert health.stats()["calls"] == 2
+        assert health.inflight == 0
+
+
+class TestHybridGraph:
+    """Tests para los turnos con el grafo híbrido."""
+
+    async def test_degraded_turns_share_thread_with_agent(self):
+        """Verifica el cambio al grafo híbrido y de vuelta sin perder el historial."""
+        agent = create_ruffo_agent(llm=EchoModel())
+        assert await ask_agent(agent, "quiero ver opciones", "web-1") == "turno 1"
+
+        fail_calls(get_llm_health(), 5)
+        assert select_graph(agent) is not agent
+        assert await ask_agent(agent, "tengo un problema con mi pedido", "web-1") == ESCALATION_MESSAGES["problem"]
+
+        get_llm_health().reset()
+        assert select_graph(agent) is agent
+        assert await ask_agent(agent, "¿sigues ahí?", "web-1") == "turno 3"
+
+    async def test_degraded_mode_makes_no_llm_calls(self):
+        """Verifica que en modo degradado se respondan textos fijos sin llamar al LLM."""
+        agent = create_ruffo_agent(llm=EchoModel())
+        fail_calls(get_llm_health(), 5)
+
+        with patch("src.agent.llm.LLMRegistry.get", side_effect=AssertionError("LLM llamado")):
+            unknown = await ask_agent(agent, "mmm no sé bien", "web-1")
+            farewell = await ask_agent(agent, "gracias", "web-1")
+
+        assert unknown in GREETINGS
+        assert farewell in FAREWELLS
+
+    async def test_hybrid_mode_setting(self):
+        """Verifica AGENT_MODE=hybrid con el LLM sano solo para redactar."""
+        agent = create_ruffo_agent(llm=EchoModel())
+        wording = MagicMock()
+        wording.invoke.return_value = AIMessage(content="¡Qué onda! 🐾")
+
+        with patch.object(settings, "agent_mode", "hybrid"), \
+                patch("src.agent.nodes.greeting.get_llm", return_value=wording):
+            assert await ask_agent(agent, "hola", "web-1") == "¡Qué onda! 🐾"
+        assert wording.invoke.call_count == 1
+
+    async def test_branch_question_after_completed_checkout(self):
+        """Verifica que tras confirmar un pedido una consulta de sucursales no caiga en el order handler."""
+        agent = create_ruffo_agent(llm=EchoModel())
+        config = {"configurable": {"thread_id": "web-1"}}
+        order = OrderInProgress(items=[
+            ProductInCart(product_id="PP-20", product_name="PRO PLAN 20 KG", quantity=1, unit_price=1800.0),
+        ])
+
+        with patch.object(settings, "agent_mode", "hybrid"):
+            hybrid = select_graph(agent)
+            await hybrid.aupdate_state(config, {"order": order, "order_stage": "completed"})
+            assert route_by_intent({"intent": UserIntent.BRANCH_INFO, "order_stage": "completed"}) == "branch_info"
+
+            fail_calls(get_llm_health(), 5)
+            reply = await ask_agent(agent, "¿dónde están sus sucursales?", "web-1")
+
+        values = (await hybrid.aget_state(config)).values
+        assert values["current_node"] == "branch_info"
+        assert "Tecámac" in reply
+        assert values["order_stage"] == "completed"
+        assert values["order"].items == order.items
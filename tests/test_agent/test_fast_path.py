@@ -0,0 +1,124 @@
+"""Tests del camino rápido antes del agente ReAct."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.agent.checkpoint import SQLiteCheckpointer
+from src.agent.fast_path import EMPTY_CART_TEXT, classify_trivial, get_fast_path_stats
+from src.agent.graph import create_ruffo_agent
+from src.agent.metrics import reset_metrics
+from src.agent.nodes.farewell import FAREWELLS
+from src.agent.nodes.greeting import GREETINGS, GREETINGS_RETURNING
+from src.agent.nodes.intent_router import classify_by_keywords
+from src.agent.runner import ask_agent, stream_agent
+from src.config.settings import settings
+from src.schemas.intents import UserIntent
+from tests.test_agent.test_checkpoint import EchoModel
+
+
+@pytest.fixture(autouse=True)
+def fast_path_on():
+    reset_metrics()
+    with patch.object(settings, "fast_path_enabled", True):
+        yield
+
+
+class TestClassifyTrivial:
+    """Tests para reconocer mensajes triviales."""
+
+    @pytest.mark.parametrize("text, intent", [
+        ("hola", UserIntent.GREETING),
+        ("¡Buenas tardes, Ruffo!", UserIntent.GREETING),
+        ("qué tal", UserIntent.GREETING),
+        ("muchas gracias", UserIntent.FAREWELL),
+        ("Adiós, nos vemos", UserIntent.FAREWELL),
+        ("/sucursales", UserIntent.BRANCH_INFO),
+        ("¿Dónde están ubicados?", UserIntent.BRANCH_INFO),
+        ("¿qué llevo en mi carrito?", UserIntent.CART_STATUS),
+    ])
+    def test_trivial_messages(self, text, intent):
+        """Verifica los saludos, despedidas y consultas que no necesitan LLM."""
+        assert classify_trivial(text) == intent
+
+    @pytest.mark.parametrize("text", [
+        "hola, quiero croquetas para perro",
+        "gracias, ¿y tienen arena para gato?",
+        "¿hay sucursal en Tecámac?",
+        "hola, ¿dónde están?",
+        "quiero pagar con tarjeta",
+        "",
+    ])
+    def test_anything_else_goes_to_agent(self, text):
+        """Verifica que lo ambiguo o con más contenido siga al agente."""
+        assert classify_trivial(text) is None
+
+    @pytest.mark.parametrize("text", ["donde estan", "buenos dias", "que tal", "ver el carrito"])
+    def test_same_intent_as_router(self, text):
+        """Verifica que la intención trivial sea la misma que da el router por keywords."""
+        assert classify_trivial(text) is not None
+        assert classify_trivial(text) == classify_by_keywords(text)
+
+
+class TestFastPathTurns:
+    """Tests para los turnos respondidos sin LLM."""
+
+    async def test_greeting_without_llm_and_saved_in_thread(self):
+        """Verifica que el saludo no llame al modelo y quede en el historial."""
+        agent = create_ruffo_agent(llm=EchoModel())
+
+        assert await ask_agent(agent, "hola", "web-1") in GREETINGS
+        assert await ask_agent(agent, "buenas", "web-1") in GREETINGS_RETURNING
+        # El agente ve los turnos anteriores
+        assert await ask_agent(agent, "quiero croquetas", "web-1") == "turno 3"
+
+        stats = get_fast_path_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["by_intent"] == {"greeting": 2}
+        assert stats["latency"]["count"] == 2
+
+    async def test_streaming_reply(self):
+        """Verifica que el stream entregue la respuesta rápida como token y done."""
+        agent = create_ruffo_agent(llm=EchoModel())
+
+        events = [e async for e in stream_agent(agent, "muchas gracias", "web-1")]
+
+        assert [e["type"] for e in events] == ["token", "done"]
+        assert events[-1]["text"] in FAREWELLS
+
+    async def test_cart_status(self):
+        """Verifica el carrito vacío al empezar y que luego lo responda el agente."""
+        agent = create_ruffo_agent(llm=EchoModel())
+
+        assert await ask_agent(agent, "ver carrito", "web-1") == EMPTY_CART_TEXT
+        await ask_agent(agent, "quiero croquetas", "web-1")
+        assert await ask_agent(agent, "ver carrito", "web-1") == "turno 3"
+
+    async def test_branch_reply_off_event_loop(self):
+        """Verifica que la respuesta de sucursales (puede leer Sheets) corra en el pool de tools."""
+        threads = []
+
+        def branch_info(state):
+            threads.append(threading.current_thread().name)
+            return {"last_ruffo_message": "sucursales"}
+
+        agent = create_ruffo_agent(llm=EchoModel())
+        with patch("src.agent.fast_path.branch_info_node", side_effect=branch_info):
+            assert await ask_agent(agent, "/sucursales", "web-1") == "sucursales"
+
+        assert threads[0].startswith("ruffo-tool")
+
+    async def test_durable_checkpointer(self, tmp_path):
+        """Verifica que la respuesta rápida sobreviva un reinicio del checkpointer."""
+        path = str(tmp_path / "checkpoints.db")
+        saver = SQLiteCheckpointer(path, flush_interval=0.01)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        await ask_agent(agent, "hola", "web-1")
+        saver.close()
+
+        saver = SQLiteCheckpointer(path, flush_interval=0.01)
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        assert await ask_agent(agent, "¿me recomiendas croquetas?", "web-1") == "turno 2"
+        saver.close()
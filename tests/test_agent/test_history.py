@@ -0,0 +1,122 @@
+"""Tests del historial con presupuesto de tokens y resumen acumulado."""
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.graph import create_ruffo_agent
+from src.agent.history import HistoryBudget, schedule_summary, wait_summaries
+from src.agent.runner import ask_agent
+from src.config.settings import settings
+
+CONFIG = {"configurable": {"thread_id": "web-1"}}
+
+
+class SummarizingModel(BaseChatModel):
+    """Modelo falso: resume si se lo piden y guarda lo que vio en cada turno."""
+
+    seen: list = []
+    summaries: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "summarizing-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if messages[0].content.startswith("Resume la conversación"):
+            self.summaries += 1
+            text = f"RESUMEN {self.summaries}: busca croquetas"
+        else:
+            self.seen.append(messages)
+            text = "Claro, te ayudo con eso " * 5
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def make_history(exchanges: int) -> list:
+    messages = []
+    for i in range(exchanges):
+        messages.append(HumanMessage(content=f"pregunta {i} sobre croquetas " * 10, id=f"h{i}"))
+        messages.append(AIMessage(content=f"respuesta {i} con precios " * 10, id=f"a{i}"))
+    return messages
+
+
+class TestHistoryBudget:
+    """Tests del pre-model hook."""
+
+    def test_short_history_is_untouched(self):
+        """Verifica que un historial dentro del presupuesto pase completo."""
+        hook = HistoryBudget(max_tokens=10000)
+        messages = make_history(3)
+
+        assert hook({"messages": messages}, CONFIG)["llm_input_messages"] == messages
+
+    def test_keeps_last_exchanges_within_budget(self):
+        """Verifica que se respete el presupuesto y los últimos K intercambios vayan completos."""
+        hook = HistoryBudget(max_tokens=600, keep_exchanges=2)
+        messages = make_history(20)
+
+        trimmed = hook({"messages": messages}, CONFIG)["llm_input_messages"]
+
+        assert count_tokens_approximately(trimmed) <= 600
+        assert trimmed[-4:] == messages[-4:]
+        assert messages[0] not in trimmed
+
+    def test_keeps_cart_and_pet_facts(self):
+        """Verifica que el carrito y la mascota sigan aunque sus mensajes se recorten."""
+        hook = HistoryBudget(max_tokens=500, keep_exchanges=1)
+        messages = [
+            HumanMessage(content="tengo un perrito y quiero croquetas"),
+            AIMessage(content="", tool_calls=[{"name": "get_cart_status", "args": {}, "id": "c1"}]),
+            ToolMessage(content="Carrito actual:\n- Royal Canin x2 = $2598.00", tool_call_id="c1", name="get_cart_status"),
+            AIMessage(content="Tienes Royal Canin x2"),
+        ] + make_history(10)
+
+        trimmed = hook({"messages": messages}, CONFIG)["llm_input_messages"]
+
+        head = trimmed[0]
+        assert isinstance(head, SystemMessage)
+        assert "Royal Canin x2" in head.content
+        assert "perro" in head.content
+
+    async def test_summary_runs_after_turn_and_replaces_old_turns(self):
+        """Verifica que el resumen se genere fuera del hook y luego sustituya lo anterior."""
+        model = SummarizingModel()
+        hook = HistoryBudget(model, max_tokens=600, keep_exchanges=2)
+        messages = make_history(20)
+
+        hook({"messages": messages}, CONFIG)
+        assert model.summaries == 0  # el hook no espera al resumen
+
+        schedule_summary("web-1")
+        await wait_summaries()
+        trimmed = hook({"messages": messages}, CONFIG)["llm_input_messages"]
+
+        assert model.summaries == 1
+        assert "RESUMEN 1" in trimmed[0].content
+        assert trimmed[-4:] == messages[-4:]
+
+
+class TestAgentWithBudget:
+    """Tests del agente con el historial recortado."""
+
+    async def test_model_input_stays_bounded(self, monkeypatch, tmp_path):
+        """Verifica que lo que ve el modelo deje de crecer y el estado conserve todo."""
+        monkeypatch.setattr(settings, "history_max_tokens", 1500)
+        monkeypatch.setattr(settings, "history_keep_exchanges", 2)
+        model = SummarizingModel(seen=[])
+        agent = create_ruffo_agent(llm=model)
+
+        for i in range(15):
+            await ask_agent(agent, f"mensaje {i} sobre croquetas para mi perro " * 5, "web-1")
+            await wait_summaries()
+
+        sizes = [count_tokens_approximately(messages) for messages in model.seen]
+        assert max(sizes[-5:]) <= 1500
+        assert model.summaries > 0
+        state = await agent.aget_state(CONFIG)
+        assert len(state.values["messages"]) == 30
+        assert "llm_input_messages" not in state.values
@@ -0,0 +1,102 @@
+"""Tests del registro de clientes LLM compartidos."""
+
+import asyncio
+import threading
+
+import httpx
+
+from src.agent.llm import LLMRegistry
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-test",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "¡Guau!"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+}
+
+
+class FakeOpenAI:
+    """Transporte falso del API: cuenta peticiones por ruta."""
+
+    def __init__(self):
+        self.paths: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"data": []})
+        return httpx.Response(200, json=COMPLETION)
+
+
+def make_registry(api: FakeOpenAI) -> LLMRegistry:
+    registry = LLMRegistry()
+    transport = httpx.MockTransport(api)
+    registry._http = httpx.Client(transport=transport)
+    registry._async_http = httpx.AsyncClient(transport=transport)
+    return registry
+
+
+class TestLLMRegistry:
+    """Tests para las instancias compartidas y sus pools HTTP."""
+
+    def test_one_instance_per_model_and_max_tokens(self):
+        """Verifica que (modelo, max_tokens) se reutilice y comparta el pool."""
+        registry = make_registry(FakeOpenAI())
+
+        first = registry.get("gpt-test", 500)
+        assert registry.get("gpt-test", 500) is first
+        other = registry.get("gpt-test", 300)
+
+        assert other is not first
+        assert other.http_client is first.http_client is registry._http
+        assert registry.stats() == {"clients": 2, "created": 2, "reused": 1}
+
+    def test_concurrent_threads_share_instance(self):
+        """Verifica que varios hilos obtengan la misma instancia."""
+        registry = make_registry(FakeOpenAI())
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(registry.get("gpt-test", 500))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(llm) for llm in results}) == 1
+        assert registry.created == 1
+
+    async def test_sync_and_async_calls_use_shared_pools(self):
+        """Verifica invoke y ainvoke con la misma instancia sobre los pools compartidos."""
+        api = FakeOpenAI()
+        registry = make_registry(api)
+        llm = registry.get("gpt-test", 500)
+
+        assert (await llm.ainvoke("hola")).content == "¡Guau!"
+        assert (await asyncio.to_thread(llm.invoke, "hola")).content == "¡Guau!"
+        assert api.paths == ["/v1/chat/completions"] * 2
+
+    def test_new_event_loop_gets_new_async_pool(self):
+        """Verifica que al cambiar de loop no se reutilicen conexiones del anterior."""
+        registry = LLMRegistry()
+
+        async def get():
+            return registry.get("gpt-test", 500)
+
+        first = asyncio.run(get())
+        second = asyncio.run(get())
+
+        assert first is not second
+        assert first.http_async_client is not second.http_async_client
+        assert first.http_client is second.http_client
+
+    async def test_warm_up_opens_connections(self):
+        """Verifica la petición ligera de warm-up en ambos pools."""
+        api = FakeOpenAI()
+        registry = make_registry(api)
+
+        await asyncio.to_thread(registry.warm_up)
+        await registry.awarm_up()
+
+        assert api.paths == ["/v1/models", "/v1/models"]
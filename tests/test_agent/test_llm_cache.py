@@ -0,0 +1,99 @@
+"""Tests de la caché de respuestas del LLM."""
+
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.llm_cache import LLMCache, cache_key, cached_invoke, get_llm_cache
+from src.agent.metrics import get_metrics, reset_metrics
+from src.agent.nodes.intent_router import intent_router_node
+from src.schemas.intents import UserIntent
+
+
+class CountingModel:
+    """Modelo falso: responde `reply` y cuenta las llamadas."""
+
+    def __init__(self, reply: str, model_name: str = "gpt-test", max_tokens: int = 300):
+        self.reply = reply
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=self.reply)
+
+
+class TestLLMCache:
+    """Tests para la llave y los niveles de la caché."""
+
+    def test_key_covers_model_params_and_prompt(self):
+        """Verifica que cambie la llave con el modelo, los parámetros o el prompt."""
+        llm = CountingModel("x")
+        key = cache_key(llm, "hola")
+
+        assert cache_key(CountingModel("otra"), "hola") == key
+        assert cache_key(CountingModel("x", model_name="otro"), "hola") != key
+        assert cache_key(CountingModel("x", max_tokens=500), "hola") != key
+        assert cache_key(llm, "hola!") != key
+
+    def test_repeated_prompt_served_from_cache(self):
+        """Verifica que el mismo prompt llame al modelo una sola vez."""
+        reset_metrics()
+        llm = CountingModel("greeting")
+
+        first = cached_invoke(llm, "Clasifica: hola")
+        second = cached_invoke(llm, "Clasifica: hola")
+
+        assert first.content == second.content == "greeting"
+        assert llm.calls == 1
+        counters = get_metrics()["counters"]
+        assert counters["llm_cache.hits"] == 1
+        assert counters["llm_cache.misses"] == 1
+
+    def test_rejected_responses_are_not_stored(self):
+        """Verifica que `accept` evite guardar respuestas inválidas."""
+        llm = CountingModel("no sé")
+
+        for _ in range(2):
+            cached_invoke(llm, "Clasifica: ???", accept=lambda text: text == "greeting")
+
+        assert llm.calls == 2
+        assert get_llm_cache().stats()["size"] == 0
+
+    def test_ttl_expires_entries(self):
+        """Verifica que una respuesta vencida no se sirva."""
+        cache = LLMCache(ttl_seconds=60)
+        cache.set("k", "v")
+
+        with patch("src.tools.cache.time.monotonic", return_value=10**9):
+            assert cache.get("k") is None
+
+    def test_sqlite_tier_survives_restart(self, tmp_path):
+        """Verifica que el nivel persistente sirva respuestas tras reiniciar."""
+        path = str(tmp_path / "llm_cache.db")
+        cache = LLMCache(db_path=path)
+        cache.set("k", "¡Guau!")
+        cache.close()
+
+        restarted = LLMCache(db_path=path)
+
+        assert restarted.get("k") == "¡Guau!"
+        assert restarted.stats()["db_hits"] == 1
+        assert restarted.get("k") == "¡Guau!"  # ya en memoria
+        assert restarted.stats()["db_hits"] == 1
+
+
+class TestIntentClassificationCache:
+    """Tests para la clasificación por LLM con caché."""
+
+    def test_same_message_classified_once(self):
+        """Verifica que el mismo mensaje sin keywords no vuelva a llamar al modelo."""
+        llm = CountingModel("product_inquiry")
+        state = {"messages": [HumanMessage(content="algo para que deje de rascarse")]}
+
+        with patch("src.agent.nodes.intent_router.get_llm", return_value=llm):
+            results = [intent_router_node(dict(state)) for _ in range(3)]
+
+        assert all(r["intent"] == UserIntent.PRODUCT_INQUIRY for r in results)
+        assert llm.calls == 1
@@ -0,0 +1,110 @@
+"""Tests de las respuestas por plantilla del flujo de pedido."""
+
+import re
+import string
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.metrics import get_metrics, reset_metrics
+from src.agent.nodes import order_handler
+from src.agent.nodes.order_handler import order_handler_node
+from src.agent.nodes.order_templates import ORDER_TEMPLATES, render_order_template
+from src.config.settings import settings
+from src.schemas.order import OrderInProgress
+
+PRODUCT = {"id": "PP-20", "name": "PRO PLAN ADULTO 20 KG", "price": 1800.0, "category": "Alimento"}
+
+
+@pytest.fixture
+def catalog():
+    with patch.object(order_handler, "search_products") as search, \
+            patch.object(order_handler, "get_upsell_suggestions") as upsell:
+        search.invoke.return_value = [PRODUCT]
+        upsell.invoke.return_value = []
+        yield search
+
+
+def turn(state: dict, text: str) -> dict:
+    state = {**state, "messages": [HumanMessage(content=text)]}
+    result = order_handler_node(state)
+    return {**state, **result}
+
+
+class TestOrderTemplates:
+    """Tests para el catálogo de plantillas."""
+
+    def test_every_situation_has_templates(self):
+        """Verifica que cada situación usada por el order handler tenga redacciones."""
+        source = Path(order_handler.__file__).read_text(encoding="utf-8")
+        used = set(re.findall(r'_order_response\(\s*"(\w+)"', source))
+
+        assert used and used <= set(ORDER_TEMPLATES)
+
+    def test_variants_share_placeholders(self):
+        """Verifica que todas las redacciones de una situación lleven los mismos datos."""
+        for key, variants in ORDER_TEMPLATES.items():
+            fields = [{f for _, f, _, _ in string.Formatter().parse(v) if f} for v in variants]
+            assert all(f == fields[0] for f in fields), key
+
+    def test_render_keeps_data(self):
+        """Verifica que los datos bancarios y el total salgan tal cual."""
+        text = render_order_template("bank_transfer", total=1234.5)
+
+        assert "012345678901234567" in text
+        assert "$1234.50" in text
+
+
+class TestTemplateFirstCheckout:
+    """Tests para el checkout sin llamadas al LLM."""
+
+    def test_checkout_without_llm_calls(self, catalog):
+        """Verifica un checkout completo solo con plantillas."""
+        reset_metrics()
+        with patch.object(order_handler, "get_llm", side_effect=AssertionError("LLM llamado")):
+            state = turn({"order_stage": "collecting_items"}, "pro plan 20 kg")
+            assert "PRO PLAN ADULTO 20 KG" in state["messages"][-1].content
+
+            state = turn({**state, "order_stage": "confirming_items"}, "sí")
+            assert state["order_stage"] == "selecting_delivery"
+            state = turn(state, "a domicilio")
+            assert state["order_stage"] == "collecting_address"
+            state = turn(state, "Av. Ojo de Agua 123, Col. Centro, Tecámac, CP 55770")
+            assert state["order_stage"] == "selecting_payment"
+            state = turn(state, "transferencia")
+            assert "CLABE: 012345678901234567" in state["messages"][-1].content
+            state = turn(state, "[foto]")
+
+        assert state["order_stage"] == "completed"
+        assert "PEDIDO CONFIRMADO" in state["messages"][-1].content
+        assert state["order"].llm_calls == 0
+        assert get_metrics()["counters"]["order.checkouts"] == 1
+
+    def test_llm_polish_only_for_allowed_stages(self, catalog):
+        """Verifica que el LLM reescriba solo las situaciones permitidas y se cuente."""
+        llm = MagicMock()
+        llm.invoke.return_value = AIMessage(content="🤘 ¡Ya va tu Pro Plan!")
+
+        with patch.object(settings, "order_llm_stages", "item_added"), \
+                patch.object(order_handler, "get_llm", return_value=llm):
+            state = turn({"order_stage": "collecting_items"}, "pro plan 20 kg")
+            assert state["messages"][-1].content == "🤘 ¡Ya va tu Pro Plan!"
+
+            state = turn({**state, "order_stage": "confirming_items"}, "sí")
+            assert state["messages"][-1].content.startswith(("🤘 ¡A todo dar!", "🎸 ¡Rock on!"))
+
+        assert llm.invoke.call_count == 1
+        assert state["order"].llm_calls == 1
+        prompt = llm.invoke.call_args.args[0]
+        assert "Respuesta base" in prompt and "$1800.00" in prompt
+
+    def test_llm_failure_keeps_template(self, catalog):
+        """Verifica que si el LLM falla quede la plantilla."""
+        with patch.object(settings, "order_llm_stages", "*"), \
+                patch.object(order_handler, "get_llm", side_effect=RuntimeError("timeout")):
+            state = turn({"order": OrderInProgress(), "order_stage": "confirming_items"}, "sí")
+
+        assert "Pickup" in state["messages"][-1].content
+        assert state["order"].llm_calls == 1
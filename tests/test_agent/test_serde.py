@@ -0,0 +1,128 @@
+"""Tests del serializador compacto de checkpoints."""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.agent.checkpoint import RuffoSerializer, SQLiteCheckpointer
+from src.agent.graph import create_ruffo_agent
+from src.agent.runner import ask_agent
+from src.schemas.customer import CustomerSession
+from src.schemas.intents import ConversationContext, UserIntent
+from src.schemas.order import DeliveryType, OrderInProgress, PaymentMethod
+from src.schemas.product import ProductInCart
+
+from .test_checkpoint import EchoModel
+
+
+def make_order() -> OrderInProgress:
+    order = OrderInProgress(delivery_type=DeliveryType.DELIVERY, payment_method=PaymentMethod.CASH)
+    order.add_item(ProductInCart(product_id="P1", product_name="Royal Canin 15kg", quantity=2, unit_price=1299.0))
+    return order
+
+
+def make_messages() -> list:
+    return [
+        SystemMessage(content="Eres Ruffo"),
+        HumanMessage(content="quiero croquetas", id="m1"),
+        AIMessage(
+            content="",
+            id="m2",
+            tool_calls=[{"name": "search_products", "args": {"query": "croquetas"}, "id": "call_1"}],
+        ),
+        ToolMessage(content="Royal Canin 15kg $1,299", tool_call_id="call_1", name="search_products", id="m3"),
+        AIMessage(content="¡Guau! Tenemos Royal Canin 🐾", id="m4"),
+    ]
+
+
+class TestRuffoSerializer:
+    """Tests de fidelidad y tamaño del serializador compacto."""
+
+    def setup_method(self):
+        self.serde = RuffoSerializer()
+
+    def roundtrip(self, obj):
+        return self.serde.loads_typed(self.serde.dumps_typed(obj))
+
+    def test_messages_roundtrip(self):
+        """Verifica que los mensajes (con tool calls) vuelvan iguales."""
+        messages = make_messages()
+
+        restored = self.roundtrip(messages)
+
+        assert restored == messages
+        assert [type(m) for m in restored] == [type(m) for m in messages]
+        assert restored[2].tool_calls[0]["args"] == {"query": "croquetas"}
+        assert restored[3].tool_call_id == "call_1"
+
+    def test_state_models_roundtrip(self):
+        """Verifica pedido, sesión y contexto con sus enums y campos mutados."""
+        context = ConversationContext()
+        context.add_message("tengo un perro")
+        context.extract_pet_info("tengo un perro")
+        state = {
+            "order": make_order(),
+            "customer": CustomerSession(telegram_id="123", name="Ana", is_new=False),
+            "conversation_context": context,
+            "intent": UserIntent.BUY_ORDER,
+            "pair": (1, "dos"),
+            "waiting_for": None,
+        }
+
+        restored = self.roundtrip(state)
+
+        assert restored == state
+        assert isinstance(restored["order"].delivery_type, DeliveryType)
+        assert restored["order"].total == state["order"].total
+        assert restored["conversation_context"].pet_type == "perro"
+        assert restored["pair"] == (1, "dos")
+
+    def test_unknown_types_use_fallback(self):
+        """Verifica que los tipos no registrados se deleguen al serializador de LangGraph."""
+        from datetime import datetime
+
+        from langchain_core.messages import AIMessageChunk
+
+        value = {"when": datetime(2025, 5, 1, 12, 30), "chunk": AIMessageChunk(content="hola")}
+
+        assert self.roundtrip(value) == value
+
+    def test_large_tool_output_is_compressed(self):
+        """Verifica que las salidas grandes de tools se compriman."""
+        message = ToolMessage(content="Croquetas premium 15kg $1,299\n" * 200, tool_call_id="call_1")
+
+        type_, data = self.serde.dumps_typed(message)
+
+        assert type_.startswith("ruffo+")
+        assert len(data) < len(message.content) / 5
+        assert self.roundtrip(message) == message
+
+    def test_reads_default_serializer_rows(self):
+        """Verifica que se sigan leyendo checkpoints escritos con el serializador por defecto."""
+        legacy = JsonPlusSerializer().dumps_typed({"order": make_order(), "messages": make_messages()})
+
+        restored = self.serde.loads_typed(legacy)
+
+        assert restored["order"] == make_order()
+        assert restored["messages"] == make_messages()
+
+    def test_smaller_than_default(self):
+        """Verifica que el estado ocupe bastante menos que con el serializador por defecto."""
+        state = {"order": make_order(), "messages": make_messages(), "customer": CustomerSession(telegram_id="1")}
+
+        compact = len(self.serde.dumps_typed(state)[1])
+        default = len(JsonPlusSerializer().dumps_typed(state)[1])
+
+        assert compact < default / 2
+
+    async def test_checkpointer_with_compact_serializer(self, tmp_path):
+        """Verifica una conversación completa guardada con el serializador compacto."""
+        path = str(tmp_path / "checkpoints.db")
+        saver = SQLiteCheckpointer(path, serde=RuffoSerializer())
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        assert await ask_agent(agent, "hola", "web-1") == "turno 1"
+        saver.close()
+
+        saver = SQLiteCheckpointer(path, serde=RuffoSerializer())
+        agent = create_ruffo_agent(checkpointer=saver, llm=EchoModel())
+        assert await ask_agent(agent, "¿sigues ahí?", "web-1") == "turno 2"
+        saver.close()
@@ -0,0 +1,209 @@
+"""Tests de respuestas en streaming (eventos del agente, Telegram y SSE web)."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramBadRequest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.agent.graph import create_ruffo_agent
+from src.agent.metrics import get_metrics, reset_metrics
+from src.agent.runner import stream_agent, tool_progress_text
+from src.channels.telegram.streaming import TelegramStreamer, split_message
+from src.channels.web.streaming import sse_chat_events
+
+REPLY_TOKENS = ["¡Guau! ", "Tenemos ", "croquetas 🐾"]
+
+
+class StreamingFakeModel(BaseChatModel):
+    """Modelo falso que entrega la respuesta por tokens."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = AIMessage(content="".join(REPLY_TOKENS))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in REPLY_TOKENS:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeClock:
+    """Reloj controlado por el test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_bot() -> MagicMock:
+    bot = MagicMock()
+    bot.default.parse_mode = "Markdown"
+    bot.send_chat_action = AsyncMock()
+    bot.send_message = AsyncMock(return_value=SimpleNamespace(message_id=42))
+    bot.edit_message_text = AsyncMock()
+    return bot
+
+
+async def events_from(items, clock=None, step=0.0):
+    for item in items:
+        if clock is not None:
+            clock.now += step
+        yield item
+
+
+class TestStreamAgent:
+    """Tests para los eventos de `stream_agent`."""
+
+    async def test_streams_tokens_and_final_text(self):
+        """Verifica que lleguen los tokens y al final la respuesta completa."""
+        agent = create_ruffo_agent(llm=StreamingFakeModel())
+
+        events = [e async for e in stream_agent(agent, "hola", "test-stream")]
+
+        tokens = [e["text"] for e in events if e["type"] == "token"]
+        assert tokens == REPLY_TOKENS
+        assert events[-1] == {"type": "done", "text": "".join(REPLY_TOKENS)}
+
+    def test_tool_progress_text(self):
+        """Verifica el texto de progreso de las tools."""
+        assert tool_progress_text("search_products", {"query": "croquetas"}) == "🔍 Buscando croquetas…"
+        assert tool_progress_text("search_products", {}) == "🔍 Buscando…"
+        assert tool_progress_text("otra_tool", {"x": 1}) == "🐕 Olfateando…"
+
+
+class TestTelegramStreamer:
+    """Tests para el placeholder editado progresivamente."""
+
+    def setup_method(self):
+        reset_metrics()
+
+    async def test_typing_placeholder_and_final_edit(self):
+        """Verifica acción de escribiendo, placeholder y edición final en Markdown."""
+        bot = make_bot()
+        streamer = TelegramStreamer(bot, chat_id=1, edit_interval=0)
+
+        events = [{"type": "token", "text": t} for t in REPLY_TOKENS]
+        events.append({"type": "done", "text": "".join(REPLY_TOKENS)})
+        response = await streamer.stream(events_from(events), empty_text="vacío")
+
+        assert response == "".join(REPLY_TOKENS)
+        bot.send_chat_action.assert_awaited_once()
+        bot.send_message.assert_awaited_once()
+        last_edit = bot.edit_message_text.await_args_list[-1].kwargs
+        assert last_edit["text"] == response
+        assert last_edit["parse_mode"] == "Markdown"
+        assert get_metrics()["latency"]["telegram.first_content_ms"]["count"] == 1
+
+    async def test_edits_are_rate_limited(self):
+        """Verifica que no se edite más de una vez por intervalo."""
+        bot = make_bot()
+        clock = FakeClock()
+        streamer = TelegramStreamer(bot, chat_id=1, edit_interval=1.0, clock=clock)
+
+        # 20 tokens en 2 segundos → a lo más 2 ediciones intermedias + la final
+        events = [{"type": "token", "text": f"t{i} "} for i in range(20)]
+        await streamer.stream(events_from(events, clock, step=0.1), empty_text="vacío")
+
+        assert bot.edit_message_text.await_count <= 3
+
+    async def test_shows_tool_progress_before_tokens(self):
+        """Verifica que se muestre el progreso de la tool mientras no hay texto."""
+        bot = make_bot()
+        streamer = TelegramStreamer(bot, chat_id=1, edit_interval=0)
+
+        events = [
+            {"type": "tool", "name": "search_products", "status": "start", "text": "🔍 Buscando croquetas…"},
+            {"type": "tool", "name": "search_products", "status": "end", "text": "🔍 Buscando croquetas…"},
+            {"type": "token", "text": "Listo"},
+        ]
+        await streamer.stream(events_from(events), empty_text="vacío")
+
+        edited = [call.kwargs["text"] for call in bot.edit_message_text.await_args_list]
+        assert edited[0] == "🔍 Buscando croquetas…"
+        assert edited[-1] == "Listo"
+
+    async def test_invalid_markdown_falls_back_to_plain(self):
+        """Verifica el reintento en texto plano si el Markdown no es válido."""
+        bot = make_bot()
+
+        async def edit(**kwargs):
+            if kwargs["parse_mode"] == "Markdown":
+                raise TelegramBadRequest(method=MagicMock(), message="can't parse entities")
+
+        bot.edit_message_text = AsyncMock(side_effect=edit)
+        streamer = TelegramStreamer(bot, chat_id=1, edit_interval=0)
+
+        await streamer.stream(events_from([{"type": "done", "text": "precio *especial"}]), empty_text="vacío")
+
+        last_edit = bot.edit_message_text.await_args_list[-1].kwargs
+        assert last_edit["parse_mode"] is None
+        assert streamer.shown == "precio *especial"
+
+    async def test_empty_response_uses_default_text(self):
+        """Verifica el texto por defecto si el agente no respondió."""
+        bot = make_bot()
+        streamer = TelegramStreamer(bot, chat_id=1, edit_interval=0)
+
+        response = await streamer.stream(events_from([{"type": "done", "text": ""}]), empty_text="vacío")
+
+        assert response == "vacío"
+
+    def test_split_long_message(self):
+        """Verifica que un texto largo se parta respetando el límite."""
+        text = "\n".join(["línea " * 20] * 100)
+        parts = split_message(text, limit=500)
+
+        assert all(len(p) <= 500 for p in parts)
+        assert "".join(parts).replace("\n", "") == text.replace("\n", "")
+
+
+class TestSSEChatEvents:
+    """Tests para el endpoint SSE del chat web."""
+
+    def setup_method(self):
+        reset_metrics()
+
+    async def test_emits_start_tokens_and_done(self):
+        """Verifica la secuencia de eventos SSE de un turno."""
+        agent = create_ruffo_agent(llm=StreamingFakeModel())
+
+        chunks = [c async for c in sse_chat_events(agent, "hola", "abc", "web-abc")]
+
+        names = [c.split("\n")[0].removeprefix("event: ") for c in chunks]
+        assert names[0] == "start"
+        assert names.count("token") == len(REPLY_TOKENS)
+        assert names[-1] == "done"
+        done = json.loads(chunks[-1].split("data: ")[1])
+        assert done == {"response": "".join(REPLY_TOKENS), "thread_id": "abc"}
+
+    async def test_client_disconnect_cancels_stream(self):
+        """Verifica que al desconectarse el cliente se deje de consumir el agente."""
+        agent = create_ruffo_agent(llm=StreamingFakeModel())
+        checks = 0
+
+        async def is_disconnected():
+            nonlocal checks
+            checks += 1
+            return checks > 1
+
+        chunks = [
+            c async for c in sse_chat_events(agent, "hola", "abc", "web-abc", is_disconnected=is_disconnected)
+        ]
+
+        assert not any(c.startswith("event: done") for c in chunks)
+        assert get_metrics()["counters"]["web.streams_cancelled"] == 1
@@ -0,0 +1,109 @@
+"""Tests para el directorio de sucursales y sus horarios."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from src.config.settings import settings
+from src.tools.sheets import branches
+from src.tools.sheets.branches import format_all_branches, get_branch_directory, get_branch_hours
+from src.tools.sheets.hours import STORE_TZ, WeeklySchedule, parse_hours
+
+# 2026-10-19 es lunes
+MONDAY = datetime(2026, 10, 19, tzinfo=STORE_TZ)
+
+SHEET_ROWS = [
+    {
+        "ID": "centro",
+        "Nombre": "Animalicha Centro",
+        "Dirección": "Calle 1",
+        "Teléfono": "55-0000-0000",
+        "Horario": "Lun-Vie 9:00-14:00 y 16:00-20:00, Sábado 10 a 14, Domingo cerrado",
+        "Servicios": "pickup, grooming",
+        "Pickup": "Sí",
+        "Maps": "",
+        "Lat": "19.70",
+        "Lng": "-99.00",
+    },
+]
+
+
+class TestParseHours:
+    """Tests para el parseo de horarios en texto libre."""
+
+    def test_default_format(self):
+        """Verifica 'Lunes a Sábado ..., Domingo ...'."""
+        hours = parse_hours("Lunes a Sábado 9:00 - 20:00, Domingo 10:00 - 18:00")
+        assert hours[0] == hours[5] == [(540, 1200)]
+        assert hours[6] == [(600, 1080)]
+
+    def test_split_shifts_and_closed_day(self):
+        """Verifica turnos partidos, abreviaturas y días cerrados."""
+        hours = parse_hours(SHEET_ROWS[0]["Horario"])
+        assert hours[4] == [(540, 840), (960, 1200)]
+        assert hours[5] == [(600, 840)]
+        assert 6 not in hours
+
+    def test_pm_times(self):
+        """Verifica horas con am/pm."""
+        assert parse_hours("Sábado y Domingo 9am - 3pm") == {5: [(540, 900)], 6: [(540, 900)]}
+
+
+class TestWeeklySchedule:
+    """Tests para las consultas de apertura."""
+
+    def setup_method(self):
+        self.schedule = WeeklySchedule.parse("Lunes a Sábado 9:00 - 20:00, Domingo 10:00 - 18:00")
+
+    def test_open_and_closing_time(self):
+        """Verifica abierto y hora de cierre."""
+        now = MONDAY.replace(hour=12)
+        assert self.schedule.is_open(now)
+        assert self.schedule.closes_at_time(now) == "20:00"
+
+    def test_closed_and_next_opening(self):
+        """Verifica cerrado y siguiente apertura (incluye cruce de semana)."""
+        night = MONDAY.replace(hour=21)
+        assert not self.schedule.is_open(night)
+        assert self.schedule.next_opening(night) == "Martes 9:00"
+
+        sunday_night = datetime(2026, 10, 25, 19, tzinfo=STORE_TZ)
+        assert self.schedule.next_opening(sunday_night) == "Lunes 9:00"
+
+
+class TestBranchDirectory:
+    """Tests para el directorio cargado desde la pestaña."""
+
+    def test_defaults_without_tab(self):
+        """Verifica que sin pestaña se usen las sucursales por default."""
+        directory = get_branch_directory()
+        assert [b["id"] for b in directory.branches] == ["ojo-agua", "tecamac", "ecatepec"]
+        assert format_all_branches() is directory.all_text
+
+    def test_loaded_from_tab(self):
+        """Verifica la carga desde Sheets y la versión sin cambios."""
+        with patch.object(settings, "branches_sheet_name", "sucursales"), \
+                patch("src.tools.sheets.branches.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = SHEET_ROWS
+            mock.return_value = client
+
+            directory = get_branch_directory()
+            branch = directory.by_id["centro"]
+            assert branch["services"] == ["pickup", "grooming"]
+            assert branch["lat"] == 19.70
+            assert directory.status("centro", MONDAY.replace(hour=15))["next_opening"] == "Lunes 16:00"
+
+            assert branches.refresh_branches() is directory
+
+    def test_find_in_text(self):
+        """Verifica la sucursal mencionada en una pregunta."""
+        directory = get_branch_directory()
+        assert directory.find_in_text("¿a qué hora cierra Ecatepec?")["id"] == "ecatepec"
+        assert directory.find_in_text("¿está abierto en Ojo de Agua?")["id"] == "ojo-agua"
+
+    def test_hours_tool(self):
+        """Verifica la tool de horarios para una sucursal."""
+        result = get_branch_hours.invoke({"branch": "ecatepec"})
+        assert len(result) == 1
+        assert result[0]["id"] == "ecatepec"
+        assert isinstance(result[0]["open_now"], bool)
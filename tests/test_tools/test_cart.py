@@ -0,0 +1,155 @@
+"""Tests para las tools del carrito sobre el estado del agente."""
+
+from itertools import count
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.graph import create_ruffo_agent
+from src.agent.runner import ask_agent
+from src.schemas.order import OrderInProgress
+from src.schemas.product import ProductInCart
+from src.tools.cart import merge_order
+from src.tools.popularity import get_popularity_tracker
+from src.tools.render import product_handle
+from tests.test_tools.test_catalog import CATALOG_ROWS
+
+_ids = count()
+
+
+@pytest.fixture
+def mock_client():
+    with patch("src.tools.sheets.products.get_client") as mock:
+        client = MagicMock()
+        client.get_all_as_dicts.return_value = CATALOG_ROWS
+        mock.return_value = client
+        yield client
+
+
+def call(name: str, **args) -> dict:
+    return {"name": name, "args": args, "id": f"call_{next(_ids)}", "type": "tool_call"}
+
+
+class ScriptedModel(BaseChatModel):
+    """Modelo falso: pide las tools de cada paso del guion y luego responde "listo"."""
+
+    script: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if isinstance(messages[-1], ToolMessage) or not self.script:
+            message = AIMessage(content="listo")
+        else:
+            message = AIMessage(content="", tool_calls=self.script.pop(0))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def item(product_id: str, quantity: int = 1, price: float = 100.0) -> ProductInCart:
+    return ProductInCart(product_id=product_id, product_name=product_id, quantity=quantity, unit_price=price)
+
+
+class TestOrderIndex:
+    """Tests para el índice por product_id del pedido."""
+
+    def test_lookup_add_remove_set(self):
+        """Verifica que el índice siga a las altas, bajas y cambios de cantidad."""
+        order = OrderInProgress()
+        order.add_item(item("A"))
+        order.add_item(item("B", 2))
+        order.add_item(item("A", 3))
+
+        assert order.get_item("A").quantity == 4
+        assert order.set_quantity("B", 5) and order.item_count == 9
+        assert order.remove_item("A") and order.get_item("A") is None
+        assert not order.set_quantity("A", 1)
+        assert order.set_quantity("B", 0) and order.items == []
+
+    def test_index_rebuilt_after_replace_and_copy(self):
+        """Verifica el índice al reemplazar items, copiar o deserializar el pedido."""
+        order = OrderInProgress(items=[item("A")])
+        assert order.get_item("A") is not None
+
+        order.items = [item("B")]
+        assert order.get_item("A") is None and order.get_item("B") is not None
+
+        copy = order.model_copy(deep=True)
+        copy.set_quantity("B", 7)
+        assert order.get_item("B").quantity == 1
+        assert OrderInProgress.model_validate(copy.model_dump()).get_item("B").quantity == 7
+
+
+class TestMergeOrder:
+    """Tests para el reducer del carrito."""
+
+    def test_ops_compose_without_touching_current(self):
+        """Verifica que las operaciones se apliquen sobre una copia, una tras otra."""
+        current = OrderInProgress(items=[item("A")])
+        add = {"op": "add", "product_id": "A", "product_name": "A", "unit_price": 100.0, "quantity": 2}
+
+        merged = merge_order(merge_order(current, [add]), [add])
+
+        assert merged.get_item("A").quantity == 5
+        assert current.get_item("A").quantity == 1
+
+    def test_full_order_replaces(self):
+        """Verifica que un pedido completo reemplace al actual."""
+        new = OrderInProgress()
+        assert merge_order(OrderInProgress(items=[item("A")]), new) is new
+
+
+class TestCartTools:
+    """Tests para las tools del carrito dentro del agente."""
+
+    async def test_cart_lives_in_thread_state(self, mock_client):
+        """Verifica altas en paralelo, cambio de cantidad y consulta sin que el modelo cargue el carrito."""
+        model = ScriptedModel(script=[
+            [
+                call("add_to_cart", product_id=product_handle("PP-20")),
+                call("add_to_cart", product_id="PP-3", quantity=2),
+                call("add_to_cart", product_id="PP-20"),
+            ],
+            [call("set_quantity", product_id=product_handle("PP-3"), quantity=1)],
+            [call("view_cart"), call("remove_from_cart", product_id="NO-EXISTE")],
+        ])
+        agent = create_ruffo_agent(llm=model)
+        config = {"configurable": {"thread_id": "web-1"}}
+
+        await ask_agent(agent, "llevo dos pro plan grandes y dos chicos", "web-1")
+        order = (await agent.aget_state(config)).values["order"]
+        assert [(i.product_id, i.quantity) for i in order.items] == [("PP-20", 2), ("PP-3", 2)]
+
+        await ask_agent(agent, "mejor solo un chico", "web-1")
+        await ask_agent(agent, "¿qué llevo?", "web-1")
+
+        values = (await agent.aget_state(config)).values
+        assert values["order"].subtotal == 2 * 1800.0 + 420.0
+        outputs = [m.content for m in values["messages"] if isinstance(m, ToolMessage)]
+        assert outputs[0].startswith(f"+1 PRO PLAN ADULTO RAZA MEDIANA 20 KG (ref {product_handle('PP-20')})")
+        assert outputs[3].endswith("x1 | carrito: 3 pzas, $4020.00")
+        assert "1x PRO PLAN ADULTO RAZA MEDIANA 3kg" in outputs[4] and "subtotal $4020.00" in outputs[4]
+        assert outputs[5].startswith("No está en el carrito: NO-EXISTE")
+        # Las tools no reciben el carrito como argumento
+        assert all("cart_items" not in m.tool_calls[0]["args"] for m in values["messages"]
+                   if isinstance(m, AIMessage) and m.tool_calls)
+
+    async def test_add_feeds_popularity(self, mock_client):
+        """Verifica que agregar registre el agregado y lo mostrado en la última búsqueda."""
+        model = ScriptedModel(script=[
+            [call("search_products", query="pro plan")],
+            [call("add_to_cart", product_id=product_handle("PP-3"))],
+        ])
+        agent = create_ruffo_agent(llm=model)
+
+        await ask_agent(agent, "pro plan", "web-1")
+        await ask_agent(agent, "el chico", "web-1")
+
+        assert get_popularity_tracker().pending == {"PP-20": [0, 1], "PP-3": [1, 1]}
@@ -0,0 +1,293 @@
+"""Tests para el snapshot del catálogo y sus índices numéricos."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.tools.sheets.catalog import CatalogSnapshot, parse_size_kg
+
+CATALOG_ROWS = [
+    {
+        "Clave": "PP-20",
+        "Descripcion": "PRO PLAN ADULTO RAZA MEDIANA 20 KG",
+        "Marca": "Pro Plan",
+        "Familia": "Alimento",
+        "linea": "Perro",
+        "Precio Publico": "$1,800.00",
+    },
+    {
+        "Clave": "PP-3",
+        "Descripcion": "PRO PLAN ADULTO RAZA MEDIANA 3kg",
+        "Marca": "Pro Plan",
+        "Familia": "Alimento",
+        "linea": "Perro",
+        "Precio Publico": "420",
+    },
+    {
+        "Clave": "DC-1.5",
+        "Descripcion": "DOG CHOW CROQUETAS ADULTO 1.5kg",
+        "Marca": "Dog Chow",
+        "Familia": "Alimento",
+        "linea": "Perro",
+        "Precio Publico": "150",
+    },
+    {
+        "Clave": "WH-85",
+        "Descripcion": "WHISKAS SOBRE POLLO 85 g",
+        "Marca": "Whiskas",
+        "Familia": "Alimento",
+        "linea": "Gato",
+        "Precio Publico": "18",
+    },
+    {
+        "Clave": "KONG-M",
+        "Descripcion": "KONG CLASSIC MEDIANO",
+        "Marca": "Kong",
+        "Familia": "Juguetes",
+        "linea": "Perro",
+        "Precio Publico": "320",
+    },
+]
+
+
+class TestParseSize:
+    """Tests para parse_size_kg."""
+
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("PRO PLAN 20 KG", 20.0),
+            ("DOG CHOW 1.5kg", 1.5),
+            ("WHISKAS 85 g", 0.085),
+            ("SOBRE 3 x 85g", 0.255),
+            ("DIAMOND 6,8 kg", 6.8),
+            ("KONG CLASSIC MEDIANO", None),
+            ("ARENA 5 GATOS", None),
+        ],
+    )
+    def test_parses_sizes(self, text, expected):
+        """Verifica el parseo de tamaños a kg."""
+        assert parse_size_kg(text) == expected
+
+
+class TestCatalogSnapshot:
+    """Tests para CatalogSnapshot."""
+
+    def test_builds_numeric_columns(self):
+        """Verifica columnas de precio, tamaño y precio por kg."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        slot = catalog.find("PP-20")
+
+        assert catalog.price[slot] == 1800.0
+        assert catalog.size_kg[slot] == 20.0
+        assert catalog.product(slot)["price_per_kg"] == 90.0
+        assert len(catalog.indexes["size_kg"]) == 4
+
+    def test_filter_by_price_range(self):
+        """Verifica el filtro por rango de precio."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        slots = catalog.filter_slots(max_price=500)
+
+        assert {catalog.products[s]["id"] for s in slots} == {"PP-3", "DC-1.5", "WH-85", "KONG-M"}
+
+    def test_filter_combines_price_and_size(self):
+        """Verifica que los filtros se intersecten."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        slots = catalog.filter_slots(max_price=500, min_size_kg=1)
+
+        assert {catalog.products[s]["id"] for s in slots} == {"PP-3", "DC-1.5"}
+
+    def test_no_filters_returns_none(self):
+        """Verifica que sin filtros no se restrinja nada."""
+        assert CatalogSnapshot(CATALOG_ROWS).filter_slots() is None
+
+    def test_sort_unknown_sizes_last(self):
+        """Verifica que los productos sin tamaño queden al final."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        ordered = catalog.sort_slots(list(range(len(catalog))), "size_desc")
+
+        assert [catalog.products[s]["id"] for s in ordered] == [
+            "PP-20", "PP-3", "DC-1.5", "WH-85", "KONG-M"
+        ]
+
+    def test_sort_unpriced_last(self):
+        """Verifica que "más barato" no ponga primero las filas sin precio."""
+        rows = CATALOG_ROWS + [{
+            "Clave": "SIN-PRECIO",
+            "Descripcion": "DOG CHOW CACHORRO 2 KG",
+            "Marca": "Dog Chow",
+            "Familia": "Alimento",
+            "linea": "Perro",
+            "Precio Publico": "",
+        }]
+        catalog = CatalogSnapshot(rows)
+        ordered = catalog.sort_slots(list(range(len(catalog))), "price_asc")
+
+        assert [catalog.products[s]["id"] for s in ordered] == [
+            "WH-85", "DC-1.5", "KONG-M", "PP-3", "PP-20", "SIN-PRECIO"
+        ]
+
+
+class TestSearchWithNumericFilters:
+    """Tests para search_products con filtros numéricos."""
+
+    @pytest.fixture
+    def mock_client(self):
+        """Mock del cliente de Sheets."""
+        with patch("src.tools.sheets.products.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = CATALOG_ROWS
+            mock.return_value = client
+            yield client
+
+    def test_largest_bag_first(self, mock_client):
+        """Verifica 'la bolsa más grande'."""
+        from src.tools.sheets.products import search_products
+
+        results = search_products.invoke({"query": "adulto", "sort_by": "size_desc"})
+
+        assert results[0]["id"] == "PP-20"
+
+    def test_max_price_filter(self, mock_client):
+        """Verifica 'croquetas de menos de $500'."""
+        from src.tools.sheets.products import search_products
+
+        results = search_products.invoke({"query": "pro plan", "max_price": 500})
+
+        assert [r["id"] for r in results] == ["PP-3"]
+
+    def test_cheapest_per_kg(self, mock_client):
+        """Verifica el orden por precio por kg."""
+        from src.tools.sheets.products import search_products
+
+        results = search_products.invoke({"query": "adulto", "sort_by": "price_per_kg_asc"})
+
+        assert [r["id"] for r in results] == ["PP-20", "DC-1.5", "PP-3"]
+
+    def test_snapshot_loaded_once(self, mock_client):
+        """Verifica que la hoja se lea una sola vez por snapshot."""
+        from src.tools.sheets.products import search_products
+
+        search_products.invoke({"query": "pro plan"})
+        search_products.invoke({"query": "kong"})
+
+        assert mock_client.get_all_as_dicts.call_count == 1
+
+
+class TestIncrementalRefresh:
+    """Tests para el mantenimiento incremental de índices."""
+
+    def _ids(self, catalog, slots):
+        return sorted(catalog.products[s]["id"] for s in slots)
+
+    def _updated_rows(self):
+        rows = [dict(row) for row in CATALOG_ROWS if row["Clave"] != "KONG-M"]
+        rows[1]["Precio Publico"] = "399"  # PP-3 cambia de precio
+        rows.append({
+            "Clave": "CAT-10",
+            "Descripcion": "CAT CHOW ADULTO 10 KG",
+            "Marca": "Cat Chow",
+            "Familia": "Alimento",
+            "linea": "Gato",
+            "Precio Publico": "890",
+        })
+        return rows
+
+    def test_diff_by_clave(self):
+        """Verifica altas, bajas y cambios por Clave."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        diff = catalog.diff(self._updated_rows())
+
+        assert list(diff.added) == ["CAT-10"]
+        assert list(diff.removed) == ["KONG-M"]
+        assert list(diff.changed) == ["PP-3"]
+
+    def test_previous_version_is_untouched(self):
+        """Verifica que los lectores del snapshot anterior no vean el cambio."""
+        old = CatalogSnapshot(CATALOG_ROWS)
+        new = old.apply_diff(old.diff(self._updated_rows()))
+
+        assert old.find("KONG-M") is not None
+        assert old.find("CAT-10") is None
+        assert old.price[old.find("PP-3")] == 420.0
+        assert new.find("KONG-M") is None
+        assert new.price[new.find("PP-3")] == 399.0
+        assert new.version == old.version + 1
+
+    def test_incremental_matches_full_rebuild(self):
+        """Verifica que el resultado incremental sea igual a reconstruir."""
+        from src.tools.sheets.products import classify_pets, rank_products
+
+        rows = self._updated_rows()
+        old = CatalogSnapshot(CATALOG_ROWS, classifier=classify_pets)
+        incremental = old.apply_diff(old.diff(rows))
+        rebuilt = CatalogSnapshot(rows, classifier=classify_pets)
+
+        for query, pet in [("adulto", None), ("adulto", "gato"), ("kong", None), ("alimento", "perro")]:
+            got = [(s, incremental.products[slot]["id"]) for s, slot in rank_products(incremental, query, pet)]
+            expected = [(s, rebuilt.products[slot]["id"]) for s, slot in rank_products(rebuilt, query, pet)]
+            assert sorted(got) == sorted(expected)
+
+        assert self._ids(incremental, incremental.filter_slots(max_price=400)) == \
+            self._ids(rebuilt, rebuilt.filter_slots(max_price=400))
+        assert len(incremental) == len(rebuilt)
+
+    def test_removed_slot_is_reused(self):
+        """Verifica que los slots liberados se reutilicen."""
+        old = CatalogSnapshot(CATALOG_ROWS)
+        new = old.apply_diff(old.diff(self._updated_rows()))
+
+        assert len(new.products) == len(old.products)
+        assert new.find("CAT-10") == old.find("KONG-M")
+
+    def test_upsell_pools_updated_only_when_touched(self):
+        """Verifica que solo se recalculen los pools afectados."""
+        from src.tools.sheets.products import classify_pets
+
+        old = CatalogSnapshot(CATALOG_ROWS, classifier=classify_pets)
+        pools = old.get_derived("upsell_pools")
+        assert [old.products[s]["id"] for s in pools["juguetes"]] == ["KONG-M"]
+
+        new = old.apply_diff(old.diff(self._updated_rows()))
+        new_pools = new.derived["upsell_pools"]
+
+        assert new_pools["juguetes"] == []
+        assert new_pools["cama"] is pools["cama"]
+
+
+class TestRefreshCatalog:
+    """Tests para el refresco del snapshot global."""
+
+    def test_refresh_swaps_snapshot(self):
+        """Verifica que el refresco publique una versión nueva con el diff."""
+        from src.tools.sheets import products
+
+        with patch("src.tools.sheets.products.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = CATALOG_ROWS
+            mock.return_value = client
+
+            first = products.get_catalog()
+            client.get_all_as_dicts.return_value = CATALOG_ROWS[:-1]
+            second = products.get_catalog(force_refresh=True)
+
+        assert second.version == first.version + 1
+        assert second.find("KONG-M") is None
+        assert first.find("KONG-M") is not None
+        assert products.get_catalog() is second
+
+    def test_empty_reload_keeps_previous(self):
+        """Verifica que una recarga vacía no borre el catálogo."""
+        from src.tools.sheets import products
+
+        with patch("src.tools.sheets.products.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = CATALOG_ROWS
+            mock.return_value = client
+
+            first = products.get_catalog()
+            client.get_all_as_dicts.return_value = []
+            second = products.get_catalog(force_refresh=True)
+
+        assert second is first
+        assert len(second) == len(CATALOG_ROWS)
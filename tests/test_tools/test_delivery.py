@@ -0,0 +1,72 @@
+"""Tests para validación de direcciones y zonas de envío."""
+
+import pytest
+
+from src.schemas.order import DeliveryType, OrderInProgress
+from src.schemas.product import ProductInCart
+from src.tools.delivery import validate_address
+
+
+class TestValidateAddress:
+    """Tests para validate_address."""
+
+    def test_valid_address_with_cp(self):
+        """Verifica CP, colonia, zona y dirección normalizada."""
+        result = validate_address("Av. Ojo de Agua 123, CP 55770")
+        assert result["valid"] is True
+        assert result["zone"] == "A"
+        assert result["fee"] == 50.0
+        assert result["normalized"] == "Av. Ojo de Agua 123, Col. Ojo de Agua, Tecámac, C.P. 55770"
+
+    def test_colonia_without_cp_gets_cp(self):
+        """Verifica que la colonia complete el CP y la zona."""
+        result = validate_address("calle Pino 12, Ciudad Azteca, Ecatepec")
+        assert result["valid"] is True
+        assert result["cp"] == "55070"
+        assert result["zone"] == "B"
+
+    @pytest.mark.parametrize("text,missing", [
+        ("Ciudad Azteca", ["calle y número"]),
+        ("Calle Pino 12, Ecatepec", ["colonia o CP"]),
+        ("por ahí", ["calle y número", "colonia o CP"]),
+    ])
+    def test_incomplete_address(self, text, missing):
+        """Verifica que se indique lo que falta."""
+        result = validate_address(text)
+        assert result["valid"] is False
+        assert result["missing"] == missing
+
+    def test_unknown_cp_is_out_of_area(self):
+        """Verifica que un CP fuera del índice se marque fuera de zona."""
+        result = validate_address("Insurgentes Sur 1000, CP 03100")
+        assert result["out_of_area"] is True
+        assert result["valid"] is False
+
+    def test_far_coordinates_are_out_of_area(self):
+        """Verifica coordenadas lejos de las colonias conocidas."""
+        assert validate_address("20.6736, -103.344")["out_of_area"] is True
+        assert validate_address("19.6799, -99.0168")["colonia"] == "Ojo de Agua"
+
+
+class TestShippingCost:
+    """Tests para el costo de envío por zona."""
+
+    def _order(self, unit_price: float) -> OrderInProgress:
+        order = OrderInProgress(delivery_type=DeliveryType.DELIVERY)
+        order.add_item(ProductInCart(product_id="1", product_name="X", quantity=1, unit_price=unit_price))
+        return order
+
+    def test_default_without_zone(self):
+        """Verifica el envío por default antes de conocer la zona."""
+        assert self._order(300).shipping_cost == 50.0
+        assert self._order(500).shipping_cost == 0.0
+
+    def test_zone_fee_and_threshold(self):
+        """Verifica costo y umbral de envío gratis de la zona."""
+        order = self._order(600)
+        zone = validate_address("Calle Pino 12, Ciudad Azteca")
+        order.delivery_fee, order.free_shipping_over = zone["fee"], zone["free_over"]
+        assert order.shipping_cost == 70.0
+
+        order.items[0].quantity = 2
+        assert order.shipping_cost == 0.0
@@ -0,0 +1,90 @@
+"""Tests para el gazetteer, la distancia haversine y la sucursal más cercana."""
+
+import random
+
+import pytest
+
+from src.tools.geo import Gazetteer, GridIndex, haversine_km
+from src.tools.sheets.branches import find_nearest_branch, rank_branches
+
+
+class TestHaversine:
+    """Tests para haversine_km."""
+
+    def test_known_distance(self):
+        """Verifica un grado de latitud ≈ 111 km."""
+        assert haversine_km(19.0, -99.0, 20.0, -99.0) == pytest.approx(111.2, abs=0.1)
+
+    def test_same_point(self):
+        """Verifica distancia cero."""
+        assert haversine_km(19.68, -99.01, 19.68, -99.01) == 0.0
+
+
+class TestGridIndex:
+    """Tests para el índice de rejilla."""
+
+    def test_matches_brute_force(self):
+        """Verifica que los k más cercanos coincidan con la búsqueda exhaustiva."""
+        rng = random.Random(7)
+        points = [(19.5 + rng.random() * 0.4, -99.2 + rng.random() * 0.4, i) for i in range(200)]
+        index = GridIndex(points, cell_deg=0.03)
+
+        for _ in range(20):
+            lat, lng = 19.5 + rng.random() * 0.4, -99.2 + rng.random() * 0.4
+            expected = sorted(points, key=lambda p: haversine_km(lat, lng, p[0], p[1]))[:5]
+            assert [item for _, item in index.nearest(lat, lng, k=5)] == [p[2] for p in expected]
+
+    def test_far_query_still_finds_points(self):
+        """Verifica que una consulta lejos de todas las celdas encuentre algo."""
+        index = GridIndex([(19.68, -99.01, "a")])
+        assert index.nearest(25.0, -105.0)[0][1] == "a"
+
+
+class TestGazetteer:
+    """Tests para la resolución de ubicaciones."""
+
+    def setup_method(self):
+        self.gazetteer = Gazetteer()
+
+    @pytest.mark.parametrize("text,match,label", [
+        ("vivo en ojo de agua", "colonia", "Ojo de Agua"),
+        ("mi cp es 55070", "cp", "Ciudad Azteca"),
+        ("Héroes Tecámac, sección flores", "colonia", "Héroes Tecámac"),
+        ("estoy por ecatepec", "municipio", "Ecatepec"),
+        ("19.6, -99.05", "coords", "19.6000, -99.0500"),
+    ])
+    def test_resolves(self, text, match, label):
+        """Verifica coordenadas, CP, colonia y municipio."""
+        location = self.gazetteer.resolve(text)
+        assert location["match"] == match
+        assert location["label"] == label
+
+    def test_longest_colonia_wins(self):
+        """Verifica que 'Ciudad Azteca Tercera Sección' gane sobre 'Ciudad Azteca'."""
+        assert self.gazetteer.resolve("ciudad azteca tercera seccion")["cp"] == "55140"
+
+    def test_unknown_location(self):
+        """Verifica que un lugar fuera de la zona no se resuelva."""
+        assert self.gazetteer.resolve("Guadalajara") is None
+
+
+class TestNearestBranch:
+    """Tests para find_nearest_branch / rank_branches."""
+
+    def test_ranked_by_distance(self):
+        """Verifica el orden de sucursales desde Ciudad Azteca."""
+        resolved, ranked = rank_branches("Ciudad Azteca")
+        assert resolved["label"] == "Ciudad Azteca"
+        assert [b["id"] for b in ranked] == ["ecatepec", "ojo-agua", "tecamac"]
+        assert ranked[0]["distance_km"] < ranked[1]["distance_km"]
+
+    def test_tool_returns_nearest(self):
+        """Verifica la tool con un código postal."""
+        branch = find_nearest_branch.invoke({"location": "CP 55740"})
+        assert branch["id"] == "tecamac"
+        assert branch["resolved_location"] == "Tecámac Centro"
+
+    def test_unresolved_falls_back_to_name(self):
+        """Verifica el fallback por nombre de sucursal."""
+        assert rank_branches("no sé") == (None, [])
+        assert find_nearest_branch.invoke({"location": "la de ecatepec"})["id"] == "ecatepec"
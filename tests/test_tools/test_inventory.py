@@ -0,0 +1,154 @@
+"""Tests para el inventario por sucursal."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config.settings import settings
+from src.tools.sheets import inventory
+from src.tools.sheets.branches import BRANCHES
+from src.tools.sheets.catalog import CatalogSnapshot
+from src.tools.sheets.inventory import InventorySnapshot, parse_inventory_rows
+from src.tools.sheets.products import get_product_by_id, search_products
+from tests.test_tools.test_catalog import CATALOG_ROWS
+
+BRANCH_IDS = [branch["id"] for branch in BRANCHES]
+
+INVENTORY_CSV = (
+    "Clave,Ojo de Agua,Tecámac,Ecatepec\n"
+    "PP-20,2,0,1\n"
+    "PP-3,0,5,0\n"
+    "DC-1.5,3,3,3\n"
+)
+
+
+@pytest.fixture
+def inventory_file(tmp_path):
+    path = tmp_path / "inventario.csv"
+    path.write_text(INVENTORY_CSV, encoding="utf-8")
+    with patch.object(settings, "inventory_file_path", str(path)):
+        yield path
+
+
+@pytest.fixture
+def mock_client():
+    with patch("src.tools.sheets.products.get_client") as mock:
+        client = MagicMock()
+        client.get_all_as_dicts.return_value = CATALOG_ROWS
+        mock.return_value = client
+        yield client
+
+
+class TestParseInventory:
+    """Tests para los formatos de la pestaña de inventario."""
+
+    def test_wide_format_matches_branch_names(self):
+        """Verifica que los encabezados se asocien a la sucursal."""
+        stock = parse_inventory_rows(
+            [{"Clave": "A", "Ojo de Agua": "4", "tecamac": "", "Ecatepec": "-2"}], BRANCHES
+        )
+        assert stock == {"A": {"ojo-agua": 4, "tecamac": 0, "ecatepec": 0}}
+
+    def test_long_format_sums_repeated_rows(self):
+        """Verifica el formato una-fila-por-sucursal."""
+        rows = [
+            {"Clave": "A", "Sucursal": "Tecámac Centro", "Existencia": "2"},
+            {"Clave": "A", "Sucursal": "tecamac", "Existencia": "3"},
+            {"Clave": "A", "Sucursal": "Desconocida", "Existencia": "9"},
+        ]
+        assert parse_inventory_rows(rows, BRANCHES) == {"A": {"tecamac": 5}}
+
+
+class TestInventorySnapshot:
+    """Tests para la matriz producto × sucursal."""
+
+    def setup_method(self):
+        self.stock = InventorySnapshot(
+            {"PP-20": {"ojo-agua": 2, "ecatepec": 1}, "PP-3": {"tecamac": 5}}, BRANCH_IDS
+        )
+
+    def test_stock_of_unknown_product_is_zero(self):
+        """Verifica que un producto fuera del inventario no tenga existencia."""
+        assert self.stock.stock_of("X") == {"ojo-agua": 0, "tecamac": 0, "ecatepec": 0}
+        assert self.stock.total("PP-20") == 3
+
+    def test_branches_for_whole_cart(self):
+        """Verifica qué sucursales surten todo el pedido."""
+        assert self.stock.branches_for([("PP-20", 1)]) == ["ojo-agua", "ecatepec"]
+        assert self.stock.branches_for([("PP-20", 2)]) == ["ojo-agua"]
+        assert self.stock.branches_for([("PP-20", 1), ("PP-3", 1)]) == []
+        assert self.stock.missing_at("tecamac", [("PP-20", 1), ("PP-3", 1)]) == ["PP-20"]
+
+    def test_available_slots_aligned_to_catalog(self):
+        """Verifica la columna de la sucursal alineada a los slots del catálogo."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+
+        slots = self.stock.available_slots(catalog, "tecamac")
+        assert {catalog.products[s]["id"] for s in slots} == {"PP-3"}
+        assert self.stock.available_slots(catalog, "tecamac") is slots
+        assert self.stock.available_slots(catalog, "no-existe") == set()
+
+
+class TestInventoryRefresh:
+    """Tests para la carga y el refresco del inventario."""
+
+    def test_not_configured_returns_none(self):
+        """Verifica que sin fuente el stock quede como desconocido."""
+        assert inventory.get_inventory() is None
+
+    def test_unchanged_reload_keeps_version(self, inventory_file):
+        """Verifica que una recarga sin cambios no publique versión nueva."""
+        first = inventory.get_inventory()
+        assert inventory.refresh_inventory() is first
+
+        inventory_file.write_text(INVENTORY_CSV.replace("PP-3,0,5,0", "PP-3,1,5,0"), encoding="utf-8")
+        second = inventory.refresh_inventory()
+        assert second.version == first.version + 1
+        assert second.stock_of("PP-3")["ojo-agua"] == 1
+        assert first.stock_of("PP-3")["ojo-agua"] == 0
+
+    def test_empty_or_failed_first_load_is_remembered(self, mock_client):
+        """Verifica que una fuente vacía o caída no se relea en cada búsqueda."""
+        with patch.object(settings, "inventory_sheet_name", "inventario"), \
+                patch.object(inventory._loader, "load_rows", return_value=[]) as load:
+            for _ in range(3):
+                search_products.invoke({"query": "pro plan"})
+                assert inventory.get_inventory() is None
+            assert load.call_count == 1
+
+            inventory._loader.reset()
+            load.side_effect = RuntimeError("sheets caído")
+            assert inventory.get_inventory() is None
+            assert inventory.get_inventory() is None
+            assert load.call_count == 2
+
+            # Pasado max_age se vuelve a intentar
+            with patch("src.tools.sheets.snapshot.time.monotonic", return_value=10**9):
+                load.side_effect = None
+                load.return_value = []
+                assert inventory.get_inventory() is None
+            assert load.call_count == 3
+
+
+class TestSearchWithInventory:
+    """Tests para búsqueda con existencias por sucursal."""
+
+    def test_results_are_annotated(self, mock_client, inventory_file):
+        """Verifica que los productos traigan existencia total y por sucursal."""
+        product = get_product_by_id.invoke({"product_id": "PP-20"})
+        assert product["stock"] == 3
+        assert product["stock_by_branch"] == {"ojo-agua": 2, "tecamac": 0, "ecatepec": 1}
+
+    def test_filter_by_pickup_branch(self, mock_client, inventory_file):
+        """Verifica que branch_id deje solo lo que hay en esa sucursal."""
+        results = search_products.invoke({"query": "pro plan", "branch_id": "tecamac"})
+        assert [p["id"] for p in results] == ["PP-3"]
+
+        results = search_products.invoke({"query": "pro plan", "branch_id": "ojo-agua"})
+        assert [p["id"] for p in results] == ["PP-20"]
+
+    def test_without_inventory_stock_is_unknown(self, mock_client):
+        """Verifica que sin inventario no se filtre ni se invente existencia."""
+        results = search_products.invoke({"query": "pro plan", "branch_id": "tecamac"})
+        assert {p["id"] for p in results} == {"PP-20", "PP-3"}
+        assert results[0]["stock"] is None
@@ -0,0 +1,92 @@
+"""Tests para la memoización de tools por thread."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import ToolMessage
+
+from src.agent.graph import create_ruffo_agent
+from src.agent.metrics import get_metrics, reset_metrics
+from src.agent.runner import ask_agent
+from src.config.settings import settings
+from src.tools.agent_tools import RUFFO_TOOLS
+from src.tools.memo import get_tool_memo
+from src.tools.sheets import products
+from tests.test_tools.test_cart import ScriptedModel, call
+from tests.test_tools.test_catalog import CATALOG_ROWS
+
+AGENT_TOOLS = {t.name: t for t in RUFFO_TOOLS}
+
+
+@pytest.fixture
+def mock_client():
+    with patch("src.tools.sheets.products.get_client") as mock:
+        client = MagicMock()
+        client.get_all_as_dicts.return_value = CATALOG_ROWS
+        mock.return_value = client
+        yield client
+
+
+@pytest.fixture
+def searches():
+    with patch.object(products, "run_product_search", wraps=products.run_product_search) as spy:
+        yield spy
+
+
+async def tool_outputs(agent, thread_id: str) -> list[str]:
+    state = await agent.aget_state({"configurable": {"thread_id": thread_id}})
+    return [m.content for m in state.values["messages"] if isinstance(m, ToolMessage)]
+
+
+class TestToolMemo:
+    """Tests para repetir tools dentro de una conversación."""
+
+    async def test_repeated_calls_in_thread(self, mock_client, searches):
+        """Verifica que la misma búsqueda y las sucursales no se vuelvan a correr en el thread."""
+        reset_metrics()
+        model = ScriptedModel(script=[
+            [call("search_products", query="pro plan"), call("get_all_branches")],
+            [call("search_products", query="pro plan")],
+            [call("get_all_branches"), call("search_products", query="dog chow")],
+        ])
+        agent = create_ruffo_agent(llm=model)
+
+        for text in ("pro plan y sucursales", "¿y el pro plan?", "sucursales y dog chow"):
+            await ask_agent(agent, text, "web-1")
+
+        outputs = await tool_outputs(agent, "web-1")
+        assert outputs[2] == outputs[0] and outputs[3] == outputs[1]
+        assert searches.call_count == 2
+        assert get_tool_memo().stats() == {"size": 3, "calls": 5, "duplicates": 2, "duplicate_rate": 0.4}
+        assert get_metrics()["counters"]["tools.memo_duplicates.search_products"] == 1
+
+    async def test_scoped_per_thread_and_catalog_version(self, mock_client, searches):
+        """Verifica que otro thread o un catálogo nuevo vuelvan a correr la tool."""
+        model = ScriptedModel(script=[[call("search_products", query="pro plan")] for _ in range(3)])
+        agent = create_ruffo_agent(llm=model)
+
+        await ask_agent(agent, "pro plan", "web-1")
+        await ask_agent(agent, "pro plan", "web-2")
+        mock_client.get_all_as_dicts.return_value = [
+            {**row, "Precio Publico": "1900"} if row["Clave"] == "PP-20" else row for row in CATALOG_ROWS
+        ]
+        products.refresh_catalog()
+        await ask_agent(agent, "pro plan", "web-1")
+
+        assert searches.call_count == 3
+        outputs = await tool_outputs(agent, "web-1")
+        assert "$1,900.00" in outputs[1] and "$1,900.00" not in outputs[0]
+
+    def test_outside_agent_and_disabled(self, mock_client, searches):
+        """Verifica que sin thread o con TOOL_MEMO_ENABLED=false la tool siempre corra."""
+        config = {"configurable": {"thread_id": "web-1"}}
+        tool = AGENT_TOOLS["search_products"]
+
+        tool.invoke({"query": "pro plan"})
+        tool.invoke({"query": "pro plan"})
+        with patch.object(settings, "tool_memo_enabled", False):
+            tool.invoke({"query": "pro plan"}, config)
+            tool.invoke({"query": "pro plan"}, config)
+
+        assert searches.call_count == 4
+        assert get_tool_memo().stats()["calls"] == 0
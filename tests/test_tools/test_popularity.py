@@ -0,0 +1,123 @@
+"""Tests para el ranking por popularidad."""
+
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.tools.popularity import PopularityTracker
+from src.tools.sheets.catalog import CatalogSnapshot
+
+ROWS = [
+    {"Clave": "A", "Descripcion": "CROQUETAS PERRO ADULTO 2 KG", "Marca": "Marca A", "Precio Publico": "200"},
+    {"Clave": "B", "Descripcion": "CROQUETAS PERRO ADULTO 2 KG", "Marca": "Marca B", "Precio Publico": "210"},
+]
+
+
+class TestPopularityTracker:
+    """Tests para PopularityTracker."""
+
+    def test_events_are_batched(self, tmp_path):
+        """Verifica que no se escriba a disco hasta completar el lote."""
+        path = tmp_path / "pop.json"
+        tracker = PopularityTracker(str(path), flush_every=3, flush_seconds=3600)
+
+        tracker.record_added("A")
+        assert not path.exists()
+
+        tracker.record_added("A")
+        tracker.record_added("B")
+        tracker.background.wait(timeout=5)
+        assert json.loads(path.read_text())["A"][0] == 2.0
+
+    def test_flush_runs_off_the_caller(self, tmp_path):
+        """Verifica que quien registra el evento no espere el volcado."""
+        tracker = PopularityTracker(str(tmp_path / "pop.json"), flush_every=1)
+        flushing = threading.Event()
+        release = threading.Event()
+
+        def slow_flush():
+            flushing.set()
+            release.wait(5)
+
+        with patch.object(tracker.background, "_flush", slow_flush):
+            tracker.record_shown(["A"])  # no se bloquea en el volcado
+            assert flushing.wait(5)
+            tracker.record_shown(["B"])  # ya hay un volcado en curso
+            release.set()
+            tracker.background.wait(timeout=5)
+
+    def test_scores_decay(self, tmp_path):
+        """Verifica el decaimiento con la vida media."""
+        tracker = PopularityTracker(str(tmp_path / "pop.json"), half_life_days=1)
+        tracker.scores = {"A": [4.0, 4.0, 1000.0]}
+
+        assert tracker.popularity("A", now=1000.0 + 86400) == pytest.approx(2.0)
+
+    def test_counters_survive_restart(self, tmp_path):
+        """Verifica que los contadores se recarguen del archivo."""
+        path = str(tmp_path / "pop.json")
+        tracker = PopularityTracker(path, flush_every=1)
+        tracker.record_added("B")
+        tracker.background.wait(timeout=5)
+
+        reloaded = PopularityTracker(path)
+        assert reloaded.popularity("B") == pytest.approx(1.0, rel=1e-3)
+
+    def test_bonus_array_is_cached(self, tmp_path):
+        """Verifica que el arreglo solo se recalcule tras un volcado."""
+        tracker = PopularityTracker(str(tmp_path / "pop.json"), flush_every=100, flush_seconds=3600)
+        catalog = CatalogSnapshot(ROWS)
+
+        first = tracker.bonus_array(catalog, max_bonus=10)
+        tracker.record_added("B")
+        assert tracker.bonus_array(catalog, max_bonus=10) is first
+
+        tracker.flush()
+        bonus = tracker.bonus_array(catalog, max_bonus=10)
+        assert bonus is not first
+        assert bonus[catalog.find("B")] == 10.0
+        assert bonus[catalog.find("A")] == 0.0
+
+
+class TestPopularityRanking:
+    """Tests para el desempate por popularidad en search_products."""
+
+    def test_popular_product_wins_tie(self):
+        """Verifica que el más agregado al carrito gane el empate."""
+        from src.tools.popularity import get_popularity_tracker
+        from src.tools.sheets.products import search_products
+
+        with patch("src.tools.sheets.products.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = ROWS
+            mock.return_value = client
+
+            before = search_products.invoke({"query": "croquetas"})
+            tracker = get_popularity_tracker()
+            tracker.record_added("B")
+            tracker.flush()
+            after = search_products.invoke({"query": "croquetas"})
+
+        assert [p["id"] for p in before] == ["A", "B"]
+        assert [p["id"] for p in after] == ["B", "A"]
+
+    def test_popularity_flush_keeps_search_cache(self):
+        """Verifica que un volcado de contadores reordene sin invalidar la búsqueda en caché."""
+        from src.tools.popularity import get_popularity_tracker
+        from src.tools.sheets import products
+
+        with patch("src.tools.sheets.products.get_client") as mock:
+            client = MagicMock()
+            client.get_all_as_dicts.return_value = ROWS
+            mock.return_value = client
+
+            products.search_products.invoke({"query": "croquetas"})
+            tracker = get_popularity_tracker()
+            tracker.record_added("B")
+            tracker.flush()
+            after = products.search_products.invoke({"query": "croquetas"})
+
+        assert [p["id"] for p in after] == ["B", "A"]
+        assert products._search_cache.hits == 1
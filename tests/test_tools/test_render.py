@@ -0,0 +1,139 @@
+"""Tests para la salida compacta de las tools de productos."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.history import HistoryBudget
+from src.agent.metrics import get_metrics, reset_metrics
+from src.config.settings import settings
+from src.tools.agent_tools import RUFFO_TOOLS
+from src.tools.render import approx_tokens, product_handle, render_products, resolve_handle
+from src.tools.sheets.catalog import CatalogSnapshot
+from src.tools.sheets.products import get_catalog, get_product_by_id, search_products
+from tests.test_tools.test_catalog import CATALOG_ROWS
+
+AGENT_TOOLS = {t.name: t for t in RUFFO_TOOLS}
+
+
+@pytest.fixture
+def mock_client():
+    with patch("src.tools.sheets.products.get_client") as mock:
+        client = MagicMock()
+        client.get_all_as_dicts.return_value = CATALOG_ROWS
+        mock.return_value = client
+        yield client
+
+
+def tool_call(name: str, args: dict) -> dict:
+    return {"name": name, "args": args, "id": "call_1", "type": "tool_call"}
+
+
+class TestProductHandles:
+    """Tests para las refs cortas de productos."""
+
+    def test_handle_is_short_and_stable(self):
+        """Verifica que la ref sea corta y siempre la misma para una Clave."""
+        assert product_handle("PP-20") == product_handle("PP-20")
+        assert product_handle("PP-20") != product_handle("PP-3")
+        assert len(product_handle("PP-20")) == 6
+
+    def test_resolve_handle_to_full_record(self, mock_client):
+        """Verifica que el servidor resuelva la ref al registro completo."""
+        ref = product_handle("PP-20")
+
+        product = get_product_by_id.invoke({"product_id": ref})
+
+        assert product["id"] == "PP-20"
+        assert product["barcode"] == ""
+
+    def test_handles_follow_catalog_refresh(self, mock_client):
+        """Verifica que las refs se actualicen al agregar o quitar productos."""
+        catalog = get_catalog()
+        assert resolve_handle(catalog, product_handle("DC-1.5")) is not None
+
+        rows = [r for r in CATALOG_ROWS if r["Clave"] != "DC-1.5"] + [
+            {"Clave": "NEW-1", "Descripcion": "CAMA PARA PERRO", "Marca": "X", "Precio Publico": "300"}
+        ]
+        refreshed, _ = catalog.refreshed(rows)
+
+        assert resolve_handle(refreshed, product_handle("DC-1.5")) is None
+        assert resolve_handle(refreshed, product_handle("NEW-1")) is not None
+
+
+class TestRenderProducts:
+    """Tests para la tabla compacta."""
+
+    def test_table_has_only_needed_fields(self):
+        """Verifica las columnas de la tabla y que no viajen campos internos."""
+        catalog = CatalogSnapshot(CATALOG_ROWS)
+        product = catalog.product(catalog.find("PP-20"))
+        product.update(stock=3, stock_by_branch={"ojo-agua": 2, "tecamac": 0, "ecatepec": 1}, barcode="7501234")
+
+        text, refs = render_products([product])
+
+        lines = text.split("\n")
+        assert lines[0].startswith("ref | producto | precio")
+        assert lines[1] == f"{refs[0]} | PRO PLAN ADULTO RAZA MEDIANA 20 KG | $1,800.00 | 20 | $90.00 | 3 (ojo-agua 2, ecatepec 1)"
+        assert "7501234" not in text
+
+    def test_empty_and_missing(self):
+        """Verifica los textos sin resultados."""
+        assert render_products([]) == ("Sin resultados.", [])
+        assert render_products(None) == ("Producto no encontrado.", [])
+
+    def test_agent_tool_message_is_compact(self, mock_client):
+        """Verifica que el ToolMessage del agente lleve la tabla y las refs como artifact."""
+        reset_metrics()
+        args = {"query": "pro plan"}
+
+        with patch.object(settings, "tool_tokens_sample_every", 1):
+            message = AGENT_TOOLS["search_products"].invoke(tool_call("search_products", args))
+        full = json.dumps(search_products.invoke(args), ensure_ascii=False)
+
+        assert isinstance(message, ToolMessage)
+        assert message.artifact["refs"] == [product_handle("PP-20"), product_handle("PP-3")]
+        assert approx_tokens(message.content) < approx_tokens(full) / 2
+        counters = get_metrics()["counters"]
+        assert counters["tools.tokens_sampled_compact"] == counters["tools.tokens_compact"]
+        assert counters["tools.tokens_sampled_compact"] < counters["tools.tokens_sampled_full"]
+
+    def test_full_size_is_sampled(self, mock_client):
+        """Verifica que el JSON completo solo se mida en una muestra de llamadas."""
+        reset_metrics()
+        tool = AGENT_TOOLS["search_products"]
+
+        with patch.object(settings, "tool_tokens_sample_every", 0):
+            tool.invoke(tool_call("search_products", {"query": "pro plan"}))
+
+        counters = get_metrics()["counters"]
+        assert counters["tools.tokens_compact"] > 0
+        assert "tools.tokens_sampled_full" not in counters
+
+
+class TestElideConsumedOutputs:
+    """Tests para la omisión de salidas de tools ya usadas."""
+
+    def test_previous_turn_outputs_become_notes(self):
+        """Verifica que solo se omitan las salidas de turnos anteriores, conservando refs."""
+        old = ToolMessage(content="ref | producto\nabc123 | PRO PLAN", tool_call_id="c1",
+                          name="search_products", artifact={"refs": ["abc123"]})
+        current = ToolMessage(content="ref | producto\nxyz789 | DOG CHOW", tool_call_id="c2", name="search_products")
+        messages = [
+            HumanMessage(content="pro plan"),
+            AIMessage(content="", tool_calls=[tool_call("search_products", {"query": "pro plan"})]),
+            old,
+            AIMessage(content="Tengo Pro Plan"),
+            HumanMessage(content="¿y dog chow?"),
+            AIMessage(content="", tool_calls=[{**tool_call("search_products", {"query": "dog chow"}), "id": "c2"}]),
+            current,
+        ]
+
+        view = HistoryBudget(max_tokens=0)({"messages": messages}, {})["llm_input_messages"]
+
+        assert view[2].content == "[salida de search_products ya usada; refs: abc123]"
+        assert view[2].tool_call_id == "c1"
+        assert view[-1] is current
+        assert messages[2].content == old.content  # el estado no cambia
@@ -0,0 +1,90 @@
+"""Tests para el log de búsquedas y el calentamiento de cachés."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.tools.popularity import QueryLog, get_query_log
+from src.tools.sheets import products
+from src.tools.sheets.products import search_products
+from src.tools.warmup import get_cache_warmer, get_warmup_status
+from tests.test_tools.test_catalog import CATALOG_ROWS
+
+
+@pytest.fixture
+def mock_client():
+    with patch("src.tools.sheets.products.get_client") as mock:
+        client = MagicMock()
+        client.get_all_as_dicts.return_value = CATALOG_ROWS
+        mock.return_value = client
+        yield client
+
+
+class TestQueryLog:
+    """Tests para QueryLog."""
+
+    def test_top_includes_pending(self, tmp_path):
+        """Verifica que el top cuente búsquedas aún no volcadas."""
+        log = QueryLog(str(tmp_path / "queries.json"), flush_every=100, flush_seconds=3600)
+        log.record({"query": "pro plan"})
+        log.record({"query": "whiskas"})
+        log.record({"query": "pro plan"})
+
+        assert log.top(1) == [{"query": "pro plan"}]
+
+    def test_log_survives_restart(self, tmp_path):
+        """Verifica que el log se recargue del archivo."""
+        path = str(tmp_path / "queries.json")
+        log = QueryLog(path, flush_every=1)
+        log.record({"query": "kong", "max_results": 5})
+        log.background.wait(timeout=5)
+
+        assert QueryLog(path).top(5) == [{"query": "kong", "max_results": 5}]
+
+    def test_flush_keeps_top_keys(self, tmp_path):
+        """Verifica que al volcar se conserven solo las búsquedas más frecuentes."""
+        path = str(tmp_path / "queries.json")
+        log = QueryLog(path, flush_every=100, flush_seconds=3600, max_keys=2)
+        for query in ["kong", "kong", "kong", "whiskas", "whiskas", "arena"]:
+            log.record({"query": query})
+        log.flush()
+
+        assert QueryLog(path).top(5) == [{"query": "kong"}, {"query": "whiskas"}]
+
+    def test_search_records_normalized_args(self, mock_client):
+        """Verifica que la misma búsqueda escrita distinto cuente igual."""
+        search_products.invoke({"query": "Pro  Plan"})
+        search_products.invoke({"query": "pro plan", "sort_by": "relevance"})
+
+        assert get_query_log().top(5) == [{"query": "pro plan", "max_results": 5}]
+
+
+class TestCacheWarmer:
+    """Tests para el calentamiento en segundo plano."""
+
+    def test_repeated_search_hits_cache(self, mock_client):
+        """Verifica que la segunda búsqueda igual salga de la caché."""
+        first = search_products.invoke({"query": "pro plan"})
+        second = search_products.invoke({"query": "PRO PLAN"})
+
+        assert first == second
+        assert products._search_cache.hits == 1
+
+    def test_warmup_replays_top_queries(self, mock_client):
+        """Verifica que al cargar el catálogo se repitan las búsquedas top."""
+        get_query_log().record({"query": "whiskas", "max_results": 5})
+        warmer = get_cache_warmer()
+
+        products.get_catalog()
+        warmer.wait(timeout=5)
+
+        status = get_warmup_status()
+        assert status["state"] == "done"
+        assert status["warm"] is True
+        assert status["completed"] == status["total"] == 2
+
+        # La búsqueda real ya está en caché y el warm-up no infla el log
+        search_products.invoke({"query": "whiskas"})
+        assert products._search_cache.hits == 1
+        assert get_query_log().top(5) == [{"query": "whiskas", "max_results": 5}]
+        assert sum(get_query_log().pending.values()) == 2